@@ -0,0 +1,21 @@
+"""Benchmarks de volume do fluxo de caixa.
+
+O pacote tem três partes:
+
+- `gerador`: cria uma base sintética determinística (árvore de
+  qualificadores, anos de lançamentos diários, contas, saldos, LOA e
+  cenários do simulador) num banco separado do `instance/fluxo.db`;
+- `bench_*.py`: suítes no estilo pytest-benchmark para relatórios,
+  simulação, backtest, importação e comparação de versões;
+- `comparar`: diff entre dois arquivos JSON de resultados.
+
+Uso (a partir de `src/`)::
+
+    python -m pytest benchmarks --bench-qualificadores 200 --bench-anos 5
+    python -m benchmarks.comparar benchmarks/resultados/a.json benchmarks/resultados/b.json
+
+Com pytest-benchmark instalado, a fixture `benchmark` é a do plugin e
+`--benchmark-json` grava os resultados; sem ele, a fixture de
+`conftest.py` mede com `time.perf_counter` e grava o mesmo formato em
+`benchmarks/resultados/`.
+"""
@@ -0,0 +1,101 @@
+"""Backend analítico (DuckDB, ANALITICO_DUCKDB) contra o SQL do repositório em volume.
+
+A base sintética é ampliada até ``--bench-linhas-analitico`` lançamentos
+(padrão: 10 milhões) num banco à parte em `.dados/`, repetindo as linhas de
+flc_lancamento. As mesmas chamadas de `LancamentoRepository` são medidas com
+uma sessão SQL nesse banco e com o DuckDB anexado a ele. Cada rodada do SQL
+leva segundos: são 3 rodadas por benchmark, sem aquecimento. Sem duckdb, os
+benchmarks são pulados (antes de ampliar a base).
+"""
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+_COLUNAS = (
+    'dat_lancamento, seq_qualificador, val_lancamento, cod_tipo_lancamento, '
+    'cod_origem_lancamento, dat_inclusao, cod_pessoa_inclusao, ind_status, seq_conta'
+)
+
+
+def _ampliar(origem: str, destino: str, linhas: int) -> None:
+    if os.path.exists(destino):
+        return
+    temporario = f'{destino}.tmp'
+    shutil.copyfile(origem, temporario)
+    conn = sqlite3.connect(temporario)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    total = conn.execute('SELECT count(*) FROM flc_lancamento').fetchone()[0]
+    while total < linhas:
+        conn.execute(
+            f'INSERT INTO flc_lancamento ({_COLUNAS}) SELECT {_COLUNAS} FROM flc_lancamento LIMIT ?',
+            (linhas - total,),
+        )
+        conn.commit()
+        total = conn.execute('SELECT count(*) FROM flc_lancamento').fetchone()[0]
+    conn.execute('ANALYZE')
+    conn.close()
+    os.replace(temporario, destino)
+
+
+@pytest.fixture(scope='module')
+def base_ampliada(base_sintetica, request):
+    pytest.importorskip('duckdb')
+    from sqlalchemy import create_engine
+
+    from fluxocaixa.models.base import engine
+
+    linhas = request.config.getoption('--bench-linhas-analitico')
+    origem = engine.url.database
+    raiz, _ = os.path.splitext(origem)
+    destino = f'{raiz}-analitico-{linhas}.db'
+    _ampliar(origem, destino, linhas)
+    yield create_engine(f'sqlite:///{destino}')
+
+
+@pytest.fixture(params=['sql', 'duckdb'])
+def repositorio(request, base_ampliada):
+    from sqlalchemy.orm import Session
+
+    from fluxocaixa.repositories import LancamentoRepository
+    from fluxocaixa.repositories import lancamento_analitico_repository as analitico
+
+    session = Session(bind=base_ampliada)
+    if request.param == 'duckdb':
+        analitico.iniciar(base_ampliada)
+    try:
+        yield LancamentoRepository(session)
+    finally:
+        analitico.encerrar()
+        session.close()
+
+
+def _medir(benchmark, funcao, *args):
+    return benchmark.pedantic(funcao, args=args, rounds=3, iterations=1)
+
+
+@pytest.mark.benchmark(group='analitico')
+def bench_grouped_by_qualificador_year_month(benchmark, base_sintetica, repositorio):
+    folhas = base_sintetica['folhas_receita'] + base_sintetica['folhas_despesa']
+    linhas = _medir(benchmark, repositorio.get_grouped_by_qualificador_year_month,
+                    folhas, base_sintetica['anos'], list(range(1, 13)))
+    assert len(linhas) >= len(folhas) * 12
+
+
+@pytest.mark.benchmark(group='analitico')
+def bench_comparative_by_origem(benchmark, base_sintetica, repositorio):
+    linhas = _medir(benchmark, repositorio.get_comparative_by_origem,
+                    1, base_sintetica['anos'], list(range(1, 13)))
+    assert linhas
+
+
+@pytest.mark.benchmark(group='analitico')
+def bench_historico_mensal(benchmark, base_sintetica, repositorio):
+    from datetime import date
+
+    anos = base_sintetica['anos']
+    linhas = _medir(benchmark, repositorio.get_monthly_totals_by_qualificador,
+                    base_sintetica['folhas_receita'], date(anos[0], 1, 1), date(anos[-1], 12, 31))
+    assert linhas
@@ -0,0 +1,89 @@
+"""Relatórios servidos pela cópia colunar de flc_lancamento (LANCAMENTOS_COLUNAR).
+
+Mesmos relatórios de `bench_relatorios.py`, com a cópia carregada; a carga
+em si é medida à parte, junto com a construção dos arquivos compartilhados
+(COLUNAS_MAPEADAS) e o início de um worker que só os mapeia.
+"""
+import pytest
+
+
+@pytest.fixture(scope='module')
+def colunar(base_sintetica):
+    from fluxocaixa.repositories import lancamento_colunar_repository
+
+    yield lancamento_colunar_repository.carregar()
+    lancamento_colunar_repository.descartar()
+
+
+@pytest.mark.benchmark(group='colunar')
+def bench_carga_colunar(benchmark, base_sintetica):
+    from fluxocaixa.repositories import lancamento_colunar_repository
+
+    colunas = benchmark(lancamento_colunar_repository.carregar)
+    lancamento_colunar_repository.descartar()
+    benchmark.extra_info['linhas'] = len(colunas)
+    assert len(colunas)
+
+
+@pytest.mark.benchmark(group='colunar')
+def bench_construcao_mapeada(benchmark, base_sintetica, tmp_path):
+    from fluxocaixa.repositories import colunas_mapeadas_repository
+
+    resultado = benchmark(colunas_mapeadas_repository.construir, raiz=str(tmp_path))
+    benchmark.extra_info['linhas'] = resultado['lancamentos']
+    assert resultado['lancamentos']
+
+
+@pytest.mark.benchmark(group='colunar')
+def bench_inicio_worker_mapeado(benchmark, base_sintetica, tmp_path):
+    from fluxocaixa.repositories import colunas_mapeadas_repository, lancamento_colunar_repository
+
+    colunas_mapeadas_repository.construir(raiz=str(tmp_path))
+
+    def iniciar():
+        colunas_mapeadas_repository.encerrar()
+        return colunas_mapeadas_repository.iniciar(str(tmp_path))
+
+    try:
+        assert benchmark(iniciar)
+        assert len(lancamento_colunar_repository.colunas_lancamento())
+    finally:
+        colunas_mapeadas_repository.encerrar()
+
+
+@pytest.mark.benchmark(group='colunar')
+def bench_dfc_anual_colunar(benchmark, base_sintetica, colunar):
+    from fluxocaixa.services.relatorio import get_dfc_data
+
+    ano = base_sintetica['anos'][-1]
+    data = benchmark(get_dfc_data, 'ano', ano, None, list(range(1, 13)), 'realizado', None)
+    assert len(data['headers']) == 13
+
+
+@pytest.mark.benchmark(group='colunar')
+def bench_resumo_colunar(benchmark, base_sintetica, colunar):
+    from fluxocaixa.services.relatorio import get_resumo_data
+
+    ano = base_sintetica['anos'][-1]
+    assert benchmark(get_resumo_data, ano, list(range(1, 13)), 'realizado', None)
+
+
+@pytest.mark.benchmark(group='colunar')
+def bench_indicadores_colunar(benchmark, base_sintetica, colunar):
+    from fluxocaixa.services.relatorio import get_indicadores_data
+
+    ano = base_sintetica['anos'][-1]
+    assert benchmark(get_indicadores_data, ano, list(range(1, 13)), 'ambos')
+
+
+@pytest.mark.benchmark(group='colunar')
+def bench_historico_colunar(benchmark, base_sintetica, colunar):
+    from datetime import date
+
+    from fluxocaixa.services.modelos_economicos_service import obter_dados_historicos_agregados
+
+    anos = base_sintetica['anos']
+    folhas = base_sintetica['folhas_receita'] + base_sintetica['folhas_despesa']
+    df = benchmark(obter_dados_historicos_agregados, folhas,
+                   date(anos[0], 1, 1), date(anos[-1], 12, 31))
+    assert len(df) == 12 * len(anos)
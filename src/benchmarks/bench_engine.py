@@ -0,0 +1,126 @@
+"""Vazão de leitura/escrita concorrentes por perfil de engine.
+
+Cada rodada dispara leitores (agregação por qualificador e mês, como nos
+relatórios) em paralelo com um escritor que grava lançamentos um a um, cada
+um na sua transação (como /saldos/add). Os perfis rodam sobre cópias da
+base sintética: `simples` em journal_mode=DELETE (o comportamento anterior)
+e `sqlite` em WAL. Com BENCH_POSTGRES_URL definido, o perfil `postgresql`
+roda contra esse banco (o schema é criado se faltar).
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import pytest
+
+LEITORES = 4
+LEITURAS_POR_LEITOR = 20
+ESCRITAS = 80
+
+PERFIS = ['simples', 'sqlite']
+if os.getenv('BENCH_POSTGRES_URL'):
+    PERFIS.append('postgresql')
+
+
+def _copiar_base(origem: str, destino: str, journal_mode: str) -> None:
+    # backup() inclui o que ainda estiver no -wal da base original
+    for sufixo in ('', '-wal', '-shm'):
+        if os.path.exists(destino + sufixo):
+            os.remove(destino + sufixo)
+    with sqlite3.connect(origem) as fonte, sqlite3.connect(destino) as copia:
+        fonte.backup(copia)
+        copia.execute(f'PRAGMA journal_mode={journal_mode}')
+
+
+@pytest.fixture(scope='module')
+def engines(base_sintetica, tmp_path_factory):
+    from fluxocaixa.models import Base
+    from fluxocaixa.models.base import engine as engine_app
+    from fluxocaixa.models.engine import criar_engine
+
+    criadas = {}
+    pasta = tmp_path_factory.mktemp('engines')
+    for perfil in PERFIS:
+        if perfil == 'postgresql':
+            engine = criar_engine(os.environ['BENCH_POSTGRES_URL'], 'postgresql')
+            Base.metadata.create_all(engine)
+        else:
+            caminho = str(pasta / f'{perfil}.db')
+            _copiar_base(engine_app.url.database, caminho, 'WAL' if perfil == 'sqlite' else 'DELETE')
+            engine = criar_engine(f'sqlite:///{caminho}', perfil)
+        criadas[perfil] = engine
+    yield criadas
+    for engine in criadas.values():
+        engine.dispose()
+
+
+def _rodada(engine, seq_qualificador: int) -> dict:
+    from sqlalchemy import delete, extract, func, insert, select
+
+    from fluxocaixa.models import Lancamento
+
+    t = Lancamento.__table__
+    mes = extract('month', t.c.dat_lancamento)
+    consulta = (
+        select(t.c.seq_qualificador, mes, func.sum(t.c.val_lancamento))
+        .where(t.c.dat_lancamento >= date(2023, 1, 1), t.c.ind_status == 'A')
+        .group_by(t.c.seq_qualificador, mes)
+    )
+    contagem = {'leituras': 0, 'escritas': 0, 'erros': 0}
+    trava = threading.Lock()
+
+    def somar(chave):
+        with trava:
+            contagem[chave] += 1
+
+    def ler():
+        for _ in range(LEITURAS_POR_LEITOR):
+            try:
+                with engine.connect() as conn:
+                    conn.execute(consulta).fetchall()
+                somar('leituras')
+            except Exception:
+                somar('erros')
+
+    def escrever():
+        for i in range(ESCRITAS):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(t).values(
+                        dat_lancamento=date(2099, 1, i % 28 + 1), seq_qualificador=seq_qualificador,
+                        val_lancamento=1, cod_tipo_lancamento=1, cod_origem_lancamento=1,
+                        dat_inclusao=date.today(), cod_pessoa_inclusao=0, ind_status='A',
+                    ))
+                somar('escritas')
+            except Exception:
+                somar('erros')
+
+    threads = [threading.Thread(target=ler) for _ in range(LEITORES)]
+    threads.append(threading.Thread(target=escrever))
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    contagem['segundos'] = time.perf_counter() - inicio
+
+    with engine.begin() as conn:
+        conn.execute(delete(t).where(t.c.dat_lancamento >= date(2099, 1, 1)))
+    return contagem
+
+
+@pytest.mark.benchmark(group='engine')
+@pytest.mark.parametrize('perfil', PERFIS)
+def bench_leitura_escrita_concorrentes(benchmark, base_sintetica, engines, perfil):
+    engine = engines[perfil]
+    seq = base_sintetica['folhas_receita'][0]
+    resultado = benchmark.pedantic(_rodada, args=(engine, seq), rounds=3, warmup_rounds=1)
+    benchmark.extra_info.update({
+        'leituras_por_s': resultado['leituras'] / resultado['segundos'],
+        'escritas_por_s': resultado['escritas'] / resultado['segundos'],
+        'erros': resultado['erros'],
+    })
+    assert resultado['erros'] == 0
+    assert resultado['escritas'] == ESCRITAS
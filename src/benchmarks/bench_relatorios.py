@@ -0,0 +1,33 @@
+"""Relatórios DFC e resumo sobre a base sintética."""
+import pytest
+
+
+@pytest.mark.benchmark(group='relatorios')
+@pytest.mark.parametrize('estrategia', ['realizado', 'projetado'])
+def bench_dfc_anual(benchmark, base_sintetica, estrategia):
+    from fluxocaixa.services.relatorio import get_dfc_data
+
+    ano = base_sintetica['anos'][-1]
+    cenario = base_sintetica['cenarios'][0] if estrategia == 'projetado' else None
+    data = benchmark(get_dfc_data, 'ano', ano, None, list(range(1, 13)), estrategia, cenario)
+    assert len(data['headers']) == 13  # 'Nome' + 12 meses
+
+
+@pytest.mark.benchmark(group='relatorios')
+def bench_dfc_mensal(benchmark, base_sintetica):
+    from fluxocaixa.services.relatorio import get_dfc_data
+
+    ano = base_sintetica['anos'][-1]
+    data = benchmark(get_dfc_data, 'mes', ano, 6, [], 'realizado', None)
+    assert data['headers']
+
+
+@pytest.mark.benchmark(group='relatorios')
+@pytest.mark.parametrize('estrategia', ['realizado', 'projetado'])
+def bench_resumo(benchmark, base_sintetica, estrategia):
+    from fluxocaixa.services.relatorio import get_resumo_data
+
+    ano = base_sintetica['anos'][-1]
+    cenario = base_sintetica['cenarios'][0] if estrategia == 'projetado' else None
+    data = benchmark(get_resumo_data, ano, list(range(1, 13)), estrategia, cenario)
+    assert data
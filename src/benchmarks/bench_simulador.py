@@ -0,0 +1,55 @@
+"""Simulação de cenários e backtest de modelos."""
+import pytest
+
+
+@pytest.mark.benchmark(group='simulador')
+@pytest.mark.parametrize('indice', [0, 1, 2, 3], ids=['manual-loa', 'manual-manual', 'hw-media', 'arima-loa'])
+def bench_executar_simulacao(benchmark, base_sintetica, indice):
+    from fluxocaixa.services.simulador_cenario_service import executar_simulacao
+
+    cenarios = base_sintetica['cenarios']
+    if indice >= len(cenarios):
+        pytest.skip('base gerada com menos cenários')
+    resultado = benchmark(executar_simulacao, cenarios[indice])
+    benchmark.extra_info['tipo'] = resultado['simulador'].nom_cenario
+    assert resultado is not None
+
+
+@pytest.mark.benchmark(group='backtest')
+@pytest.mark.parametrize('modelos', [['MEDIA_HISTORICA'], ['HOLT_WINTERS', 'ARIMA']], ids=['media', 'hw-arima'])
+def bench_executar_backtest(benchmark, base_sintetica, modelos):
+    from fluxocaixa.services.backtest_service import executar_backtest
+
+    anos = base_sintetica['anos']
+    if len(anos) < 3:
+        pytest.skip('backtest precisa de pelo menos 3 anos')
+    folhas = base_sintetica['folhas_receita'][:5] + base_sintetica['folhas_despesa'][:5]
+    resultado = benchmark.pedantic(
+        executar_backtest,
+        kwargs={'anos_treino': anos[:-1], 'anos_teste': anos[-1:], 'modelos': modelos,
+                'qualificadores_ids': folhas},
+        rounds=2,
+    )
+    benchmark.extra_info['qualificadores'] = len(folhas)
+    assert resultado
+
+
+@pytest.mark.benchmark(group='monte-carlo')
+def bench_monte_carlo_caminhos(benchmark, base_sintetica):
+    # base_sintetica: liga a engine à base do benchmark antes do import
+    import numpy as np
+    from fluxocaixa.services.monte_carlo_service import simular_caminhos
+
+    rng = np.random.default_rng(0)
+    receita, despesa = np.full(36, 1e6), np.full(36, 9.5e5)
+    erros = rng.normal(0, 0.1, size=(36, 2))
+    resultado = benchmark(simular_caminhos, receita, despesa, erros, caminhos=10000, semente=1)
+    assert len(resultado['prob_saldo_negativo']) == 36
+
+
+@pytest.mark.benchmark(group='monte-carlo')
+def bench_simular_monte_carlo(benchmark, base_sintetica):
+    from fluxocaixa.services.monte_carlo_service import simular_monte_carlo
+
+    resultado = benchmark(simular_monte_carlo, base_sintetica['cenarios'][0], caminhos=10000, semente=1)
+    assert resultado['caminhos'] == 10000
@@ -0,0 +1,79 @@
+"""Importação de lançamentos e comparação de versões de projeção."""
+import csv
+import io
+
+import pytest
+
+
+def _csv_importacao(base_sintetica, linhas: int) -> bytes:
+    from fluxocaixa.models import Qualificador
+
+    seqs = base_sintetica['folhas_receita'] + base_sintetica['folhas_despesa']
+    nomes = {
+        q.seq_qualificador: q.dsc_qualificador
+        for q in Qualificador.query.filter(Qualificador.seq_qualificador.in_(seqs))
+    }
+    ano = base_sintetica['anos'][-1]
+    saida = io.StringIO()
+    writer = csv.writer(saida)
+    writer.writerow(['Data', 'Qualificador', 'Valor (R$)', 'Tipo', 'Banco', 'Agencia', 'Conta'])
+    for i in range(linhas):
+        seq = seqs[i % len(seqs)]
+        receita = seq in base_sintetica['folhas_receita']
+        writer.writerow([
+            f'{ano}-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+            nomes[seq],
+            f'{(1000 + i) * (1 if receita else -1):.2f}',
+            'Entrada' if receita else 'Saída',
+            # Conta 1 da base sintética, para exercitar o razão diário de saldos
+            '001', '1001', '100001-1',
+        ])
+    return saida.getvalue().encode('utf-8')
+
+
+def _remover_importados():
+    from fluxocaixa.models import Lancamento, OrigemLancamento, db
+    from fluxocaixa.repositories import SaldoContaDiarioRepository
+
+    origem = OrigemLancamento.query.filter_by(dsc_origem_lancamento='Importado').first()
+    db.session.query(Lancamento).filter_by(cod_origem_lancamento=origem.cod_origem_lancamento).delete()
+    db.session.commit()
+    # Delete em massa não passa pelos hooks do razão
+    SaldoContaDiarioRepository().recalcular_conta(1)
+
+
+@pytest.mark.benchmark(group='importacao')
+@pytest.mark.parametrize('linhas', [1_000, 10_000])
+def bench_importar_lancamentos(benchmark, base_sintetica, linhas):
+    from fluxocaixa.services.lancamento_service import import_lancamentos_service
+
+    conteudo = _csv_importacao(base_sintetica, linhas)
+    try:
+        resultado = benchmark.pedantic(
+            import_lancamentos_service, args=(conteudo, 'bench.csv'),
+            setup=_remover_importados, rounds=3,
+        )
+    finally:
+        _remover_importados()
+    assert resultado['sucesso'] == linhas, resultado.get('erros', [])[:3]
+
+
+@pytest.fixture(scope='module')
+def versoes(base_sintetica):
+    from fluxocaixa.services.projecao_versao_service import deletar_versao, salvar_projecao_como_versao
+
+    cenario = base_sintetica['cenarios'][1]
+    a = salvar_projecao_como_versao(cenario, 'bench A').seq_projecao_versao
+    b = salvar_projecao_como_versao(cenario, 'bench B').seq_projecao_versao
+    yield a, b
+    deletar_versao(a)
+    deletar_versao(b)
+
+
+@pytest.mark.benchmark(group='versoes')
+def bench_comparar_versoes(benchmark, versoes):
+    from fluxocaixa.services.projecao_versao_service import comparar_versoes
+
+    resultado = benchmark(comparar_versoes, *versoes)
+    benchmark.extra_info['linhas'] = len(resultado['linhas'])
+    assert resultado['linhas']
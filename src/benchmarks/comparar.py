@@ -0,0 +1,62 @@
+"""Compara dois arquivos JSON de resultados de benchmark.
+
+Aceita tanto o formato gravado por `conftest.py` quanto o `--benchmark-json`
+do pytest-benchmark (mesmas chaves). Sai com código 1 se algum benchmark
+ficou mais lento que o limite percentual::
+
+    python -m benchmarks.comparar antes.json depois.json --limite 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+
+def carregar(caminho: str) -> dict[str, dict]:
+    """Lê um arquivo de resultados e indexa as estatísticas por `fullname`."""
+    with open(caminho, encoding='utf-8') as f:
+        dados = json.load(f)
+    return {b['fullname']: b['stats'] for b in dados.get('benchmarks', [])}
+
+
+def comparar(antes: dict[str, dict], depois: dict[str, dict], estatistica: str = 'median') -> list[dict]:
+    """Variação percentual de cada benchmark presente nos dois arquivos."""
+    linhas = []
+    for nome in sorted(antes.keys() & depois.keys()):
+        valor_antes = antes[nome][estatistica]
+        valor_depois = depois[nome][estatistica]
+        variacao = (valor_depois - valor_antes) / valor_antes * 100 if valor_antes else 0.0
+        linhas.append({'nome': nome, 'antes': valor_antes, 'depois': valor_depois, 'variacao': variacao})
+    return linhas
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Compara resultados de benchmark.')
+    parser.add_argument('antes')
+    parser.add_argument('depois')
+    parser.add_argument('--estatistica', default='median', choices=['min', 'mean', 'median', 'max'])
+    parser.add_argument('--limite', type=float, default=10.0,
+                        help='Regressão máxima tolerada, em %% (padrão: 10)')
+    args = parser.parse_args(argv)
+
+    antes, depois = carregar(args.antes), carregar(args.depois)
+    linhas = comparar(antes, depois, args.estatistica)
+    largura = max((len(l['nome']) for l in linhas), default=10)
+    regressoes = 0
+    for l in linhas:
+        marca = ''
+        if l['variacao'] > args.limite:
+            marca = '  << regressão'
+            regressoes += 1
+        print(f"{l['nome']:<{largura}}  {l['antes'] * 1000:10.2f} ms  {l['depois'] * 1000:10.2f} ms"
+              f"  {l['variacao']:+7.1f}%{marca}")
+    for nome in sorted(antes.keys() - depois.keys()):
+        print(f'{nome:<{largura}}  removido')
+    for nome in sorted(depois.keys() - antes.keys()):
+        print(f'{nome:<{largura}}  novo')
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Fixtures das suítes de benchmark.
+
+A base sintética é gerada uma vez por parâmetros (e reaproveitada entre
+execuções) em `benchmarks/.dados/`. Nenhum módulo `bench_*` importa
+`fluxocaixa` no topo: a engine é ligada a DATABASE_URL no import, então a
+aplicação só pode ser carregada depois de `preparar_banco`.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import pytest
+
+from .gerador import PARAMETROS_PADRAO, preparar_banco
+
+DIR_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+try:
+    import pytest_benchmark  # noqa: F401
+    _TEM_PYTEST_BENCHMARK = True
+except ImportError:
+    _TEM_PYTEST_BENCHMARK = False
+
+_resultados: list[dict] = []
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup('bench', 'benchmarks do fluxo de caixa')
+    for nome, padrao in PARAMETROS_PADRAO.items():
+        grupo.addoption(f'--bench-{nome.replace("_", "-")}', type=int, default=padrao)
+    grupo.addoption('--bench-rodadas', type=int, default=5,
+                    help='Rodadas por benchmark (sem pytest-benchmark)')
+    grupo.addoption('--bench-json', default=None,
+                    help='Arquivo de saída (padrão: benchmarks/resultados/<data>-<commit>.json)')
+    grupo.addoption('--bench-linhas-analitico', type=int, default=10_000_000,
+                    help='Lançamentos da base ampliada de bench_analitico.py')
+
+
+def _parametros(config) -> dict:
+    return {nome: config.getoption(f'--bench-{nome.replace("_", "-")}') for nome in PARAMETROS_PADRAO}
+
+
+@pytest.fixture(scope='session')
+def base_sintetica(request):
+    """Resumo da base sintética (ids de cenários, folhas, anos...)."""
+    parametros = _parametros(request.config)
+    nome = '-'.join(f'{v}' for v in parametros.values())
+    return preparar_banco(os.path.join(DIR_BENCHMARKS, '.dados', f'bench-{nome}.db'), **parametros)
+
+
+def _estatisticas(tempos: list[float], iteracoes: int) -> dict:
+    media = statistics.mean(tempos)
+    return {
+        'min': min(tempos),
+        'max': max(tempos),
+        'mean': media,
+        'stddev': statistics.stdev(tempos) if len(tempos) > 1 else 0.0,
+        'median': statistics.median(tempos),
+        'rounds': len(tempos),
+        'iterations': iteracoes,
+        'ops': 1 / media if media else 0.0,
+    }
+
+
+class Cronometro:
+    """Subconjunto da fixture `benchmark` do pytest-benchmark.
+
+    Suporta `benchmark(fn, *args, **kwargs)`, `benchmark.pedantic(...)` e
+    `benchmark.extra_info`; cada rodada é medida com `time.perf_counter`.
+    """
+
+    def __init__(self, node, rodadas: int):
+        self.node = node
+        self.rodadas = rodadas
+        self.extra_info = {}
+        self.group = None
+        marcador = node.get_closest_marker('benchmark')
+        if marcador:
+            self.group = marcador.kwargs.get('group')
+
+    def __call__(self, funcao, *args, **kwargs):
+        return self.pedantic(funcao, args=args, kwargs=kwargs, rounds=self.rodadas, warmup_rounds=1)
+
+    def pedantic(self, target, args=(), kwargs=None, setup=None, rounds=1, iterations=1, warmup_rounds=0):
+        kwargs = kwargs or {}
+        resultado = None
+        for _ in range(warmup_rounds):
+            if setup:
+                setup()
+            target(*args, **kwargs)
+        tempos = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            inicio = time.perf_counter()
+            for _ in range(iterations):
+                resultado = target(*args, **kwargs)
+            tempos.append((time.perf_counter() - inicio) / iterations)
+        _resultados.append({
+            'group': self.group,
+            'name': self.node.name,
+            'fullname': self.node.nodeid,
+            'params': getattr(getattr(self.node, 'callspec', None), 'params', None),
+            'stats': _estatisticas(tempos, iterations),
+            'extra_info': self.extra_info,
+        })
+        return resultado
+
+
+if not _TEM_PYTEST_BENCHMARK:
+    @pytest.fixture()
+    def benchmark(request):
+        return Cronometro(request.node, request.config.getoption('--bench-rodadas'))
+
+
+def _commit_info() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=DIR_BENCHMARKS, check=True).stdout.strip()
+        sujo = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                   capture_output=True, text=True, cwd=DIR_BENCHMARKS).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {'id': None, 'dirty': None}
+    return {'id': commit, 'dirty': sujo}
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if _TEM_PYTEST_BENCHMARK or not _resultados:
+        return
+    commit = _commit_info()
+    destino = session.config.getoption('--bench-json', default=None)
+    if not destino:
+        carimbo = datetime.now().strftime('%Y%m%d-%H%M%S')
+        destino = os.path.join(DIR_BENCHMARKS, 'resultados', f'{carimbo}-{(commit["id"] or "local")[:8]}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    with open(destino, 'w', encoding='utf-8') as f:
+        json.dump({
+            'machine_info': {
+                'node': platform.node(),
+                'machine': platform.machine(),
+                'python_version': platform.python_version(),
+                'system': platform.system(),
+            },
+            'commit_info': commit,
+            'parametros': _parametros(session.config),
+            'benchmarks': _resultados,
+            'datetime': datetime.now().isoformat(),
+            'version': 'fluxocaixa-bench/1',
+        }, f, indent=2, default=str)
@@ -0,0 +1,379 @@
+"""Gerador determinístico de uma base sintética em volume de produção.
+
+Diferente de `services/seed.py` (livro de demonstração pequeno), aqui tudo
+é parametrizado e derivado de uma única semente, de modo que a mesma
+configuração sempre produz exatamente os mesmos registros. As inserções
+usam Core em lotes; o razão diário de saldos é reconstruído ao final.
+
+Também pode ser usado direto da linha de comando::
+
+    python -m benchmarks.gerador --banco /tmp/bench.db --qualificadores 300 --anos 6
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+_TAMANHO_LOTE = 10_000
+
+GRUPOS_RECEITA = ['IMPOSTOS', 'TRANSFERÊNCIAS FEDERAIS', 'DEMAIS RECEITAS', 'RECEITAS PATRIMONIAIS']
+# Nomes que acionam as categorias da LDO (pessoal/saúde/educação) nos relatórios
+GRUPOS_DESPESA = [
+    'PESSOAL - FOLHA', 'SAÚDE', 'EDUCAÇÃO', 'CUSTEIO',
+    'INVESTIMENTO', 'SERVIÇO DA DÍVIDA', 'REPASSES',
+]
+
+PARAMETROS_PADRAO = {
+    'qualificadores': 60,
+    'anos': 4,
+    'ano_final': 2025,
+    'contas': 5,
+    'lancamentos_por_dia': 20,
+    'cenarios': 4,
+    'semente': 42,
+}
+
+
+def _dias_uteis(ano_inicial: int, ano_final: int) -> list[date]:
+    dia = date(ano_inicial, 1, 1)
+    fim = date(ano_final, 12, 31)
+    dias = []
+    while dia <= fim:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def _inserir_em_lotes(conn, tabela, linhas: list[dict]) -> None:
+    for inicio in range(0, len(linhas), _TAMANHO_LOTE):
+        conn.execute(tabela.insert(), linhas[inicio:inicio + _TAMANHO_LOTE])
+
+
+def _montar_arvore(total: int) -> tuple[list[dict], list[tuple[int, str]]]:
+    """Monta a árvore raiz -> grupo -> folha com `total` nós ao todo.
+
+    Returns:
+        (linhas de flc_qualificador, [(seq_qualificador, tipo_fluxo)] das folhas)
+    """
+    total = max(total, 6)
+    linhas: list[dict] = []
+    folhas: list[tuple[int, str]] = []
+    seq = 0
+    metade_receita = int(total * 0.4)
+    for raiz_num, raiz_dsc, tipo_fluxo, nomes_grupos, n_lado in (
+        ('1', 'RECEITA LÍQUIDA', 'receita', GRUPOS_RECEITA, metade_receita),
+        ('2', 'DESPESAS', 'despesa', GRUPOS_DESPESA, total - metade_receita),
+    ):
+        seq += 1
+        raiz = seq
+        linhas.append({'seq_qualificador': raiz, 'num_qualificador': raiz_num,
+                       'dsc_qualificador': raiz_dsc, 'cod_qualificador_pai': None})
+        n_nos = n_lado - 1
+        n_grupos = max(1, min(len(nomes_grupos) * 4, round(math.sqrt(n_nos))))
+        n_folhas = max(n_grupos, n_nos - n_grupos)
+        grupos = []
+        for g in range(n_grupos):
+            seq += 1
+            nome = nomes_grupos[g % len(nomes_grupos)]
+            if g >= len(nomes_grupos):
+                nome = f'{nome} {g // len(nomes_grupos) + 1}'
+            grupos.append((seq, f'{raiz_num}.{g + 1}'))
+            linhas.append({'seq_qualificador': seq, 'num_qualificador': f'{raiz_num}.{g + 1}',
+                           'dsc_qualificador': nome, 'cod_qualificador_pai': raiz})
+        for f in range(n_folhas):
+            seq += 1
+            seq_grupo, num_grupo = grupos[f % n_grupos]
+            dsc_grupo = linhas[seq_grupo - 1]['dsc_qualificador']
+            linhas.append({'seq_qualificador': seq, 'num_qualificador': f'{num_grupo}.{f // n_grupos + 1}',
+                           'dsc_qualificador': f'{dsc_grupo} - ITEM {f + 1:04d}',
+                           'cod_qualificador_pai': seq_grupo})
+            folhas.append((seq, tipo_fluxo))
+    return linhas, folhas
+
+
+def gerar_base_sintetica(
+    session=None,
+    *,
+    qualificadores: int = PARAMETROS_PADRAO['qualificadores'],
+    anos: int = PARAMETROS_PADRAO['anos'],
+    ano_final: int = PARAMETROS_PADRAO['ano_final'],
+    contas: int = PARAMETROS_PADRAO['contas'],
+    lancamentos_por_dia: int = PARAMETROS_PADRAO['lancamentos_por_dia'],
+    cenarios: int = PARAMETROS_PADRAO['cenarios'],
+    semente: int = PARAMETROS_PADRAO['semente'],
+) -> dict:
+    """Popula um banco *vazio* com a base sintética e retorna um resumo.
+
+    Args:
+        session: Sessão SQLAlchemy (padrão: db.session)
+        qualificadores: Total de nós da árvore (raízes + grupos + folhas)
+        anos: Quantidade de anos de lançamentos, terminando em `ano_final`
+        ano_final: Último ano com lançamentos; também é o ano_base dos cenários
+        contas: Número de contas bancárias
+        lancamentos_por_dia: Lançamentos por dia útil
+        cenarios: Número de cenários do simulador (alternando os tipos de modelo)
+        semente: Semente do gerador pseudoaleatório
+
+    Returns:
+        Dict com os parâmetros usados, contagens e ids úteis para os benchmarks
+    """
+    from fluxocaixa.models import (
+        CenarioDespesa,
+        CenarioDespesaAjuste,
+        CenarioReceita,
+        CenarioReceitaAjuste,
+        ContaBancaria,
+        Lancamento,
+        Loa,
+        OrigemLancamento,
+        Qualificador,
+        SaldoConta,
+        SimuladorCenario,
+        TipoLancamento,
+    )
+    from fluxocaixa.models.base import db
+    from fluxocaixa.repositories import SaldoContaDiarioRepository
+
+    session = session or db.session
+    rng = np.random.default_rng(semente)
+    conn = session.connection()
+    ano_inicial = ano_final - anos + 1
+    dat_inclusao = date(ano_final, 12, 31)
+
+    # Domínios
+    _inserir_em_lotes(conn, TipoLancamento.__table__, [
+        {'cod_tipo_lancamento': 1, 'dsc_tipo_lancamento': 'Entrada'},
+        {'cod_tipo_lancamento': 2, 'dsc_tipo_lancamento': 'Saída'},
+    ])
+    _inserir_em_lotes(conn, OrigemLancamento.__table__, [
+        {'cod_origem_lancamento': 1, 'dsc_origem_lancamento': 'Manual', 'ind_status': 'A'},
+        {'cod_origem_lancamento': 2, 'dsc_origem_lancamento': 'Automático', 'ind_status': 'A'},
+        {'cod_origem_lancamento': 3, 'dsc_origem_lancamento': 'Importado', 'ind_status': 'A'},
+    ])
+    _inserir_em_lotes(conn, ContaBancaria.__table__, [
+        {'seq_conta': i, 'cod_banco': f'{i:03d}', 'num_agencia': f'{1000 + i}',
+         'num_conta': f'{100000 + i}-{i % 10}', 'dsc_conta': f'Conta Sintética {i}',
+         'ind_status': 'A', 'dat_cadastro': dat_inclusao}
+        for i in range(1, contas + 1)
+    ])
+
+    # Árvore de qualificadores
+    linhas_qualificador, folhas = _montar_arvore(qualificadores)
+    for linha in linhas_qualificador:
+        linha.update(dat_inclusao=dat_inclusao, ind_status='A')
+    _inserir_em_lotes(conn, Qualificador.__table__, linhas_qualificador)
+    seq_folhas = np.array([seq for seq, _ in folhas])
+    eh_receita = np.array([tipo == 'receita' for _, tipo in folhas])
+
+    # Lançamentos diários: valor base por folha x sazonalidade x crescimento x ruído
+    dias = _dias_uteis(ano_inicial, ano_final)
+    n = len(dias) * lancamentos_por_dia
+    idx_dia = np.repeat(np.arange(len(dias)), lancamentos_por_dia)
+    idx_folha = rng.integers(0, len(folhas), size=n)
+    base = rng.lognormal(mean=11.0, sigma=0.8, size=len(folhas))
+    # Despesas um pouco menores que receitas para o saldo não divergir
+    base = np.where(eh_receita, base * 1.05, base * 0.9)
+    meses = np.array([d.month for d in dias])[idx_dia]
+    anos_idx = np.array([d.year - ano_inicial for d in dias])[idx_dia]
+    sazonal = 1.0 + 0.15 * np.sin(2 * np.pi * (meses - 1) / 12)
+    valores = base[idx_folha] * sazonal * (1.05 ** anos_idx) * rng.lognormal(0.0, 0.25, size=n)
+    valores = np.round(np.where(eh_receita[idx_folha], valores, -valores), 2)
+    origens = rng.integers(1, 3, size=n)
+    contas_lanc = idx_folha % contas + 1
+
+    _inserir_em_lotes(conn, Lancamento.__table__, [
+        {
+            'dat_lancamento': dias[idx_dia[i]],
+            'seq_qualificador': int(seq_folhas[idx_folha[i]]),
+            'val_lancamento': float(valores[i]),
+            'cod_tipo_lancamento': 1 if valores[i] >= 0 else 2,
+            'cod_origem_lancamento': int(origens[i]),
+            'dat_inclusao': dat_inclusao,
+            'cod_pessoa_inclusao': 1,
+            'ind_status': 'A',
+            'seq_conta': int(contas_lanc[i]),
+        }
+        for i in range(n)
+    ])
+
+    # Saldos informados no primeiro dia útil de cada mês
+    saldo_inicial = rng.uniform(5e7, 2e8, size=contas)
+    movimento_por_dia = np.zeros((contas, len(dias)))
+    np.add.at(movimento_por_dia, (contas_lanc - 1, idx_dia), valores)
+    acumulado_antes = np.cumsum(movimento_por_dia, axis=1) - movimento_por_dia
+    saldos = []
+    for pos, dia in enumerate(dias):
+        if pos == 0 or dias[pos - 1].month != dia.month:
+            for c in range(contas):
+                saldos.append({
+                    'seq_conta': c + 1,
+                    'dat_saldo': dia,
+                    'val_saldo': round(float(saldo_inicial[c] + acumulado_antes[c, pos]), 2),
+                    'dat_inclusao': dat_inclusao,
+                    'cod_pessoa_inclusao': 1,
+                })
+    _inserir_em_lotes(conn, SaldoConta.__table__, saldos)
+
+    # LOA: realizado anual por folha com desvio de até 10%
+    total_por_ano = np.zeros((anos, len(folhas)))
+    np.add.at(total_por_ano, (anos_idx, idx_folha), np.abs(valores))
+    fator_loa = rng.uniform(0.9, 1.1, size=total_por_ano.shape)
+    _inserir_em_lotes(conn, Loa.__table__, [
+        {'num_ano': ano_inicial + a, 'seq_qualificador': int(seq_folhas[f]),
+         'val_loa': round(float(total_por_ano[a, f] * fator_loa[a, f]), 2),
+         'dat_inclusao': dat_inclusao, 'ind_status': 'A'}
+        for a in range(anos) for f in range(len(folhas))
+    ])
+
+    # Cenários do simulador, alternando os tipos de modelo
+    folhas_receita = [int(s) for s in seq_folhas[eh_receita]]
+    folhas_despesa = [int(s) for s in seq_folhas[~eh_receita]]
+    loa_despesa = float(total_por_ano[-1, ~eh_receita].sum())
+    modelos = [
+        ('MANUAL', 'LOA'),
+        ('MANUAL', 'MANUAL'),
+        ('HOLT_WINTERS', 'MEDIA_HISTORICA'),
+        ('ARIMA', 'LOA'),
+    ]
+    seq_cenarios = []
+    for i in range(cenarios):
+        tipo_receita, tipo_despesa = modelos[i % len(modelos)]
+        cenario = SimuladorCenario(
+            nom_cenario=f'Sintético {i + 1} ({tipo_receita}/{tipo_despesa})',
+            dsc_cenario='Cenário gerado para benchmark',
+            ano_base=ano_final,
+            meses_projecao=12,
+            ind_status='A',
+            dat_criacao=dat_inclusao,
+            dat_inclusao=dat_inclusao,
+            cod_pessoa_inclusao=1,
+        )
+        session.add(cenario)
+        session.flush()
+        config_receita = None
+        if tipo_receita != 'MANUAL':
+            config_receita = json.dumps({'seq_qualificadores': folhas_receita})
+        receita = CenarioReceita(seq_simulador_cenario=cenario.seq_simulador_cenario,
+                                 cod_tipo_cenario=tipo_receita, json_configuracao=config_receita,
+                                 dat_inclusao=dat_inclusao)
+        if tipo_despesa == 'LOA':
+            config_despesa = {'distribuicao': 'uniforme', 'valor_anual': round(loa_despesa, 2)}
+        elif tipo_despesa == 'MEDIA_HISTORICA':
+            config_despesa = {'seq_qualificadores': folhas_despesa, 'periodo_meses': 12}
+        else:
+            config_despesa = None
+        despesa = CenarioDespesa(seq_simulador_cenario=cenario.seq_simulador_cenario,
+                                 cod_tipo_cenario=tipo_despesa,
+                                 json_configuracao=json.dumps(config_despesa) if config_despesa else None,
+                                 dat_inclusao=dat_inclusao)
+        session.add_all([receita, despesa])
+        session.flush()
+
+        percentuais = np.round(rng.uniform(-2.0, 5.0, size=(len(folhas), 12)), 2)
+        if tipo_receita == 'MANUAL':
+            _inserir_em_lotes(conn, CenarioReceitaAjuste.__table__, [
+                {'seq_cenario_receita': receita.seq_cenario_receita, 'seq_qualificador': seq,
+                 'ano': ano_final, 'mes': mes, 'cod_tipo_ajuste': 'P',
+                 'val_ajuste': float(percentuais[f, mes - 1]), 'dat_inclusao': dat_inclusao}
+                for f, seq in enumerate(folhas_receita) for mes in range(1, 13)
+            ])
+        if tipo_despesa == 'MANUAL':
+            _inserir_em_lotes(conn, CenarioDespesaAjuste.__table__, [
+                {'seq_cenario_despesa': despesa.seq_cenario_despesa, 'seq_qualificador': seq,
+                 'ano': ano_final, 'mes': mes, 'cod_tipo_ajuste': 'P',
+                 'val_ajuste': float(percentuais[-f - 1, mes - 1]), 'dat_inclusao': dat_inclusao}
+                for f, seq in enumerate(folhas_despesa) for mes in range(1, 13)
+            ])
+        seq_cenarios.append(cenario.seq_simulador_cenario)
+
+    session.commit()
+    SaldoContaDiarioRepository(session).recalcular_tudo()
+
+    return {
+        'parametros': {
+            'qualificadores': qualificadores, 'anos': anos, 'ano_final': ano_final,
+            'contas': contas, 'lancamentos_por_dia': lancamentos_por_dia,
+            'cenarios': cenarios, 'semente': semente,
+        },
+        'anos': list(range(ano_inicial, ano_final + 1)),
+        'total_qualificadores': len(linhas_qualificador),
+        'total_lancamentos': n,
+        'total_saldos': len(saldos),
+        'folhas_receita': folhas_receita,
+        'folhas_despesa': folhas_despesa,
+        'cenarios': seq_cenarios,
+    }
+
+
+def preparar_banco(caminho: str, **parametros) -> dict:
+    """Cria (ou reaproveita) um arquivo SQLite com a base sintética.
+
+    Deve ser chamado antes de qualquer import de `fluxocaixa`, pois a engine
+    é criada a partir de DATABASE_URL no import. O resumo da geração fica em
+    `<caminho>.json`; se o arquivo já existir com os mesmos parâmetros, a
+    base é reaproveitada.
+    """
+    parametros = {**PARAMETROS_PADRAO, **parametros}
+    caminho = os.path.abspath(caminho)
+    caminho_resumo = f'{caminho}.json'
+    os.environ['DATABASE_URL'] = f'sqlite:///{caminho}'
+
+    if os.path.exists(caminho) and os.path.exists(caminho_resumo):
+        with open(caminho_resumo, encoding='utf-8') as f:
+            resumo = json.load(f)
+        if resumo.get('parametros') == parametros:
+            # Tabelas criadas depois da geração (ex.: flc_revisao_dados)
+            from fluxocaixa.models import db
+            db.create_all()
+            return resumo
+    for arquivo in (caminho, caminho_resumo):
+        if os.path.exists(arquivo):
+            os.remove(arquivo)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    from fluxocaixa.models import db
+    from fluxocaixa.models.alerta import ensure_alerta_schema
+    from fluxocaixa.models.base import engine
+    from fluxocaixa.models.lancamento import ensure_lancamento_schema
+    from fluxocaixa.models.projecao_versao import ensure_projecao_historico_schema
+    from fluxocaixa.models.saldo_conta_diario import ensure_saldo_conta_diario_schema
+
+    if str(engine.url) != os.environ['DATABASE_URL']:
+        raise RuntimeError(
+            f'fluxocaixa já foi importado com outra base ({engine.url}); '
+            'chame preparar_banco antes de importar a aplicação'
+        )
+    db.create_all()
+    ensure_alerta_schema()
+    ensure_lancamento_schema()
+    ensure_projecao_historico_schema()
+    ensure_saldo_conta_diario_schema()
+
+    resumo = gerar_base_sintetica(**parametros)
+    with open(caminho_resumo, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, indent=2)
+    return resumo
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Gera a base sintética de benchmark.')
+    parser.add_argument('--banco', required=True, help='Arquivo SQLite de destino')
+    for nome, padrao in PARAMETROS_PADRAO.items():
+        parser.add_argument(f'--{nome.replace("_", "-")}', type=int, default=padrao)
+    args = vars(parser.parse_args(argv))
+    banco = args.pop('banco')
+    resumo = preparar_banco(banco, **args)
+    print(
+        f"{resumo['total_qualificadores']} qualificadores, {resumo['total_lancamentos']} lançamentos, "
+        f"{resumo['total_saldos']} saldos, {len(resumo['cenarios'])} cenários em {banco}"
+    )
+
+
+if __name__ == '__main__':
+    main()
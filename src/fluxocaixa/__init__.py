@@ -5,10 +5,20 @@ from fastapi.staticfiles import StaticFiles
 from .config import Config
 from .models import db
 from .models.alerta import ensure_alerta_schema
+from .models.lancamento import ensure_lancamento_schema
 from .models.projecao_versao import ensure_projecao_historico_schema
+from .models.saldo_conta_diario import ensure_saldo_conta_diario_schema
+from .models.simulador_cenario_historico import ensure_simulador_cenario_historico_schema
+from .repositories import (
+    colunas_mapeadas_repository,
+    lancamento_analitico_repository,
+    lancamento_colunar_repository,
+    revisao_repository,
+)
 from .services.seed import seed_data
 from .utils.formatters import format_currency
 from .web import router, templates
+from .web.middleware import InstrumentacaoSqlMiddleware, SessaoPorRequisicaoMiddleware
 
 
 def create_app(config_class: type[Config] = Config) -> FastAPI:
@@ -20,8 +30,20 @@ def create_app(config_class: type[Config] = Config) -> FastAPI:
     # Ensure database tables exist and populate basic data
     db.create_all()
     ensure_alerta_schema()
+    ensure_lancamento_schema()
     ensure_projecao_historico_schema()
+    ensure_saldo_conta_diario_schema()
+    ensure_simulador_cenario_historico_schema()
     seed_data()
+    # Antes dos caches carregados aqui: escritas de outros workers depois
+    # desta leitura são vistas na primeira requisição
+    revisao_repository.iniciar()
+    if config_class.COLUNAS_MAPEADAS:
+        colunas_mapeadas_repository.iniciar()
+    elif config_class.LANCAMENTOS_COLUNAR:
+        lancamento_colunar_repository.carregar()
+    if config_class.ANALITICO_DUCKDB:
+        lancamento_analitico_repository.iniciar()
 
     # Register Jinja2 filters
     templates.env.filters["format_currency"] = format_currency
@@ -29,6 +51,10 @@ def create_app(config_class: type[Config] = Config) -> FastAPI:
     # Include application routes
     app.include_router(router)
 
+    # One database session per request; SQL metrics when PERF_SQL is on
+    app.add_middleware(SessaoPorRequisicaoMiddleware)
+    app.add_middleware(InstrumentacaoSqlMiddleware)
+
     # Mount static files
     app.mount("/static", StaticFiles(directory=static_folder), name="static")
 
@@ -0,0 +1,59 @@
+"""Arquivamento de anos frios de flc_lancamento (para agendamento via cron).
+
+Usa o mesmo DATABASE_URL da aplicação e não recria nem popula o banco::
+
+    python -m fluxocaixa.arquivamento                 # anos fora da janela quente
+    python -m fluxocaixa.arquivamento --anos 2017 2018
+    python -m fluxocaixa.arquivamento --restaurar 2018
+    python -m fluxocaixa.arquivamento --listar
+
+Os workers da aplicação enxergam o arquivamento ou a restauração na
+requisição seguinte (revisão ``periodo``, ver `repositories/revisao_repository.py`).
+Sai com código 1 se algum ano falhou.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Arquiva anos antigos de flc_lancamento.')
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--anos', type=int, nargs='+', default=None,
+                       help='Anos a arquivar (padrão: todos fora da janela quente)')
+    grupo.add_argument('--restaurar', type=int, nargs='+', default=None,
+                       help='Anos arquivados a devolver para flc_lancamento')
+    grupo.add_argument('--listar', action='store_true', help='Lista os anos arquivados')
+    args = parser.parse_args(argv)
+
+    from .services import arquivamento_service as servico
+
+    if args.listar:
+        for item in servico.listar_anos_arquivados():
+            print(f"{item['ano']}: {item['lancamentos']} lançamento(s), "
+                  f"{item['valor']:.2f}, arquivado em {item['dat_arquivamento']}")
+        return 0
+
+    if args.restaurar:
+        operacao, anos = servico.restaurar_ano, args.restaurar
+    else:
+        operacao, anos = servico.arquivar_ano, args.anos or servico.anos_arquivaveis()
+
+    erros = 0
+    for ano in anos:
+        try:
+            resultado = operacao(ano)
+        except (ValueError, RuntimeError) as exc:
+            print(f'ano {ano}: ERRO {exc}', file=sys.stderr)
+            erros += 1
+            continue
+        print(f"ano {resultado['ano']}: {resultado['lancamentos']} lançamento(s), "
+              f"{resultado['valor']:.2f}")
+    if not anos:
+        print('Nenhum ano a processar')
+    return 1 if erros else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""Nova geração dos arquivos colunares compartilhados (COLUNAS_MAPEADAS).
+
+Usa o mesmo DATABASE_URL da aplicação e não recria nem popula o banco. Os
+workers mapeiam a geração nova na requisição seguinte; rode depois de
+escritas feitas fora da aplicação (carga direta no banco, restauração de
+backup)::
+
+    python -m fluxocaixa.colunas
+    python -m fluxocaixa.colunas --diretorio /srv/fluxo/colunas
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Constrói os arquivos colunares mapeados pelos workers.')
+    parser.add_argument('--diretorio', default=None,
+                        help='Diretório dos arquivos (padrão: COLUNAS_MAPEADAS_DIR)')
+    args = parser.parse_args(argv)
+
+    from .repositories import colunas_mapeadas_repository
+
+    inicio = time.perf_counter()
+    resultado = colunas_mapeadas_repository.construir(raiz=args.diretorio)
+    print(f"{resultado['geracao']}: {resultado['lancamentos']} lançamento(s), "
+          f"{resultado['saldos']} saldo(s) em {time.perf_counter() - inicio:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
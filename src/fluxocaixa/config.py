@@ -5,3 +5,68 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', f'sqlite:///{os.path.join(BASE_DIR, "instance", "fluxo.db")}')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Réplica para as sessões de leitura (relatórios, modelos, backtest).
+    # Vazio = mesma base, em conexões somente leitura.
+    DATABASE_READ_URL = os.getenv('DATABASE_READ_URL') or None
+
+    # Perfil da engine (models/engine.py): postgresql, sqlite ou simples.
+    # Vazio = deduzido da URL.
+    DB_PROFILE = os.getenv('DB_PROFILE') or None
+
+    # PostgreSQL
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '60000'))
+    DB_LOCK_TIMEOUT_MS = int(os.getenv('DB_LOCK_TIMEOUT_MS', '10000'))
+
+    # SQLite
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))
+
+    # Instrumentação de SQL (models/instrumentacao.py): contagem e tempo de
+    # queries por requisição e por função, /_debug/perf e cabeçalhos X-DB-*
+    PERF_SQL = os.getenv('PERF_SQL', '').lower() in ('1', 'true', 'sim', 'on')
+    PERF_SQL_LENTA_MS = float(os.getenv('PERF_SQL_LENTA_MS', '100'))
+    # Acima deste tempo o plano (EXPLAIN) da query é capturado
+    PERF_SQL_EXPLAIN_MS = float(os.getenv('PERF_SQL_EXPLAIN_MS', '250'))
+    PERF_SQL_HISTORICO = int(os.getenv('PERF_SQL_HISTORICO', '200'))
+    # Expõe /_debug/perf (com PERF_SQL), só para acesso local sem proxy
+    PERF_SQL_DEBUG = os.getenv('PERF_SQL_DEBUG', '').lower() in ('1', 'true', 'sim', 'on')
+
+    # Pool de processos compartilhado pela seleção de ordem ARIMA/SARIMA
+    # (services/selecao_ordem_service.py). 0 = núcleos da máquina; 1 = serial
+    SELECAO_ORDEM_PROCESSOS = int(os.getenv('SELECAO_ORDEM_PROCESSOS', '0'))
+
+    # Arquivamento de anos frios de flc_lancamento (services/arquivamento_service.py).
+    # O ano corrente e os ANOS_QUENTES - 1 anteriores nunca são arquivados.
+    ANOS_QUENTES = int(os.getenv('ANOS_QUENTES', '5'))
+    # SQLite: banco anexado com uma tabela por ano arquivado.
+    # Vazio = <banco>_arquivo.db ao lado do banco principal.
+    ARQUIVO_LANCAMENTOS_SQLITE = os.getenv('ARQUIVO_LANCAMENTOS_SQLITE') or None
+
+    # Cópia colunar de flc_lancamento em memória (repositories/lancamento_colunar_repository.py),
+    # carregada na inicialização e usada pelos relatórios e históricos no lugar do SQL
+    LANCAMENTOS_COLUNAR = os.getenv('LANCAMENTOS_COLUNAR', '').lower() in ('1', 'true', 'sim', 'on')
+
+    # Arquivos colunares de flc_lancamento e flc_saldo_conta mapeados em memória e
+    # compartilhados pelos workers (repositories/colunas_mapeadas_repository.py).
+    # Substitui LANCAMENTOS_COLUNAR quando as duas estão ligadas.
+    COLUNAS_MAPEADAS = os.getenv('COLUNAS_MAPEADAS', '').lower() in ('1', 'true', 'sim', 'on')
+    # Vazio = <banco>_colunas ao lado do banco SQLite, ou instance/colunas
+    COLUNAS_MAPEADAS_DIR = os.getenv('COLUNAS_MAPEADAS_DIR') or None
+    # Espera entre uma escrita e a reconstrução (agrupa escritas próximas)
+    COLUNAS_MAPEADAS_ATRASO_S = float(os.getenv('COLUNAS_MAPEADAS_ATRASO_S', '2'))
+
+    # Backend analítico embutido (repositories/lancamento_analitico_repository.py):
+    # agrupamentos de vários anos rodam num DuckDB que lê o banco de leitura
+    # anexado somente leitura. Requer duckdb (opcional).
+    ANALITICO_DUCKDB = os.getenv('ANALITICO_DUCKDB', '').lower() in ('1', 'true', 'sim', 'on')
+    # 0 = padrão do DuckDB (todos os núcleos)
+    ANALITICO_DUCKDB_THREADS = int(os.getenv('ANALITICO_DUCKDB_THREADS', '0'))
+    # Anos arquivados lidos de <dir>/flc_lancamento_<ano>.parquet (gravados no
+    # primeiro uso). Vazio = direto do arquivo
+    ANALITICO_PARQUET_DIR = os.getenv('ANALITICO_PARQUET_DIR') or None
@@ -0,0 +1,64 @@
+"""Fechamento de períodos de flc_lancamento (para agendamento via cron).
+
+Usa o mesmo DATABASE_URL da aplicação e não recria nem popula o banco::
+
+    python -m fluxocaixa.fechamento                    # até o mês anterior
+    python -m fluxocaixa.fechamento --ate 2025-12
+    python -m fluxocaixa.fechamento --reabrir 2025-11
+    python -m fluxocaixa.fechamento --listar
+
+Os workers da aplicação enxergam o fechamento ou a reabertura na requisição
+seguinte (revisão ``periodo``, ver `repositories/revisao_repository.py`).
+Sai com código 1 se a operação falhou.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date, timedelta
+
+
+def _mes(valor: str) -> tuple[int, int]:
+    try:
+        ano, mes = valor.split('-')
+        return int(ano), int(mes)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Mês inválido: {valor!r} (use AAAA-MM)')
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Fecha meses de flc_lancamento.')
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--ate', type=_mes, default=None,
+                       help='Último mês a fechar, AAAA-MM (padrão: mês anterior)')
+    grupo.add_argument('--reabrir', type=_mes, default=None,
+                       help='Primeiro mês a reabrir, AAAA-MM (reabre os posteriores)')
+    grupo.add_argument('--listar', action='store_true', help='Lista os meses fechados')
+    args = parser.parse_args(argv)
+
+    from .services import fechamento_service as servico
+
+    if args.listar:
+        for item in servico.listar_periodos_fechados():
+            print(f"{item['mes']:02d}/{item['ano']}: {item['lancamentos']} lançamento(s), "
+                  f"{item['valor']:.2f}, fechado em {item['dat_fechamento']}")
+        return 0
+
+    try:
+        if args.reabrir:
+            resultado = servico.reabrir_periodo(*args.reabrir)
+            print(f"{resultado['meses']} mês(es) reaberto(s); fechado até {resultado['fechado_ate']}")
+        else:
+            anterior = date.today().replace(day=1) - timedelta(days=1)
+            ano, mes = args.ate or (anterior.year, anterior.month)
+            resultado = servico.fechar_periodo(ano, mes)
+            print(f"{resultado['meses']} mês(es) fechado(s) até {resultado['fechado_ate']}: "
+                  f"{resultado['lancamentos']} lançamento(s), {resultado['valor']:.2f}")
+    except ValueError as exc:
+        print(f'ERRO {exc}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@ from .tipo_lancamento import TipoLancamento
 from .origem_lancamento import OrigemLancamento
 from .qualificador import Qualificador
 from .lancamento import Lancamento
+from .lancamento_arquivo import LancamentoMensal, PeriodoFechado, LancamentoAnoArquivado
 from .orgao import Orgao
 from .pagamento import Pagamento
 from .conferencia import Conferencia
@@ -12,6 +13,7 @@ from .alerta import Alerta
 from .alerta_gerado import AlertaGerado
 from .conta_bancaria import ContaBancaria
 from .saldo_conta import SaldoConta
+from .saldo_conta_diario import SaldoContaDiario
 from .simulador_cenario import (
     SimuladorCenario,
     CenarioReceita,
@@ -24,6 +26,7 @@ from .simulador_cenario_historico import SimuladorCenarioHistorico
 from .projecao_versao import ProjecaoVersao, ProjecaoValor
 from .loa import Loa
 from .formula import RubricaFormula, ParametroGlobal, CenarioParametroValor
+from .revisao_dados import RevisaoDados
 
 __all__ = [
     'db',
@@ -33,6 +36,9 @@ __all__ = [
     'OrigemLancamento',
     'Qualificador',
     'Lancamento',
+    'LancamentoMensal',
+    'PeriodoFechado',
+    'LancamentoAnoArquivado',
     'Orgao',
     'Pagamento',
     'Conferencia',
@@ -42,6 +48,7 @@ __all__ = [
     'AlertaGerado',
     'ContaBancaria',
     'SaldoConta',
+    'SaldoContaDiario',
     'SimuladorCenario',
     'CenarioReceita',
     'CenarioReceitaAjuste',
@@ -55,4 +62,5 @@ __all__ = [
     'RubricaFormula',
     'ParametroGlobal',
     'CenarioParametroValor',
+    'RevisaoDados',
 ]
@@ -1,17 +1,108 @@
-from sqlalchemy import create_engine
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import TextClause
 from sqlalchemy.orm import (
     declarative_base,
     sessionmaker,
     scoped_session,
     Query,
+    Session,
 )
 from fastapi import HTTPException
 
-from ..config import Config
+from .engine import criar_engine, criar_engine_leitura
+
+
+engine = criar_engine()
+engine_leitura = criar_engine_leitura(engine)
+
+_modo_leitura: ContextVar[bool] = ContextVar('modo_leitura', default=False)
+
+
+def _e_escrita(mapper, clause) -> bool:
+    if clause is None:
+        # session.connection() sem statement: usado para escrever
+        return mapper is None
+    if getattr(clause, 'is_dml', False):
+        return True
+    # SQL textual só vai para a leitura quando é claramente uma consulta
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().upper().startswith('SELECT')
+    return False
+
+
+class RoutingSession(Session):
+    """Session that sends reads to `engine_leitura` inside `somente_leitura()`.
+
+    Flushes, DML and `session.connection()` without a statement always use
+    the primary engine, so writes issued within a read-only block still work
+    (they just don't see the reads' snapshot and vice versa).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            _modo_leitura.get()
+            and engine_leitura is not engine
+            and not self._flushing
+            and not _e_escrita(mapper, clause)
+        ):
+            return engine_leitura
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+_escopo_sessao: ContextVar[Optional[object]] = ContextVar('escopo_sessao', default=None)
 
 
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
-SessionLocal = scoped_session(sessionmaker(bind=engine, autocommit=False, autoflush=False))
+def _chave_escopo():
+    # Dentro de uma requisição (ou de `escopo_sessao()`) a sessão é daquele
+    # escopo; fora dele (scripts, pools, testes) continua uma por thread
+    escopo = _escopo_sessao.get()
+    return escopo if escopo is not None else threading.get_ident()
+
+
+SessionLocal = scoped_session(
+    sessionmaker(bind=engine, class_=RoutingSession, autocommit=False, autoflush=False),
+    scopefunc=_chave_escopo,
+)
+
+
+@contextmanager
+def escopo_sessao():
+    """Give the block its own `SessionLocal` session, removed at the end.
+
+    Used per request by `SessaoPorRequisicaoMiddleware`: the identity map
+    lives only as long as the request, and concurrent async requests on the
+    event loop thread no longer share a session. Anything left uncommitted
+    is rolled back when the scope ends.
+    """
+    token = _escopo_sessao.set(object())
+    try:
+        yield
+    finally:
+        try:
+            SessionLocal.remove()
+        finally:
+            _escopo_sessao.reset(token)
+
+
+@contextmanager
+def somente_leitura():
+    """Route the queries of this block to the read-only engine.
+
+    Works as a context manager or as a decorator (`@somente_leitura()`).
+    The read engine is a replica when `DATABASE_READ_URL` is set, otherwise
+    a separate pool with writes disabled on the primary database, so long
+    report aggregations never hold connections or locks used by writers.
+    """
+    token = _modo_leitura.set(True)
+    try:
+        yield
+    finally:
+        _modo_leitura.reset(token)
+
 
 Base = declarative_base()
 Base.query = SessionLocal.query_property()
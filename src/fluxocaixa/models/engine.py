@@ -0,0 +1,204 @@
+"""Engine factory with named connection profiles.
+
+O perfil define pool e ajustes de sessão de cada backend:
+
+- ``postgresql``: QueuePool dimensionado, ``pool_pre_ping`` e
+  ``statement_timeout``/``lock_timeout`` aplicados em cada conexão nova.
+- ``sqlite``: WAL, ``synchronous=NORMAL``, ``mmap_size``, ``cache_size`` e
+  ``busy_timeout`` via PRAGMA no evento ``connect``. Em WAL leitores não
+  bloqueiam o escritor (e vice-versa), e o ``busy_timeout`` faz um segundo
+  escritor esperar em vez de falhar com "database is locked".
+- ``simples``: ``create_engine(url)`` sem ajustes (comportamento anterior).
+
+``somente_leitura=True`` cria a engine de leitura usada pelo roteamento de
+sessões (``models/base.py``): ``PRAGMA query_only`` no SQLite e
+``default_transaction_read_only`` no PostgreSQL.
+
+Sem ``DB_PROFILE`` o perfil sai do dialeto da URL. Os valores padrão vêm de
+``Config`` (variáveis de ambiente) e podem ser sobrescritos por chamada.
+"""
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from ..config import Config
+
+PERFIS = ('postgresql', 'sqlite', 'simples')
+
+
+def perfil_da_url(url: str) -> str:
+    """Default profile for a database URL.
+
+    Args:
+        url: SQLAlchemy database URL
+
+    Returns:
+        'postgresql', 'sqlite' or 'simples' (any other dialect)
+    """
+    backend = make_url(url).get_backend_name()
+    return backend if backend in ('postgresql', 'sqlite') else 'simples'
+
+
+def opcoes_perfil(perfil: str) -> dict:
+    """Profile settings taken from ``Config``.
+
+    Args:
+        perfil: One of ``PERFIS``
+
+    Returns:
+        Dictionary with the pool/PRAGMA settings of the profile
+    """
+    if perfil == 'postgresql':
+        return {
+            'pool_size': Config.DB_POOL_SIZE,
+            'max_overflow': Config.DB_MAX_OVERFLOW,
+            'pool_timeout': Config.DB_POOL_TIMEOUT,
+            'pool_recycle': Config.DB_POOL_RECYCLE,
+            'statement_timeout_ms': Config.DB_STATEMENT_TIMEOUT_MS,
+            'lock_timeout_ms': Config.DB_LOCK_TIMEOUT_MS,
+        }
+    if perfil == 'sqlite':
+        return {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': Config.SQLITE_MMAP_SIZE,
+            # Negativo = KiB (convenção do PRAGMA cache_size)
+            'cache_size': -Config.SQLITE_CACHE_SIZE_KB,
+            'busy_timeout': Config.SQLITE_BUSY_TIMEOUT_MS,
+            'temp_store': 'MEMORY',
+        }
+    if perfil == 'simples':
+        return {}
+    raise ValueError(f'Perfil de banco desconhecido: {perfil}. Use um de {", ".join(PERFIS)}')
+
+
+def _sqlite_em_memoria(url) -> bool:
+    return url.database in (None, '', ':memory:') or 'mode=memory' in str(url)
+
+
+def _engine_postgresql(url, opcoes: dict, kwargs: dict, somente_leitura: bool) -> Engine:
+    engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=opcoes['pool_size'],
+        max_overflow=opcoes['max_overflow'],
+        pool_timeout=opcoes['pool_timeout'],
+        pool_recycle=opcoes['pool_recycle'],
+        pool_pre_ping=True,
+        **kwargs,
+    )
+    ajustes = []
+    if opcoes['statement_timeout_ms']:
+        ajustes.append(f"SET statement_timeout = {int(opcoes['statement_timeout_ms'])}")
+    if opcoes['lock_timeout_ms']:
+        ajustes.append(f"SET lock_timeout = {int(opcoes['lock_timeout_ms'])}")
+    if somente_leitura:
+        ajustes.append('SET default_transaction_read_only = on')
+
+    if ajustes:
+        @event.listens_for(engine, 'connect')
+        def _ajustar_sessao(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for comando in ajustes:
+                    cursor.execute(comando)
+            finally:
+                cursor.close()
+            # SET fora de transação explícita: confirma para não ficar
+            # pendente no primeiro checkout (psycopg abre transação implícita)
+            dbapi_connection.commit()
+
+    return engine
+
+
+def _engine_sqlite(url, opcoes: dict, kwargs: dict, somente_leitura: bool) -> Engine:
+    em_memoria = _sqlite_em_memoria(url)
+    if em_memoria:
+        # Uma única conexão compartilhada; WAL e mmap não se aplicam
+        kwargs.setdefault('poolclass', StaticPool)
+        kwargs.setdefault('connect_args', {}).setdefault('check_same_thread', False)
+    engine = create_engine(url, **kwargs)
+
+    pragmas = [
+        ('busy_timeout', opcoes['busy_timeout']),
+        ('cache_size', opcoes['cache_size']),
+        ('temp_store', opcoes['temp_store']),
+    ]
+    if not em_memoria:
+        pragmas = [
+            ('journal_mode', opcoes['journal_mode']),
+            ('synchronous', opcoes['synchronous']),
+            ('mmap_size', opcoes['mmap_size']),
+        ] + pragmas
+    if somente_leitura:
+        pragmas.append(('query_only', 'ON'))
+
+    @event.listens_for(engine, 'connect')
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for nome, valor in pragmas:
+                cursor.execute(f'PRAGMA {nome}={valor}')
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def criar_engine(
+    url: Optional[str] = None,
+    perfil: Optional[str] = None,
+    somente_leitura: bool = False,
+    **ajustes,
+) -> Engine:
+    """Create an engine configured by profile.
+
+    Args:
+        url: Database URL (default: ``Config.SQLALCHEMY_DATABASE_URI``)
+        perfil: Profile name (default: ``Config.DB_PROFILE`` or derived from the URL)
+        somente_leitura: Reject writes on every connection (ignored by ``simples``)
+        **ajustes: Overrides for the profile settings (see ``opcoes_perfil``);
+            unknown keys are passed to ``create_engine``
+
+    Returns:
+        SQLAlchemy Engine
+    """
+    url = make_url(url or Config.SQLALCHEMY_DATABASE_URI)
+    perfil = perfil or Config.DB_PROFILE or perfil_da_url(str(url))
+    opcoes = opcoes_perfil(perfil)
+    kwargs = {k: v for k, v in ajustes.items() if k not in opcoes}
+    opcoes.update({k: v for k, v in ajustes.items() if k in opcoes})
+
+    if perfil == 'postgresql':
+        if url.get_backend_name() != 'postgresql':
+            raise ValueError(f'Perfil postgresql requer URL PostgreSQL, recebido {url.get_backend_name()}')
+        engine = _engine_postgresql(url, opcoes, kwargs, somente_leitura)
+    elif perfil == 'sqlite':
+        if url.get_backend_name() != 'sqlite':
+            raise ValueError(f'Perfil sqlite requer URL SQLite, recebido {url.get_backend_name()}')
+        engine = _engine_sqlite(url, opcoes, kwargs, somente_leitura)
+    else:
+        engine = create_engine(url, **kwargs)
+    return engine
+
+
+def criar_engine_leitura(engine: Engine) -> Engine:
+    """Engine for read-only sessions.
+
+    Uses ``Config.DATABASE_READ_URL`` (a replica) when set; otherwise a
+    second pool on the primary database with writes disabled. An in-memory
+    SQLite database cannot be opened twice, so the primary engine is reused.
+
+    Args:
+        engine: Primary engine
+
+    Returns:
+        SQLAlchemy Engine
+    """
+    if Config.DATABASE_READ_URL:
+        return criar_engine(Config.DATABASE_READ_URL, somente_leitura=True)
+    if engine.url.get_backend_name() == 'sqlite' and _sqlite_em_memoria(engine.url):
+        return engine
+    return criar_engine(engine.url, somente_leitura=True)
@@ -0,0 +1,232 @@
+"""SQL instrumentation through cursor events.
+
+Cada statement executado nas engines instaladas é cronometrado entre
+``before_cursor_execute`` e ``after_cursor_execute`` e atribuído:
+
+- à requisição corrente (``medir_requisicao``, aberto pelo middleware);
+- à função de serviço que o originou: o frame mais interno de
+  ``fluxocaixa.services`` na pilha (ou, na falta dele, o mais interno do
+  pacote fora de models/repositories), de modo que laços por folha num
+  relatório aparecem como uma função com centenas de queries.
+
+Statements acima de ``PERF_SQL_LENTA_MS`` entram na lista de lentas; acima
+de ``PERF_SQL_EXPLAIN_MS`` o plano é capturado na mesma conexão (``EXPLAIN
+QUERY PLAN`` no SQLite, ``EXPLAIN`` no PostgreSQL). Tudo fica em memória no
+processo e é exposto por ``resumo()`` (``/_debug/perf``).
+"""
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from ..config import Config
+
+# Statements mais lentos guardados por requisição e no total do processo
+MAX_LENTAS = 10
+MAX_SQL = 2000
+
+_medicao_atual: ContextVar[Optional[dict]] = ContextVar('medicao_sql', default=None)
+
+_trava = threading.Lock()
+_requisicoes: deque = deque(maxlen=Config.PERF_SQL_HISTORICO)
+_por_funcao: Dict[str, dict] = {}
+_lentas: List[dict] = []
+_engines: list = []
+
+
+# ==================== Instalação ====================
+
+def instalar(*engines) -> None:
+    """Attach the cursor listeners to the given engines (idempotent)."""
+    for engine in engines:
+        if any(engine is e for e in _engines):
+            continue
+        event.listen(engine, 'before_cursor_execute', _antes)
+        event.listen(engine, 'after_cursor_execute', _depois)
+        _engines.append(engine)
+
+
+def desinstalar() -> None:
+    """Detach the listeners from every instrumented engine."""
+    while _engines:
+        engine = _engines.pop()
+        event.remove(engine, 'before_cursor_execute', _antes)
+        event.remove(engine, 'after_cursor_execute', _depois)
+
+
+def limpar() -> None:
+    """Discard the collected statistics."""
+    with _trava:
+        _requisicoes.clear()
+        _por_funcao.clear()
+        _lentas.clear()
+
+
+# ==================== Eventos ====================
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('perf_sql_inicio', []).append(time.perf_counter())
+
+
+def _depois(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('perf_sql_inicio')
+    if not inicios:
+        return
+    duracao_ms = (time.perf_counter() - inicios.pop()) * 1000
+    funcao = _funcao_origem()
+    medicao = _medicao_atual.get()
+
+    lenta = None
+    if duracao_ms >= Config.PERF_SQL_LENTA_MS:
+        lenta = {
+            'sql': statement[:MAX_SQL],
+            'ms': round(duracao_ms, 2),
+            'funcao': funcao,
+            'rota': medicao['rota'] if medicao else None,
+        }
+        if duracao_ms >= Config.PERF_SQL_EXPLAIN_MS and not executemany:
+            lenta['plano'] = _explicar(conn, statement, parameters)
+
+    with _trava:
+        _acumular(_por_funcao, funcao, duracao_ms)
+        if medicao is not None:
+            medicao['consultas'] += 1
+            medicao['tempo_ms'] += duracao_ms
+            _acumular(medicao['funcoes'], funcao, duracao_ms)
+        if lenta:
+            _guardar_lenta(_lentas, lenta)
+            if medicao is not None:
+                _guardar_lenta(medicao['lentas'], lenta)
+
+
+def _acumular(destino: Dict[str, dict], funcao: str, duracao_ms: float) -> None:
+    item = destino.get(funcao)
+    if item is None:
+        item = destino[funcao] = {'consultas': 0, 'tempo_ms': 0.0, 'max_ms': 0.0}
+    item['consultas'] += 1
+    item['tempo_ms'] += duracao_ms
+    item['max_ms'] = max(item['max_ms'], duracao_ms)
+
+
+def _guardar_lenta(lentas: List[dict], lenta: dict) -> None:
+    lentas.append(lenta)
+    lentas.sort(key=lambda l: l['ms'], reverse=True)
+    del lentas[MAX_LENTAS:]
+
+
+_FORA_DA_ORIGEM = ('fluxocaixa.models', 'fluxocaixa.repositories')
+
+
+def _funcao_origem() -> str:
+    """Innermost service frame that led to the statement."""
+    frame = sys._getframe(2)
+    candidato = None
+    while frame is not None:
+        modulo = frame.f_globals.get('__name__', '')
+        if modulo.startswith('fluxocaixa.services.'):
+            return f'{modulo[len("fluxocaixa."):]}.{frame.f_code.co_name}'
+        if (
+            candidato is None
+            and modulo.startswith('fluxocaixa.')
+            and not modulo.startswith(_FORA_DA_ORIGEM)
+        ):
+            candidato = f'{modulo[len("fluxocaixa."):]}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return candidato or '(fora da aplicação)'
+
+
+def _explicar(conn, statement: str, parameters) -> Optional[List[str]]:
+    """Query plan of a read statement, on the same DBAPI connection."""
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    dialeto = conn.dialect.name
+    if dialeto == 'sqlite':
+        prefixo = 'EXPLAIN QUERY PLAN '
+    elif dialeto == 'postgresql':
+        prefixo = 'EXPLAIN '
+    else:
+        return None
+    # Cursor DBAPI direto: não passa pelos eventos (nem conta como query)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefixo + statement, parameters)
+        linhas = cursor.fetchall()
+    except Exception as exc:
+        return [f'(plano indisponível: {exc})']
+    finally:
+        cursor.close()
+    if dialeto == 'sqlite':
+        # (id, parent, notused, detail)
+        return [linha[-1] for linha in linhas]
+    return [linha[0] for linha in linhas]
+
+
+# ==================== Requisições ====================
+
+@contextmanager
+def medir_requisicao(rota: str):
+    """Collect the statements of this block as one request.
+
+    Yields the measurement dict (``consultas``, ``tempo_ms``, ``funcoes``,
+    ``lentas``), which is added to the recent-requests history at the end.
+    """
+    medicao = {
+        'rota': rota,
+        'inicio': datetime.now().isoformat(timespec='seconds'),
+        'consultas': 0,
+        'tempo_ms': 0.0,
+        'funcoes': {},
+        'lentas': [],
+    }
+    token = _medicao_atual.set(medicao)
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    finally:
+        _medicao_atual.reset(token)
+        medicao['duracao_ms'] = (time.perf_counter() - inicio) * 1000
+        with _trava:
+            _requisicoes.append(medicao)
+
+
+def _arredondar(funcoes: Dict[str, dict]) -> List[dict]:
+    return [
+        {'funcao': nome, 'consultas': item['consultas'],
+         'tempo_ms': round(item['tempo_ms'], 2), 'max_ms': round(item['max_ms'], 2)}
+        for nome, item in sorted(funcoes.items(), key=lambda kv: kv[1]['tempo_ms'], reverse=True)
+    ]
+
+
+def resumo(limite: int = 50) -> dict:
+    """Snapshot of the collected statistics (most recent requests first).
+
+    Args:
+        limite: Maximum number of recent requests returned
+
+    Returns:
+        Dictionary with 'requisicoes', 'funcoes' and 'lentas'
+    """
+    with _trava:
+        requisicoes = list(_requisicoes)[-limite:][::-1]
+        return {
+            'requisicoes': [
+                {
+                    'rota': r['rota'],
+                    'inicio': r['inicio'],
+                    'consultas': r['consultas'],
+                    'tempo_ms': round(r['tempo_ms'], 2),
+                    'duracao_ms': round(r.get('duracao_ms', 0.0), 2),
+                    'funcoes': _arredondar(r['funcoes']),
+                    'lentas': list(r['lentas']),
+                }
+                for r in requisicoes
+            ],
+            'funcoes': _arredondar(_por_funcao),
+            'lentas': list(_lentas),
+        }
@@ -6,14 +6,20 @@ from sqlalchemy import (
     Date,
     Numeric,
     ForeignKey,
+    Index,
+    inspect,
 )
 from sqlalchemy.orm import relationship
 
-from .base import Base
+from .base import Base, engine
 from .conta_bancaria import ContaBancaria
 
 class Lancamento(Base):
     __tablename__ = 'flc_lancamento'
+    __table_args__ = (
+        # Paginação por keyset (/saldos) e filtros por intervalo de datas
+        Index('ix_lancamento_data_seq', 'dat_lancamento', 'seq_lancamento'),
+    )
     seq_lancamento = Column(Integer, primary_key=True)
     dat_lancamento = Column(Date, nullable=False)
     seq_qualificador = Column(Integer, ForeignKey('flc_qualificador.seq_qualificador'), nullable=False)
@@ -33,3 +39,17 @@ class Lancamento(Base):
     origem = relationship('OrigemLancamento')
     qualificador = relationship('Qualificador')
     conta = relationship('ContaBancaria')
+
+
+def ensure_lancamento_schema():
+    """Cria os índices de flc_lancamento em bancos já existentes.
+
+    Idempotente, no mesmo padrão de `ensure_alerta_schema`.
+    """
+    inspector = inspect(engine)
+    if 'flc_lancamento' not in inspector.get_table_names():
+        return
+    existing = {ix['name'] for ix in inspector.get_indexes('flc_lancamento')}
+    for index in Lancamento.__table__.indexes:
+        if index.name not in existing:
+            index.create(bind=engine)
@@ -0,0 +1,66 @@
+"""Agregados mensais congelados, meses fechados e anos arquivados.
+
+Fechar um mês (``services/fechamento_service.py``) grava aqui seus totais por
+qualificador, tipo, origem, conta e status; enquanto o mês estiver fechado
+esses totais não mudam e lançamentos com data nele são recusados. Relatórios
+de granularidade mensal ou maior leem os meses fechados destes agregados, e
+só os meses abertos chegam a flc_lancamento.
+
+Um ano arquivado (``services/arquivamento_service.py``) está sempre fechado:
+suas linhas saem de flc_lancamento para a tabela do ano no arquivo e os
+agregados continuam no banco quente.
+"""
+from datetime import date
+
+from sqlalchemy import Column, Integer, String, Date, Numeric, Index
+
+from .base import Base
+
+
+class LancamentoMensal(Base):
+    """Total mensal de lançamentos de um mês fechado."""
+
+    __tablename__ = 'flc_lancamento_mensal'
+    __table_args__ = (
+        Index('ix_lancamento_mensal_mes', 'dat_mes', 'seq_qualificador'),
+    )
+
+    seq_lancamento_mensal = Column(Integer, primary_key=True)
+    # Primeiro dia do mês
+    dat_mes = Column(Date, nullable=False)
+    seq_qualificador = Column(Integer, nullable=False)
+    cod_tipo_lancamento = Column(Integer, nullable=False)
+    cod_origem_lancamento = Column(Integer, nullable=False)
+    seq_conta = Column(Integer)
+    ind_status = Column(String(1), nullable=False)
+    val_total = Column(Numeric(18, 2), nullable=False)
+    qtd_lancamentos = Column(Integer, nullable=False)
+
+
+class PeriodoFechado(Base):
+    """Mês fechado: seus agregados estão em flc_lancamento_mensal.
+
+    Os meses fechados são sempre contíguos, do primeiro mês com lançamentos
+    até o último fechado.
+    """
+
+    __tablename__ = 'flc_periodo_fechado'
+
+    # Primeiro dia do mês
+    dat_mes = Column(Date, primary_key=True)
+    dat_fechamento = Column(Date, default=date.today, nullable=False)
+    # Lançamentos e soma de val_lancamento (todos os status) no fechamento
+    qtd_lancamentos = Column(Integer, nullable=False)
+    val_total = Column(Numeric(18, 2), nullable=False)
+
+
+class LancamentoAnoArquivado(Base):
+    """Ano de flc_lancamento movido para o arquivo."""
+
+    __tablename__ = 'flc_lancamento_ano_arquivado'
+
+    ano = Column(Integer, primary_key=True, autoincrement=False)
+    dat_arquivamento = Column(Date, default=date.today, nullable=False)
+    qtd_lancamentos = Column(Integer, nullable=False)
+    # Soma de val_lancamento (todos os status), conferida ao restaurar
+    val_total = Column(Numeric(18, 2), nullable=False)
@@ -0,0 +1,19 @@
+"""Revisões dos dados por domínio, compartilhadas pelos workers.
+
+Cada escrita confirmada num domínio (lançamentos, saldos, qualificadores,
+simuladores, ...) incrementa o contador do domínio na mesma transação. Os
+caches em memória de cada worker comparam os contadores com os que já viram
+(ver ``repositories/revisao_repository.py``).
+"""
+from sqlalchemy import BigInteger, Column, String
+
+from .base import Base
+
+
+class RevisaoDados(Base):
+    """Contador de revisões de um domínio de dados."""
+
+    __tablename__ = 'flc_revisao_dados'
+
+    dsc_dominio = Column(String(30), primary_key=True)
+    num_revisao = Column(BigInteger, nullable=False, default=0)
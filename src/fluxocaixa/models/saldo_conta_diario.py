@@ -0,0 +1,61 @@
+"""Razão diário de saldos por conta bancária.
+
+Tabela derivada de flc_saldo_conta + flc_lancamento, mantida de forma
+incremental (ver `SaldoContaDiarioRepository`). Uma linha por conta e por
+dia em que houve saldo informado ou movimento vinculado à conta; dias sem
+eventos herdam a última linha anterior.
+"""
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Date,
+    Numeric,
+    ForeignKey,
+    UniqueConstraint,
+    Index,
+    inspect,
+)
+
+from .base import Base, engine
+
+
+class SaldoContaDiario(Base):
+    """Posição diária de uma conta bancária."""
+
+    __tablename__ = 'flc_saldo_conta_diario'
+    __table_args__ = (
+        UniqueConstraint('seq_conta', 'dat_movimento', name='uk_saldo_conta_diario'),
+        Index('ix_saldo_conta_diario_data', 'dat_movimento', 'seq_conta'),
+    )
+
+    seq_saldo_conta_diario = Column(Integer, primary_key=True)
+    seq_conta = Column(Integer, ForeignKey('flc_conta_bancaria.seq_conta'), nullable=False)
+    dat_movimento = Column(Date, nullable=False)
+    # Abertura: saldo informado no dia, ou fechamento da linha anterior
+    val_saldo_abertura = Column(Numeric(18, 2), nullable=False, default=0)
+    val_entradas = Column(Numeric(18, 2), nullable=False, default=0)
+    # Saídas em valor absoluto
+    val_saidas = Column(Numeric(18, 2), nullable=False, default=0)
+    val_saldo_fechamento = Column(Numeric(18, 2), nullable=False, default=0)
+    # Último saldo informado (flc_saldo_conta) com data <= dat_movimento
+    val_saldo_informado = Column(Numeric(18, 2))
+    # 'S' quando há saldo informado exatamente nesta data
+    ind_saldo_informado = Column(String(1), default='N', nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<SaldoContaDiario(seq_conta={self.seq_conta}, dat_movimento={self.dat_movimento}, "
+            f"val_saldo_fechamento={self.val_saldo_fechamento})>"
+        )
+
+
+def ensure_saldo_conta_diario_schema():
+    """Cria a tabela do razão diário se não existir.
+
+    Idempotente, no padrão de `ensure_projecao_historico_schema`. A carga
+    inicial fica a cargo de `SaldoContaDiarioRepository.recalcular_tudo()`.
+    """
+    inspector = inspect(engine)
+    if 'flc_saldo_conta_diario' not in inspector.get_table_names():
+        SaldoContaDiario.__table__.create(bind=engine)
@@ -1,21 +1,45 @@
-"""Modelo para histórico de cenários do simulador."""
+"""Modelo para histórico de cenários do simulador.
+
+O snapshot guarda em JSON apenas o cabeçalho (simulador e configurações de
+receita e despesa); os ajustes ficam em `bin_ajustes`, um array NumPy
+estruturado (colunas tipadas) serializado em binário, que é decodificado
+sem parse linha a linha. Snapshots antigos, com os ajustes dentro do JSON,
+continuam legíveis.
+"""
 from datetime import date
-from sqlalchemy import Column, Integer, Date, Text, ForeignKey
+from sqlalchemy import Column, Integer, Date, Text, LargeBinary, ForeignKey, inspect, text
 
-from .base import Base
+from .base import Base, engine
 
 
 class SimuladorCenarioHistorico(Base):
     """Armazena snapshots históricos de cenários do simulador."""
-    
+
     __tablename__ = 'flc_simulador_cenario_historico'
-    
+
     seq_historico = Column(Integer, primary_key=True)
     seq_simulador_cenario = Column(
-        Integer, 
+        Integer,
         ForeignKey('flc_simulador_cenario.seq_simulador_cenario'),
         nullable=False
     )
     dat_snapshot = Column(Date, nullable=False, default=date.today)
     cod_pessoa_snapshot = Column(Integer, nullable=False)
-    json_snapshot = Column(Text, nullable=False)  # JSON completo do cenário
+    json_snapshot = Column(Text, nullable=False)  # JSON do cenário (sem os ajustes)
+    bin_ajustes = Column(LargeBinary)  # Ajustes de receita e despesa em colunas (.npy)
+
+
+def ensure_simulador_cenario_historico_schema():
+    """Add bin_ajustes to flc_simulador_cenario_historico if needed.
+
+    Idempotente, no mesmo padrão de `ensure_alerta_schema`.
+    """
+    inspector = inspect(engine)
+    if 'flc_simulador_cenario_historico' not in inspector.get_table_names():
+        return
+    columns = {c['name'] for c in inspector.get_columns('flc_simulador_cenario_historico')}
+    if 'bin_ajustes' not in columns:
+        tipo = LargeBinary().compile(dialect=engine.dialect)
+        with engine.connect() as conn:
+            conn.execute(text(f'ALTER TABLE flc_simulador_cenario_historico ADD COLUMN bin_ajustes {tipo}'))
+            conn.commit()
@@ -0,0 +1,49 @@
+"""Pré-cálculo das projeções dos cenários ativos (para agendamento via cron).
+
+Usa o mesmo DATABASE_URL da aplicação e não recria nem popula o banco::
+
+    python -m fluxocaixa.precalculo
+    python -m fluxocaixa.precalculo --cenarios 3 7 --processos 4 --publicar
+
+Sai com código 1 se algum cenário falhou.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Pré-calcula as projeções dos cenários do simulador.')
+    parser.add_argument('--cenarios', type=int, nargs='+', default=None,
+                        help='IDs dos cenários (padrão: todos os ativos)')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='Tamanho do pool de processos (padrão: núcleos da máquina)')
+    parser.add_argument('--nome', default=None, help='Nome das versões gravadas')
+    parser.add_argument('--publicar', action='store_true', help='Grava as versões como publicadas')
+    parser.add_argument('--manter-anteriores', action='store_true',
+                        help='Não apaga os rascunhos de lotes anteriores')
+    args = parser.parse_args(argv)
+
+    from .services.simulacao_lote_service import precalcular_cenarios
+
+    inicio = time.perf_counter()
+    resultado = precalcular_cenarios(
+        seq_cenarios=args.cenarios,
+        processos=args.processos,
+        nom_versao=args.nome,
+        publicar=args.publicar,
+        manter_anteriores=args.manter_anteriores,
+    )
+    for seq, seq_versao in sorted(resultado['versoes'].items()):
+        print(f'cenário {seq}: versão {seq_versao}')
+    for seq, erro in sorted(resultado['erros'].items()):
+        print(f'cenário {seq}: ERRO {erro}', file=sys.stderr)
+    print(f"{len(resultado['versoes'])} cenário(s) em {time.perf_counter() - inicio:.1f}s "
+          f"({resultado['ramos_unicos']} de {resultado['ramos']} ramos ajustados)")
+    return 1 if resultado['erros'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
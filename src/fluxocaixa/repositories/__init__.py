@@ -9,6 +9,7 @@ from .conferencia_repository import ConferenciaRepository
 from .alerta_gerado_repository import AlertaGeradoRepository
 from .saldo_conta_repository import SaldoContaRepository
 from .loa_repository import LoaRepository
+from .saldo_conta_diario_repository import SaldoContaDiarioRepository
 
 __all__ = [
     'PagamentoRepository',
@@ -22,4 +23,5 @@ __all__ = [
     'AlertaGeradoRepository',
     'SaldoContaRepository',
     'LoaRepository',
+    'SaldoContaDiarioRepository',
 ]
@@ -0,0 +1,455 @@
+"""Column files of flc_lancamento and flc_saldo_conta shared by the workers (``Config.COLUNAS_MAPEADAS``).
+
+A cópia colunar de `lancamento_colunar_repository` vive na memória de cada
+processo: com ``--workers N`` são N cópias e N cargas. Com esta opção os
+arrays ficam em arquivos ``.npy`` e cada worker os abre com
+``np.load(mmap_mode='r')``: as páginas vêm do cache de páginas do sistema,
+compartilhadas entre os processos, sem cópia. A memória não cresce com o
+número de workers e um worker novo só precisa mapear os arquivos.
+
+Layout de ``Config.COLUNAS_MAPEADAS_DIR``::
+
+    ATUAL                       nome da geração em uso
+    geracao-000007/
+        meta.json               categorias, contas ativas, marcas e revisões do banco
+        lancamento.<coluna>.npy colunas de `ColunasLancamento`
+        saldo.<coluna>.npy      conta, dia e centavos de flc_saldo_conta
+    .construcao.lock
+
+Uma geração nunca é alterada. `construir` grava a próxima num diretório
+temporário, renomeia-o e troca ``ATUAL`` com ``os.replace`` (atômico); cada
+worker confere ``ATUAL`` com um ``stat`` por requisição (`acompanhar`) e mapeia
+a geração nova. Gerações antigas são apagadas na construção seguinte; um
+worker que ainda as tenha mapeadas continua lendo os arquivos já abertos.
+
+Cada geração guarda as revisões ``lancamento`` e ``saldo`` lidas antes dos
+dados (ver `revisao_repository`), e um worker não usa geração com revisão
+anterior à que já viu. Escritas pela sessão em Lancamento, SaldoConta ou
+ContaBancaria agendam uma reconstrução em segundo plano
+(``Config.COLUNAS_MAPEADAS_ATRASO_S`` agrupa as escritas próximas); o worker
+que escreveu volta ao SQL na hora, e os demais na requisição seguinte, até a
+geração nova ser publicada. Escritas feitas direto no banco, sem passar pela
+aplicação, pedem ``python -m fluxocaixa.colunas``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from itertools import chain
+
+HAS_FCNTL = False
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    pass
+
+import numpy as np
+from sqlalchemy import BigInteger, String, cast, event, func, select
+from sqlalchemy.orm import Session
+
+from ..config import BASE_DIR, Config
+from ..models import ContaBancaria, Lancamento, SaldoConta
+from ..models.base import engine
+from . import lancamento_colunar_repository, revisao_repository
+from .lancamento_colunar_repository import ColunasLancamento, _dias
+
+logger = logging.getLogger(__name__)
+
+_ATUAL = 'ATUAL'
+_PREFIXO = 'geracao-'
+_TRAVA = '.construcao.lock'
+# Revisões que uma geração precisa acompanhar
+_DOMINIOS = ('lancamento', 'saldo')
+# Sem fcntl (Windows): a construção só é exclusiva dentro do processo
+_trava_construcao = threading.Lock()
+
+
+class ColunasSaldo:
+    """Informed balances (flc_saldo_conta) sorted by account and date."""
+
+    def __init__(self, conta: np.ndarray, dia: np.ndarray, centavos: np.ndarray, ativas):
+        self.conta = conta
+        self.dia = dia
+        self.centavos = centavos
+        contas, inicios = np.unique(conta, return_index=True)
+        fins = np.append(inicios[1:], len(conta))
+        ativas = set(ativas)
+        # Trecho [inicio, fim) de cada conta ativa
+        self._trechos = [
+            (int(inicio), int(fim))
+            for seq_conta, inicio, fim in zip(contas.tolist(), inicios, fins)
+            if seq_conta in ativas
+        ]
+
+    def __len__(self) -> int:
+        return len(self.conta)
+
+    def total(self, data: date, inclusive: bool = True) -> float:
+        """Sum, over active accounts, of the latest informed balance up to a date.
+
+        Same result as `SaldoContaDiarioRepository.get_saldo_informado_total`.
+
+        Args:
+            data: Reference date
+            inclusive: If True consider balances informed on `data`
+
+        Returns:
+            Total balance (0 if no informed balances)
+        """
+        alvo = data.toordinal()
+        lado = 'right' if inclusive else 'left'
+        centavos = 0
+        for inicio, fim in self._trechos:
+            posicao = inicio + int(np.searchsorted(self.dia[inicio:fim], alvo, side=lado)) - 1
+            if posicao >= inicio:
+                centavos += int(self.centavos[posicao])
+        return centavos / 100
+
+
+def diretorio(bind=engine) -> str:
+    """Directory of the column files (``Config.COLUNAS_MAPEADAS_DIR``).
+
+    Default: ``<banco>_colunas`` beside a SQLite database, otherwise
+    ``instance/colunas``.
+    """
+    if Config.COLUNAS_MAPEADAS_DIR:
+        return Config.COLUNAS_MAPEADAS_DIR
+    banco = bind.url.database
+    if bind.dialect.name == 'sqlite' and banco and banco != ':memory:' and 'mode=memory' not in str(bind.url):
+        raiz, _ = os.path.splitext(os.path.abspath(banco))
+        return f'{raiz}_colunas'
+    return os.path.join(BASE_DIR, 'instance', 'colunas')
+
+
+def _marcas(bind) -> dict:
+    # Maiores chaves: uma geração anterior a inclusões feitas com a aplicação
+    # parada é reconhecida sem varrer as tabelas
+    with bind.connect() as conn:
+        return {
+            'lancamento': conn.execute(select(func.max(Lancamento.seq_lancamento))).scalar(),
+            'saldo': conn.execute(select(func.max(SaldoConta.seq_saldo_conta))).scalar(),
+        }
+
+
+def _ler_saldos(bind) -> tuple[dict[str, np.ndarray], list[int]]:
+    consulta = select(
+        SaldoConta.seq_conta,
+        cast(SaldoConta.dat_saldo, String),
+        cast(func.round(SaldoConta.val_saldo * 100), BigInteger),
+    ).order_by(SaldoConta.seq_conta, SaldoConta.dat_saldo)
+    with bind.connect() as conn:
+        linhas = conn.execute(consulta).all()
+        ativas = conn.execute(
+            select(ContaBancaria.seq_conta).where(ContaBancaria.ind_status == 'A')
+        ).scalars().all()
+    conta, datas, centavos = zip(*linhas) if linhas else ((), (), ())
+    return {
+        'conta': np.array(conta, dtype=np.int32),
+        'dia': _dias(list(datas)) if datas else np.empty(0, dtype=np.int32),
+        'centavos': np.array(centavos, dtype=np.int64),
+    }, list(ativas)
+
+
+def _geracoes(raiz: str) -> list[str]:
+    return sorted(nome for nome in os.listdir(raiz) if nome.startswith(_PREFIXO))
+
+
+def _ler_atual(raiz: str) -> str | None:
+    try:
+        with open(os.path.join(raiz, _ATUAL)) as arquivo:
+            return arquivo.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _travar(raiz: str):
+    if not HAS_FCNTL:
+        with _trava_construcao:
+            yield
+        return
+    with open(os.path.join(raiz, _TRAVA), 'w') as trava:
+        fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def construir(bind=engine, raiz: str | None = None, desde: float | None = None) -> dict:
+    """Write a new generation of column files and make it the current one.
+
+    Only one process builds at a time (lock file; without ``fcntl``, only
+    one thread of this process); the others wait and then build from the
+    data committed meanwhile.
+
+    Args:
+        bind: Engine to read from
+        raiz: Directory of the files (default: `diretorio()`)
+        desde: Skip the build if the current generation was read after this
+            time (`time.time()`), e.g. by another worker while this one waited
+
+    Returns:
+        Dictionary with 'geracao', 'lancamentos' and 'saldos'
+    """
+    raiz = raiz or diretorio(bind)
+    os.makedirs(raiz, exist_ok=True)
+    with _travar(raiz):
+        atual = _ler_atual(raiz)
+        if desde is not None and atual is not None:
+            try:
+                with open(os.path.join(raiz, atual, 'meta.json')) as arquivo:
+                    meta = json.load(arquivo)
+            except FileNotFoundError:
+                meta = None
+            if meta is not None and meta['lido_em'] >= desde:
+                return {'geracao': atual, 'lancamentos': meta['lancamentos'], 'saldos': meta['saldos']}
+
+        # Anteriores à leitura: escrita confirmada no meio deixa a geração
+        # com revisão menor, nunca o contrário
+        lido_em = time.time()
+        revisoes = revisao_repository.ler(bind, _DOMINIOS)
+        marcas = _marcas(bind)
+        lancamentos, categorias = lancamento_colunar_repository.ler(bind).exportar()
+        saldos, ativas = _ler_saldos(bind)
+
+        anteriores = _geracoes(raiz)
+        numero = int(anteriores[-1][len(_PREFIXO):]) + 1 if anteriores else 1
+        nome = f'{_PREFIXO}{numero:06d}'
+        temporario = os.path.join(raiz, f'.{nome}.{os.getpid()}')
+        os.makedirs(temporario)
+        for prefixo, colunas in (('lancamento', lancamentos), ('saldo', saldos)):
+            for coluna, valores in colunas.items():
+                np.save(os.path.join(temporario, f'{prefixo}.{coluna}.npy'), np.ascontiguousarray(valores))
+        with open(os.path.join(temporario, 'meta.json'), 'w') as arquivo:
+            json.dump({
+                'lido_em': lido_em,
+                'revisoes': revisoes,
+                'marcas': marcas,
+                'lancamentos': len(lancamentos['seq']),
+                'saldos': len(saldos['conta']),
+                'lancamento': sorted(lancamentos),
+                'saldo': sorted(saldos),
+                'categorias': categorias,
+                'contas_ativas': ativas,
+            }, arquivo)
+        os.rename(temporario, os.path.join(raiz, nome))
+
+        ponteiro = os.path.join(raiz, f'.{_ATUAL}.{os.getpid()}')
+        with open(ponteiro, 'w') as arquivo:
+            arquivo.write(nome)
+        os.replace(ponteiro, os.path.join(raiz, _ATUAL))
+
+        # Mantém a anterior para quem está entre ler ATUAL e abrir os arquivos
+        for antiga in anteriores[:-1]:
+            shutil.rmtree(os.path.join(raiz, antiga), ignore_errors=True)
+    return {'geracao': nome, 'lancamentos': len(lancamentos['seq']), 'saldos': len(saldos['conta'])}
+
+
+# ==================== Workers ====================
+
+_raiz: str | None = None
+_assinatura = None
+_meta: dict | None = None
+_saldos: ColunasSaldo | None = None
+# Hora do agendamento da construção pendente (None = nenhuma)
+_agendada: float | None = None
+_trava = threading.Lock()
+
+
+def colunas_saldo() -> ColunasSaldo | None:
+    """Mapped informed balances (None when not mapped in this worker)."""
+    return _saldos
+
+
+def _assinar(raiz: str):
+    info = os.stat(os.path.join(raiz, _ATUAL))
+    return info.st_ino, info.st_mtime_ns
+
+
+def _soltar() -> None:
+    global _saldos, _meta
+    colunas = lancamento_colunar_repository.colunas_lancamento()
+    if colunas is not None and not colunas.gravavel:
+        lancamento_colunar_repository.descartar()
+    _saldos = None
+    _meta = None
+
+
+def _defasada(meta: dict) -> bool:
+    # Geração lida antes de uma escrita que este worker já viu
+    revisoes = meta.get('revisoes', {})
+    return any(revisoes.get(dominio, 0) < revisao_repository.revisao(dominio) for dominio in _DOMINIOS)
+
+
+def mapear() -> bool:
+    """Map the current generation, unless it predates a write seen by this worker.
+
+    Returns:
+        True if a generation is mapped after the call
+    """
+    global _assinatura, _meta, _saldos
+    if _raiz is None:
+        return False
+    with _trava:
+        try:
+            assinatura = _assinar(_raiz)
+        except FileNotFoundError:
+            return False
+        if assinatura == _assinatura:
+            return _meta is not None
+        _assinatura = assinatura
+        try:
+            pasta = os.path.join(_raiz, _ler_atual(_raiz) or '')
+            with open(os.path.join(pasta, 'meta.json')) as arquivo:
+                meta = json.load(arquivo)
+            if _defasada(meta):
+                return _meta is not None
+
+            def abrir(prefixo):
+                return {
+                    coluna: np.load(os.path.join(pasta, f'{prefixo}.{coluna}.npy'), mmap_mode='r')
+                    for coluna in meta[prefixo]
+                }
+
+            lancamentos = abrir('lancamento')
+            saldos = abrir('saldo')
+        except FileNotFoundError:
+            # Geração apagada entre ler ATUAL e abri-la: a próxima troca de ATUAL resolve
+            return _meta is not None
+        lancamento_colunar_repository.instalar(
+            ColunasLancamento.somente_leitura(lancamentos, meta['categorias'])
+        )
+        _saldos = ColunasSaldo(saldos['conta'], saldos['dia'], saldos['centavos'], meta['contas_ativas'])
+        _meta = meta
+        return True
+
+
+def acompanhar() -> None:
+    """Map a generation published by any worker since the last call (one `stat`)."""
+    if _raiz is None:
+        return
+    try:
+        assinatura = _assinar(_raiz)
+    except FileNotFoundError:
+        return
+    if assinatura != _assinatura:
+        mapear()
+
+
+def _construir_agendado() -> None:
+    global _agendada
+    with _trava:
+        raiz, desde, _agendada = _raiz, _agendada, None
+    if raiz is None:
+        return
+    try:
+        construir(raiz=raiz, desde=desde)
+    except Exception:
+        logger.exception('Falha ao construir as colunas mapeadas em %s', raiz)
+        return
+    mapear()
+
+
+def agendar_construcao(atraso: float | None = None) -> None:
+    """Build a new generation in a background thread after `atraso` seconds.
+
+    A build already scheduled and not yet started also covers later writes.
+    """
+    global _agendada
+    with _trava:
+        if _agendada is not None or _raiz is None:
+            return
+        _agendada = time.time()
+    temporizador = threading.Timer(
+        Config.COLUNAS_MAPEADAS_ATRASO_S if atraso is None else atraso, _construir_agendado
+    )
+    temporizador.daemon = True
+    temporizador.start()
+
+
+def iniciar(raiz: str | None = None) -> bool:
+    """Use the shared column files in this worker (called by `create_app`).
+
+    Maps the current generation right away; when there is none, or the
+    database has rows newer than it, a build is scheduled and the
+    repositories use SQL until it is published.
+
+    Returns:
+        True if a generation was mapped
+    """
+    global _raiz, _assinatura
+    _raiz = raiz or diretorio()
+    _assinatura = None
+    os.makedirs(_raiz, exist_ok=True)
+    if mapear() and _meta['marcas'] == _marcas(engine):
+        return True
+    _soltar()
+    agendar_construcao(0)
+    return False
+
+
+def encerrar() -> None:
+    """Stop using the column files in this worker."""
+    global _raiz, _assinatura
+    _raiz = None
+    _assinatura = None
+    _soltar()
+
+
+# ==================== Sincronização ====================
+
+_ALTERADO_KEY = 'colunas_mapeadas_alteradas'
+_MONITORADOS = (Lancamento, SaldoConta, ContaBancaria)
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    if _raiz is None or session.info.get(_ALTERADO_KEY):
+        return
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _MONITORADOS) and (obj not in session.dirty or session.is_modified(obj)):
+            session.info[_ALTERADO_KEY] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _desatualizar(session):
+    if not session.info.pop(_ALTERADO_KEY, False) or _raiz is None:
+        return
+    # Este worker volta ao SQL até a geração com a sua escrita
+    with _trava:
+        _soltar()
+    agendar_construcao()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alteracoes(session):
+    session.info.pop(_ALTERADO_KEY, None)
+
+
+@revisao_repository.ao_mudar(*_DOMINIOS)
+def _desatualizar_por_outro_worker() -> None:
+    if _raiz is None:
+        return
+    with _trava:
+        raiz = _raiz
+        if _meta is not None and _defasada(_meta):
+            _soltar()
+    try:
+        with open(os.path.join(raiz, _ler_atual(raiz) or '', 'meta.json')) as arquivo:
+            publicada = json.load(arquivo)
+    except FileNotFoundError:
+        publicada = None
+    # Geração já publicada com a escrita: `acompanhar` a mapeia. Senão o worker
+    # que escreveu em geral já agendou, e esta construção é pulada se alguma
+    # geração for lida depois do agendamento
+    if publicada is None or _defasada(publicada):
+        agendar_construcao()
@@ -0,0 +1,266 @@
+"""Embedded DuckDB analytical backend (``Config.ANALITICO_DUCKDB``).
+
+Agrupamentos como os do comparativo, da previsão e das cargas de histórico
+dos modelos e do backtest varrem anos de lançamentos para devolver poucas
+linhas; no SQLite esse tipo de consulta fica preso ao executor linha a linha.
+Com a opção ligada (requer ``duckdb``, opcional), `create_app` abre um DuckDB
+em memória que anexa o banco de leitura da aplicação somente leitura:
+
+- SQLite: ``ATTACH ... (TYPE SQLITE, READ_ONLY)``, extensão ``sqlite``; o
+  arquivo de anos arquivados (``<banco>_arquivo.db``) é anexado como ``arq``;
+- PostgreSQL: ``ATTACH ... (TYPE POSTGRES, READ_ONLY)``, extensão ``postgres``;
+  os anos arquivados são lidos das partições ``flc_lancamento_<ano>``.
+
+Com ``Config.ANALITICO_PARQUET_DIR``, cada ano arquivado é lido de
+``flc_lancamento_<ano>.parquet`` nesse diretório, gravado a partir do arquivo
+no primeiro uso (o conteúdo de um ano arquivado não muda). Arquivar e
+restaurar um ano apagam o seu Parquet (`descartar_parquet`): restaurado, o
+ano pode ser reaberto, alterado e arquivado de novo.
+
+O DuckDB lê as tabelas anexadas a cada consulta: não há cópia a invalidar.
+`LancamentoRepository` usa as funções deste módulo quando o backend está
+ativo e a cópia colunar não está carregada; as linhas devolvidas têm os
+mesmos campos das consultas SQL. As extensões precisam estar instaladas no
+DuckDB (``INSTALL sqlite``/``INSTALL postgres``, com rede no primeiro uso, ou
+o pacote ``duckdb-extension-*`` correspondente).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import namedtuple
+from datetime import date
+
+HAS_DUCKDB = False
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except ImportError:
+    pass
+
+from ..config import Config
+from ..models.base import engine_leitura
+from .lancamento_arquivo_repository import anos_arquivados, caminho_arquivo_sqlite
+
+_QualificadorAnoMesTipo = namedtuple(
+    '_QualificadorAnoMesTipo', 'seq_qualificador ano mes cod_tipo_lancamento total'
+)
+_OrigemAnoMes = namedtuple('_OrigemAnoMes', 'dsc_origem_lancamento year month total')
+_QualificadorAnoMes = namedtuple('_QualificadorAnoMes', 'seq_qualificador ano mes total')
+
+_COLUNAS = (
+    'dat_lancamento, seq_qualificador, cod_tipo_lancamento, '
+    'cod_origem_lancamento, seq_conta, ind_status, val_lancamento'
+)
+# Soma exata: o SQLite entrega val_lancamento como DOUBLE
+_TOTAL = 'SUM(CAST(val_lancamento AS DECIMAL(18, 2)))'
+
+_conexao = None
+_esquema: str | None = None
+_arquivo_sqlite: str | None = None
+_trava = threading.Lock()
+
+
+def ativo() -> bool:
+    """Whether the analytical backend is open in this process."""
+    return _conexao is not None
+
+
+def _literal(texto: str) -> str:
+    return "'" + texto.replace("'", "''") + "'"
+
+
+def _dsn_postgres(url) -> str:
+    partes = {
+        'host': url.host,
+        'port': url.port,
+        'dbname': url.database,
+        'user': url.username,
+        'password': url.password,
+    }
+    valores = {
+        chave: "'" + str(valor).replace('\\', '\\\\').replace("'", "\\'") + "'"
+        for chave, valor in partes.items()
+        if valor is not None
+    }
+    return ' '.join(f'{chave}={valor}' for chave, valor in valores.items())
+
+
+def iniciar(bind=engine_leitura) -> None:
+    """Open the DuckDB of this process attached (read-only) to `bind`'s database.
+
+    Args:
+        bind: Engine whose database is attached (default: the read engine)
+
+    Raises:
+        RuntimeError: duckdb not installed, or unsupported database
+    """
+    global _conexao, _esquema, _arquivo_sqlite
+    if not HAS_DUCKDB:
+        raise RuntimeError('Backend analítico requer duckdb. Execute: pip install duckdb')
+    conexao = duckdb.connect()
+    if Config.ANALITICO_DUCKDB_THREADS:
+        conexao.execute(f'SET threads = {int(Config.ANALITICO_DUCKDB_THREADS)}')
+    url = bind.url
+    if bind.dialect.name == 'sqlite':
+        banco = url.database
+        if not banco or banco == ':memory:' or 'mode=memory' in str(url):
+            raise RuntimeError('Backend analítico requer um banco SQLite em arquivo')
+        conexao.execute('INSTALL sqlite')
+        conexao.execute('LOAD sqlite')
+        conexao.execute(f'ATTACH {_literal(os.path.abspath(banco))} AS op (TYPE SQLITE, READ_ONLY)')
+        esquema = 'op'
+        arquivo = caminho_arquivo_sqlite(bind)
+    elif bind.dialect.name == 'postgresql':
+        conexao.execute('INSTALL postgres')
+        conexao.execute('LOAD postgres')
+        conexao.execute(f'ATTACH {_literal(_dsn_postgres(url))} AS op (TYPE POSTGRES, READ_ONLY)')
+        esquema = 'op.public'
+        arquivo = None
+    else:
+        raise RuntimeError(f'Backend analítico não suporta {bind.dialect.name}')
+    with _trava:
+        _conexao, _esquema, _arquivo_sqlite = conexao, esquema, arquivo
+
+
+def encerrar() -> None:
+    """Close the analytical backend of this process."""
+    global _conexao
+    with _trava:
+        conexao, _conexao = _conexao, None
+    if conexao is not None:
+        conexao.close()
+
+
+# ==================== Fonte ====================
+
+def _caminho_parquet(ano: int) -> str:
+    return os.path.join(Config.ANALITICO_PARQUET_DIR, f'flc_lancamento_{int(ano)}.parquet')
+
+
+def descartar_parquet(ano: int) -> None:
+    """Delete the Parquet copy of `ano`, if any (the year is being archived or restored)."""
+    if not Config.ANALITICO_PARQUET_DIR:
+        return
+    try:
+        os.remove(_caminho_parquet(ano))
+    except FileNotFoundError:
+        pass
+
+
+def _tabela_ano(ano: int) -> str:
+    """Relation with the archived lancamentos of `ano`."""
+    nome = f'flc_lancamento_{int(ano)}'
+    if Config.ANALITICO_PARQUET_DIR:
+        caminho = _caminho_parquet(ano)
+        if not os.path.exists(caminho):
+            _gravar_parquet(_tabela_arquivada(nome), caminho)
+        return f'read_parquet({_literal(caminho)})'
+    return _tabela_arquivada(nome)
+
+
+def _tabela_arquivada(nome: str) -> str:
+    if _arquivo_sqlite is None:
+        return f'{_esquema}.{nome}'
+    # Anexado só quando há ano arquivado: o arquivo pode ter sido criado depois de `iniciar`
+    anexados = {linha[0] for linha in _conexao.execute('SELECT database_name FROM duckdb_databases()').fetchall()}
+    if 'arq' not in anexados:
+        _conexao.execute(f'ATTACH {_literal(_arquivo_sqlite)} AS arq (TYPE SQLITE, READ_ONLY)')
+    return f'arq.{nome}'
+
+
+def _gravar_parquet(tabela: str, caminho: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    _conexao.execute(
+        f'COPY (SELECT {_COLUNAS} FROM {tabela}) TO {_literal(temporario)} (FORMAT PARQUET)'
+    )
+    os.replace(temporario, caminho)
+
+
+def _fonte(anos=None) -> str:
+    """Every lancamento (hot table plus the archived years among `anos`) as a subquery."""
+    with _trava:
+        partes = [f'{_esquema}.flc_lancamento']
+        for ano in sorted(anos_arquivados()):
+            if anos is None or ano in anos:
+                partes.append(_tabela_ano(ano))
+    return '(' + ' UNION ALL '.join(f'SELECT {_COLUNAS} FROM {parte}' for parte in partes) + ')'
+
+
+def _consultar(sql: str, parametros: list) -> list[tuple]:
+    # Um cursor por chamada: a conexão base é compartilhada entre threads
+    cursor = _conexao.cursor()
+    try:
+        return cursor.execute(sql, parametros).fetchall()
+    finally:
+        cursor.close()
+
+
+def _periodo(anos) -> list[date]:
+    return [date(min(anos), 1, 1), date(max(anos), 12, 31)]
+
+
+# ==================== Consultas ====================
+
+def grouped_by_qualificador_year_month(qualificador_ids, anos, meses) -> list:
+    """Same rows as `LancamentoRepository.get_grouped_by_qualificador_year_month`."""
+    anos, meses = [int(a) for a in anos], [int(m) for m in meses]
+    if not anos or not meses or not qualificador_ids:
+        return []
+    linhas = _consultar(
+        f"""
+        SELECT seq_qualificador, year(dat_lancamento) AS ano, month(dat_lancamento) AS mes,
+               cod_tipo_lancamento, {_TOTAL} AS total
+        FROM {_fonte(anos)}
+        WHERE dat_lancamento BETWEEN ? AND ?
+          AND list_contains(?, seq_qualificador)
+          AND list_contains(?, year(dat_lancamento))
+          AND list_contains(?, month(dat_lancamento))
+          AND ind_status = 'A'
+        GROUP BY ALL
+        """,
+        [*_periodo(anos), [int(q) for q in qualificador_ids], anos, meses],
+    )
+    return [_QualificadorAnoMesTipo(q, a, m, t, float(total)) for q, a, m, t, total in linhas]
+
+
+def comparative_by_origem(cod_tipo: int, anos, meses) -> list:
+    """Same rows as `LancamentoRepository.get_comparative_by_origem`."""
+    anos, meses = [int(a) for a in anos], [int(m) for m in meses]
+    if not anos or not meses:
+        return []
+    linhas = _consultar(
+        f"""
+        SELECT o.dsc_origem_lancamento, year(l.dat_lancamento) AS year,
+               month(l.dat_lancamento) AS month, {_TOTAL} AS total
+        FROM {_fonte(anos)} l
+        JOIN {_esquema}.flc_origem_lancamento o USING (cod_origem_lancamento)
+        WHERE l.dat_lancamento BETWEEN ? AND ?
+          AND l.cod_tipo_lancamento = ?
+          AND list_contains(?, year(l.dat_lancamento))
+          AND list_contains(?, month(l.dat_lancamento))
+        GROUP BY ALL
+        """,
+        [*_periodo(anos), int(cod_tipo), anos, meses],
+    )
+    return [_OrigemAnoMes(d, a, m, float(total)) for d, a, m, total in linhas]
+
+
+def monthly_totals_by_qualificador(qualificador_ids, data_inicio: date, data_fim: date) -> list:
+    """Same rows as `LancamentoRepository.get_monthly_totals_by_qualificador` (every status)."""
+    if not qualificador_ids:
+        return []
+    anos = range(data_inicio.year, data_fim.year + 1)
+    linhas = _consultar(
+        f"""
+        SELECT seq_qualificador, year(dat_lancamento) AS ano, month(dat_lancamento) AS mes,
+               {_TOTAL} AS total
+        FROM {_fonte(anos)}
+        WHERE dat_lancamento BETWEEN ? AND ?
+          AND list_contains(?, seq_qualificador)
+        GROUP BY ALL
+        """,
+        [data_inicio, data_fim, [int(q) for q in qualificador_ids]],
+    )
+    return [_QualificadorAnoMes(q, a, m, float(total)) for q, a, m, total in linhas]
@@ -0,0 +1,561 @@
+"""Closed months and cold-year archive of flc_lancamento.
+
+Meses fechados (tudo até ``fechado_ate()``) têm seus totais por mês,
+qualificador, tipo, origem, conta e status congelados em
+``flc_lancamento_mensal``; lançamentos com data neles são recusados no flush
+da sessão.
+
+Anos arquivados, sempre fechados, saem de flc_lancamento (o conjunto quente,
+consultado por toda tela e relatório) para uma tabela por ano,
+``flc_lancamento_<ano>``:
+
+- PostgreSQL: partições declarativas (``PARTITION BY RANGE (dat_lancamento)``)
+  de ``flc_lancamento_arquivo``, no mesmo banco;
+- SQLite: tabelas de um segundo arquivo (``Config.ARQUIVO_LANCAMENTOS_SQLITE``),
+  anexado como ``arq`` em cada conexão das engines da aplicação.
+
+``fonte_lancamentos()`` devolve a entidade a consultar no lugar de
+``Lancamento``: a própria tabela quando a consulta não toca meses fechados
+nem anos arquivados (sem custo extra), ou um UNION ALL dos meses abertos de
+flc_lancamento com os agregados dos meses fechados, quando a consulta é de
+granularidade mensal ou maior, ou com as tabelas dos anos arquivados, quando
+precisa das linhas.
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+from itertools import chain
+
+from sqlalchemy import (
+    Column,
+    Index,
+    MetaData,
+    Table,
+    cast,
+    delete,
+    event,
+    extract,
+    func,
+    insert,
+    inspect,
+    null,
+    or_,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, aliased
+
+from ..config import Config
+from ..models import Lancamento
+from ..models.base import engine, engine_leitura
+from ..models.lancamento_arquivo import LancamentoAnoArquivado, LancamentoMensal, PeriodoFechado
+from . import revisao_repository
+
+ESQUEMA_SQLITE = 'arq'
+TABELA_PARTICIONADA = 'flc_lancamento_arquivo'
+
+_quente = Lancamento.__table__
+_mensal = LancamentoMensal.__table__
+_registro = LancamentoAnoArquivado.__table__
+_fechados = PeriodoFechado.__table__
+_metadata = MetaData()
+_tabelas: dict[int, Table] = {}
+_anos_arquivados: frozenset[int] | None = None
+_NAO_LIDO = object()
+_fechado_ate = _NAO_LIDO
+
+
+# ==================== Tabelas ====================
+
+def caminho_arquivo_sqlite(bind: Engine = engine) -> str | None:
+    """Path of the SQLite archive file (None for other backends or in-memory DBs)."""
+    if bind.dialect.name != 'sqlite':
+        return None
+    if Config.ARQUIVO_LANCAMENTOS_SQLITE:
+        return Config.ARQUIVO_LANCAMENTOS_SQLITE
+    banco = bind.url.database
+    if not banco or banco == ':memory:' or 'mode=memory' in str(bind.url):
+        return None
+    raiz, _ = os.path.splitext(os.path.abspath(banco))
+    return f'{raiz}_arquivo.db'
+
+
+def _colunas() -> list[Column]:
+    # Mesmas colunas e ordem de flc_lancamento, sem FKs (o arquivo SQLite é
+    # outro banco) e, no PostgreSQL, sem PK (teria de incluir a chave da partição)
+    sqlite = engine.dialect.name == 'sqlite'
+    return [
+        Column(c.name, c.type, nullable=c.nullable, primary_key=sqlite and c.primary_key)
+        for c in _quente.columns
+    ]
+
+
+def tabela_ano(ano: int) -> Table:
+    """Table holding the archived lancamentos of a year.
+
+    Args:
+        ano: Archived year
+
+    Returns:
+        SQLAlchemy Table with the columns of flc_lancamento
+    """
+    tabela = _tabelas.get(ano)
+    if tabela is None:
+        nome = f'flc_lancamento_{int(ano)}'
+        if engine.dialect.name == 'sqlite':
+            tabela = Table(nome, _metadata, *_colunas(), schema=ESQUEMA_SQLITE)
+            Index(f'ix_{nome}_data', tabela.c.dat_lancamento, tabela.c.seq_qualificador)
+        else:
+            tabela = Table(nome, _metadata, *_colunas())
+        _tabelas[ano] = tabela
+    return tabela
+
+
+def _tabela_particionada() -> Table:
+    tabela = _metadata.tables.get(TABELA_PARTICIONADA)
+    if tabela is None:
+        tabela = Table(
+            TABELA_PARTICIONADA, _metadata, *_colunas(),
+            postgresql_partition_by='RANGE (dat_lancamento)',
+        )
+        # Criado na tabela mãe, vale para todas as partições
+        Index('ix_lancamento_arquivo_data', tabela.c.dat_lancamento, tabela.c.seq_qualificador)
+    return tabela
+
+
+def _anexar_arquivo(dbapi_connection, connection_record, connection_proxy):
+    if connection_record.info.get('arquivo_anexado'):
+        return
+    caminho = caminho_arquivo_sqlite()
+    if caminho is None or not os.path.exists(caminho):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'ATTACH DATABASE ? AS {ESQUEMA_SQLITE}', (caminho,))
+    finally:
+        cursor.close()
+    connection_record.info['arquivo_anexado'] = True
+
+
+def instalar_anexo(*engines: Engine) -> None:
+    """Attach the SQLite archive on checkout of every connection of the engines.
+
+    Done on checkout (not only on connect) so connections opened before the
+    first archival pick up the file once it exists. No-op for other backends.
+    """
+    for alvo in engines:
+        if alvo.dialect.name == 'sqlite' and not event.contains(alvo, 'checkout', _anexar_arquivo):
+            event.listen(alvo, 'checkout', _anexar_arquivo)
+
+
+instalar_anexo(engine, engine_leitura)
+
+
+# ==================== Meses fechados e anos arquivados ====================
+
+def anos_arquivados() -> frozenset[int]:
+    """Archived years, read once per process (see `invalidar_cache`)."""
+    global _anos_arquivados
+    if _anos_arquivados is None:
+        with engine.connect() as conn:
+            if not inspect(conn).has_table(_registro.name):
+                return frozenset()
+            _anos_arquivados = frozenset(conn.execute(select(_registro.c.ano)).scalars())
+    return _anos_arquivados
+
+
+def fechado_ate() -> date | None:
+    """Last day of the last closed month, read once per process (see `invalidar_cache`).
+
+    Returns:
+        Every lancamento up to this date is closed; None when no month is
+    """
+    global _fechado_ate
+    if _fechado_ate is _NAO_LIDO:
+        with engine.connect() as conn:
+            if not inspect(conn).has_table(_fechados.name):
+                return None
+            _fechado_ate = ultimo_mes_fechado(conn)
+    return _fechado_ate
+
+
+@revisao_repository.ao_mudar('periodo')
+def invalidar_cache() -> None:
+    """Forget archived years and closed months after any of them changes.
+
+    Also run when another worker closes, reopens, archives or restores.
+    """
+    global _anos_arquivados, _fechado_ate
+    _anos_arquivados = None
+    _fechado_ate = _NAO_LIDO
+
+
+def periodo_fechado(dia: date) -> bool:
+    """Whether a lancamento dated `dia` falls in a closed month."""
+    limite = fechado_ate()
+    return limite is not None and dia <= limite
+
+
+# ==================== Roteamento ====================
+
+def _ultimo_dia_mes(dia: date) -> bool:
+    return (dia + timedelta(days=1)).day == 1
+
+
+def _colunas_mensais() -> list:
+    """Monthly aggregates shaped as flc_lancamento rows (one per month and key)."""
+    valores = {
+        'dat_lancamento': _mensal.c.dat_mes,
+        'seq_qualificador': _mensal.c.seq_qualificador,
+        'val_lancamento': _mensal.c.val_total,
+        'cod_tipo_lancamento': _mensal.c.cod_tipo_lancamento,
+        'cod_origem_lancamento': _mensal.c.cod_origem_lancamento,
+        'ind_status': _mensal.c.ind_status,
+        'seq_conta': _mensal.c.seq_conta,
+    }
+    return [
+        valores.get(c.name, cast(null(), c.type)).label(c.name)
+        for c in _quente.columns
+    ]
+
+
+def _fim_mes(dia: date) -> date:
+    return date(dia.year + dia.month // 12, dia.month % 12 + 1, 1) - timedelta(days=1)
+
+
+def _meses_agregados(inicio: date | None, fim: date | None):
+    """First and last day of the whole closed months inside [inicio, fim].
+
+    Returns:
+        Tuple (first day or None when unbounded, last day), or None when the
+        range holds no whole closed month
+    """
+    limite = fechado_ate()
+    if limite is None:
+        return None
+    primeiro = inicio
+    if primeiro is not None and primeiro.day != 1:
+        primeiro = _fim_mes(primeiro) + timedelta(days=1)
+    ultimo = limite if fim is None or fim > limite else fim
+    if not _ultimo_dia_mes(ultimo):
+        ultimo = date(ultimo.year, ultimo.month, 1) - timedelta(days=1)
+    if primeiro is not None and primeiro > ultimo:
+        return None
+    return primeiro, ultimo
+
+
+def _fora_dos_agregados(coluna, agregado):
+    if agregado is None:
+        return None
+    primeiro, ultimo = agregado
+    if primeiro is None:
+        return coluna > ultimo
+    return or_(coluna < primeiro, coluna > ultimo)
+
+
+def fonte_lancamentos(
+    anos=None,
+    inicio: date | None = None,
+    fim: date | None = None,
+    mensal: bool = False,
+):
+    """Entity to query in place of `Lancamento` for a set of years or a date range.
+
+    When the query touches neither closed months (with `mensal`) nor archived
+    years this is `Lancamento` itself. Otherwise it is an alias over the
+    UNION ALL of the parts that hold the window: open months of
+    flc_lancamento, the aggregates of closed months and the tables of
+    archived years. Filters on years/dates still have to be applied by the
+    caller, exactly as on `Lancamento`.
+
+    Args:
+        anos: Years the query filters on (None = use `inicio`/`fim`)
+        inicio: First day of the range (None = unbounded)
+        fim: Last day of the range (None = unbounded)
+        mensal: The query only sums `val_lancamento` grouped/filtered by month
+            or coarser (plus qualificador, tipo, origem, conta and status);
+            whole closed months are then read from flc_lancamento_mensal, and
+            only the months cut by `inicio`/`fim` come from the rows
+
+    Returns:
+        `Lancamento` or an aliased entity with the same attributes
+    """
+    if anos is not None:
+        anos = {int(a) for a in anos}
+        if not anos:
+            return Lancamento
+        inicio, fim = date(min(anos), 1, 1), date(max(anos), 12, 31)
+    agregado = _meses_agregados(inicio, fim) if mensal else None
+
+    def coberto(ano: int) -> bool:
+        return agregado is not None and (
+            (agregado[0] is None or agregado[0] <= date(ano, 1, 1))
+            and agregado[1] >= date(ano, 12, 31)
+        )
+
+    detalhados = [
+        ano for ano in sorted(anos_arquivados())
+        if (anos is None or ano in anos)
+        and (inicio is None or ano >= inicio.year)
+        and (fim is None or ano <= fim.year)
+        and not coberto(ano)
+    ]
+    if agregado is None and not detalhados:
+        return Lancamento
+
+    def linhas(tabela: Table):
+        consulta = select(*tabela.columns)
+        condicao = _fora_dos_agregados(tabela.c.dat_lancamento, agregado)
+        return consulta if condicao is None else consulta.where(condicao)
+
+    partes = []
+    # Meses fechados cobrindo a janela inteira dispensam flc_lancamento
+    if agregado is None or agregado != (inicio, fim):
+        partes.append(linhas(_quente))
+    partes += [linhas(tabela_ano(ano)) for ano in detalhados]
+    if agregado is not None:
+        primeiro, ultimo = agregado
+        meses = select(*_colunas_mensais()).where(_mensal.c.dat_mes <= ultimo)
+        if primeiro is not None:
+            meses = meses.where(_mensal.c.dat_mes >= primeiro)
+        partes.append(meses)
+    fonte = union_all(*partes) if len(partes) > 1 else partes[0]
+    return aliased(Lancamento, fonte.subquery('lancamento_com_arquivo'), adapt_on_names=True)
+
+
+# ==================== Fechamento ====================
+# Usado por `services/fechamento_service.py` e `services/arquivamento_service.py`;
+# cada função roda na conexão recebida, sem commit.
+
+def ultimo_mes_fechado(conn: Connection) -> date | None:
+    """Last day of the last closed month (None when no month is closed)."""
+    mes = conn.execute(select(func.max(_fechados.c.dat_mes))).scalar()
+    return _fim_mes(mes) if mes is not None else None
+
+
+def primeiro_dia_quente(conn: Connection) -> date | None:
+    """Date of the oldest lancamento in flc_lancamento."""
+    return conn.execute(select(func.min(_quente.c.dat_lancamento))).scalar()
+
+
+def _meses(inicio: date, fim: date) -> list[date]:
+    meses, mes = [], date(inicio.year, inicio.month, 1)
+    while mes <= fim:
+        meses.append(mes)
+        mes = _fim_mes(mes) + timedelta(days=1)
+    return meses
+
+
+def _chave_mes(coluna_data):
+    return extract('year', coluna_data), extract('month', coluna_data)
+
+
+def gravar_agregados(conn: Connection, inicio: date, fim: date) -> None:
+    """Write the monthly aggregates of whole months [inicio, fim], computed from flc_lancamento."""
+    conn.execute(delete(_mensal).where(_mensal.c.dat_mes.between(inicio, fim)))
+    ano, mes = _chave_mes(_quente.c.dat_lancamento)
+    chaves = (
+        _quente.c.seq_qualificador,
+        _quente.c.cod_tipo_lancamento,
+        _quente.c.cod_origem_lancamento,
+        _quente.c.seq_conta,
+        _quente.c.ind_status,
+    )
+    linhas = conn.execute(
+        select(
+            ano.label('ano'),
+            mes.label('mes'),
+            *chaves,
+            func.sum(_quente.c.val_lancamento).label('val_total'),
+            func.count().label('qtd_lancamentos'),
+        )
+        .where(_quente.c.dat_lancamento.between(inicio, fim))
+        .group_by(ano, mes, *chaves)
+    ).mappings().all()
+    if linhas:
+        conn.execute(insert(_mensal), [
+            {
+                'dat_mes': date(int(linha['ano']), int(linha['mes']), 1),
+                'seq_qualificador': linha['seq_qualificador'],
+                'cod_tipo_lancamento': linha['cod_tipo_lancamento'],
+                'cod_origem_lancamento': linha['cod_origem_lancamento'],
+                'seq_conta': linha['seq_conta'],
+                'ind_status': linha['ind_status'],
+                'val_total': linha['val_total'],
+                'qtd_lancamentos': linha['qtd_lancamentos'],
+            }
+            for linha in linhas
+        ])
+
+
+def fechar_meses(conn: Connection, inicio: date, fim: date) -> tuple[int, float]:
+    """Freeze the aggregates of whole months [inicio, fim] and mark them closed.
+
+    Args:
+        conn: Connection inside the caller's transaction
+        inicio: First day of the first month to close
+        fim: Last day of the last month to close
+
+    Returns:
+        Tuple (lancamentos, value sum) of the closed months
+    """
+    gravar_agregados(conn, inicio, fim)
+    ano, mes = _chave_mes(_quente.c.dat_lancamento)
+    totais = {
+        (int(linha.ano), int(linha.mes)): (int(linha.qtd), linha.total)
+        for linha in conn.execute(
+            select(
+                ano.label('ano'),
+                mes.label('mes'),
+                func.count().label('qtd'),
+                func.sum(_quente.c.val_lancamento).label('total'),
+            )
+            .where(_quente.c.dat_lancamento.between(inicio, fim))
+            .group_by(ano, mes)
+        )
+    }
+    conn.execute(delete(_fechados).where(_fechados.c.dat_mes.between(inicio, fim)))
+    registros = []
+    for mes_fechado in _meses(inicio, fim):
+        qtd, total = totais.get((mes_fechado.year, mes_fechado.month), (0, 0))
+        registros.append({
+            'dat_mes': mes_fechado,
+            'dat_fechamento': date.today(),
+            'qtd_lancamentos': qtd,
+            'val_total': total,
+        })
+    conn.execute(insert(_fechados), registros)
+    return (
+        sum(r['qtd_lancamentos'] for r in registros),
+        round(sum(float(r['val_total']) for r in registros), 2),
+    )
+
+
+def reabrir_meses(conn: Connection, inicio: date) -> int:
+    """Reopen every closed month from `inicio` on, dropping their aggregates.
+
+    Returns:
+        Number of months reopened
+    """
+    conn.execute(delete(_mensal).where(_mensal.c.dat_mes >= inicio))
+    return conn.execute(delete(_fechados).where(_fechados.c.dat_mes >= inicio)).rowcount
+
+
+def totais_fechados(conn: Connection, ano: int) -> tuple[int, float]:
+    """Row count and value sum recorded when the months of a year were closed."""
+    qtd, total = conn.execute(
+        select(
+            func.coalesce(func.sum(_fechados.c.qtd_lancamentos), 0),
+            func.coalesce(func.sum(_fechados.c.val_total), 0),
+        ).where(_do_ano(_fechados.c.dat_mes, ano))
+    ).one()
+    return int(qtd), round(float(total), 2)
+
+
+# ==================== Arquivamento ====================
+# Usado por `services/arquivamento_service.py`; cada função roda na conexão
+# recebida, sem commit.
+
+def criar_tabela_ano(conn: Connection, ano: int) -> Table:
+    """Create the (empty) archive table of a year, replacing a leftover one."""
+    tabela = tabela_ano(ano)
+    if conn.dialect.name == 'postgresql':
+        _tabela_particionada().create(conn, checkfirst=True)
+        conn.execute(text(f'DROP TABLE IF EXISTS {tabela.name}'))
+        conn.execute(text(
+            f'CREATE TABLE {tabela.name} PARTITION OF {TABELA_PARTICIONADA} '
+            f"FOR VALUES FROM ('{ano}-01-01') TO ('{ano + 1}-01-01')"
+        ))
+    else:
+        tabela.drop(conn, checkfirst=True)
+        tabela.create(conn)
+    return tabela
+
+
+def remover_tabela_ano(conn: Connection, ano: int) -> None:
+    """Drop the archive table of a year."""
+    tabela_ano(ano).drop(conn, checkfirst=True)
+
+
+def _do_ano(coluna_data, ano: int):
+    return coluna_data.between(date(ano, 1, 1), date(ano, 12, 31))
+
+
+def totais_ano(conn: Connection, tabela: Table, ano: int) -> tuple[int, float]:
+    """Row count and value sum (every status) of a year in a lancamento table."""
+    qtd, total = conn.execute(
+        select(func.count(), func.coalesce(func.sum(tabela.c.val_lancamento), 0))
+        .where(_do_ano(tabela.c.dat_lancamento, ano))
+    ).one()
+    return int(qtd), round(float(total), 2)
+
+
+def copiar_para_arquivo(conn: Connection, ano: int) -> None:
+    """Copy the lancamentos of a year from flc_lancamento to its archive table."""
+    tabela = tabela_ano(ano)
+    nomes = [c.name for c in _quente.columns]
+    conn.execute(
+        insert(tabela).from_select(
+            nomes, select(*_quente.columns).where(_do_ano(_quente.c.dat_lancamento, ano))
+        )
+    )
+
+
+def registrar_ano(conn: Connection, ano: int, qtd: int, total: float) -> None:
+    """Mark a year as archived and remove its rows from flc_lancamento."""
+    conn.execute(delete(_quente).where(_do_ano(_quente.c.dat_lancamento, ano)))
+    conn.execute(delete(_registro).where(_registro.c.ano == ano))
+    conn.execute(insert(_registro).values(
+        ano=ano, dat_arquivamento=date.today(), qtd_lancamentos=qtd, val_total=total,
+    ))
+
+
+def devolver_ao_quente(conn: Connection, ano: int) -> None:
+    """Copy an archived year back to flc_lancamento and drop its registry row.
+
+    The year stays closed: its monthly aggregates are kept.
+    """
+    tabela = tabela_ano(ano)
+    nomes = [c.name for c in _quente.columns]
+    conn.execute(insert(_quente).from_select(nomes, select(*tabela.columns)))
+    conn.execute(delete(_registro).where(_registro.c.ano == ano))
+
+
+def registro_ano(conn: Connection, ano: int):
+    """Registry row of an archived year (None when not archived)."""
+    return conn.execute(select(_registro).where(_registro.c.ano == ano)).first()
+
+
+def anos_no_quente(conn: Connection) -> list[int]:
+    """Years that still have rows in flc_lancamento."""
+    ano = extract('year', _quente.c.dat_lancamento)
+    return sorted(int(a) for a in conn.execute(select(ano).distinct()).scalars() if a is not None)
+
+
+
+# ==================== Escrita em meses fechados ====================
+
+@event.listens_for(Session, 'before_flush')
+def _recusar_periodo_fechado(session, flush_context, instances):
+    datas = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Lancamento):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        datas.append(obj.dat_lancamento)
+        # Mover um lançamento para fora de um mês fechado também o altera
+        datas.extend(inspect(obj).attrs.dat_lancamento.history.deleted)
+    datas = [dia for dia in datas if dia is not None]
+    if not datas:
+        return
+    limite = fechado_ate()
+    fechadas = [dia for dia in datas if limite is not None and dia <= limite]
+    if fechadas:
+        raise ValueError(
+            f'Período {min(fechadas):%m/%Y} fechado: lançamentos até '
+            f'{limite:%d/%m/%Y} não podem ser incluídos, alterados ou excluídos'
+        )
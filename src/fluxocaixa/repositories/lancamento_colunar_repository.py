@@ -0,0 +1,571 @@
+"""In-process columnar copy of flc_lancamento (``Config.LANCAMENTOS_COLUNAR``).
+
+Relatórios e carregadores de histórico somam os mesmos lançamentos a cada
+consulta, passando pelo ORM e convertendo Decimal em float. Com a opção
+ligada, `create_app` carrega flc_lancamento (com os anos arquivados) uma vez
+em arrays NumPy:
+
+- ``dia``: dat_lancamento como ordinal (int32), e ``mes`` como
+  ano * 12 + mês - 1 (int32), para filtrar e agrupar por período sem datas;
+- ``qualificador``, ``tipo``, ``origem``, ``conta`` e ``status`` como códigos
+  de categoria (int16/int8), com os valores em `ColunasLancamento.categorias`;
+- ``centavos``: val_lancamento em centavos (int64), somado sem erro de
+  arredondamento.
+
+`LancamentoRepository` e `modelos_economicos_service` usam a API de consulta
+(`filtro`, `somar`, `agrupar`, `acumulado`) no lugar do SQL quando a cópia
+está carregada. Os hooks de sessão no fim do módulo a mantêm em dia:
+lançamentos incluídos, alterados ou excluídos por um flush são anexados,
+corrigidos ou retirados quando a transação é confirmada. Escritas fora do ORM
+só vêm do arquivamento e da restauração, que movem linhas entre tabelas sem
+mudar o conteúdo.
+
+Cada processo tem sua cópia. Quando outro worker escreve em flc_lancamento
+(revisão ``lancamento``, ver `revisao_repository`), a cópia é descartada na
+requisição seguinte e recarregada em segundo plano (`recarregar`), com os
+repositórios no SQL enquanto isso. Uma carga que coincide com outra escrita
+é repetida até `MAX_CARGAS_RECARGA` vezes, com espera crescente; se todas
+coincidirem, outra recarga fica agendada para `PAUSA_RECARGA_S` depois (ou
+para a próxima escrita de outro worker, se vier antes). Com muitos workers e
+escritas frequentes são N recargas por escrita. Para esse caso, ver `colunas_mapeadas_repository`
+(``Config.COLUNAS_MAPEADAS``), que instala aqui uma cópia somente leitura
+mapeada de arquivos compartilhados.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import date
+
+import numpy as np
+from sqlalchemy import BigInteger, String, cast, event, func, select
+from sqlalchemy.orm import Session
+
+from ..models import Lancamento
+from ..models.base import engine
+from . import revisao_repository
+from .lancamento_arquivo_repository import fonte_lancamentos
+
+logger = logging.getLogger(__name__)
+
+# seq_conta nulo vira esta categoria
+SEM_CONTA = -1
+
+_TIPOS = {
+    'seq': np.int64,
+    'dia': np.int32,
+    'mes': np.int32,
+    'qualificador': np.int16,
+    'tipo': np.int8,
+    'origem': np.int8,
+    'conta': np.int16,
+    'status': np.int8,
+    'centavos': np.int64,
+}
+_CATEGORICAS = ('qualificador', 'tipo', 'origem', 'conta', 'status')
+_EPOCA = date(1970, 1, 1).toordinal()
+_LOTE = 50_000
+
+
+class _Categoria:
+    """Distinct values of a column and their codes (position in `valores`)."""
+
+    def __init__(self):
+        self.valores: list = []
+        self._codigos: dict = {}
+
+    def codigo(self, valor) -> int:
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def codificar(self, valores: np.ndarray) -> np.ndarray:
+        unicos, inverso = np.unique(valores, return_inverse=True)
+        mapa = np.array([self.codigo(v) for v in unicos.tolist()], dtype=np.int32)
+        return mapa[inverso.reshape(-1)]
+
+    def codigos(self, valores) -> np.ndarray:
+        """Codes of the known values among `valores` (unknown ones match nothing)."""
+        return np.array(
+            [self._codigos[v] for v in valores if v in self._codigos], dtype=np.int32
+        )
+
+    def decodificar(self, codigos: np.ndarray) -> list:
+        return [self.valores[c] for c in codigos.tolist()]
+
+
+def _dias(datas) -> np.ndarray:
+    """Ordinals of dates given as `date` objects or ISO strings."""
+    return (np.array(datas, dtype='datetime64[D]').astype(np.int64) + _EPOCA).astype(np.int32)
+
+
+def _meses(dias: np.ndarray) -> np.ndarray:
+    """ano * 12 + mês - 1 of ordinal days."""
+    return ((dias.astype(np.int64) - _EPOCA).astype('datetime64[D]')
+            .astype('datetime64[M]').astype(np.int32) + 1970 * 12)
+
+
+def _dias_do_mes(dias: np.ndarray) -> np.ndarray:
+    datas = (dias.astype(np.int64) - _EPOCA).astype('datetime64[D]')
+    return (datas - datas.astype('datetime64[M]')).astype(np.int32) + 1
+
+
+class ColunasLancamento:
+    """Columnar, append-friendly copy of the lancamentos.
+
+    Query methods take the boolean mask built by `filtro`; its length fixes
+    the rows considered, so a concurrent append does not shift the result.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.categorias = {nome: _Categoria() for nome in _CATEGORICAS}
+        self._dados = {nome: np.empty(0, dtype=tipo) for nome, tipo in _TIPOS.items()}
+        # None numa cópia somente leitura
+        self._posicao: dict[int, int] | None = {}
+        self._trava = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.n
+
+    @classmethod
+    def somente_leitura(cls, dados: dict[str, np.ndarray], valores: dict[str, list]) -> ColunasLancamento:
+        """Read-only copy over existing arrays (e.g. memory-mapped), without copying them.
+
+        Args:
+            dados: One array per column, as returned by `exportar`
+            valores: Category values per categorical column, as returned by `exportar`
+        """
+        colunas = cls()
+        colunas.n = len(dados['seq'])
+        colunas._dados = dict(dados)
+        colunas._posicao = None
+        for nome, lista in valores.items():
+            for valor in lista:
+                colunas.categorias[nome].codigo(valor)
+        return colunas
+
+    @property
+    def gravavel(self) -> bool:
+        return self._posicao is not None
+
+    def exportar(self) -> tuple[dict[str, np.ndarray], dict[str, list]]:
+        """Arrays of the present rows and category values of each categorical column."""
+        with self._trava:
+            dados = {nome: coluna[:self.n] for nome, coluna in self._dados.items()}
+            valores = {nome: list(categoria.valores) for nome, categoria in self.categorias.items()}
+        return dados, valores
+
+    # ==================== Escrita ====================
+
+    def anexar(self, colunas: dict[str, np.ndarray]) -> None:
+        """Append rows given as raw column arrays.
+
+        Args:
+            colunas: Arrays 'seq', 'dia' (ordinals), 'qualificador', 'tipo',
+                'origem', 'conta' (SEM_CONTA for null), 'status' and 'centavos'
+        """
+        qtd = len(colunas['seq'])
+        if not qtd:
+            return
+        with self._trava:
+            self._reservar(self.n + qtd)
+            self._gravar(slice(self.n, self.n + qtd), colunas)
+            if self._posicao is not None:
+                self._posicao.update(zip(colunas['seq'].tolist(), range(self.n, self.n + qtd)))
+            self.n += qtd
+
+    def aplicar(self, alteracoes: dict[int, tuple | None]) -> None:
+        """Apply committed changes: seq_lancamento -> row tuple, or None if deleted.
+
+        Row tuples follow `_linha`: (dat_lancamento, seq_qualificador,
+        cod_tipo_lancamento, cod_origem_lancamento, seq_conta, ind_status,
+        centavos).
+        """
+        novos = []
+        with self._trava:
+            for seq, linha in alteracoes.items():
+                posicao = self._posicao.get(seq)
+                if linha is None:
+                    if posicao is not None:
+                        self._retirar(seq, posicao)
+                elif posicao is None:
+                    novos.append((seq, *linha))
+                else:
+                    self._gravar(slice(posicao, posicao + 1), _colunas_de([(seq, *linha)]))
+        if novos:
+            self.anexar(_colunas_de(novos))
+
+    def _reservar(self, total: int) -> None:
+        capacidade = len(self._dados['seq'])
+        if total <= capacidade:
+            return
+        capacidade = max(total, capacidade * 2, 1024)
+        for nome, atual in self._dados.items():
+            novo = np.empty(capacidade, dtype=atual.dtype)
+            novo[:self.n] = atual[:self.n]
+            self._dados[nome] = novo
+
+    def _gravar(self, destino: slice, colunas: dict[str, np.ndarray]) -> None:
+        dias = np.asarray(colunas['dia'], dtype=np.int32)
+        self._dados['seq'][destino] = colunas['seq']
+        self._dados['dia'][destino] = dias
+        self._dados['mes'][destino] = _meses(dias)
+        self._dados['centavos'][destino] = colunas['centavos']
+        for nome in _CATEGORICAS:
+            codigos = self.categorias[nome].codificar(np.asarray(colunas[nome]))
+            coluna = self._dados[nome]
+            if len(self.categorias[nome].valores) > np.iinfo(coluna.dtype).max:
+                coluna = self._dados[nome] = coluna.astype(np.int32)
+            coluna[destino] = codigos
+
+    def _retirar(self, seq: int, posicao: int) -> None:
+        # A última linha ocupa o lugar da retirada
+        ultima = self.n - 1
+        if posicao != ultima:
+            for coluna in self._dados.values():
+                coluna[posicao] = coluna[ultima]
+            self._posicao[int(self._dados['seq'][posicao])] = posicao
+        del self._posicao[seq]
+        self.n = ultima
+
+    # ==================== Consulta ====================
+
+    def filtro(
+        self,
+        inicio: date | None = None,
+        fim: date | None = None,
+        anos=None,
+        meses=None,
+        qualificadores=None,
+        tipos=None,
+        origens=None,
+        contas=None,
+        status: str | None = 'A',
+    ) -> np.ndarray:
+        """Boolean mask of the rows matching every given condition.
+
+        Args:
+            inicio: First day (inclusive)
+            fim: Last day (inclusive)
+            anos: Years to keep
+            meses: Months (1-12) to keep, in any year
+            qualificadores: seq_qualificador values to keep
+            tipos: cod_tipo_lancamento values to keep
+            origens: cod_origem_lancamento values to keep
+            contas: seq_conta values to keep (None for no account)
+            status: ind_status to keep (None = every status)
+
+        Returns:
+            Mask over the rows present when called
+        """
+        n = self.n
+        mascara = np.ones(n, dtype=bool)
+        if inicio is not None:
+            mascara &= self._dados['dia'][:n] >= inicio.toordinal()
+        if fim is not None:
+            mascara &= self._dados['dia'][:n] <= fim.toordinal()
+        if anos is not None or meses is not None:
+            mes = self._dados['mes'][:n]
+            if anos is not None:
+                mascara &= np.isin(mes // 12, np.fromiter(anos, dtype=np.int32))
+            if meses is not None:
+                mascara &= np.isin(mes % 12 + 1, np.fromiter(meses, dtype=np.int32))
+        if contas is not None:
+            contas = [SEM_CONTA if c is None else c for c in contas]
+        criterios = {
+            'qualificador': qualificadores,
+            'tipo': tipos,
+            'origem': origens,
+            'conta': contas,
+            'status': [status] if status is not None else None,
+        }
+        for nome, valores in criterios.items():
+            if valores is not None:
+                codigos = self.categorias[nome].codigos(valores)
+                mascara &= np.isin(self._dados[nome][:n], codigos)
+        return mascara
+
+    def _chave(self, nome: str, mascara: np.ndarray) -> np.ndarray:
+        n = len(mascara)
+        if nome == 'ano':
+            return self._dados['mes'][:n][mascara] // 12
+        if nome == 'mes':
+            return self._dados['mes'][:n][mascara] % 12 + 1
+        if nome == 'dia':
+            return _dias_do_mes(self._dados['dia'][:n][mascara])
+        if nome == 'data':
+            return self._dados['dia'][:n][mascara]
+        return self._dados[nome][:n][mascara]
+
+    def _valor(self, nome: str, chaves: np.ndarray) -> list:
+        if nome == 'data':
+            return [date.fromordinal(d) for d in chaves.tolist()]
+        if nome == 'conta':
+            return [None if c == SEM_CONTA else c for c in self.categorias[nome].decodificar(chaves)]
+        if nome in self.categorias:
+            return self.categorias[nome].decodificar(chaves)
+        return chaves.tolist()
+
+    def somar(self, mascara: np.ndarray) -> float:
+        """Sum of val_lancamento over the mask, in reais."""
+        return int(self._dados['centavos'][:len(mascara)][mascara].sum()) / 100
+
+    def _grupos(self, mascara: np.ndarray, por: tuple[str, ...]):
+        centavos = self._dados['centavos'][:len(mascara)][mascara]
+        if not centavos.size:
+            return [], np.empty(0, dtype=np.int64)
+        chaves = [self._chave(nome, mascara) for nome in por]
+        ordem = np.lexsort(chaves[::-1])
+        chaves = [chave[ordem] for chave in chaves]
+        novo_grupo = np.zeros(centavos.size, dtype=bool)
+        novo_grupo[0] = True
+        for chave in chaves:
+            novo_grupo[1:] |= chave[1:] != chave[:-1]
+        inicios = np.flatnonzero(novo_grupo)
+        valores = [self._valor(nome, chave[inicios]) for nome, chave in zip(por, chaves)]
+        # Grupos em ordem crescente das chaves
+        return list(zip(*valores)), np.add.reduceat(centavos[ordem], inicios)
+
+    def agrupar(self, mascara: np.ndarray, por: tuple[str, ...]) -> dict[tuple, float]:
+        """Sum of val_lancamento over the mask grouped by one or more keys.
+
+        Args:
+            mascara: Result of `filtro`
+            por: Keys among 'qualificador', 'tipo', 'origem', 'conta',
+                'status', 'ano', 'mes' (1-12), 'dia' (day of month) and
+                'data' (date)
+
+        Returns:
+            Dict mapping a tuple of key values (in `por` order) -> sum in reais
+        """
+        chaves, somas = self._grupos(mascara, por)
+        return {chave: soma / 100 for chave, soma in zip(chaves, somas.tolist())}
+
+    def acumulado(self, mascara: np.ndarray, por: str = 'data') -> list[tuple]:
+        """Running total of val_lancamento by period.
+
+        Args:
+            mascara: Result of `filtro`
+            por: 'data' (one entry per day with lancamentos) or 'mes'
+                (one entry per (ano, mes))
+
+        Returns:
+            List of (period, running total in reais), oldest first; the
+            period is a date or an (ano, mes) tuple
+        """
+        chaves, somas = self._grupos(mascara, ('data',) if por == 'data' else ('ano', 'mes'))
+        if por == 'data':
+            chaves = [chave[0] for chave in chaves]
+        return [(chave, soma / 100) for chave, soma in zip(chaves, np.cumsum(somas).tolist())]
+
+
+def _colunas_de(linhas: list[tuple]) -> dict[str, np.ndarray]:
+    seq, datas, qualificador, tipo, origem, conta, status, centavos = zip(*linhas)
+    return {
+        'seq': np.array(seq, dtype=np.int64),
+        'dia': _dias(datas),
+        'qualificador': np.array(qualificador),
+        'tipo': np.array(tipo),
+        'origem': np.array(origem),
+        'conta': np.array([SEM_CONTA if c is None else c for c in conta]),
+        'status': np.array(status),
+        'centavos': np.array(centavos, dtype=np.int64),
+    }
+
+
+# ==================== Carga ====================
+
+_colunas: ColunasLancamento | None = None
+# Recarga em segundo plano em andamento (None = nenhuma)
+_recarga: threading.Thread | None = None
+# Cópia descartada por escrita de outro worker e ainda não recarregada
+_desatualizada = False
+_trava = threading.Lock()
+
+# Cargas de uma recarga (a espera entre elas dobra a cada uma) e pausa antes
+# da recarga seguinte quando todas coincidem com escritas de outros workers
+MAX_CARGAS_RECARGA = 3
+ESPERA_RECARGA_S = 0.5
+PAUSA_RECARGA_S = 60.0
+
+
+def colunas_lancamento() -> ColunasLancamento | None:
+    """The loaded columnar copy (None when `carregar` was not called)."""
+    return _colunas
+
+
+def ler(bind=engine) -> ColunasLancamento:
+    """Read every lancamento (archived years included) into a new columnar copy.
+
+    Args:
+        bind: Engine to read from
+
+    Returns:
+        The copy, not yet used by the repositories
+    """
+    L = fonte_lancamentos()
+    # Data como texto ISO: convertida em lote pelo NumPy, sem um `date` por linha
+    consulta = select(
+        L.seq_lancamento,
+        cast(L.dat_lancamento, String),
+        L.seq_qualificador,
+        L.cod_tipo_lancamento,
+        L.cod_origem_lancamento,
+        L.seq_conta,
+        L.ind_status,
+        cast(func.round(L.val_lancamento * 100), BigInteger),
+    )
+    colunas = ColunasLancamento()
+    with bind.connect() as conn:
+        resultado = conn.execution_options(yield_per=_LOTE).execute(consulta)
+        for lote in resultado.partitions():
+            colunas.anexar(_colunas_de(lote))
+    return colunas
+
+
+def carregar(bind=engine) -> ColunasLancamento:
+    """Load every lancamento into a new columnar copy used by this process.
+
+    Args:
+        bind: Engine to read from
+
+    Returns:
+        The copy, now used by the repositories of this process
+    """
+    return instalar(ler(bind))
+
+
+def instalar(colunas: ColunasLancamento) -> ColunasLancamento:
+    """Make the repositories of this process use `colunas`."""
+    global _colunas, _desatualizada
+    _colunas, _desatualizada = colunas, False
+    return colunas
+
+
+def descartar() -> None:
+    """Stop using the columnar copy in this process."""
+    global _colunas, _desatualizada
+    _colunas, _desatualizada = None, False
+
+
+@revisao_repository.ao_mudar('lancamento')
+def recarregar(bind=engine) -> None:
+    """Replace the copy of this process by a new one loaded in the background.
+
+    Run when another worker writes lancamentos. The repositories use SQL
+    until the new copy is installed. A load that overlaps a committed write
+    is repeated, up to `MAX_CARGAS_RECARGA` loads; after that another call
+    is scheduled `PAUSA_RECARGA_S` later. No-op for a read-only (mapped) copy
+    or when none is in use.
+
+    Args:
+        bind: Engine to read from
+    """
+    global _colunas, _desatualizada
+    with _trava:
+        if _colunas is not None and not _colunas.gravavel:
+            return
+        if _colunas is None and _recarga is None and not _desatualizada:
+            return
+        _colunas, _desatualizada = None, True
+        _iniciar_recarga(bind)
+
+
+def _iniciar_recarga(bind) -> None:
+    # Chamada com _trava
+    global _recarga
+    if _recarga is None:
+        _recarga = threading.Thread(target=_recarregar, args=(bind,), daemon=True)
+        _recarga.start()
+
+
+def _retomar(bind) -> None:
+    # Fim da pausa: nada a fazer se outra recarga já instalou uma cópia
+    with _trava:
+        if _desatualizada:
+            _iniciar_recarga(bind)
+
+
+def _recarregar(bind) -> None:
+    global _colunas, _recarga, _desatualizada
+    pausar = False
+    try:
+        for carga in range(MAX_CARGAS_RECARGA):
+            if carga:
+                time.sleep(ESPERA_RECARGA_S * 2 ** (carga - 1))
+            antes = revisao_repository.ler(bind, ('lancamento',))
+            colunas = ler(bind)
+            with _trava:
+                if revisao_repository.ler(bind, ('lancamento',)) == antes:
+                    _colunas, _recarga, _desatualizada = colunas, None, False
+                    return
+        logger.warning(
+            'Cópia colunar de flc_lancamento não recarregada: %d cargas seguidas '
+            'coincidiram com escritas de outros workers; nova recarga em %gs',
+            MAX_CARGAS_RECARGA, PAUSA_RECARGA_S,
+        )
+        pausar = True
+    except Exception:
+        logger.exception('Falha ao recarregar a cópia colunar de flc_lancamento')
+    with _trava:
+        _recarga = None
+    if pausar:
+        pausa = threading.Timer(PAUSA_RECARGA_S, _retomar, args=(bind,))
+        pausa.daemon = True
+        pausa.start()
+
+
+# ==================== Sincronização ====================
+# Alterações coletadas a cada flush e aplicadas só no commit: um rollback
+# não deixa rastro na cópia. Durante uma recarga também são coletadas: se o
+# commit vier depois de a carga conferir a revisão, são aplicadas à cópia nova.
+
+_PENDENTES_KEY = 'lancamentos_colunar_pendentes'
+
+
+def _linha(obj: Lancamento) -> tuple:
+    return (
+        obj.dat_lancamento,
+        obj.seq_qualificador,
+        obj.cod_tipo_lancamento,
+        obj.cod_origem_lancamento,
+        obj.seq_conta,
+        obj.ind_status,
+        round(float(obj.val_lancamento) * 100),
+    )
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    # Cópia mapeada: renovada por colunas_mapeadas_repository
+    if (_colunas is None or not _colunas.gravavel) and _recarga is None:
+        return
+    pendentes = session.info.setdefault(_PENDENTES_KEY, {})
+    for obj in session.new:
+        if isinstance(obj, Lancamento):
+            pendentes[obj.seq_lancamento] = _linha(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Lancamento) and session.is_modified(obj):
+            pendentes[obj.seq_lancamento] = _linha(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Lancamento):
+            pendentes[obj.seq_lancamento] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_alteracoes(session):
+    pendentes = session.info.pop(_PENDENTES_KEY, None)
+    if not pendentes:
+        return
+    with _trava:
+        if _colunas is not None and _colunas.gravavel:
+            _colunas.aplicar(pendentes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alteracoes(session):
+    session.info.pop(_PENDENTES_KEY, None)
@@ -1,16 +1,52 @@
 from __future__ import annotations
 
-from datetime import date
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, or_, extract
 
-from ..models import Lancamento, Qualificador
+from ..models import Lancamento, Qualificador, TipoLancamento, OrigemLancamento
 from ..models.base import db
 from ..domain import LancamentoCreate
+from . import lancamento_analitico_repository as analitico
+from . import revisao_repository
+from .lancamento_arquivo_repository import anos_arquivados, fonte_lancamentos
+from .lancamento_colunar_repository import colunas_lancamento
+
+
+# Colunas aceitas na ordenação da listagem (/saldos)
+_SORT_COLUMNS = (
+    'dat_lancamento',
+    'val_lancamento',
+    'cod_tipo_lancamento',
+    'cod_origem_lancamento',
+    'seq_qualificador',
+    'seq_conta',
+)
+
+# Contagens filtradas da listagem, invalidadas a cada escrita (deste ou de
+# outro worker, ver o fim do módulo)
+_COUNT_CACHE_MAX = 256
+_count_cache: dict[tuple, int] = {}
+
+# Linhas dos agrupamentos servidos pela cópia colunar, com os nomes das do SQL
+_QualificadorTipoMes = namedtuple('_QualificadorTipoMes', 'seq_qualificador cod_tipo_lancamento mes total')
+_QualificadorAnoMes = namedtuple('_QualificadorAnoMes', 'seq_qualificador ano mes total')
+_CAMPOS_COLUNARES = {'day': 'dia', 'month': 'mes', 'year': 'ano'}
 
 
 class LancamentoRepository:
-    """Data access layer for Lancamento records."""
+    """Data access layer for Lancamento records.
+
+    Reads bounded by year or date range go through `fonte_lancamentos`, so
+    archived years (see `lancamento_arquivo_repository`) are included
+    transparently; unbounded listings cover only flc_lancamento. When the
+    columnar copy is loaded (`lancamento_colunar_repository`), the report
+    aggregations are computed from it instead of SQL; otherwise, with the
+    DuckDB backend open (`lancamento_analitico_repository`), the heavy
+    multi-year groupings run there.
+    """
 
     def __init__(self, session: Session | None = None):
         self.session = session or db.session
@@ -27,57 +63,211 @@ class LancamentoRepository:
         per_page: int = 50,
         sort_by: str = 'dat_lancamento',
         sort_order: str = 'desc',
+        cursor: str | None = None,
+        direction: str = 'next',
     ) -> tuple[list, int]:
-        query = (
-            self.session.query(Lancamento)
-            .options(
-                joinedload(Lancamento.qualificador),
-                joinedload(Lancamento.tipo),
-                joinedload(Lancamento.origem),
-                joinedload(Lancamento.conta)
+        """List lancamentos with filters and pagination.
+
+        When `cursor` is given (see `encode_cursor`) the page is fetched by
+        keyset on (sort column, seq_lancamento): `direction='next'` returns
+        the rows after the cursor, `'prev'` the rows before it and `'last'`
+        the final page. Without a cursor the page falls back to OFFSET.
+        The filtered count is cached until the next write.
+
+        Returns:
+            Tuple (lancamentos, total_count)
+        """
+        filtros = (start_date, end_date, tipo, qualificador_folha, seq_conta, cod_origem)
+        L = self._fonte_listagem(start_date, end_date)
+        sort_column = self._sort_column(sort_by, L)
+        descending = sort_order != 'asc'
+
+        query = self._apply_filters(
+            self.session.query(L).options(
+                joinedload(L.qualificador),
+                joinedload(L.tipo),
+                joinedload(L.origem),
+                joinedload(L.conta)
+            ),
+            *filtros,
+            lancamento=L,
+        )
+
+        # Percorrer de trás para frente ('prev'/'last') inverte a ordenação
+        reverse = direction in ('prev', 'last')
+        if cursor and direction != 'last':
+            valor, seq = self._decode_cursor(cursor, sort_by)
+            query = query.filter(
+                self._seek_condition(sort_column, valor, seq, descending != reverse, L)
+            )
+
+        if descending != reverse:
+            query = query.order_by(sort_column.desc(), L.seq_lancamento.desc())
+        else:
+            query = query.order_by(sort_column.asc(), L.seq_lancamento.asc())
+
+        total_count = self.count_filtered(*filtros)
+
+        if direction == 'last':
+            # Última página contém apenas o resto, alinhada à numeração das demais
+            limit = total_count - ((total_count - 1) // per_page) * per_page if total_count else per_page
+            lancamentos = query.limit(limit).all()
+            lancamentos.reverse()
+        elif cursor:
+            lancamentos = query.limit(per_page).all()
+            if reverse:
+                lancamentos.reverse()
+        else:
+            offset = (page - 1) * per_page
+            lancamentos = query.offset(offset).limit(per_page).all()
+
+        return lancamentos, total_count
+
+    def count_filtered(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        tipo: int | None = None,
+        qualificador_folha: int | None = None,
+        seq_conta: int | None = None,
+        cod_origem: int | None = None,
+    ) -> int:
+        """Count active lancamentos matching the listing filters (cached per filter set)."""
+        key = (start_date, end_date, tipo, qualificador_folha, seq_conta, cod_origem)
+        if key not in _count_cache:
+            if len(_count_cache) >= _COUNT_CACHE_MAX:
+                _count_cache.clear()
+            L = self._fonte_listagem(start_date, end_date)
+            query = self._apply_filters(
+                self.session.query(func.count(L.seq_lancamento)), *key, lancamento=L
+            )
+            _count_cache[key] = query.scalar() or 0
+        return _count_cache[key]
+
+    @staticmethod
+    def invalidate_count_cache() -> None:
+        """Drop cached listing counts after lancamentos are written."""
+        _count_cache.clear()
+
+    @staticmethod
+    def encode_cursor(lancamento: Lancamento, sort_by: str = 'dat_lancamento') -> str:
+        """Build the keyset cursor (sort value + seq_lancamento) for a listed row."""
+        if sort_by not in _SORT_COLUMNS:
+            sort_by = 'dat_lancamento'
+        valor = getattr(lancamento, sort_by)
+        if sort_by == 'seq_conta':
+            valor = valor or 0
+        if isinstance(valor, date):
+            valor = valor.isoformat()
+        return f"{valor}|{lancamento.seq_lancamento}"
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort_by: str):
+        valor, seq = cursor.rsplit('|', 1)
+        if sort_by == 'val_lancamento':
+            return Decimal(valor), int(seq)
+        if sort_by in _SORT_COLUMNS and sort_by != 'dat_lancamento':
+            return int(valor), int(seq)
+        return date.fromisoformat(valor), int(seq)
+
+    @staticmethod
+    def _fonte_listagem(start_date: date | None, end_date: date | None):
+        # Sem filtro de datas a listagem cobre só o conjunto quente
+        if start_date and end_date:
+            return fonte_lancamentos(inicio=start_date, fim=end_date)
+        return Lancamento
+
+    @staticmethod
+    def _sort_column(sort_by: str, lancamento=Lancamento):
+        if sort_by == 'seq_conta':
+            # NULL sorts as the smallest value, as SQLite does, but stays comparable
+            return func.coalesce(lancamento.seq_conta, 0)
+        return getattr(lancamento, sort_by if sort_by in _SORT_COLUMNS else 'dat_lancamento')
+
+    @staticmethod
+    def _seek_condition(sort_column, valor, seq: int, descending: bool, lancamento=Lancamento):
+        if descending:
+            return or_(
+                sort_column < valor,
+                (sort_column == valor) & (lancamento.seq_lancamento < seq),
             )
-            .filter_by(ind_status='A')
+        return or_(
+            sort_column > valor,
+            (sort_column == valor) & (lancamento.seq_lancamento > seq),
         )
 
+    @staticmethod
+    def _apply_filters(
+        query,
+        start_date: date | None,
+        end_date: date | None,
+        tipo: int | None,
+        qualificador_folha: int | None,
+        seq_conta: int | None,
+        cod_origem: int | None,
+        lancamento=Lancamento,
+    ):
+        query = query.filter(lancamento.ind_status == 'A')
+
         if start_date and end_date:
-            query = query.filter(Lancamento.dat_lancamento.between(start_date, end_date))
+            query = query.filter(lancamento.dat_lancamento.between(start_date, end_date))
 
         if tipo:
-            query = query.filter(Lancamento.cod_tipo_lancamento == tipo)
+            query = query.filter(lancamento.cod_tipo_lancamento == tipo)
 
         if qualificador_folha:
-            query = query.filter(Lancamento.seq_qualificador == qualificador_folha)
+            query = query.filter(lancamento.seq_qualificador == qualificador_folha)
 
         if seq_conta:
-            query = query.filter(Lancamento.seq_conta == seq_conta)
+            query = query.filter(lancamento.seq_conta == seq_conta)
 
         if cod_origem:
-            query = query.filter(Lancamento.cod_origem_lancamento == cod_origem)
-
-        # Ordenação dinâmica
-        sort_column_map = {
-            'dat_lancamento': Lancamento.dat_lancamento,
-            'val_lancamento': Lancamento.val_lancamento,
-            'cod_tipo_lancamento': Lancamento.cod_tipo_lancamento,
-            'cod_origem_lancamento': Lancamento.cod_origem_lancamento,
-            'seq_qualificador': Lancamento.seq_qualificador,
-            'seq_conta': Lancamento.seq_conta,
-        }
-        sort_column = sort_column_map.get(sort_by, Lancamento.dat_lancamento)
-        
-        if sort_order == 'asc':
-            query = query.order_by(sort_column.asc())
-        else:
-            query = query.order_by(sort_column.desc())
+            query = query.filter(lancamento.cod_origem_lancamento == cod_origem)
 
-        # Contagem total para paginação
-        total_count = query.count()
+        return query
 
-        # Aplicar paginação
-        offset = (page - 1) * per_page
-        lancamentos = query.offset(offset).limit(per_page).all()
+    def iter_export(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        tipo: int | None = None,
+        qualificador_folha: int | None = None,
+        seq_conta: int | None = None,
+        cod_origem: int | None = None,
+        batch_size: int = 5000,
+    ):
+        """Stream the listing (same filters as `list`) in batches of column rows.
 
-        return lancamentos, total_count
+        Executed with `yield_per`, so rows come from the cursor batch by batch
+        (a server-side cursor on PostgreSQL) and memory does not grow with the
+        number of lancamentos. Ordered by (dat_lancamento, seq_lancamento).
+
+        Yields:
+            Lists of rows (seq_lancamento, dat_lancamento, num_qualificador,
+            dsc_qualificador, dsc_tipo_lancamento, dsc_origem_lancamento,
+            seq_conta, val_lancamento)
+        """
+        L = self._fonte_listagem(start_date, end_date)
+        query = self._apply_filters(
+            self.session.query(
+                L.seq_lancamento,
+                L.dat_lancamento,
+                Qualificador.num_qualificador,
+                Qualificador.dsc_qualificador,
+                TipoLancamento.dsc_tipo_lancamento,
+                OrigemLancamento.dsc_origem_lancamento,
+                L.seq_conta,
+                L.val_lancamento,
+            )
+            .join(Qualificador, Qualificador.seq_qualificador == L.seq_qualificador)
+            .join(TipoLancamento, TipoLancamento.cod_tipo_lancamento == L.cod_tipo_lancamento)
+            .join(OrigemLancamento, OrigemLancamento.cod_origem_lancamento == L.cod_origem_lancamento),
+            start_date, end_date, tipo, qualificador_folha, seq_conta, cod_origem,
+            lancamento=L,
+        ).order_by(L.dat_lancamento, L.seq_lancamento)
+        result = self.session.execute(query.statement, execution_options={'yield_per': batch_size})
+        for batch in result.partitions():
+            yield batch
 
     def get_total_by_tipo_and_period(
         self,
@@ -99,23 +289,35 @@ class LancamentoRepository:
         Returns:
             Total sum (0 if no results)
         """
-        query = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.cod_tipo_lancamento == cod_tipo,
-            Lancamento.ind_status == 'A'
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            if start_date and end_date:
+                filtro = colunas.filtro(inicio=start_date, fim=end_date, tipos=[cod_tipo])
+            else:
+                filtro = colunas.filtro(anos=[ano], meses=meses or None, tipos=[cod_tipo])
+            return colunas.somar(filtro)
+
+        if start_date and end_date:
+            L = fonte_lancamentos(inicio=start_date, fim=end_date, mensal=True)
+        else:
+            L = fonte_lancamentos(anos=[ano], mensal=True)
+        query = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.cod_tipo_lancamento == cod_tipo,
+            L.ind_status == 'A'
         )
 
         if start_date and end_date:
-            query = query.filter(Lancamento.dat_lancamento.between(start_date, end_date))
+            query = query.filter(L.dat_lancamento.between(start_date, end_date))
         elif meses:
             conditions = []
             for mes in meses:
                 conditions.append(
-                    (extract("year", Lancamento.dat_lancamento) == ano) &
-                    (extract("month", Lancamento.dat_lancamento) == mes)
+                    (extract("year", L.dat_lancamento) == ano) &
+                    (extract("month", L.dat_lancamento) == mes)
                 )
             query = query.filter(or_(*conditions))
         else:
-            query = query.filter(extract("year", Lancamento.dat_lancamento) == ano)
+            query = query.filter(extract("year", L.dat_lancamento) == ano)
 
         return float(query.scalar() or 0)
 
@@ -135,14 +337,21 @@ class LancamentoRepository:
         Returns:
             Monthly sum
         """
-        query = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            extract("year", Lancamento.dat_lancamento) == ano,
-            extract("month", Lancamento.dat_lancamento) == mes,
-            Lancamento.ind_status == 'A'
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            return colunas.somar(colunas.filtro(
+                anos=[ano], meses=[mes], tipos=[cod_tipo] if cod_tipo else None,
+            ))
+
+        L = fonte_lancamentos(anos=[ano], mensal=True)
+        query = self.session.query(func.sum(L.val_lancamento)).filter(
+            extract("year", L.dat_lancamento) == ano,
+            extract("month", L.dat_lancamento) == mes,
+            L.ind_status == 'A'
         )
         
         if cod_tipo:
-            query = query.filter(Lancamento.cod_tipo_lancamento == cod_tipo)
+            query = query.filter(L.cod_tipo_lancamento == cod_tipo)
         
         return float(query.scalar() or 0)
 
@@ -173,19 +382,20 @@ class LancamentoRepository:
         else:
             ids = [seq_qualificador]
         
-        query = self.session.query(Lancamento).filter(
-            Lancamento.seq_qualificador.in_(ids),
-            Lancamento.ind_status == 'A',
-            extract("year", Lancamento.dat_lancamento) == ano
+        L = fonte_lancamentos(anos=[ano])
+        query = self.session.query(L).filter(
+            L.seq_qualificador.in_(ids),
+            L.ind_status == 'A',
+            extract("year", L.dat_lancamento) == ano
         )
         
         if mes:
-            query = query.filter(extract("month", Lancamento.dat_lancamento) == mes)
+            query = query.filter(extract("month", L.dat_lancamento) == mes)
         
         if dia and mes:
-            query = query.filter(extract("day", Lancamento.dat_lancamento) == dia)
+            query = query.filter(extract("day", L.dat_lancamento) == dia)
         
-        return query.order_by(Lancamento.dat_lancamento).all()
+        return query.order_by(L.dat_lancamento).all()
 
     def get_by_qualificadores_and_month_year(
         self,
@@ -203,17 +413,77 @@ class LancamentoRepository:
         Returns:
             List of Lancamento objects
         """
+        L = fonte_lancamentos(anos=[ano])
         return (
-            self.session.query(Lancamento)
+            self.session.query(L)
             .filter(
-                Lancamento.seq_qualificador.in_(qualificador_ids),
-                Lancamento.ind_status == "A",
-                extract("year", Lancamento.dat_lancamento) == ano,
-                extract("month", Lancamento.dat_lancamento) == mes
+                L.seq_qualificador.in_(qualificador_ids),
+                L.ind_status == "A",
+                extract("year", L.dat_lancamento) == ano,
+                extract("month", L.dat_lancamento) == mes
+            )
+            .order_by(L.dat_lancamento)
+            .all()
+        )
+
+    def get_eventos_page(
+        self,
+        qualificador_ids,
+        start_date: date,
+        end_date: date,
+        page: int = 1,
+        per_page: int = 100,
+    ) -> tuple[list, int, float]:
+        """Page of lancamento rows for a drill-down, with count and sum of all matches.
+
+        Only the displayed columns are selected, joined with qualificador, tipo
+        and origem in the same statement (no ORM objects, no lazy loads).
+        Rows are ordered by (dat_lancamento, seq_lancamento) so pages are stable.
+
+        Args:
+            qualificador_ids: List of IDs or a SELECT of IDs (e.g. a subtree CTE)
+            start_date: First day (inclusive)
+            end_date: Last day (inclusive)
+            page: 1-based page number
+            per_page: Rows per page
+
+        Returns:
+            Tuple (rows, total_count, total_value)
+        """
+        L = fonte_lancamentos(inicio=start_date, fim=end_date)
+        filtros = (
+            L.seq_qualificador.in_(qualificador_ids),
+            L.ind_status == 'A',
+            L.dat_lancamento.between(start_date, end_date),
+        )
+        total_count, total_value = (
+            self.session.query(
+                func.count(L.seq_lancamento),
+                func.coalesce(func.sum(L.val_lancamento), 0),
+            )
+            .filter(*filtros)
+            .one()
+        )
+        rows = (
+            self.session.query(
+                L.seq_lancamento,
+                L.dat_lancamento,
+                L.val_lancamento,
+                Qualificador.num_qualificador,
+                Qualificador.dsc_qualificador,
+                TipoLancamento.dsc_tipo_lancamento,
+                OrigemLancamento.dsc_origem_lancamento,
             )
-            .order_by(Lancamento.dat_lancamento)
+            .join(Qualificador, Qualificador.seq_qualificador == L.seq_qualificador)
+            .join(TipoLancamento, TipoLancamento.cod_tipo_lancamento == L.cod_tipo_lancamento)
+            .join(OrigemLancamento, OrigemLancamento.cod_origem_lancamento == L.cod_origem_lancamento)
+            .filter(*filtros)
+            .order_by(L.dat_lancamento, L.seq_lancamento)
+            .offset((page - 1) * per_page)
+            .limit(per_page)
             .all()
         )
+        return rows, total_count or 0, float(total_value or 0)
 
     def get_grouped_by_qualificador_and_period(
         self,
@@ -233,22 +503,30 @@ class LancamentoRepository:
         Returns:
             List of tuples (seq_qualificador, period_value, total)
         """
-        if groupby_column is None:
-            groupby_column = extract("month", Lancamento.dat_lancamento)
+        campo = groupby_column.field if groupby_column is not None else 'month'
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            filtro = colunas.filtro(anos=[ano], meses=[mes] if mes else meses or None)
+            totais = colunas.agrupar(filtro, ('qualificador', _CAMPOS_COLUNARES[campo]))
+            return [(seq, col, total) for (seq, col), total in totais.items()]
+
+        # Agrupado por dia, os anos arquivados precisam das linhas detalhadas
+        L = fonte_lancamentos(anos=[ano], mensal=campo != 'day')
+        groupby_column = extract(campo, L.dat_lancamento)
         
         query = self.session.query(
-            Lancamento.seq_qualificador,
+            L.seq_qualificador,
             groupby_column.label("col"),
-            func.sum(Lancamento.val_lancamento).label("total"),
+            func.sum(L.val_lancamento).label("total"),
         ).filter(
-            extract("year", Lancamento.dat_lancamento) == ano,
-            Lancamento.ind_status == "A",
+            extract("year", L.dat_lancamento) == ano,
+            L.ind_status == "A",
         )
         
         if mes:
-            query = query.filter(extract("month", Lancamento.dat_lancamento) == mes)
+            query = query.filter(extract("month", L.dat_lancamento) == mes)
         elif meses:
-            query = query.filter(extract("month", Lancamento.dat_lancamento).in_(meses))
+            query = query.filter(extract("month", L.dat_lancamento).in_(meses))
         
         return query.group_by("seq_qualificador", "col").all()
 
@@ -261,11 +539,12 @@ class LancamentoRepository:
         Returns:
             Tuple (count, total)
         """
-        count = self.session.query(Lancamento).filter_by(
+        L = fonte_lancamentos()
+        count = self.session.query(L).filter_by(
             cod_tipo_lancamento=cod_tipo
         ).count()
         
-        total = self.session.query(func.sum(Lancamento.val_lancamento)).filter_by(
+        total = self.session.query(func.sum(L.val_lancamento)).filter_by(
             cod_tipo_lancamento=cod_tipo
         ).scalar()
         
@@ -280,7 +559,8 @@ class LancamentoRepository:
         Returns:
             Count of lancamentos
         """
-        return self.session.query(Lancamento).filter_by(
+        L = fonte_lancamentos()
+        return self.session.query(L).filter_by(
             seq_qualificador=seq_qualificador
         ).count()
 
@@ -302,17 +582,18 @@ class LancamentoRepository:
         Returns:
             Sum value
         """
-        result = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.dat_lancamento.between(start_date, end_date),
-            Lancamento.cod_tipo_lancamento == cod_tipo,
-            Lancamento.cod_origem_lancamento == cod_origem,
-            Lancamento.ind_status == 'A'
+        L = fonte_lancamentos(inicio=start_date, fim=end_date, mensal=True)
+        result = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.dat_lancamento.between(start_date, end_date),
+            L.cod_tipo_lancamento == cod_tipo,
+            L.cod_origem_lancamento == cod_origem,
+            L.ind_status == 'A'
         ).scalar()
         
         return float(result or 0)
 
     def get_available_years(self) -> list[int]:
-        """Get list of years with lancamento data.
+        """Get list of years with lancamento data, archived years included.
         
         Returns:
             List of years sorted descending
@@ -321,7 +602,7 @@ class LancamentoRepository:
             extract("year", Lancamento.dat_lancamento)
         ).distinct().all()
         
-        return sorted([int(y[0]) for y in years if y[0]], reverse=True)
+        return sorted({int(y[0]) for y in years if y[0]} | anos_arquivados(), reverse=True)
 
     def get_sum_by_account_before_date(
         self,
@@ -337,10 +618,11 @@ class LancamentoRepository:
         Returns:
             Sum value
         """
-        result = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.seq_conta == seq_conta,
-            Lancamento.dat_lancamento < before_date,
-            Lancamento.ind_status == "A",
+        L = fonte_lancamentos(fim=before_date - timedelta(days=1), mensal=True)
+        result = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.seq_conta == seq_conta,
+            L.dat_lancamento < before_date,
+            L.ind_status == "A",
         ).scalar()
         
         return float(result or 0)
@@ -359,11 +641,12 @@ class LancamentoRepository:
         Returns:
             Sum of positive values
         """
-        result = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.seq_conta == seq_conta,
-            Lancamento.dat_lancamento == on_date,
-            Lancamento.val_lancamento > 0,
-            Lancamento.ind_status == "A",
+        L = fonte_lancamentos(inicio=on_date, fim=on_date)
+        result = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.seq_conta == seq_conta,
+            L.dat_lancamento == on_date,
+            L.val_lancamento > 0,
+            L.ind_status == "A",
         ).scalar()
         
         return float(result or 0)
@@ -382,11 +665,12 @@ class LancamentoRepository:
         Returns:
             Sum of negative values (as absolute value)
         """
-        result = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.seq_conta == seq_conta,
-            Lancamento.dat_lancamento == on_date,
-            Lancamento.val_lancamento < 0,
-            Lancamento.ind_status == "A",
+        L = fonte_lancamentos(inicio=on_date, fim=on_date)
+        result = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.seq_conta == seq_conta,
+            L.dat_lancamento == on_date,
+            L.val_lancamento < 0,
+            L.ind_status == "A",
         ).scalar()
         
         return abs(float(result or 0))
@@ -405,14 +689,20 @@ class LancamentoRepository:
         Returns:
             Dictionary mapping date to sum
         """
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            filtro = colunas.filtro(inicio=start_date, fim=end_date)
+            return {d: total for (d,), total in colunas.agrupar(filtro, ('data',)).items()}
+
+        L = fonte_lancamentos(inicio=start_date, fim=end_date)
         results = self.session.query(
-            Lancamento.dat_lancamento,
-            func.sum(Lancamento.val_lancamento)
+            L.dat_lancamento,
+            func.sum(L.val_lancamento)
             ).filter(
-            Lancamento.ind_status == "A",
-            Lancamento.dat_lancamento >= start_date,
-            Lancamento.dat_lancamento <= end_date,
-        ).group_by(Lancamento.dat_lancamento).all()
+            L.ind_status == "A",
+            L.dat_lancamento >= start_date,
+            L.dat_lancamento <= end_date,
+        ).group_by(L.dat_lancamento).all()
         
         return {d: float(val or 0) for d, val in results}
 
@@ -425,9 +715,14 @@ class LancamentoRepository:
         Returns:
             Sum value
         """
-        result = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.ind_status == "A",
-            Lancamento.dat_lancamento < before_date,
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            return colunas.somar(colunas.filtro(fim=before_date - timedelta(days=1)))
+
+        L = fonte_lancamentos(fim=before_date - timedelta(days=1), mensal=True)
+        result = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.ind_status == "A",
+            L.dat_lancamento < before_date,
         ).scalar()
         
         return float(result or 0)
@@ -448,17 +743,24 @@ class LancamentoRepository:
         Returns:
             List of tuples (origem, year, month, total)
         """
+        if analitico.ativo():
+            return analitico.comparative_by_origem(cod_tipo, anos, meses)
+
         from ..models import OrigemLancamento
-        
+
+        L = fonte_lancamentos(anos=anos, mensal=True)
         results = self.session.query(
             OrigemLancamento.dsc_origem_lancamento,
-            extract("year", Lancamento.dat_lancamento).label("year"),
-            extract("month", Lancamento.dat_lancamento).label("month"),
-            func.sum(Lancamento.val_lancamento).label("total"),
-        ).join(OrigemLancamento).filter(
-            Lancamento.cod_tipo_lancamento == cod_tipo,
-            extract("year", Lancamento.dat_lancamento).in_(anos),
-            extract("month", Lancamento.dat_lancamento).in_(meses),
+            extract("year", L.dat_lancamento).label("year"),
+            extract("month", L.dat_lancamento).label("month"),
+            func.sum(L.val_lancamento).label("total"),
+        ).select_from(L).join(
+            OrigemLancamento,
+            OrigemLancamento.cod_origem_lancamento == L.cod_origem_lancamento,
+        ).filter(
+            L.cod_tipo_lancamento == cod_tipo,
+            extract("year", L.dat_lancamento).in_(anos),
+            extract("month", L.dat_lancamento).in_(meses),
         ).group_by("dsc_origem_lancamento", "year", "month").all()
         
         return results
@@ -479,22 +781,26 @@ class LancamentoRepository:
         Returns:
             List of rows with seq_qualificador, ano, mes, cod_tipo_lancamento, total
         """
+        if analitico.ativo():
+            return analitico.grouped_by_qualificador_year_month(qualificador_ids, anos, meses)
+
+        L = fonte_lancamentos(anos=anos, mensal=True)
         results = self.session.query(
-            Lancamento.seq_qualificador,
-            extract("year", Lancamento.dat_lancamento).label("ano"),
-            extract("month", Lancamento.dat_lancamento).label("mes"),
-            Lancamento.cod_tipo_lancamento,
-            func.sum(Lancamento.val_lancamento).label("total"),
+            L.seq_qualificador,
+            extract("year", L.dat_lancamento).label("ano"),
+            extract("month", L.dat_lancamento).label("mes"),
+            L.cod_tipo_lancamento,
+            func.sum(L.val_lancamento).label("total"),
         ).filter(
-            Lancamento.seq_qualificador.in_(qualificador_ids),
-            extract("year", Lancamento.dat_lancamento).in_(anos),
-            extract("month", Lancamento.dat_lancamento).in_(meses),
-            Lancamento.ind_status == "A",
+            L.seq_qualificador.in_(qualificador_ids),
+            extract("year", L.dat_lancamento).in_(anos),
+            extract("month", L.dat_lancamento).in_(meses),
+            L.ind_status == "A",
         ).group_by(
-            Lancamento.seq_qualificador,
+            L.seq_qualificador,
             "ano",
             "mes",
-            Lancamento.cod_tipo_lancamento,
+            L.cod_tipo_lancamento,
         ).all()
         
         return results
@@ -513,15 +819,16 @@ class LancamentoRepository:
         Returns:
             List of tuples (seq_qualificador, cod_tipo_lancamento, total)
         """
+        L = fonte_lancamentos(anos=[ano - 1], mensal=True)
         results = self.session.query(
-            Lancamento.seq_qualificador,
-            Lancamento.cod_tipo_lancamento,
-            func.sum(Lancamento.val_lancamento).label("total"),
+            L.seq_qualificador,
+            L.cod_tipo_lancamento,
+            func.sum(L.val_lancamento).label("total"),
         ).filter(
-            extract("year", Lancamento.dat_lancamento) == ano - 1,
-            extract("month", Lancamento.dat_lancamento) == mes,
-            Lancamento.ind_status == "A",
-        ).group_by(Lancamento.seq_qualificador, Lancamento.cod_tipo_lancamento).all()
+            extract("year", L.dat_lancamento) == ano - 1,
+            extract("month", L.dat_lancamento) == mes,
+            L.ind_status == "A",
+        ).group_by(L.seq_qualificador, L.cod_tipo_lancamento).all()
         
         return results
 
@@ -539,14 +846,15 @@ class LancamentoRepository:
         Returns:
             List of tuples (seq_qualificador, month, total)
         """
+        L = fonte_lancamentos(anos=[ano - 1], mensal=True)
         results = self.session.query(
-            Lancamento.seq_qualificador,
-            extract("month", Lancamento.dat_lancamento).label("col"),
-            func.sum(Lancamento.val_lancamento).label("total"),
+            L.seq_qualificador,
+            extract("month", L.dat_lancamento).label("col"),
+            func.sum(L.val_lancamento).label("total"),
         ).filter(
-            extract("year", Lancamento.dat_lancamento) == ano - 1,
-            extract("month", Lancamento.dat_lancamento).in_(meses),
-            Lancamento.ind_status == "A",
+            extract("year", L.dat_lancamento) == ano - 1,
+            extract("month", L.dat_lancamento).in_(meses),
+            L.ind_status == "A",
         ).group_by("seq_qualificador", "col").all()
         
         return results
@@ -571,13 +879,14 @@ class LancamentoRepository:
         """
         if not qualificadores_ids:
             return 0.0
-        
-        result = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.seq_qualificador.in_(qualificadores_ids),
-            Lancamento.cod_tipo_lancamento == cod_tipo,
-            extract('year', Lancamento.dat_lancamento) == ano,
-            extract('month', Lancamento.dat_lancamento) == mes,
-            Lancamento.ind_status == 'A'
+
+        L = fonte_lancamentos(anos=[ano], mensal=True)
+        result = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.seq_qualificador.in_(qualificadores_ids),
+            L.cod_tipo_lancamento == cod_tipo,
+            extract('year', L.dat_lancamento) == ano,
+            extract('month', L.dat_lancamento) == mes,
+            L.ind_status == 'A'
         ).scalar()
         
         return float(result or 0)
@@ -600,16 +909,130 @@ class LancamentoRepository:
         """
         if not qualificadores_ids:
             return 0.0
-        
-        result = self.session.query(func.sum(Lancamento.val_lancamento)).filter(
-            Lancamento.seq_qualificador.in_(qualificadores_ids),
-            Lancamento.cod_tipo_lancamento == cod_tipo,
-            extract('year', Lancamento.dat_lancamento) == ano,
-            Lancamento.ind_status == 'A'
+
+        L = fonte_lancamentos(anos=[ano], mensal=True)
+        result = self.session.query(func.sum(L.val_lancamento)).filter(
+            L.seq_qualificador.in_(qualificadores_ids),
+            L.cod_tipo_lancamento == cod_tipo,
+            extract('year', L.dat_lancamento) == ano,
+            L.ind_status == 'A'
         ).scalar()
         
         return float(result or 0)
 
+    def get_totals_by_qualificador_and_tipo(self, ano: int) -> dict[tuple[int, int], float]:
+        """Get yearly totals for every qualificador and tipo in a single query.
+
+        Args:
+            ano: Year
+
+        Returns:
+            Dict mapping (seq_qualificador, cod_tipo_lancamento) -> sum value
+        """
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            return colunas.agrupar(colunas.filtro(anos=[ano]), ('qualificador', 'tipo'))
+
+        L = fonte_lancamentos(anos=[ano], mensal=True)
+        results = self.session.query(
+            L.seq_qualificador,
+            L.cod_tipo_lancamento,
+            func.sum(L.val_lancamento).label("total"),
+        ).filter(
+            L.dat_lancamento.between(date(ano, 1, 1), date(ano, 12, 31)),
+            L.ind_status == 'A',
+        ).group_by(
+            L.seq_qualificador,
+            L.cod_tipo_lancamento,
+        ).all()
+
+        return {
+            (seq_qualificador, cod_tipo): float(total or 0)
+            for seq_qualificador, cod_tipo, total in results
+        }
+
+    def get_grouped_by_qualificador_tipo_month(
+        self,
+        ano: int,
+        meses: list[int]
+    ) -> list:
+        """Get yearly lancamentos grouped by qualificador, tipo and month.
+
+        Args:
+            ano: Year
+            meses: List of months (1-12) to include
+
+        Returns:
+            List of rows with seq_qualificador, cod_tipo_lancamento, mes, total
+        """
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            totais = colunas.agrupar(
+                colunas.filtro(anos=[ano], meses=meses), ('qualificador', 'tipo', 'mes'),
+            )
+            return [_QualificadorTipoMes(*chave, total) for chave, total in totais.items()]
+
+        L = fonte_lancamentos(anos=[ano], mensal=True)
+        mes_col = extract("month", L.dat_lancamento)
+        return self.session.query(
+            L.seq_qualificador,
+            L.cod_tipo_lancamento,
+            mes_col.label("mes"),
+            func.sum(L.val_lancamento).label("total"),
+        ).filter(
+            L.dat_lancamento.between(date(ano, 1, 1), date(ano, 12, 31)),
+            mes_col.in_(meses),
+            L.ind_status == 'A',
+        ).group_by(
+            L.seq_qualificador,
+            L.cod_tipo_lancamento,
+            "mes",
+        ).all()
+
+    def get_monthly_totals_by_qualificador(
+        self,
+        qualificador_ids: list[int],
+        data_inicio: date,
+        data_fim: date,
+    ) -> list:
+        """Get monthly totals per qualificador within a date range.
+
+        Like `modelos_economicos_service.obter_dados_historicos`, every
+        status is included so the simulator history is unchanged.
+
+        Args:
+            qualificador_ids: List of qualificador IDs
+            data_inicio: Start date (inclusive)
+            data_fim: End date (inclusive)
+
+        Returns:
+            List of rows with seq_qualificador, ano, mes, total
+        """
+        colunas = colunas_lancamento()
+        if colunas is not None:
+            filtro = colunas.filtro(
+                inicio=data_inicio, fim=data_fim, qualificadores=qualificador_ids, status=None,
+            )
+            totais = colunas.agrupar(filtro, ('qualificador', 'ano', 'mes'))
+            return [_QualificadorAnoMes(*chave, total) for chave, total in totais.items()]
+        if analitico.ativo():
+            return analitico.monthly_totals_by_qualificador(qualificador_ids, data_inicio, data_fim)
+
+        L = fonte_lancamentos(inicio=data_inicio, fim=data_fim, mensal=True)
+        return self.session.query(
+            L.seq_qualificador,
+            extract("year", L.dat_lancamento).label("ano"),
+            extract("month", L.dat_lancamento).label("mes"),
+            func.sum(L.val_lancamento).label("total"),
+        ).filter(
+            L.seq_qualificador.in_(qualificador_ids),
+            L.dat_lancamento.between(data_inicio, data_fim),
+        ).group_by(
+            L.seq_qualificador,
+            "ano",
+            "mes",
+        ).all()
+
     def get_sample(self, limit: int = 10) -> list[Lancamento]:
         """Get a sample of lancamentos.
         
@@ -633,6 +1056,7 @@ class LancamentoRepository:
         )
         self.session.add(lanc)
         self.session.commit()
+        self.invalidate_count_cache()
         return lanc
 
     def get(self, ident: int) -> Lancamento:
@@ -647,9 +1071,14 @@ class LancamentoRepository:
         lanc.cod_origem_lancamento = data.cod_origem_lancamento
         lanc.seq_conta = data.seq_conta
         self.session.commit()
+        self.invalidate_count_cache()
         return lanc
 
     def soft_delete(self, ident: int) -> None:
         lanc = self.get(ident)
         lanc.ind_status = 'I'
         self.session.commit()
+        self.invalidate_count_cache()
+
+
+revisao_repository.ao_mudar('lancamento', 'periodo')(LancamentoRepository.invalidate_count_cache)
@@ -1,9 +1,9 @@
 """Repository para o histórico de projeções (versões e valores normalizados)."""
 from typing import Iterable, List, Optional, Dict, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import func, select
 
-from ..models import db, ProjecaoVersao, ProjecaoValor
+from ..models import db, ProjecaoVersao, ProjecaoValor, Qualificador
 
 
 # ==================== Versão (header) ====================
@@ -35,6 +35,31 @@ def list_versoes_by_simulador(seq_simulador_cenario: int) -> List[ProjecaoVersao
     )
 
 
+def get_ultima_versao_por_motivo(
+    seq_simulador_cenario: int,
+    dsc_motivo: str,
+) -> Optional[ProjecaoVersao]:
+    """Versão mais recente do cenário gravada com o motivo informado."""
+    return (
+        ProjecaoVersao.query
+        .filter_by(seq_simulador_cenario=seq_simulador_cenario, dsc_motivo=dsc_motivo)
+        .order_by(ProjecaoVersao.dat_versao.desc(), ProjecaoVersao.seq_projecao_versao.desc())
+        .first()
+    )
+
+
+def delete_rascunhos_por_motivo(seq_simulador_cenario: int, dsc_motivo: str) -> int:
+    """Apaga os rascunhos do cenário com o motivo informado (sem commit)."""
+    versoes = (
+        ProjecaoVersao.query
+        .filter_by(seq_simulador_cenario=seq_simulador_cenario, dsc_motivo=dsc_motivo, ind_publicado='N')
+        .all()
+    )
+    for versao in versoes:
+        db.session.delete(versao)
+    return len(versoes)
+
+
 def delete_versao(seq_projecao_versao: int) -> int:
     """Apaga uma versão. Apenas rascunhos podem ser deletados."""
     versao = ProjecaoVersao.query.get(seq_projecao_versao)
@@ -90,6 +115,49 @@ def get_valores_by_versao(
     )
 
 
+def iter_valores_by_versao(
+    seq_projecao_versao: int,
+    cod_tipo: Optional[str] = None,
+    tamanho_lote: int = 5000,
+    session=None,
+):
+    """Percorre as linhas de uma versão em lotes, direto do cursor (yield_per).
+
+    Colunas apenas (sem objetos ORM), com o qualificador em outer join
+    (linhas de modelos agregados não têm qualificador).
+
+    Yields:
+        Listas de linhas (cod_tipo, seq_qualificador, num_qualificador,
+        dsc_qualificador, ano, mes, val_projetado, val_realizado)
+    """
+    session = session or db.session
+    query = (
+        session.query(
+            ProjecaoValor.cod_tipo,
+            ProjecaoValor.seq_qualificador,
+            Qualificador.num_qualificador,
+            Qualificador.dsc_qualificador,
+            ProjecaoValor.ano,
+            ProjecaoValor.mes,
+            ProjecaoValor.val_projetado,
+            ProjecaoValor.val_realizado,
+        )
+        .outerjoin(Qualificador, Qualificador.seq_qualificador == ProjecaoValor.seq_qualificador)
+        .filter(ProjecaoValor.seq_projecao_versao == seq_projecao_versao)
+    )
+    if cod_tipo:
+        query = query.filter(ProjecaoValor.cod_tipo == cod_tipo)
+    query = query.order_by(
+        ProjecaoValor.cod_tipo,
+        ProjecaoValor.seq_qualificador,
+        ProjecaoValor.ano,
+        ProjecaoValor.mes,
+    )
+    result = session.execute(query.statement, execution_options={'yield_per': tamanho_lote})
+    for lote in result.partitions():
+        yield lote
+
+
 def get_totais_por_tipo(seq_projecao_versao: int) -> Dict[str, float]:
     """Retorna {'R': total_receita, 'D': total_despesa} via SQL."""
     rows = (
@@ -113,14 +181,21 @@ def get_comparativo(
     Retorna lista de dicts com:
         seq_qualificador, cod_tipo, ano, mes, val_a, val_b, delta, delta_pct
     """
-    rows_a = {
-        (v.cod_tipo, v.seq_qualificador, v.ano, v.mes): float(v.val_projetado or 0)
-        for v in get_valores_by_versao(seq_versao_a)
-    }
-    rows_b = {
-        (v.cod_tipo, v.seq_qualificador, v.ano, v.mes): float(v.val_projetado or 0)
-        for v in get_valores_by_versao(seq_versao_b)
-    }
+    def valores(seq_versao):
+        # Só as colunas da chave e o valor: as linhas não entram no identity map
+        linhas = db.session.execute(
+            select(
+                ProjecaoValor.cod_tipo,
+                ProjecaoValor.seq_qualificador,
+                ProjecaoValor.ano,
+                ProjecaoValor.mes,
+                ProjecaoValor.val_projetado,
+            ).where(ProjecaoValor.seq_projecao_versao == seq_versao)
+        )
+        return {(tipo, seq_q, ano, mes): float(val or 0) for tipo, seq_q, ano, mes, val in linhas}
+
+    rows_a = valores(seq_versao_a)
+    rows_b = valores(seq_versao_b)
 
     chaves = sorted(set(rows_a.keys()) | set(rows_b.keys()))
     resultado = []
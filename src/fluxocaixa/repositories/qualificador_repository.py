@@ -89,3 +89,38 @@ def count_qualificadores():
 
 def get_qualificadores_limit(limit: int):
     return Qualificador.query.limit(limit).all()
+
+def get_hierarquia_rows():
+    """Retorna (seq, num, dsc, pai, status) de todos os qualificadores em uma única query.
+
+    Usado para montar a árvore em memória sem disparar um lazy load por nó
+    (`pai`/`filhos`), como fazem `tipo_fluxo` e `is_folha()`.
+    """
+    return db.session.query(
+        Qualificador.seq_qualificador,
+        Qualificador.num_qualificador,
+        Qualificador.dsc_qualificador,
+        Qualificador.cod_qualificador_pai,
+        Qualificador.ind_status,
+    ).order_by(Qualificador.seq_qualificador).all()
+
+def select_subarvore_ids(seq_qualificador: int):
+    """SELECT dos ids da subárvore de um qualificador (ele e os descendentes ativos).
+
+    CTE recursiva resolvida no banco, equivalente a `[seq] + get_todos_filhos()`
+    sem um lazy load por nó; pode ser usada direto em `in_()`.
+    """
+    from sqlalchemy import select
+
+    arvore = (
+        select(Qualificador.seq_qualificador)
+        .where(Qualificador.seq_qualificador == seq_qualificador)
+        .cte('subarvore', recursive=True)
+    )
+    arvore = arvore.union_all(
+        select(Qualificador.seq_qualificador).where(
+            Qualificador.cod_qualificador_pai == arvore.c.seq_qualificador,
+            Qualificador.ind_status == 'A',
+        )
+    )
+    return select(arvore.c.seq_qualificador)
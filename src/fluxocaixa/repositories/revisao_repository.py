@@ -0,0 +1,293 @@
+"""Data revision counters shared by the workers (flc_revisao_dados).
+
+Com ``--workers N``, um cache em memória (opções de qualificadores, contagens
+da listagem, anos arquivados, cópia colunar, arquivos mapeados) só vê as
+escritas do próprio processo. Cada domínio de dados tem um contador em
+flc_revisao_dados, incrementado na mesma transação da escrita:
+
+- pela sessão: os hooks de ``after_flush`` e de ``do_orm_execute`` (UPDATE e
+  DELETE em massa) anotam os domínios dos modelos escritos, e o de
+  ``before_commit`` incrementa seus contadores, uma vez por transação. Cobre
+  os serviços de lançamentos, qualificadores, simuladores e os importadores
+  sem chamada explícita;
+- fora da sessão (fechamento e arquivamento, com ``engine.begin()``):
+  `incrementar` na conexão da transação.
+
+A cada requisição `SessaoPorRequisicaoMiddleware` chama `verificar`: uma
+consulta pela chave primária compara os contadores com os já vistos pelo
+processo e executa as funções registradas com `ao_mudar` para os domínios que
+outro processo alterou. Escritas do próprio processo não as disparam (os
+caches já se atualizam ou se descartam nelas), a não ser que outra escrita no
+mesmo domínio tenha sido confirmada entre as duas. Caches novos também podem
+usar `revisao(dominio)` na chave das entradas.
+
+Escritas direto no banco, sem passar pela aplicação, não mudam os contadores.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from itertools import chain
+from typing import Callable
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import (
+    CenarioDespesa,
+    CenarioDespesaAjuste,
+    CenarioReceita,
+    CenarioReceitaAjuste,
+    ContaBancaria,
+    Lancamento,
+    LancamentoAnoArquivado,
+    LancamentoMensal,
+    Loa,
+    ModeloEconomicoParametro,
+    OrigemLancamento,
+    Orgao,
+    PeriodoFechado,
+    Qualificador,
+    RevisaoDados,
+    SaldoConta,
+    SimuladorCenario,
+    SimuladorCenarioHistorico,
+    TipoLancamento,
+)
+from ..models.base import engine
+
+logger = logging.getLogger(__name__)
+
+DOMINIOS = ('lancamento', 'saldo', 'qualificador', 'simulador', 'periodo', 'loa', 'referencia')
+
+_DOMINIO_POR_MODELO = {
+    Lancamento: 'lancamento',
+    SaldoConta: 'saldo',
+    ContaBancaria: 'saldo',
+    Qualificador: 'qualificador',
+    SimuladorCenario: 'simulador',
+    CenarioReceita: 'simulador',
+    CenarioReceitaAjuste: 'simulador',
+    CenarioDespesa: 'simulador',
+    CenarioDespesaAjuste: 'simulador',
+    ModeloEconomicoParametro: 'simulador',
+    SimuladorCenarioHistorico: 'simulador',
+    LancamentoMensal: 'periodo',
+    PeriodoFechado: 'periodo',
+    LancamentoAnoArquivado: 'periodo',
+    Loa: 'loa',
+    TipoLancamento: 'referencia',
+    OrigemLancamento: 'referencia',
+    Orgao: 'referencia',
+}
+
+_tabela = RevisaoDados.__table__
+
+# Revisões já vistas por este processo e funções a executar quando mudam
+_vistas: dict[str, int] = {}
+_funcoes: dict[str, list[Callable[[], None]]] = {}
+_trava = threading.Lock()
+
+
+def _validar(dominios) -> tuple[str, ...]:
+    desconhecidos = set(dominios) - set(DOMINIOS)
+    if desconhecidos:
+        raise ValueError(f"Domínio(s) de dados desconhecido(s): {', '.join(sorted(desconhecidos))}")
+    return tuple(dominios)
+
+
+def ler(bind: Engine | Connection = engine, dominios=DOMINIOS) -> dict[str, int]:
+    """Current revision of each domain (0 when never written).
+
+    Args:
+        bind: Engine or connection (inside a transaction, its own writes count)
+        dominios: Domains to read
+
+    Returns:
+        Dictionary {dominio: revisao}
+    """
+    dominios = _validar(dominios)
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            return ler(conn, dominios)
+    linhas = bind.execute(
+        select(_tabela.c.dsc_dominio, _tabela.c.num_revisao).where(_tabela.c.dsc_dominio.in_(dominios))
+    ).all()
+    return {dominio: 0 for dominio in dominios} | {dominio: int(valor) for dominio, valor in linhas}
+
+
+def incrementar(conn: Connection, *dominios: str) -> dict[str, int]:
+    """Bump the counters of `dominios` in the transaction of `conn`.
+
+    Args:
+        conn: Connection of the transaction that writes the data
+        *dominios: Domains written
+
+    Returns:
+        Dictionary {dominio: nova revisao}, to pass to `confirmar` after commit
+    """
+    # Ordem fixa: duas transações nunca esperam uma pela outra em ordens opostas
+    dominios = sorted(set(_validar(dominios)))
+    for dominio in dominios:
+        resultado = conn.execute(
+            update(_tabela)
+            .where(_tabela.c.dsc_dominio == dominio)
+            .values(num_revisao=_tabela.c.num_revisao + 1)
+        )
+        if resultado.rowcount == 0:
+            conn.execute(insert(_tabela).values(dsc_dominio=dominio, num_revisao=1))
+    return ler(conn, dominios)
+
+
+def iniciar(bind: Engine = engine) -> dict[str, int]:
+    """Create the missing counters and take the current revisions as seen.
+
+    Called by `create_app` before the caches loaded at startup.
+
+    Returns:
+        Dictionary {dominio: revisao}
+    """
+    try:
+        with bind.begin() as conn:
+            existentes = set(conn.execute(select(_tabela.c.dsc_dominio)).scalars())
+            faltantes = [dominio for dominio in DOMINIOS if dominio not in existentes]
+            if faltantes:
+                conn.execute(insert(_tabela), [
+                    {'dsc_dominio': dominio, 'num_revisao': 0} for dominio in faltantes
+                ])
+    except IntegrityError:
+        # Outro worker criou os contadores ao mesmo tempo
+        pass
+    atuais = ler(bind)
+    with _trava:
+        _vistas.clear()
+        _vistas.update(atuais)
+    return atuais
+
+
+def revisao(dominio: str) -> int:
+    """Revision of `dominio` last seen by this process."""
+    return _vistas.get(dominio, 0)
+
+
+def ao_mudar(*dominios: str):
+    """Register a function to run when another process changes one of `dominios`.
+
+    Usable as a decorator; the function takes no arguments and is returned
+    unchanged.
+    """
+    dominios = _validar(dominios)
+
+    def registrar(funcao: Callable[[], None]) -> Callable[[], None]:
+        with _trava:
+            for dominio in dominios:
+                _funcoes.setdefault(dominio, []).append(funcao)
+        return funcao
+
+    return registrar
+
+
+def remover(funcao: Callable[[], None]) -> None:
+    """Unregister a function registered with `ao_mudar`, from every domain."""
+    with _trava:
+        for dominio in list(_funcoes):
+            _funcoes[dominio] = [f for f in _funcoes[dominio] if f is not funcao]
+            if not _funcoes[dominio]:
+                del _funcoes[dominio]
+
+
+def _executar(mudaram: set[str]) -> None:
+    funcoes = dict.fromkeys(chain.from_iterable(_funcoes.get(dominio, ()) for dominio in sorted(mudaram)))
+    for funcao in funcoes:
+        try:
+            funcao()
+        except Exception:
+            logger.exception('Falha ao descartar cache após mudança em %s', ', '.join(sorted(mudaram)))
+
+
+def verificar(bind: Engine = engine) -> set[str]:
+    """Run the `ao_mudar` functions of the domains changed by other processes.
+
+    One primary-key lookup over the domains with registered functions.
+
+    Returns:
+        Domains whose revision changed since the last call
+    """
+    if not _funcoes:
+        return set()
+    atuais = ler(bind, tuple(_funcoes))
+    mudaram = set()
+    with _trava:
+        for dominio, valor in atuais.items():
+            vista = _vistas.get(dominio)
+            if vista is not None and valor > vista:
+                mudaram.add(dominio)
+            if vista is None or valor > vista:
+                _vistas[dominio] = valor
+    _executar(mudaram)
+    return mudaram
+
+
+def confirmar(novas: dict[str, int]) -> None:
+    """Take the revisions committed by this process (`incrementar`) as seen.
+
+    When another process wrote the same domain in between, its `ao_mudar`
+    functions run now.
+    """
+    mudaram = set()
+    with _trava:
+        for dominio, valor in novas.items():
+            vista = _vistas.get(dominio)
+            if vista is not None and valor > vista + 1:
+                mudaram.add(dominio)
+            if vista is None or valor > vista:
+                _vistas[dominio] = valor
+    _executar(mudaram)
+
+
+# ==================== Sessão ====================
+
+_DOMINIOS_KEY = 'revisao_dominios'
+_NOVAS_KEY = 'revisao_novas'
+
+
+@event.listens_for(Session, 'after_flush')
+def _anotar_escritas(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        dominio = _DOMINIO_POR_MODELO.get(type(obj))
+        if dominio is not None and (obj not in session.dirty or session.is_modified(obj)):
+            session.info.setdefault(_DOMINIOS_KEY, set()).add(dominio)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _anotar_em_massa(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    dominio = _DOMINIO_POR_MODELO.get(mapper.class_) if mapper is not None else None
+    if dominio is not None:
+        orm_execute_state.session.info.setdefault(_DOMINIOS_KEY, set()).add(dominio)
+
+
+@event.listens_for(Session, 'before_commit')
+def _incrementar_revisoes(session):
+    # O commit descarrega o que estiver pendente só depois deste hook
+    session.flush()
+    dominios = session.info.pop(_DOMINIOS_KEY, None)
+    if dominios:
+        session.info[_NOVAS_KEY] = incrementar(session.connection(), *dominios)
+
+
+@event.listens_for(Session, 'after_commit')
+def _confirmar_revisoes(session):
+    novas = session.info.pop(_NOVAS_KEY, None)
+    if novas:
+        confirmar(novas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_revisoes(session):
+    session.info.pop(_DOMINIOS_KEY, None)
+    session.info.pop(_NOVAS_KEY, None)
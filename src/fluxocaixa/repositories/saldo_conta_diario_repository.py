@@ -0,0 +1,243 @@
+"""Repository for the per-account daily balance ledger (flc_saldo_conta_diario).
+
+The ledger is derived from flc_saldo_conta (informed balances) and
+flc_lancamento (movements linked to an account). It is kept current by the
+session hooks at the bottom of this module: whenever a flush touches a
+SaldoConta or a Lancamento with `seq_conta`, the affected account is
+recomputed from the earliest changed date onwards.
+"""
+from __future__ import annotations
+
+from datetime import date
+from itertools import chain
+
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..models import ContaBancaria, Lancamento, SaldoConta
+from ..models.base import db
+from ..models.saldo_conta_diario import SaldoContaDiario
+from .lancamento_arquivo_repository import fonte_lancamentos
+
+_ledger = SaldoContaDiario.__table__
+
+
+class SaldoContaDiarioRepository:
+    """Data access layer for SaldoContaDiario records."""
+
+    def __init__(self, session: Session | None = None):
+        self.session = session or db.session
+
+    def get_posicoes(self, data: date, inclusive: bool = True) -> dict[int, SaldoContaDiario]:
+        """Get the latest ledger row of every active account up to a date.
+
+        Args:
+            data: Reference date
+            inclusive: If True consider rows on `data`, otherwise only before it
+
+        Returns:
+            Dict mapping seq_conta -> SaldoContaDiario
+        """
+        limite = SaldoContaDiario.dat_movimento <= data if inclusive else SaldoContaDiario.dat_movimento < data
+        ultimas = (
+            self.session.query(
+                SaldoContaDiario.seq_conta,
+                func.max(SaldoContaDiario.dat_movimento).label('dat_movimento'),
+            )
+            .filter(limite)
+            .group_by(SaldoContaDiario.seq_conta)
+            .subquery()
+        )
+        rows = (
+            self.session.query(SaldoContaDiario)
+            .join(ultimas, and_(
+                SaldoContaDiario.seq_conta == ultimas.c.seq_conta,
+                SaldoContaDiario.dat_movimento == ultimas.c.dat_movimento,
+            ))
+            .join(ContaBancaria, SaldoContaDiario.seq_conta == ContaBancaria.seq_conta)
+            .filter(ContaBancaria.ind_status == 'A')
+            .all()
+        )
+        return {row.seq_conta: row for row in rows}
+
+    def get_saldo_informado_total(self, data: date, inclusive: bool = True) -> float:
+        """Sum, over active accounts, of the latest informed balance up to a date.
+
+        Args:
+            data: Reference date
+            inclusive: If True consider balances informed on `data`
+
+        Returns:
+            Total balance (0 if no informed balances)
+        """
+        return sum(
+            float(row.val_saldo_informado)
+            for row in self.get_posicoes(data, inclusive).values()
+            if row.val_saldo_informado is not None
+        )
+
+    def get_periodo(self, data_inicio: date, data_fim: date) -> list[SaldoContaDiario]:
+        """Get ledger rows of active accounts within a date range, ordered by date.
+
+        Args:
+            data_inicio: Start date (inclusive)
+            data_fim: End date (inclusive)
+
+        Returns:
+            List of SaldoContaDiario objects
+        """
+        return (
+            self.session.query(SaldoContaDiario)
+            .join(ContaBancaria, SaldoContaDiario.seq_conta == ContaBancaria.seq_conta)
+            .filter(
+                ContaBancaria.ind_status == 'A',
+                SaldoContaDiario.dat_movimento.between(data_inicio, data_fim),
+            )
+            .order_by(SaldoContaDiario.dat_movimento, SaldoContaDiario.seq_conta)
+            .all()
+        )
+
+    def recalcular_conta(self, seq_conta: int, a_partir_de: date | None = None) -> None:
+        """Recompute the ledger of one account from a date onwards and commit."""
+        recalcular_conta(self.session.connection(), seq_conta, a_partir_de)
+        self.session.commit()
+
+    def recalcular_tudo(self) -> None:
+        """Rebuild the whole ledger from flc_saldo_conta and flc_lancamento and commit."""
+        conn = self.session.connection()
+        conn.execute(delete(_ledger))
+        contas = set(conn.execute(select(SaldoConta.seq_conta).distinct()).scalars())
+        lancamentos = fonte_lancamentos(mensal=True)
+        contas |= set(conn.execute(
+            select(lancamentos.seq_conta).where(lancamentos.seq_conta.is_not(None)).distinct()
+        ).scalars())
+        for seq_conta in sorted(contas):
+            recalcular_conta(conn, seq_conta)
+        self.session.commit()
+
+
+def recalcular_conta(conn: Connection, seq_conta: int, a_partir_de: date | None = None) -> None:
+    """Rewrite the ledger rows of `seq_conta` dated on/after `a_partir_de`.
+
+    The row right before `a_partir_de` seeds the running closing balance and
+    the carried informed balance, so only the tail of the account is touched.
+    Runs on the given connection without committing.
+    """
+    filtro_ledger = [_ledger.c.seq_conta == seq_conta]
+    filtro_saldo = [SaldoConta.seq_conta == seq_conta]
+    # Movimentos diários: anos arquivados entram pelas linhas detalhadas
+    lancamentos = fonte_lancamentos(inicio=a_partir_de)
+    filtro_lanc = [lancamentos.seq_conta == seq_conta, lancamentos.ind_status == 'A']
+    anterior = None
+    if a_partir_de is not None:
+        filtro_ledger.append(_ledger.c.dat_movimento >= a_partir_de)
+        filtro_saldo.append(SaldoConta.dat_saldo >= a_partir_de)
+        filtro_lanc.append(lancamentos.dat_lancamento >= a_partir_de)
+        anterior = conn.execute(
+            select(_ledger.c.val_saldo_fechamento, _ledger.c.val_saldo_informado)
+            .where(_ledger.c.seq_conta == seq_conta, _ledger.c.dat_movimento < a_partir_de)
+            .order_by(_ledger.c.dat_movimento.desc())
+            .limit(1)
+        ).first()
+
+    informados = {
+        dia: float(valor)
+        for dia, valor in conn.execute(
+            select(SaldoConta.dat_saldo, SaldoConta.val_saldo).where(*filtro_saldo)
+        )
+    }
+    movimentos = {
+        dia: (float(entradas or 0), abs(float(saidas or 0)))
+        for dia, entradas, saidas in conn.execute(
+            select(
+                lancamentos.dat_lancamento,
+                func.sum(case((lancamentos.val_lancamento > 0, lancamentos.val_lancamento), else_=0)),
+                func.sum(case((lancamentos.val_lancamento < 0, lancamentos.val_lancamento), else_=0)),
+            )
+            .where(*filtro_lanc)
+            .group_by(lancamentos.dat_lancamento)
+        )
+    }
+
+    conn.execute(delete(_ledger).where(*filtro_ledger))
+
+    fechamento = float(anterior.val_saldo_fechamento) if anterior else 0.0
+    informado = (
+        float(anterior.val_saldo_informado)
+        if anterior and anterior.val_saldo_informado is not None else None
+    )
+    linhas = []
+    for dia in sorted(informados.keys() | movimentos.keys()):
+        if dia in informados:
+            abertura = informado = informados[dia]
+        else:
+            abertura = fechamento
+        entradas, saidas = movimentos.get(dia, (0.0, 0.0))
+        fechamento = round(abertura + entradas - saidas, 2)
+        linhas.append({
+            'seq_conta': seq_conta,
+            'dat_movimento': dia,
+            'val_saldo_abertura': abertura,
+            'val_entradas': entradas,
+            'val_saidas': saidas,
+            'val_saldo_fechamento': fechamento,
+            'val_saldo_informado': informado,
+            'ind_saldo_informado': 'S' if dia in informados else 'N',
+        })
+    if linhas:
+        conn.execute(insert(_ledger), linhas)
+
+
+# --- Incremental maintenance -------------------------------------------------
+
+_PENDENTES_KEY = 'saldo_conta_diario_pendentes'
+_CAMPOS_MONITORADOS = {
+    Lancamento: ('seq_conta', 'dat_lancamento', 'val_lancamento', 'ind_status'),
+    SaldoConta: ('seq_conta', 'dat_saldo', 'val_saldo'),
+}
+_ledger_disponivel = False
+
+
+def _registrar_pendente(pendentes: dict, seq_conta, dia) -> None:
+    if seq_conta is None or dia is None:
+        return
+    atual = pendentes.get(seq_conta)
+    if atual is None or dia < atual:
+        pendentes[seq_conta] = dia
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    pendentes = session.info.setdefault(_PENDENTES_KEY, {})
+    for obj in chain(session.new, session.dirty, session.deleted):
+        campos = _CAMPOS_MONITORADOS.get(type(obj))
+        if not campos:
+            continue
+        conta_attr, data_attr = campos[0], campos[1]
+        state = inspect(obj)
+        if obj in session.dirty and not any(state.attrs[c].history.has_changes() for c in campos):
+            continue
+        _registrar_pendente(pendentes, getattr(obj, conta_attr), getattr(obj, data_attr))
+        # Valores anteriores (conta ou data alteradas) também precisam ser recalculados
+        contas_antigas = state.attrs[conta_attr].history.deleted or [getattr(obj, conta_attr)]
+        datas_antigas = state.attrs[data_attr].history.deleted or [getattr(obj, data_attr)]
+        for seq_conta in contas_antigas:
+            for dia in datas_antigas:
+                _registrar_pendente(pendentes, seq_conta, dia)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _aplicar_alteracoes(session, flush_context):
+    global _ledger_disponivel
+    pendentes = session.info.pop(_PENDENTES_KEY, None)
+    if not pendentes:
+        return
+    conn = session.connection()
+    if not _ledger_disponivel:
+        # Bancos antigos sem a tabela: nada a manter até `ensure_saldo_conta_diario_schema`
+        if not inspect(conn).has_table(_ledger.name):
+            return
+        _ledger_disponivel = True
+    for seq_conta, dia in pendentes.items():
+        recalcular_conta(conn, seq_conta, dia)
@@ -7,6 +7,8 @@ from sqlalchemy import func, and_
 
 from ..models import SaldoConta, ContaBancaria
 from ..models.base import db
+from . import colunas_mapeadas_repository
+from .saldo_conta_diario_repository import SaldoContaDiarioRepository
 
 
 class SaldoContaRepository:
@@ -75,7 +77,8 @@ class SaldoContaRepository:
         """Get sum of most recent balances for all active accounts before a date.
         
         For each account, gets the most recent balance before the specified date,
-        then sums them all.
+        then sums them all. Served by the daily ledger (flc_saldo_conta_diario)
+        in a single query, or by the shared column files when mapped.
         
         Args:
             data: Date to search before
@@ -83,15 +86,27 @@ class SaldoContaRepository:
         Returns:
             Sum of most recent balances for all active accounts
         """
-        contas = self.session.query(ContaBancaria).filter_by(ind_status='A').all()
-        total = 0.0
+        saldos = colunas_mapeadas_repository.colunas_saldo()
+        if saldos is not None:
+            return saldos.total(data, inclusive=False)
+        return SaldoContaDiarioRepository(self.session).get_saldo_informado_total(data, inclusive=False)
+    
+    def get_saldo_total_at_date(self, data: date) -> float:
+        """Get sum of the balances of all active accounts at a date.
         
-        for conta in contas:
-            saldo = self.get_latest_saldo_before_date(conta.seq_conta, data)
-            if saldo:
-                total += float(saldo.val_saldo)
+        Each account contributes its balance informed on the date or, if there
+        is none, its most recent balance before it.
         
-        return total
+        Args:
+            data: Reference date
+            
+        Returns:
+            Sum of balances for all active accounts
+        """
+        saldos = colunas_mapeadas_repository.colunas_saldo()
+        if saldos is not None:
+            return saldos.total(data, inclusive=True)
+        return SaldoContaDiarioRepository(self.session).get_saldo_informado_total(data, inclusive=True)
     
     def get_saldos_periodo(
         self, 
@@ -1,10 +1,65 @@
 """Repository para histórico de cenários do simulador."""
-from typing import List, Optional
+import io
+import json
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import date
 
+import numpy as np
+
 from ..models import db, SimuladorCenarioHistorico
 
 
+# Colunas dos ajustes de um snapshot (um elemento por ajuste)
+AJUSTE_DTYPE = np.dtype([
+    ('cod_tipo', 'S1'),  # b'R' receita, b'D' despesa
+    ('seq_qualificador', '<i4'),
+    ('ano', '<i2'),
+    ('mes', 'u1'),
+    ('cod_tipo_ajuste', 'S1'),  # b'P' percentual, b'V' valor fixo
+    ('val_ajuste', '<f8'),
+])
+TIPOS_FLUXO = {'receita': b'R', 'despesa': b'D'}
+
+
+def montar_ajustes(itens: Iterable, cod_tipo: bytes = b'') -> np.ndarray:
+    """Array de ajustes a partir de dicts (JSON antigo) ou objetos ORM."""
+    linhas = []
+    for a in itens:
+        if isinstance(a, dict):
+            linhas.append((cod_tipo, a['seq_qualificador'], a['ano'], a['mes'],
+                           a['cod_tipo_ajuste'], float(a['val_ajuste'] or 0)))
+        else:
+            linhas.append((cod_tipo, a.seq_qualificador, a.ano, a.mes,
+                           a.cod_tipo_ajuste, float(a.val_ajuste or 0)))
+    return np.array(linhas, dtype=AJUSTE_DTYPE)
+
+
+def serializar_ajustes(ajustes: Dict[str, np.ndarray]) -> bytes:
+    """Concatena os ajustes de receita e despesa em um único .npy."""
+    partes = []
+    for fluxo, cod_tipo in TIPOS_FLUXO.items():
+        parte = np.array(ajustes.get(fluxo, np.zeros(0, AJUSTE_DTYPE)), dtype=AJUSTE_DTYPE)
+        parte['cod_tipo'] = cod_tipo
+        partes.append(parte)
+    buffer = io.BytesIO()
+    np.save(buffer, np.concatenate(partes), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def desserializar_ajustes(dados: bytes) -> Dict[str, np.ndarray]:
+    """Ajustes por fluxo a partir do .npy gravado."""
+    ajustes = np.load(io.BytesIO(dados), allow_pickle=False)
+    return {fluxo: ajustes[ajustes['cod_tipo'] == cod_tipo] for fluxo, cod_tipo in TIPOS_FLUXO.items()}
+
+
+# Snapshot decodificado por seq_historico: snapshots não mudam depois de criados.
+# A data do snapshot acompanha a entrada para não reaproveitar um id que
+# voltou a ser usado depois de uma exclusão.
+MAX_SNAPSHOTS_DECODIFICADOS = 128
+_snapshots_decodificados: "OrderedDict[int, Tuple[date, Dict]]" = OrderedDict()
+
+
 class SimuladorCenarioHistoricoRepository:
     """Repository para operações com histórico de cenários."""
     
@@ -29,6 +84,71 @@ class SimuladorCenarioHistoricoRepository:
             .all()
         )
     
+    def _query_periodo(self, seq_simulador_cenario: int, ano: Optional[int] = None):
+        query = (
+            self.session.query(SimuladorCenarioHistorico.seq_historico, SimuladorCenarioHistorico.dat_snapshot)
+            .filter(SimuladorCenarioHistorico.seq_simulador_cenario == seq_simulador_cenario)
+        )
+        if ano:
+            query = query.filter(
+                SimuladorCenarioHistorico.dat_snapshot >= date(ano, 1, 1),
+                SimuladorCenarioHistorico.dat_snapshot <= date(ano, 12, 31),
+            )
+        return query
+
+    def get_snapshot_ref(
+        self,
+        seq_simulador_cenario: int,
+        ano: Optional[int] = None,
+        ultimo: bool = False,
+    ):
+        """Id e data do primeiro (ou último) snapshot, sem carregar o JSON.
+
+        Returns:
+            Row com seq_historico e dat_snapshot, ou None
+        """
+        if ultimo:
+            ordem = (SimuladorCenarioHistorico.dat_snapshot.desc(), SimuladorCenarioHistorico.seq_historico.desc())
+        else:
+            ordem = (SimuladorCenarioHistorico.dat_snapshot.asc(), SimuladorCenarioHistorico.seq_historico.asc())
+        return self._query_periodo(seq_simulador_cenario, ano).order_by(*ordem).first()
+
+    def get_snapshot_decodificado(self, seq_historico: int, dat_snapshot: date) -> Optional[Dict]:
+        """Snapshot decodificado, em cache LRU por seq_historico.
+
+        Os ajustes de cada fluxo vêm como array `AJUSTE_DTYPE`, inclusive
+        nos snapshots antigos (ajustes no próprio JSON). O dict retornado é
+        compartilhado entre chamadas e não deve ser alterado.
+        """
+        entrada = _snapshots_decodificados.get(seq_historico)
+        if entrada is not None and entrada[0] == dat_snapshot:
+            _snapshots_decodificados.move_to_end(seq_historico)
+            return entrada[1]
+
+        row = (
+            self.session.query(SimuladorCenarioHistorico.json_snapshot, SimuladorCenarioHistorico.bin_ajustes)
+            .filter(SimuladorCenarioHistorico.seq_historico == seq_historico)
+            .first()
+        )
+        if row is None:
+            return None
+        dados = json.loads(row.json_snapshot)
+        if row.bin_ajustes is not None:
+            ajustes = desserializar_ajustes(row.bin_ajustes)
+        else:
+            ajustes = {
+                fluxo: montar_ajustes((dados.get(fluxo) or {}).get('ajustes', []), cod_tipo)
+                for fluxo, cod_tipo in TIPOS_FLUXO.items()
+            }
+        for fluxo, array in ajustes.items():
+            array.flags.writeable = False
+            dados.setdefault(fluxo, {})['ajustes'] = array
+        _snapshots_decodificados[seq_historico] = (dat_snapshot, dados)
+        _snapshots_decodificados.move_to_end(seq_historico)
+        while len(_snapshots_decodificados) > MAX_SNAPSHOTS_DECODIFICADOS:
+            _snapshots_decodificados.popitem(last=False)
+        return dados
+
     def get_primeiro_snapshot(
         self, 
         seq_simulador_cenario: int,
@@ -83,4 +203,5 @@ class SimuladorCenarioHistoricoRepository:
             .delete()
         )
         self.session.commit()
+        _snapshots_decodificados.clear()
         return count
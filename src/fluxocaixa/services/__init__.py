@@ -10,6 +10,7 @@ from .lancamento_service import (
     list_origens_lancamento,
     list_contas_bancarias,
     list_conferencias,
+    get_page_cursors,
 )
 from .alerta_service import (
     list_alertas,
@@ -49,6 +50,8 @@ from .qualificador_service import (
     list_despesa_qualificadores,
     list_receita_qualificadores_folha,
     list_despesa_qualificadores_folha,
+    list_qualificadores_folha_opcoes,
+    invalidate_qualificadores_cache,
     create_qualificador,
     update_qualificador,
     delete_qualificador as delete_qualificador_service,
@@ -87,6 +90,7 @@ __all__ = [
     'list_origens_lancamento',
     'list_contas_bancarias',
     'list_conferencias',
+    'get_page_cursors',
     'list_alertas',
     'create_alerta',
     'update_alerta',
@@ -124,6 +128,8 @@ __all__ = [
     'list_despesa_qualificadores',
     'list_receita_qualificadores_folha',
     'list_despesa_qualificadores_folha',
+    'list_qualificadores_folha_opcoes',
+    'invalidate_qualificadores_cache',
     'create_qualificador',
     'update_qualificador',
     'delete_qualificador_service',
@@ -0,0 +1,190 @@
+"""Arquivamento de anos frios de flc_lancamento.
+
+Quase toda consulta toca o ano corrente e os três ou quatro anteriores; o
+resto do histórico só engorda os índices e as varreduras de flc_lancamento.
+`arquivar_ano` fecha o ano, se ainda não estiver fechado (ver
+`services/fechamento_service.py`), e move suas linhas para o arquivo (ver
+`repositories/lancamento_arquivo_repository.py`); os totais mensais do
+fechamento ficam no banco quente. `LancamentoRepository` e os serviços que
+leem flc_lancamento passam a incluir o ano pelo arquivo ou pelos totais, sem
+mudar resultados. Restaurar devolve as linhas, e o ano continua fechado.
+
+No SQLite o arquivo é outro banco, e transações sobre bancos anexados em WAL
+não são atômicas entre os dois arquivos. Por isso a cópia é confirmada antes:
+se o processo cair entre as duas etapas, sobra uma tabela no arquivo sem
+registro em flc_lancamento_ano_arquivado, que é ignorada e recriada na
+próxima tentativa. No PostgreSQL tudo roda numa transação só.
+
+Disparado por cron ou manualmente com `python -m fluxocaixa.arquivamento`.
+A revisão ``periodo`` (ver `repositories/revisao_repository.py`) muda na
+transação que registra ou remove o ano arquivado, e os workers da aplicação
+descartam os anos arquivados que guardam na requisição seguinte.
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from ..config import Config
+from ..models import Lancamento
+from ..models.base import engine
+from ..models.lancamento_arquivo import LancamentoAnoArquivado
+from ..repositories import lancamento_analitico_repository as analitico
+from ..repositories import lancamento_arquivo_repository as arquivo_repo
+from ..repositories import revisao_repository
+from ..repositories.lancamento_repository import LancamentoRepository
+from . import fechamento_service
+
+
+def ultimo_ano_arquivavel(hoje: Optional[date] = None) -> int:
+    """Most recent year that may be archived (`Config.ANOS_QUENTES` stay hot)."""
+    hoje = hoje or date.today()
+    return hoje.year - Config.ANOS_QUENTES
+
+
+def anos_arquivaveis(hoje: Optional[date] = None) -> List[int]:
+    """Years still in flc_lancamento that are old enough to be archived."""
+    limite = ultimo_ano_arquivavel(hoje)
+    with engine.connect() as conn:
+        return [ano for ano in arquivo_repo.anos_no_quente(conn) if ano <= limite]
+
+
+def listar_anos_arquivados() -> List[Dict]:
+    """Archived years with row count, total value and archival date."""
+    with engine.connect() as conn:
+        linhas = conn.execute(
+            select(LancamentoAnoArquivado.__table__).order_by(LancamentoAnoArquivado.ano)
+        ).mappings().all()
+    return [
+        {
+            'ano': linha['ano'],
+            'lancamentos': linha['qtd_lancamentos'],
+            'valor': float(linha['val_total']),
+            'dat_arquivamento': linha['dat_arquivamento'],
+        }
+        for linha in linhas
+    ]
+
+
+def _preparar_arquivo() -> None:
+    caminho = arquivo_repo.caminho_arquivo_sqlite()
+    if engine.dialect.name == 'sqlite':
+        if caminho is None:
+            raise ValueError('Banco SQLite em memória não suporta arquivamento')
+        # Cria o arquivo vazio; as conexões o anexam no próximo checkout
+        sqlite3.connect(caminho).close()
+    elif engine.dialect.name != 'postgresql':
+        raise ValueError(f'Arquivamento não suportado para {engine.dialect.name}')
+
+
+def _concluir(revisoes: Dict[str, int]) -> None:
+    arquivo_repo.invalidar_cache()
+    LancamentoRepository.invalidate_count_cache()
+    revisao_repository.confirmar(revisoes)
+
+
+def arquivar_ano(ano: int, hoje: Optional[date] = None) -> Dict:
+    """Close one year if needed and move its lancamentos to the archive.
+
+    Args:
+        ano: Year to archive
+        hoje: Reference date for the hot window (default: today)
+
+    Returns:
+        Dictionary with 'ano', 'lancamentos' (rows moved) and 'valor' (their sum)
+
+    Raises:
+        ValueError: Year inside the hot window, already archived, or backend
+            without archive support
+    """
+    ano = int(ano)
+    if ano > ultimo_ano_arquivavel(hoje):
+        raise ValueError(
+            f'Ano {ano} está na janela quente ({Config.ANOS_QUENTES} anos); '
+            f'o mais recente arquivável é {ultimo_ano_arquivavel(hoje)}'
+        )
+    _preparar_arquivo()
+    with engine.connect() as conn:
+        if arquivo_repo.registro_ano(conn, ano) is not None:
+            raise ValueError(f'Ano {ano} já está arquivado')
+        fechado_ate = arquivo_repo.ultimo_mes_fechado(conn)
+    if fechado_ate is None or fechado_ate < date(ano, 12, 31):
+        fechamento_service.fechar_periodo(ano, 12, hoje)
+    # Parquet de um arquivamento anterior do ano, restaurado depois
+    analitico.descartar_parquet(ano)
+
+    # 1. Copia para a tabela do ano no arquivo
+    with engine.begin() as conn:
+        arquivo_repo.criar_tabela_ano(conn, ano)
+        arquivo_repo.copiar_para_arquivo(conn, ano)
+        copiados = arquivo_repo.totais_ano(conn, arquivo_repo.tabela_ano(ano), ano)
+        if conn.dialect.name == 'postgresql':
+            revisoes = _mover(conn, ano, copiados)
+    # 2. No SQLite, o banco quente numa segunda transação
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as conn:
+            revisoes = _mover(conn, ano, copiados)
+
+    _concluir(revisoes)
+    qtd, total = copiados
+    return {'ano': ano, 'lancamentos': qtd, 'valor': total}
+
+
+def _mover(conn, ano: int, copiados) -> Dict[str, int]:
+    quentes = arquivo_repo.totais_ano(conn, Lancamento.__table__, ano)
+    if quentes != copiados:
+        raise RuntimeError(
+            f'Cópia do ano {ano} divergente: {copiados} no arquivo, {quentes} em flc_lancamento'
+        )
+    fechados = arquivo_repo.totais_fechados(conn, ano)
+    if fechados != copiados:
+        raise RuntimeError(
+            f'Ano {ano} divergente do fechamento: {fechados} fechados, {copiados} em flc_lancamento'
+        )
+    arquivo_repo.registrar_ano(conn, ano, *copiados)
+    return revisao_repository.incrementar(conn, 'periodo')
+
+
+def arquivar_anos_frios(hoje: Optional[date] = None) -> List[Dict]:
+    """Archive every year older than the hot window, oldest first."""
+    return [arquivar_ano(ano, hoje) for ano in anos_arquivaveis(hoje)]
+
+
+def restaurar_ano(ano: int) -> Dict:
+    """Bring an archived year back to flc_lancamento.
+
+    Args:
+        ano: Archived year
+
+    Returns:
+        Dictionary with 'ano', 'lancamentos' and 'valor' restored
+
+    Raises:
+        ValueError: Year not archived
+        RuntimeError: Archive contents differ from what was archived
+    """
+    ano = int(ano)
+    _preparar_arquivo()
+    with engine.begin() as conn:
+        registro = arquivo_repo.registro_ano(conn, ano)
+        if registro is None:
+            raise ValueError(f'Ano {ano} não está arquivado')
+        arquivados = arquivo_repo.totais_ano(conn, arquivo_repo.tabela_ano(ano), ano)
+        if arquivados != (registro.qtd_lancamentos, round(float(registro.val_total), 2)):
+            raise RuntimeError(f'Arquivo do ano {ano} não confere com o registro')
+        arquivo_repo.devolver_ao_quente(conn, ano)
+        revisoes = revisao_repository.incrementar(conn, 'periodo')
+        if conn.dialect.name == 'postgresql':
+            arquivo_repo.remover_tabela_ano(conn, ano)
+    if engine.dialect.name == 'sqlite':
+        # Sem registro, a tabela que sobrar no arquivo já é ignorada
+        with engine.begin() as conn:
+            arquivo_repo.remover_tabela_ano(conn, ano)
+
+    analitico.descartar_parquet(ano)
+    _concluir(revisoes)
+    qtd, total = arquivados
+    return {'ano': ano, 'lancamentos': qtd, 'valor': total}
@@ -14,15 +14,25 @@ import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
-from ..models import db, Lancamento, Qualificador
-from sqlalchemy import func, extract, and_
+from ..models import db, Qualificador
+from ..models.base import somente_leitura
+from ..repositories.lancamento_repository import LancamentoRepository
 
 
 # Modelos suportados no backtest
+# tipo/config: variante de um tipo do registro do pipeline (ex.: ordem automática)
 MODELOS_DISPONIVEIS = {
     'HOLT_WINTERS': {'nome': 'Holt-Winters', 'min_meses': 12},
     'ARIMA': {'nome': 'ARIMA', 'min_meses': 12},
+    'ARIMA_AUTO': {
+        'nome': 'ARIMA (ordem automática)', 'min_meses': 12,
+        'tipo': 'ARIMA', 'config': {'auto_order': True},
+    },
     'SARIMA': {'nome': 'SARIMA', 'min_meses': 12},
+    'SARIMA_AUTO': {
+        'nome': 'SARIMA (ordem automática)', 'min_meses': 12,
+        'tipo': 'SARIMA', 'config': {'auto_order': True},
+    },
     'XGBOOST': {'nome': 'XGBoost', 'min_meses': 13},
     'LIGHTGBM': {'nome': 'LightGBM', 'min_meses': 13},
     'MEDIA_HISTORICA': {'nome': 'Média Histórica', 'min_meses': 1},
@@ -30,6 +40,20 @@ MODELOS_DISPONIVEIS = {
 }
 
 
+def _totais_mensais(seq_qualificador: int, anos: List[int]) -> Dict[tuple, float]:
+    """Total mensal realizado (status 'A', todos os tipos) por (ano, mês)."""
+    totais: Dict[tuple, float] = {}
+    linhas = LancamentoRepository().get_grouped_by_qualificador_year_month(
+        qualificador_ids=[seq_qualificador],
+        anos=anos,
+        meses=list(range(1, 13)),
+    )
+    for linha in linhas:
+        chave = (int(linha.ano), int(linha.mes))
+        totais[chave] = totais.get(chave, 0.0) + float(linha.total or 0)
+    return totais
+
+
 def _obter_dados_treino(
     seq_qualificador: int,
     anos_treino: List[int],
@@ -43,32 +67,15 @@ def _obter_dados_treino(
     Returns:
         DataFrame com colunas: data, valor (mensal)
     """
-    lancamentos = (
-        Lancamento.query
-        .filter(
-            Lancamento.seq_qualificador == seq_qualificador,
-            Lancamento.ind_status == 'A',
-            extract('year', Lancamento.dat_lancamento).in_(anos_treino),
-        )
-        .all()
-    )
-
-    if not lancamentos:
+    totais = _totais_mensais(seq_qualificador, anos_treino)
+    if not totais:
         return pd.DataFrame(columns=['data', 'valor'])
 
-    data = []
-    for lanc in lancamentos:
-        data.append({
-            'data': lanc.dat_lancamento,
-            'valor': float(lanc.val_lancamento)
-        })
-
-    df = pd.DataFrame(data)
-    df['ano_mes'] = df['data'].apply(lambda x: x.strftime('%Y-%m'))
-    df_agregado = df.groupby('ano_mes')['valor'].sum().reset_index()
-    df_agregado.columns = ['data', 'valor']
-    df_agregado['data'] = pd.to_datetime(df_agregado['data'] + '-01')
-    return df_agregado.sort_values('data').reset_index(drop=True)
+    meses = sorted(totais)
+    return pd.DataFrame({
+        'data': pd.to_datetime([f'{ano}-{mes:02d}-01' for ano, mes in meses]),
+        'valor': [totais[chave] for chave in meses],
+    })
 
 
 def _obter_real(
@@ -80,22 +87,7 @@ def _obter_real(
     Returns:
         Dict {mes: valor_total}, ex: {1: 50000, 2: 55000, ...}
     """
-    lancamentos = (
-        Lancamento.query
-        .filter(
-            Lancamento.seq_qualificador == seq_qualificador,
-            Lancamento.ind_status == 'A',
-            extract('year', Lancamento.dat_lancamento) == ano,
-        )
-        .all()
-    )
-
-    resultado = {}
-    for lanc in lancamentos:
-        mes = lanc.dat_lancamento.month
-        resultado[mes] = resultado.get(mes, 0) + float(lanc.val_lancamento)
-
-    return resultado
+    return {mes: valor for (_, mes), valor in _totais_mensais(seq_qualificador, [ano]).items()}
 
 
 def _executar_modelo(
@@ -110,71 +102,31 @@ def _executar_modelo(
     Returns:
         Dict {mes: valor_projetado} ou None se falhar
     """
-    from . import modelos_economicos_service as modelos
+    from .simulacao_pipeline import dados_suficientes, executar_ramo, novo_ramo
 
-    config = {}
-    meses_projecao = 12
+    tipo = MODELOS_DISPONIVEIS[modelo].get('tipo', modelo)
+    if not dados_suficientes(tipo, dados_treino):
+        return None
+    # Crescimento usa dados dos anos de treino
+    # Precisa de pelo menos 2 anos para calcular crescimento
+    if modelo == 'CRESCIMENTO_ANO' and len(anos_treino) < 2:
+        return None
 
     try:
-        if modelo == 'HOLT_WINTERS':
-            if len(dados_treino) < 12:
-                return None
-            resultado = modelos.projetar_holt_winters(
-                dados_treino, meses_projecao, config, ano_teste
-            )
-
-        elif modelo == 'ARIMA':
-            if len(dados_treino) < 12:
-                return None
-            resultado = modelos.projetar_arima(
-                dados_treino, meses_projecao, config, ano_teste
-            )
-
-        elif modelo == 'SARIMA':
-            if len(dados_treino) < 12:
-                return None
-            resultado = modelos.projetar_sarima(
-                dados_treino, meses_projecao, config, ano_teste
-            )
-
-        elif modelo == 'XGBOOST':
-            if len(dados_treino) < 13:
-                return None
-            resultado = modelos.projetar_xgboost(
-                dados_treino, meses_projecao, config, ano_teste
-            )
-
-        elif modelo == 'LIGHTGBM':
-            if len(dados_treino) < 13:
-                return None
-            resultado = modelos.projetar_lightgbm(
-                dados_treino, meses_projecao, config, ano_teste
-            )
-
-        elif modelo == 'MEDIA_HISTORICA':
-            if len(dados_treino) == 0:
-                return None
-            resultado = modelos.projetar_media_historica(
-                dados_treino, meses_projecao, config, ano_teste
-            )
-
-        elif modelo == 'CRESCIMENTO_ANO':
-            # Crescimento usa dados dos anos de treino
-            # Precisa de pelo menos 2 anos para calcular crescimento
-            if len(anos_treino) < 2:
-                return None
-            from .formula_engine import projetar_crescimento_ultimo_ano
-            ano_ref = max(anos_treino)
-            resultado = projetar_crescimento_ultimo_ano(
-                seq_qualificadores=[seq_qualificador],
-                ano_projecao=ano_teste,
-                ano_referencia=ano_ref,
-                mes_referencia=12,  # usar ano completo para backtest
-                meses_projecao=12,
-            )
-
-        else:
-            return None
+        config = dict(MODELOS_DISPONIVEIS[modelo].get('config', {}))
+        if modelo == 'CRESCIMENTO_ANO':
+            # usar ano completo para backtest
+            config['mes_referencia'] = 12
+        ramo = novo_ramo(
+            tipo=tipo,
+            ano_base=ano_teste,
+            meses_projecao=12,
+            config=config,
+            seq_qualificadores=[seq_qualificador],
+            anos_referencia=anos_treino,
+            dados=dados_treino,
+        )
+        resultado, _ = executar_ramo(ramo, estrito=True)
 
         # Converter DataFrame para dict {mes: valor}
         proj = {}
@@ -284,6 +236,7 @@ def _obter_hierarquia_qualificadores() -> Dict:
     return hierarquia
 
 
+@somente_leitura()
 def executar_backtest(
     anos_treino: List[int],
     anos_teste: List[int],
@@ -586,6 +539,7 @@ def salvar_recomendacoes(resultados_backtest: Dict) -> int:
     return count
 
 
+@somente_leitura()
 def obter_recomendacoes() -> Dict[int, Dict]:
     """Obtém recomendações salvas do último backtest.
 
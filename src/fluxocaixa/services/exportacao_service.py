@@ -0,0 +1,291 @@
+"""Exportação em streaming (CSV ou Parquet) de lançamentos, relatórios e versões.
+
+Os dados saem do banco em lotes (`yield_per`, cursor do lado do servidor no
+PostgreSQL) e cada lote é convertido e entregue antes do próximo ser lido,
+de modo que a memória fica constante qualquer que seja o número de linhas.
+
+- CSV: separador ';' (o mesmo aceito na importação da LOA), UTF-8 com BOM
+  para abrir direto no Excel.
+- Parquet: um row group por lote; requer pyarrow (opcional).
+"""
+from __future__ import annotations
+
+import csv
+from datetime import date
+from io import StringIO
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+HAS_PYARROW = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    pass
+
+from ..models.base import SessionLocal, engine_leitura
+from ..repositories import projecao_versao_repository
+from ..repositories.lancamento_repository import LancamentoRepository
+
+# formato: (media type, extensão)
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+TAMANHO_LOTE = 5000
+
+# Colunas: (nome, tipo) com tipo em 'int', 'float', 'str', 'date'
+Colunas = Sequence[Tuple[str, str]]
+
+COLUNAS_LANCAMENTOS = (
+    ('seq_lancamento', 'int'),
+    ('dat_lancamento', 'date'),
+    ('num_qualificador', 'str'),
+    ('dsc_qualificador', 'str'),
+    ('dsc_tipo_lancamento', 'str'),
+    ('dsc_origem_lancamento', 'str'),
+    ('seq_conta', 'int'),
+    ('val_lancamento', 'float'),
+)
+
+COLUNAS_PROJECAO_VALOR = (
+    ('cod_tipo', 'str'),
+    ('seq_qualificador', 'int'),
+    ('num_qualificador', 'str'),
+    ('dsc_qualificador', 'str'),
+    ('ano', 'int'),
+    ('mes', 'int'),
+    ('val_projetado', 'float'),
+    ('val_realizado', 'float'),
+)
+
+COLUNAS_BACKTEST = (
+    ('seq_qualificador', 'int'),
+    ('num_qualificador', 'str'),
+    ('dsc_qualificador', 'str'),
+    ('cod_modelo', 'str'),
+    ('nom_modelo', 'str'),
+    ('ano_teste', 'int'),
+    ('mes', 'int'),
+    ('val_projetado', 'float'),
+    ('val_real', 'float'),
+    ('val_mape', 'float'),
+    ('val_wmape', 'float'),
+    ('val_bias', 'float'),
+    ('melhor_modelo', 'str'),
+)
+
+
+def validar_formato(formato: str) -> str:
+    """Normaliza o formato pedido.
+
+    Raises:
+        ValueError: formato desconhecido ou Parquet sem pyarrow instalado
+    """
+    formato = (formato or 'csv').lower()
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato não suportado: {formato}. Use csv ou parquet')
+    if formato == 'parquet' and not HAS_PYARROW:
+        raise ValueError('Exportação Parquet requer pyarrow. Execute: pip install pyarrow')
+    return formato
+
+
+# ==================== Escrita ====================
+
+def _celula_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def gerar_csv(colunas: Colunas, lotes: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Cabeçalho e depois um bloco de bytes por lote de linhas."""
+    buffer = StringIO()
+    writer = csv.writer(buffer, delimiter=';', lineterminator='\n')
+    writer.writerow([nome for nome, _ in colunas])
+    yield buffer.getvalue().encode('utf-8-sig')
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows([_celula_csv(v) for v in linha] for linha in lote)
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _SaidaParquet:
+    """Arquivo só de escrita que entrega os bytes ao gerador a cada lote.
+
+    O ParquetWriter registra offsets a partir de `tell()`, por isso a posição
+    é acumulada mesmo depois que os bytes já escritos foram entregues.
+    """
+
+    def __init__(self):
+        self.partes: List[bytes] = []
+        self.posicao = 0
+        self.closed = False
+
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self.partes.append(dados)
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self.posicao
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drenar(self) -> bytes:
+        dados = b''.join(self.partes)
+        self.partes.clear()
+        return dados
+
+
+def _schema_parquet(colunas: Colunas):
+    tipos = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'date': pa.date32()}
+    return pa.schema([(nome, tipos[tipo]) for nome, tipo in colunas])
+
+
+def _valor_parquet(valor, tipo: str):
+    if valor is None:
+        return None
+    if tipo == 'float':
+        return float(valor)
+    if tipo == 'int':
+        return int(valor)
+    if tipo == 'str':
+        return str(valor)
+    return valor
+
+
+def gerar_parquet(colunas: Colunas, lotes: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Um row group por lote; cada um é entregue assim que escrito."""
+    schema = _schema_parquet(colunas)
+    saida = _SaidaParquet()
+    writer = pq.ParquetWriter(saida, schema)
+    try:
+        for lote in lotes:
+            if not lote:
+                continue
+            arrays = [
+                pa.array([_valor_parquet(linha[i], tipo) for linha in lote], type=schema.field(i).type)
+                for i, (_, tipo) in enumerate(colunas)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield saida.drenar()
+    finally:
+        writer.close()
+    yield saida.drenar()
+
+
+def gerar_arquivo(formato: str, colunas: Colunas, lotes: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    if formato == 'parquet':
+        return gerar_parquet(colunas, lotes)
+    return gerar_csv(colunas, lotes)
+
+
+# ==================== Fontes ====================
+
+def _lotes_em_sessao_propria(ler):
+    """Executa `ler(session)` numa sessão própria, fechada ao fim da leitura.
+
+    O corpo da resposta é consumido depois que o endpoint retorna (e fora da
+    thread da requisição), então o streaming não usa a sessão da requisição.
+    A sessão é ligada à engine de leitura, como os relatórios.
+    """
+    session = SessionLocal.session_factory(bind=engine_leitura)
+    try:
+        yield from ler(session)
+    finally:
+        session.close()
+
+
+def lotes_lancamentos(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tipo: Optional[int] = None,
+    qualificador_folha: Optional[int] = None,
+    seq_conta: Optional[int] = None,
+    cod_origem: Optional[int] = None,
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> Iterator[List]:
+    """Lançamentos com os mesmos filtros da listagem de /saldos."""
+    return _lotes_em_sessao_propria(
+        lambda session: LancamentoRepository(session).iter_export(
+            start_date, end_date, tipo, qualificador_folha, seq_conta, cod_origem,
+            batch_size=tamanho_lote,
+        )
+    )
+
+
+def lotes_projecao_versao(
+    seq_projecao_versao: int,
+    cod_tipo: Optional[str] = None,
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> Iterator[List]:
+    """Linhas (flc_projecao_valor) de uma versão de projeção."""
+    return _lotes_em_sessao_propria(
+        lambda session: projecao_versao_repository.iter_valores_by_versao(
+            seq_projecao_versao, cod_tipo, tamanho_lote, session=session
+        )
+    )
+
+
+def tabela_dfc(dados: Dict) -> Tuple[List[Tuple[str, str]], Iterator[List]]:
+    """Achata a matriz do DFC (`get_dfc_data`) em linhas e colunas.
+
+    Uma linha por nó da árvore (número, nome, nível e um valor por coluna do
+    período), seguida do total e dos saldos bancários. A matriz tem o tamanho
+    da árvore de qualificadores, não do número de lançamentos.
+    """
+    periodos = list(dados['headers'][1:])
+    colunas = [('num_qualificador', 'str'), ('dsc_qualificador', 'str'), ('nivel', 'int')]
+    colunas += [(periodo, 'float') for periodo in periodos]
+
+    def linhas():
+        pilha = list(reversed(dados['dre_data']))
+        lote = []
+        while pilha:
+            no = pilha.pop()
+            lote.append([no['number'], no['name'], no['level'], *no['values']])
+            pilha.extend(reversed(no['children']))
+        lote.append(['', 'Total', None, *dados['totals']])
+        lote.append(['', 'Saldo anterior', None, *dados['saldos_banco_anterior']])
+        lote.append(['', 'Saldo final', None, *dados['saldos_banco_final']])
+        yield lote
+
+    return colunas, linhas()
+
+
+def lotes_backtest(resultado: Dict) -> Iterator[List]:
+    """Achata o resultado de `executar_backtest`: uma linha por
+    qualificador × modelo × ano de teste × mês, com as métricas do ano."""
+    for item in resultado.get('resultados_filho', []):
+        lote = []
+        for cod_modelo, dados_modelo in item.get('modelos', {}).items():
+            for detalhe in dados_modelo.get('detalhes_por_ano', []):
+                projecao = detalhe.get('projecao', {})
+                real = detalhe.get('real', {})
+                for mes in sorted(set(projecao) | set(real), key=int):
+                    lote.append([
+                        item.get('seq_qualificador'),
+                        item.get('num_qualificador'),
+                        item.get('dsc_qualificador'),
+                        cod_modelo,
+                        dados_modelo.get('nome'),
+                        detalhe.get('ano_teste'),
+                        int(mes),
+                        projecao.get(mes),
+                        real.get(mes),
+                        detalhe.get('mape'),
+                        detalhe.get('wmape'),
+                        detalhe.get('bias'),
+                        item.get('melhor_modelo'),
+                    ])
+        yield lote
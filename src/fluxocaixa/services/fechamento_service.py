@@ -0,0 +1,147 @@
+"""Fechamento de períodos de flc_lancamento.
+
+DFC, resumo, indicadores e LDO reagregam a cada consulta meses passados cujos
+lançamentos não mudam mais. `fechar_periodo` congela os totais mensais (por
+qualificador, tipo, origem, conta e status) em flc_lancamento_mensal e marca
+os meses como fechados em flc_periodo_fechado; a partir daí:
+
+- consultas de granularidade mensal ou maior leem os meses fechados dos
+  agregados e só os meses abertos de flc_lancamento (ver
+  `repositories/lancamento_arquivo_repository.fonte_lancamentos`), de modo
+  que o custo dos relatórios acompanha o tamanho da janela aberta;
+- incluir, alterar ou excluir lançamento com data num mês fechado levanta
+  ValueError no flush da sessão.
+
+Os meses fechados são contíguos: fechar um mês fecha também os anteriores, e
+reabrir um mês reabre também os posteriores. Anos arquivados ficam sempre
+fechados. A revisão ``periodo`` (ver `repositories/revisao_repository.py`)
+muda na mesma transação, e os outros workers descartam os meses fechados que
+guardam na requisição seguinte.
+"""
+from __future__ import annotations
+
+import calendar
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from ..models.base import engine
+from ..models.lancamento_arquivo import PeriodoFechado
+from ..repositories import lancamento_arquivo_repository as arquivo_repo
+from ..repositories import revisao_repository
+from ..repositories.lancamento_repository import LancamentoRepository
+
+
+def fechado_ate() -> Optional[date]:
+    """Last day of the last closed month (None when no month is closed)."""
+    with engine.connect() as conn:
+        return arquivo_repo.ultimo_mes_fechado(conn)
+
+
+def listar_periodos_fechados() -> List[Dict]:
+    """Closed months with row count, total value and closing date."""
+    with engine.connect() as conn:
+        linhas = conn.execute(
+            select(PeriodoFechado.__table__).order_by(PeriodoFechado.dat_mes)
+        ).mappings().all()
+    return [
+        {
+            'ano': linha['dat_mes'].year,
+            'mes': linha['dat_mes'].month,
+            'lancamentos': linha['qtd_lancamentos'],
+            'valor': float(linha['val_total']),
+            'dat_fechamento': linha['dat_fechamento'],
+        }
+        for linha in linhas
+    ]
+
+
+def _validar_mes(ano: int, mes: int) -> date:
+    if not 1 <= mes <= 12:
+        raise ValueError(f'Mês inválido: {mes}')
+    return date(ano, mes, 1)
+
+
+def _concluir(revisoes: Dict[str, int]) -> None:
+    arquivo_repo.invalidar_cache()
+    LancamentoRepository.invalidate_count_cache()
+    revisao_repository.confirmar(revisoes)
+
+
+def fechar_periodo(ano: int, mes: int, hoje: Optional[date] = None) -> Dict:
+    """Close every open month up to (ano, mes) and freeze their aggregates.
+
+    Args:
+        ano: Year of the last month to close
+        mes: Last month to close (1-12)
+        hoje: Reference date; the current month can't be closed (default: today)
+
+    Returns:
+        Dictionary with 'fechado_ate', 'meses' (months closed now),
+        'lancamentos' and 'valor' of those months
+
+    Raises:
+        ValueError: Invalid month, current or future month, or already closed
+    """
+    ano, mes = int(ano), int(mes)
+    inicio_mes = _validar_mes(ano, mes)
+    hoje = hoje or date.today()
+    if inicio_mes >= date(hoje.year, hoje.month, 1):
+        raise ValueError(f'Período {mes:02d}/{ano} ainda não terminou')
+    fim = date(ano, mes, calendar.monthrange(ano, mes)[1])
+
+    with engine.begin() as conn:
+        limite = arquivo_repo.ultimo_mes_fechado(conn)
+        if limite is not None and fim <= limite:
+            raise ValueError(f'Período {mes:02d}/{ano} já está fechado')
+        if limite is not None:
+            inicio = limite + timedelta(days=1)
+        else:
+            # Primeiro fechamento: desde o lançamento mais antigo
+            primeiro = arquivo_repo.primeiro_dia_quente(conn) or inicio_mes
+            inicio = date(primeiro.year, primeiro.month, 1) if primeiro < inicio_mes else inicio_mes
+        qtd, total = arquivo_repo.fechar_meses(conn, inicio, fim)
+        revisoes = revisao_repository.incrementar(conn, 'periodo')
+
+    _concluir(revisoes)
+    return {
+        'fechado_ate': fim,
+        'meses': (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1,
+        'lancamentos': qtd,
+        'valor': total,
+    }
+
+
+def reabrir_periodo(ano: int, mes: int) -> Dict:
+    """Reopen (ano, mes) and every later closed month, dropping their aggregates.
+
+    Args:
+        ano: Year of the first month to reopen
+        mes: First month to reopen (1-12)
+
+    Returns:
+        Dictionary with 'fechado_ate' (None when nothing stays closed) and
+        'meses' (months reopened)
+
+    Raises:
+        ValueError: Invalid month, month not closed, or month of an archived year
+    """
+    ano, mes = int(ano), int(mes)
+    inicio = _validar_mes(ano, mes)
+    arquivados = [a for a in arquivo_repo.anos_arquivados() if a >= ano]
+    if arquivados:
+        raise ValueError(
+            f'Ano {max(arquivados)} está arquivado; restaure-o antes de reabrir {mes:02d}/{ano}'
+        )
+
+    with engine.begin() as conn:
+        limite = arquivo_repo.ultimo_mes_fechado(conn)
+        if limite is None or inicio > limite:
+            raise ValueError(f'Período {mes:02d}/{ano} não está fechado')
+        meses = arquivo_repo.reabrir_meses(conn, inicio)
+        limite = arquivo_repo.ultimo_mes_fechado(conn)
+        revisoes = revisao_repository.incrementar(conn, 'periodo')
+
+    _concluir(revisoes)
+    return {'fechado_ate': limite, 'meses': meses}
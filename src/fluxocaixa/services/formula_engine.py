@@ -12,11 +12,12 @@ Usa a biblioteca py_expression_eval para avaliação segura (sem eval()).
 
 import json
 from datetime import date
+from functools import lru_cache, reduce
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from py_expression_eval import Parser
-from sqlalchemy import Integer as db_Integer
 
 from ..repositories import formula_repository as formula_repo
 
@@ -24,6 +25,32 @@ from ..repositories import formula_repository as formula_repo
 # Parser compartilhado (thread-safe para leitura)
 _parser = Parser()
 
+# Parser com operações elemento a elemento: as variáveis podem ser arrays
+# NumPy e a expressão é avaliada para todos os valores de uma vez
+_parser_vetorial = Parser()
+_parser_vetorial.ops1.update({
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+    'sind': lambda a: np.sin(np.radians(a)),
+    'cosd': lambda a: np.cos(np.radians(a)),
+    'tand': lambda a: np.tan(np.radians(a)),
+    'asind': lambda a: np.degrees(np.arcsin(a)),
+    'acosd': lambda a: np.degrees(np.arccos(a)),
+    'atand': lambda a: np.degrees(np.arctan(a)),
+    'sqrt': np.sqrt, 'abs': np.abs, 'ceil': np.ceil, 'floor': np.floor,
+    'round': np.round, 'exp': np.exp, 'not': np.logical_not,
+})
+_parser_vetorial.ops2.update({
+    'and': np.logical_and, 'or': np.logical_or, 'xor': np.logical_xor,
+})
+_parser_vetorial.functions.update({
+    'log': lambda a, b=None: np.log(a) if b is None else np.log(a) / np.log(b),
+    'min': lambda *a: reduce(np.minimum, a),
+    'max': lambda *a: reduce(np.maximum, a),
+    'pow': np.power, 'atan2': np.arctan2, 'pyt': np.hypot,
+    'if': np.where,
+})
+
 
 def extrair_variaveis(expressao: str) -> List[str]:
     """Extrai os nomes das variáveis de uma expressão matemática.
@@ -95,6 +122,37 @@ def avaliar_formula(expressao: str, variaveis: Dict[str, float]) -> float:
         raise ValueError(f'Erro ao avaliar expressão: {str(e)}')
 
 
+@lru_cache(maxsize=256)
+def _parse_vetorial(expressao: str):
+    return _parser_vetorial.parse(expressao)
+
+
+def avaliar_formula_vetorial(expressao: str, variaveis: Dict[str, object]) -> np.ndarray:
+    """Avalia uma expressão com variáveis escalares ou arrays NumPy.
+
+    Os arrays são combinados por broadcasting (ex.: base com forma (meses, 1)
+    e parâmetros com forma (1, pontos) resultam em (meses, pontos)). Valores
+    não finitos (divisão por zero, variável NaN) ficam como NaN para o
+    chamador decidir o fallback, como o ValueError de `avaliar_formula`.
+
+    Raises:
+        ValueError: Se a expressão for inválida ou faltar variáveis
+    """
+    try:
+        expr = _parse_vetorial(expressao)
+    except Exception as e:
+        raise ValueError(f'Erro ao avaliar expressão: {str(e)}')
+    faltantes = set(expr.variables()) - set(variaveis.keys())
+    if faltantes:
+        raise ValueError(f'Variáveis não informadas: {", ".join(sorted(faltantes))}')
+    try:
+        with np.errstate(all='ignore'):
+            resultado = np.asarray(expr.evaluate(dict(variaveis)), dtype=float)
+    except Exception as e:
+        raise ValueError(f'Erro ao avaliar expressão: {str(e)}')
+    return np.where(np.isfinite(resultado), resultado, np.nan)
+
+
 def listar_anos_disponiveis(seq_qualificador: int) -> List[int]:
     """Retorna lista de anos que possuem dados históricos para um qualificador.
 
@@ -107,17 +165,19 @@ def listar_anos_disponiveis(seq_qualificador: int) -> List[int]:
     Returns:
         Lista de anos ordenados em ordem decrescente, ex: [2024, 2023, 2022]
     """
-    from ..models import Lancamento, db
+    from ..models import db
+    from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
     from sqlalchemy import func, extract
 
     try:
+        L = fonte_lancamentos(mensal=True)
         anos = (
             db.session.query(
-                extract('year', Lancamento.dat_lancamento).label('ano')
+                extract('year', L.dat_lancamento).label('ano')
             )
-            .filter(Lancamento.seq_qualificador == seq_qualificador)
+            .filter(L.seq_qualificador == seq_qualificador)
             .distinct()
-            .order_by(extract('year', Lancamento.dat_lancamento).desc())
+            .order_by(extract('year', L.dat_lancamento).desc())
             .all()
         )
         return [int(a.ano) for a in anos]
@@ -134,13 +194,14 @@ def listar_todos_anos_disponiveis() -> List[int]:
     Returns:
         Lista de anos ordenados em ordem decrescente, ex: [2025, 2024, 2023, 2022]
     """
-    from ..models import Lancamento
+    from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
     from ..models.base import SessionLocal
-    from sqlalchemy import func
+    from sqlalchemy import extract
 
     try:
         session = SessionLocal()
-        year_col = func.strftime('%Y', Lancamento.dat_lancamento)
+        L = fonte_lancamentos(mensal=True)
+        year_col = extract('year', L.dat_lancamento)
         anos = (
             session.query(year_col.label('ano'))
             .distinct()
@@ -224,23 +285,25 @@ def _buscar_valores_historicos_mes(
     Returns:
         Dicionário {ano: valor_total_do_mes}
     """
-    from ..models import Lancamento, db
+    from ..models import db
+    from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
     from sqlalchemy import func, extract, and_
 
     try:
+        L = fonte_lancamentos(anos=anos, mensal=True)
         resultados = (
             db.session.query(
-                extract('year', Lancamento.dat_lancamento).label('ano'),
-                func.sum(Lancamento.val_lancamento).label('total'),
+                extract('year', L.dat_lancamento).label('ano'),
+                func.sum(L.val_lancamento).label('total'),
             )
             .filter(
                 and_(
-                    Lancamento.seq_qualificador == seq_qualificador,
-                    extract('month', Lancamento.dat_lancamento) == mes,
-                    extract('year', Lancamento.dat_lancamento).in_(anos),
+                    L.seq_qualificador == seq_qualificador,
+                    extract('month', L.dat_lancamento) == mes,
+                    extract('year', L.dat_lancamento).in_(anos),
                 )
             )
-            .group_by(extract('year', Lancamento.dat_lancamento))
+            .group_by(extract('year', L.dat_lancamento))
             .all()
         )
 
@@ -335,22 +398,24 @@ def _buscar_valores_historicos_anual(
     anos: List[int],
 ) -> Dict[int, float]:
     """Busca totais anuais (soma de todos os meses) para um qualificador."""
-    from ..models import Lancamento, db
+    from ..models import db
+    from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
     from sqlalchemy import func, extract, and_
 
     try:
+        L = fonte_lancamentos(anos=anos, mensal=True)
         resultados = (
             db.session.query(
-                extract('year', Lancamento.dat_lancamento).label('ano'),
-                func.sum(Lancamento.val_lancamento).label('total'),
+                extract('year', L.dat_lancamento).label('ano'),
+                func.sum(L.val_lancamento).label('total'),
             )
             .filter(
                 and_(
-                    Lancamento.seq_qualificador == seq_qualificador,
-                    extract('year', Lancamento.dat_lancamento).in_(anos),
+                    L.seq_qualificador == seq_qualificador,
+                    extract('year', L.dat_lancamento).in_(anos),
                 )
             )
-            .group_by(extract('year', Lancamento.dat_lancamento))
+            .group_by(extract('year', L.dat_lancamento))
             .all()
         )
         return {int(r.ano): float(r.total) for r in resultados}
@@ -391,6 +456,62 @@ def projetar_com_formula_anual(
     return pd.DataFrame(records)
 
 
+def calcular_bases_periodos(
+    seq_qualificadores: List[int],
+    periodos: int,
+    periodicidade: str,
+    metodo: str,
+    config: dict,
+) -> Dict[int, np.ndarray]:
+    """Base de cada período projetado para vários qualificadores de uma vez.
+
+    Mesmo resultado de `calcular_base` (mensal, período i = mês i % 12 + 1) ou
+    `calcular_base_anual` (ANUAL, mesma base em todos os períodos), com uma
+    única query agrupada em vez de uma por qualificador e mês.
+
+    Returns:
+        {seq_qualificador: array (periodos,)}
+    """
+    from ..repositories.lancamento_repository import LancamentoRepository
+
+    if metodo == 'VALOR_FIXO':
+        valor = float(config.get('valor', 0))
+        return {seq: np.full(periodos, valor) for seq in seq_qualificadores}
+
+    anos = [int(a) for a in config.get('anos', [])]
+    if not anos or not seq_qualificadores or metodo not in ('MEDIA_SIMPLES', 'MEDIA_PONDERADA'):
+        return {seq: np.zeros(periodos) for seq in seq_qualificadores}
+
+    rows = LancamentoRepository().get_monthly_totals_by_qualificador(
+        seq_qualificadores, date(min(anos), 1, 1), date(max(anos), 12, 31)
+    )
+    df = pd.DataFrame(
+        [(r.seq_qualificador, int(r.ano), int(r.mes), float(r.total)) for r in rows],
+        columns=['seq_qualificador', 'ano', 'mes', 'valor'],
+    )
+    df = df[df['ano'].isin(anos)]
+    pesos = config.get('pesos', {}) if metodo == 'MEDIA_PONDERADA' else {}
+    df['peso'] = [float(pesos.get(str(ano), 1)) for ano in df['ano']]
+
+    mensal = periodicidade != 'ANUAL'
+    if not mensal:
+        df = df.groupby(['seq_qualificador', 'ano'], as_index=False).agg(valor=('valor', 'sum'), peso=('peso', 'first'))
+        df['mes'] = 0
+    df['ponderado'] = df['valor'] * df['peso']
+    somas = df.groupby(['seq_qualificador', 'mes'])[['ponderado', 'peso']].sum()
+    medias = (somas['ponderado'] / somas['peso']).where(somas['peso'] != 0, 0.0)
+
+    indice_mes = (np.arange(periodos) % 12 + 1) if mensal else np.zeros(periodos, dtype=int)
+    bases = {}
+    for seq in seq_qualificadores:
+        por_mes = medias.xs(seq, level='seq_qualificador') if seq in medias.index.get_level_values(0) else None
+        if por_mes is None:
+            bases[seq] = np.zeros(periodos)
+        else:
+            bases[seq] = por_mes.reindex(indice_mes, fill_value=0.0).to_numpy(dtype=float)
+    return bases
+
+
 def projetar_cenario_formula(
     seq_simulador_cenario: int,
     ano_base: int,
@@ -484,19 +605,21 @@ def _soma_acumulada(seq_qualificadores: List[int], ano: int, mes_ini: int, mes_f
     Returns:
         Soma absoluta dos lançamentos no período
     """
-    from ..models import Lancamento
+    from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
     from ..models.base import SessionLocal
     from sqlalchemy import func
 
     session = SessionLocal()
     try:
+        # abs() por linha: os agregados mensais não servem
+        L = fonte_lancamentos(anos=[ano])
         total = (
-            session.query(func.sum(func.abs(Lancamento.val_lancamento)))
+            session.query(func.sum(func.abs(L.val_lancamento)))
             .filter(
-                Lancamento.seq_qualificador.in_(seq_qualificadores),
-                func.strftime('%Y', Lancamento.dat_lancamento) == str(ano),
-                func.cast(func.strftime('%m', Lancamento.dat_lancamento), db_Integer).between(mes_ini, mes_fim),
-                Lancamento.ind_status == 'A',
+                L.seq_qualificador.in_(seq_qualificadores),
+                L.dat_lancamento >= date(ano, mes_ini, 1),
+                L.dat_lancamento < (date(ano + 1, 1, 1) if mes_fim == 12 else date(ano, mes_fim + 1, 1)),
+                L.ind_status == 'A',
             )
             .scalar()
         )
@@ -519,22 +642,24 @@ def _perfil_sazonal(seq_qualificadores: List[int], ano: int) -> Dict[int, float]
     Returns:
         Dicionário {mês: proporção}
     """
-    from ..models import Lancamento
+    from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
     from ..models.base import SessionLocal
-    from sqlalchemy import func
+    from sqlalchemy import func, extract
 
     session = SessionLocal()
     try:
-        mes_col = func.cast(func.strftime('%m', Lancamento.dat_lancamento), db_Integer)
+        L = fonte_lancamentos(anos=[ano])
+        mes_col = extract('month', L.dat_lancamento)
         resultados = (
             session.query(
                 mes_col.label('mes'),
-                func.sum(func.abs(Lancamento.val_lancamento)).label('total')
+                func.sum(func.abs(L.val_lancamento)).label('total')
             )
             .filter(
-                Lancamento.seq_qualificador.in_(seq_qualificadores),
-                func.strftime('%Y', Lancamento.dat_lancamento) == str(ano),
-                Lancamento.ind_status == 'A',
+                L.seq_qualificador.in_(seq_qualificadores),
+                L.dat_lancamento >= date(ano, 1, 1),
+                L.dat_lancamento < date(ano + 1, 1, 1),
+                L.ind_status == 'A',
             )
             .group_by(mes_col)
             .all()
@@ -1,5 +1,6 @@
 from ..domain import LancamentoCreate, LancamentoOut
 from ..repositories import LancamentoRepository
+from ..repositories.lancamento_arquivo_repository import periodo_fechado
 import csv
 import openpyxl
 from io import BytesIO, StringIO
@@ -29,6 +30,8 @@ def list_lancamentos(
     per_page: int = 50,
     sort_by: str = 'dat_lancamento',
     sort_order: str = 'desc',
+    cursor: str | None = None,
+    direction: str = 'next',
     repo: LancamentoRepository | None = None
 ) -> tuple[list, int]:
     repo = repo or LancamentoRepository()
@@ -42,7 +45,19 @@ def list_lancamentos(
         page=page,
         per_page=per_page,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        cursor=cursor,
+        direction=direction,
+    )
+
+
+def get_page_cursors(lancamentos: list, sort_by: str) -> tuple[str, str]:
+    """Cursores de keyset (primeira e última linha) para navegar entre páginas."""
+    if not lancamentos:
+        return '', ''
+    return (
+        LancamentoRepository.encode_cursor(lancamentos[0], sort_by),
+        LancamentoRepository.encode_cursor(lancamentos[-1], sort_by),
     )
 
 
@@ -189,6 +204,10 @@ def import_lancamentos_service(
                     errors.append(f"Linha {i}: Data inválida '{dat}'")
                     continue
 
+            if periodo_fechado(dat):
+                errors.append(f"Linha {i}: Período {dat:%m/%Y} fechado")
+                continue
+
             qual = qualificadores_map.get(str(desc).lower())
             if not qual:
                 errors.append(f"Linha {i}: Qualificador não encontrado para '{desc}'")
@@ -226,6 +245,7 @@ def import_lancamentos_service(
             count += 1
         
         session.commit()
+        LancamentoRepository.invalidate_count_cache()
         return {"sucesso": count, "erros": errors}
     except Exception as e:
         session.rollback()
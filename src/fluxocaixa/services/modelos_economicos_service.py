@@ -46,12 +46,18 @@ except ImportError as e:
     print(f"Warning: lightgbm not available: {e}")
 
 
-from ..models import db, Lancamento, Qualificador
-from sqlalchemy import func, extract, and_
+from ..models import db, Qualificador
+from ..models.base import somente_leitura
+from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
+from ..repositories import lancamento_analitico_repository as analitico
+from ..repositories.lancamento_colunar_repository import colunas_lancamento
+from ..repositories.lancamento_repository import LancamentoRepository
+from sqlalchemy import func, extract, and_, select
 
 
 # ==================== Helper Functions ====================
 
+@somente_leitura()
 def obter_dados_historicos(
     seq_qualificador: int,
     data_inicio: date,
@@ -70,29 +76,32 @@ def obter_dados_historicos(
     Returns:
         DataFrame com colunas: data, valor
     """
-    # Buscar lançamentos no período
-    lancamentos = (
-        Lancamento.query
-        .filter(
-            Lancamento.seq_qualificador == seq_qualificador,
-            Lancamento.dat_lancamento >= data_inicio,
-            Lancamento.dat_lancamento <= data_fim,
+    if agregacao == 'mensal' and (colunas_lancamento() is not None or analitico.ativo()):
+        # Cópia colunar ou DuckDB: totais mensais já agrupados pelo repositório
+        linhas = LancamentoRepository().get_monthly_totals_by_qualificador(
+            [seq_qualificador], data_inicio, data_fim,
         )
-        .all()
-    )
+        return _serie_mensal({(int(l.ano), int(l.mes)): float(l.total) for l in linhas})
+
+    # Buscar lançamentos no período (só as colunas: sem passar pelo identity map)
+    L = fonte_lancamentos(inicio=data_inicio, fim=data_fim, mensal=agregacao == 'mensal')
+    lancamentos = db.session.execute(
+        select(L.dat_lancamento, L.val_lancamento)
+        .where(
+            L.seq_qualificador == seq_qualificador,
+            L.dat_lancamento >= data_inicio,
+            L.dat_lancamento <= data_fim,
+        )
+    ).all()
     
     if not lancamentos:
         return pd.DataFrame(columns=['data', 'valor'])
     
     # Converter para DataFrame
-    data = []
-    for lanc in lancamentos:
-        data.append({
-            'data': lanc.dat_lancamento,
-            'valor': float(lanc.val_lancamento)
-        })
-    
-    df = pd.DataFrame(data)
+    df = pd.DataFrame({
+        'data': [lanc.dat_lancamento for lanc in lancamentos],
+        'valor': [float(lanc.val_lancamento) for lanc in lancamentos],
+    })
     
     # Agregar se necessário
     if agregacao == 'mensal':
@@ -105,6 +114,18 @@ def obter_dados_historicos(
     return df.sort_values('data')
 
 
+def _serie_mensal(totais: Dict[Tuple[int, int], float]) -> pd.DataFrame:
+    """Totais por (ano, mês) no formato de obter_dados_historicos."""
+    if not totais:
+        return pd.DataFrame(columns=['data', 'valor'])
+    meses = sorted(totais)
+    return pd.DataFrame({
+        'data': pd.to_datetime([f'{ano}-{mes:02d}-01' for ano, mes in meses]),
+        'valor': [totais[chave] for chave in meses],
+    })
+
+
+@somente_leitura()
 def obter_dados_historicos_multiplos(
     seq_qualificadores: List[int],
     data_inicio: date,
@@ -237,6 +258,8 @@ def projetar_arima(
             - d: ordem de diferenciação (default: 1)
             - q: ordem de média móvel (default: 1)
             - auto_order: bool (default: False) - Seleção automática de ordem
+              (ver selecao_ordem_service)
+            - criterio: 'aic' ou 'bic' (default: 'aic') - usado com auto_order
         ano_base: Ano base para projeção (opcional)
     
     Returns:
@@ -258,29 +281,21 @@ def projetar_arima(
     df_sorted = dados_historicos.sort_values('data')
     series = df_sorted.set_index('data')['valor']
     
+    parametros_iniciais = None
     try:
         if auto_order:
-            # Tentar encontrar melhor ordem automaticamente
-            best_aic = float('inf')
-            best_order = (p, d, q)
-            
-            for p_try in range(0, 4):
-                for d_try in range(0, 3):
-                    for q_try in range(0, 4):
-                        try:
-                            model = ARIMA(series, order=(p_try, d_try, q_try))
-                            fitted = model.fit()
-                            if fitted.aic < best_aic:
-                                best_aic = fitted.aic
-                                best_order = (p_try, d_try, q_try)
-                        except:
-                            continue
-            
-            p, d, q = best_order
+            from .selecao_ordem_service import selecionar_ordem
+            escolhida = selecionar_ordem(series, criterio=config.get('criterio', 'aic'))
+            p, d, q = escolhida['ordem']
+            parametros_iniciais = escolhida['parametros']
         
-        # Treinar modelo
+        # Treinar modelo (partindo dos parâmetros da busca, se houver)
         model = ARIMA(series, order=(p, d, q))
-        fitted_model = model.fit()
+        if parametros_iniciais:
+            from .selecao_ordem_service import parametros_de_partida
+            fitted_model = model.fit(start_params=parametros_de_partida(model, parametros_iniciais))
+        else:
+            fitted_model = model.fit()
         
         # Fazer projeção
         forecast = fitted_model.forecast(steps=meses_projecao)
@@ -307,6 +322,7 @@ def projetar_arima(
         'data': datas_futuras,
         'valor_projetado': valores
     })
+    resultado.attrs['ordem'] = fitted_model.model.order
     
     return resultado
 
@@ -326,8 +342,11 @@ def projetar_sarima(
         config: Dicionário com parâmetros:
             - p, d, q: ordens não-sazonais
             - P, D, Q, s: ordens sazonais (s = período sazonal, default 12)
-            - enforce_stationarity: bool (default: True)
-            - enforce_invertibility: bool (default: True)
+            - enforce_stationarity: bool (default: False)
+            - enforce_invertibility: bool (default: False)
+            - auto_order: bool (default: False) - Seleção automática das
+              ordens (ver selecao_ordem_service)
+            - criterio: 'aic' ou 'bic' (default: 'aic') - usado com auto_order
         ano_base: Ano base para projeção (opcional)
     
     Returns:
@@ -361,8 +380,26 @@ def projetar_sarima(
     df_sorted = dados_historicos.sort_values('data')
     series = df_sorted.set_index('data')['valor']
     
+    ordem_final = None
     try:
-        # Treinar modelo SARIMA
+        parametros_iniciais = None
+        if config.get('auto_order', False):
+            from .selecao_ordem_service import selecionar_ordem
+            escolhida = selecionar_ordem(
+                series,
+                sazonal=True,
+                s=s,
+                criterio=config.get('criterio', 'aic'),
+                opcoes={
+                    'enforce_stationarity': enforce_stationarity,
+                    'enforce_invertibility': enforce_invertibility,
+                },
+            )
+            p, d, q = escolhida['ordem']
+            P, D, Q, s = escolhida['ordem_sazonal']
+            parametros_iniciais = escolhida['parametros']
+        
+        # Treinar modelo SARIMA (partindo dos parâmetros da busca, se houver)
         model = SARIMAX(
             series,
             order=(p, d, q),
@@ -370,7 +407,12 @@ def projetar_sarima(
             enforce_stationarity=enforce_stationarity,
             enforce_invertibility=enforce_invertibility,
         )
-        fitted_model = model.fit(disp=False, maxiter=200)
+        start_params = None
+        if parametros_iniciais:
+            from .selecao_ordem_service import parametros_de_partida
+            start_params = parametros_de_partida(model, parametros_iniciais)
+        fitted_model = model.fit(start_params=start_params, disp=False, maxiter=200)
+        ordem_final = ((p, d, q), (P, D, Q, s))
         
         # Fazer projeção
         forecast = fitted_model.forecast(steps=meses_projecao)
@@ -403,6 +445,8 @@ def projetar_sarima(
         'data': datas_futuras,
         'valor_projetado': valores
     })
+    if ordem_final:
+        resultado.attrs['ordem'], resultado.attrs['ordem_sazonal'] = ordem_final
     
     return resultado
 
@@ -816,6 +860,7 @@ def projetar_media_historica(
 
 # ==================== Aggregated Historical Data ====================
 
+@somente_leitura()
 def obter_dados_historicos_agregados(
     seq_qualificadores: List[int],
     data_inicio: date,
@@ -836,31 +881,40 @@ def obter_dados_historicos_agregados(
     """
     if not seq_qualificadores:
         return pd.DataFrame(columns=['data', 'valor'])
+
+    colunas = colunas_lancamento()
+    if colunas is not None:
+        filtro = colunas.filtro(
+            inicio=data_inicio, fim=data_fim, qualificadores=seq_qualificadores, status=None,
+        )
+        if agregacao == 'mensal':
+            return _serie_mensal(colunas.agrupar(filtro, ('ano', 'mes')))
+        diarios = colunas.agrupar(filtro, ('data',))
+        return pd.DataFrame(
+            [(dia, total) for (dia,), total in sorted(diarios.items())],
+            columns=['data', 'valor'],
+        )
     
-    # Buscar lançamentos de todos os qualificadores
-    lancamentos = (
-        Lancamento.query
-        .filter(
-            Lancamento.seq_qualificador.in_(seq_qualificadores),
-            Lancamento.dat_lancamento >= data_inicio,
-            Lancamento.dat_lancamento <= data_fim,
+    # Buscar lançamentos de todos os qualificadores (só as colunas)
+    L = fonte_lancamentos(inicio=data_inicio, fim=data_fim, mensal=agregacao == 'mensal')
+    lancamentos = db.session.execute(
+        select(L.dat_lancamento, L.val_lancamento, L.seq_qualificador)
+        .where(
+            L.seq_qualificador.in_(seq_qualificadores),
+            L.dat_lancamento >= data_inicio,
+            L.dat_lancamento <= data_fim,
         )
-        .all()
-    )
+    ).all()
     
     if not lancamentos:
         return pd.DataFrame(columns=['data', 'valor'])
     
     # Converter para DataFrame
-    data = []
-    for lanc in lancamentos:
-        data.append({
-            'data': lanc.dat_lancamento,
-            'valor': float(lanc.val_lancamento),
-            'seq_qualificador': lanc.seq_qualificador
-        })
-    
-    df = pd.DataFrame(data)
+    df = pd.DataFrame({
+        'data': [lanc.dat_lancamento for lanc in lancamentos],
+        'valor': [float(lanc.val_lancamento) for lanc in lancamentos],
+        'seq_qualificador': [lanc.seq_qualificador for lanc in lancamentos],
+    })
     
     # Agregar por data (soma de todos os qualificadores)
     if agregacao == 'mensal':
@@ -875,6 +929,7 @@ def obter_dados_historicos_agregados(
     return df_agregado.sort_values('data')
 
 
+@somente_leitura()
 def obter_dados_historicos_por_qualificador(
     seq_qualificadores: List[int],
     data_inicio: date,
@@ -0,0 +1,315 @@
+"""Simulação de Monte Carlo do fluxo de caixa de um cenário.
+
+Parte da projeção determinística (`cenario_total`) e sorteia milhares de
+caminhos aplicando erros relativos à receita e à despesa de cada mês:
+
+- 'bootstrap' (padrão): reamostra os erros históricos da série de cada ramo
+  — variação sobre o mesmo mês do ano anterior, o erro de uma previsão
+  ingênua a 12 meses. Receita e despesa são sorteadas do mesmo mês
+  histórico, preservando a correlação entre elas.
+- 'normal': erros gaussianos com o desvio padrão desses mesmos erros.
+
+Os caminhos são gerados em blocos (caminhos × meses) e reduzidos a mínimo,
+máximo, contagem de saldos negativos e um histograma por mês: a memória não
+cresce com o número de caminhos (ver `simular_caminhos`).
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..repositories.lancamento_repository import LancamentoRepository
+from ..repositories.saldo_conta_repository import SaldoContaRepository
+from .simulacao_pipeline import montar_ramos_cenario
+from .simulacao_lote_service import obter_simulacao
+from .simulador_cenario_service import obter_simulador_completo
+
+PERCENTIS_PADRAO = (5, 25, 50, 75, 95)
+METODOS = ('bootstrap', 'normal')
+
+# Erro relativo máximo de um mês (evita explosões em meses de base quase nula)
+LIMITE_ERRO = 1.0
+
+
+# ==================== Núcleo vetorizado ====================
+
+SERIES = ('receita', 'despesa', 'saldo')
+
+# Classes do histograma de cada mês, entre o mínimo e o máximo sorteados
+CLASSES_HISTOGRAMA = 4096
+
+
+def _blocos(receita, despesa, erros, caminhos, saldo_inicial, metodo, sementes, tamanho_bloco):
+    """Gera os caminhos em blocos {'receita'|'despesa'|'saldo': (bloco × meses)}.
+
+    O gerador parte sempre de `sementes`: percorrer os blocos de novo
+    reproduz os mesmos caminhos.
+    """
+    meses = len(receita)
+    desvio = erros.std(axis=0)
+    rng = np.random.default_rng(sementes)
+    for inicio in range(0, caminhos, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, caminhos)
+        if metodo == 'bootstrap':
+            sorteio = erros[rng.integers(0, len(erros), size=(fim - inicio, meses))]
+        else:
+            sorteio = rng.standard_normal((fim - inicio, meses, 2)) * desvio
+        np.clip(sorteio, -LIMITE_ERRO, LIMITE_ERRO, out=sorteio)
+        bloco_receita = receita * (1 + sorteio[..., 0])
+        bloco_despesa = despesa * (1 + sorteio[..., 1])
+        bloco_saldo = np.cumsum(bloco_receita - bloco_despesa, axis=1)
+        bloco_saldo += saldo_inicial
+        yield {'receita': bloco_receita, 'despesa': bloco_despesa, 'saldo': bloco_saldo}
+
+
+def _percentis_histograma(contagens, minimo, maximo, percentis, caminhos) -> np.ndarray:
+    """Percentis (len(percentis) × meses) a partir do histograma de cada mês.
+
+    Como `np.percentile` (linear), interpola entre os caminhos de ordem
+    ``floor`` e ``ceil`` da posição; cada um é estimado dentro da sua classe,
+    com erro abaixo da largura de uma classe, (máximo − mínimo) / CLASSES_HISTOGRAMA.
+    """
+    largura = (maximo - minimo) / CLASSES_HISTOGRAMA
+    acumuladas = contagens.cumsum(axis=1)
+    meses = np.arange(len(contagens))
+
+    def valor(ordem: int) -> np.ndarray:
+        classe = (acumuladas > ordem).argmax(axis=1)
+        antes = acumuladas[meses, classe] - contagens[meses, classe]
+        fracao = (ordem - antes + 0.5) / contagens[meses, classe]
+        return np.clip(minimo + (classe + fracao) * largura, minimo, maximo)
+
+    linhas = []
+    for p in percentis:
+        posicao = p / 100 * (caminhos - 1)
+        abaixo = int(np.floor(posicao))
+        inferior = valor(abaixo)
+        superior = valor(min(abaixo + 1, caminhos - 1))
+        linhas.append(inferior + (posicao - abaixo) * (superior - inferior))
+    return np.array(linhas)
+
+
+def simular_caminhos(
+    receita: Sequence[float],
+    despesa: Sequence[float],
+    erros: np.ndarray,
+    caminhos: int = 10000,
+    saldo_inicial: float = 0.0,
+    percentis: Sequence[float] = PERCENTIS_PADRAO,
+    metodo: str = 'bootstrap',
+    semente: Optional[int] = None,
+    tamanho_bloco: int = 2000,
+) -> Dict:
+    """Sorteia caminhos de receita, despesa e saldo acumulado.
+
+    Com até `tamanho_bloco` caminhos os percentis são os exatos do bloco. Com
+    mais, os caminhos são gerados duas vezes, da mesma semente: a primeira
+    passada acumula mínimo, máximo e saldos negativos de cada mês; a segunda,
+    um histograma por mês entre esses limites, de onde saem os percentis. A
+    memória é O(tamanho_bloco × meses + meses × CLASSES_HISTOGRAMA), qualquer
+    que seja o número de caminhos.
+
+    Args:
+        receita: Receita projetada por mês (m,)
+        despesa: Despesa projetada por mês, em módulo (m,)
+        erros: Erros relativos históricos (k, 2) — colunas receita e despesa
+        caminhos: Número de caminhos
+        saldo_inicial: Saldo bancário antes do primeiro mês
+        percentis: Percentis das faixas
+        metodo: 'bootstrap' ou 'normal'
+        semente: Semente do gerador (resultados reprodutíveis)
+        tamanho_bloco: Caminhos gerados por vez
+
+    Returns:
+        Dict com 'percentis' ({'receita'|'despesa'|'saldo': {'p5': [...], ...}})
+        e 'prob_saldo_negativo' (fração dos caminhos com saldo < 0 em cada mês)
+    """
+    if metodo not in METODOS:
+        raise ValueError(f'Método inválido: {metodo}')
+    receita = np.asarray(receita, dtype=float)
+    despesa = np.asarray(despesa, dtype=float)
+    erros = np.asarray(erros, dtype=float).reshape(-1, 2)
+    if len(erros) == 0:
+        erros = np.zeros((1, 2))
+    meses = len(receita)
+    sementes = np.random.SeedSequence(semente)
+
+    def blocos():
+        return _blocos(receita, despesa, erros, caminhos, saldo_inicial, metodo, sementes, tamanho_bloco)
+
+    negativos = np.zeros(meses, dtype=np.int64)
+    if caminhos <= tamanho_bloco:
+        bloco = next(blocos())
+        faixas = {nome: np.percentile(bloco[nome], percentis, axis=0) for nome in SERIES}
+        negativos += (bloco['saldo'] < 0).sum(axis=0)
+    else:
+        minimo = {nome: np.full(meses, np.inf) for nome in SERIES}
+        maximo = {nome: np.full(meses, -np.inf) for nome in SERIES}
+        for bloco in blocos():
+            for nome in SERIES:
+                np.minimum(minimo[nome], bloco[nome].min(axis=0), out=minimo[nome])
+                np.maximum(maximo[nome], bloco[nome].max(axis=0), out=maximo[nome])
+            negativos += (bloco['saldo'] < 0).sum(axis=0)
+
+        # Índice (mês, classe) achatado para um único bincount por bloco
+        deslocamento = np.arange(meses) * CLASSES_HISTOGRAMA
+        escala = {}
+        for nome in SERIES:
+            amplitude = maximo[nome] - minimo[nome]
+            escala[nome] = np.divide(
+                CLASSES_HISTOGRAMA, amplitude, out=np.zeros(meses), where=amplitude > 0,
+            )
+        contagens = {nome: np.zeros(meses * CLASSES_HISTOGRAMA, dtype=np.int64) for nome in SERIES}
+        for bloco in blocos():
+            for nome in SERIES:
+                classe = ((bloco[nome] - minimo[nome]) * escala[nome]).astype(np.int64)
+                np.minimum(classe, CLASSES_HISTOGRAMA - 1, out=classe)
+                contagens[nome] += np.bincount(
+                    (classe + deslocamento).ravel(), minlength=meses * CLASSES_HISTOGRAMA,
+                )
+        faixas = {
+            nome: _percentis_histograma(
+                contagens[nome].reshape(meses, CLASSES_HISTOGRAMA),
+                minimo[nome], maximo[nome], percentis, caminhos,
+            )
+            for nome in SERIES
+        }
+
+    return {
+        'percentis': {
+            nome: {f'p{p:g}': linha.round(2).tolist() for p, linha in zip(percentis, faixas[nome])}
+            for nome in SERIES
+        },
+        'prob_saldo_negativo': (negativos / caminhos).round(4).tolist(),
+    }
+
+
+# ==================== Erros históricos ====================
+
+def erros_relativos(serie: pd.Series) -> pd.Series:
+    """Erros relativos de uma série mensal (índice ordenado por período).
+
+    Com 13 meses ou mais, compara cada mês com o mesmo mês do ano anterior;
+    com menos, com a média da série. Meses de base nula são descartados.
+    """
+    serie = serie.astype(float)
+    if len(serie) >= 13:
+        base = serie.shift(12)
+    elif len(serie) >= 2:
+        base = pd.Series(serie.mean(), index=serie.index)
+    else:
+        return pd.Series(dtype=float)
+    valido = base.notna() & (base.abs() > 0.005)
+    return ((serie[valido] - base[valido]) / base[valido].abs()).clip(-LIMITE_ERRO, LIMITE_ERRO)
+
+
+def _qualificadores_ramo(ramo: Dict, detalhada: Optional[pd.DataFrame]) -> set:
+    seq_qualificadores = set(ramo['seq_qualificadores'])
+    seq_qualificadores |= {a.seq_qualificador for a in ramo['ajustes']}
+    if detalhada is not None and 'seq_qualificador' in detalhada.columns:
+        seq_qualificadores |= {int(s) for s in detalhada['seq_qualificador'].dropna().unique()}
+    return seq_qualificadores
+
+
+def carregar_erros_cenario(
+    cenario_completo: Dict,
+    resultado: Dict,
+    anos_historico: int = 4,
+) -> np.ndarray:
+    """Erros relativos (k, 2) de receita e despesa dos qualificadores do cenário.
+
+    Uma única query agrupada cobre os dois ramos; meses em que só um dos
+    ramos tem erro entram com erro zero no outro.
+    """
+    ramo_receita, ramo_despesa = montar_ramos_cenario(cenario_completo)
+    quals_receita = _qualificadores_ramo(ramo_receita, resultado.get('projecao_receita_detalhada'))
+    quals_despesa = _qualificadores_ramo(ramo_despesa, resultado.get('projecao_despesa_detalhada'))
+    if not quals_receita and not quals_despesa:
+        return np.zeros((0, 2))
+
+    ano_fim = cenario_completo['simulador'].ano_base - 1
+    rows = LancamentoRepository().get_monthly_totals_by_qualificador(
+        sorted(quals_receita | quals_despesa),
+        date(ano_fim - anos_historico + 1, 1, 1),
+        date(ano_fim, 12, 31),
+    )
+    historico = pd.DataFrame(
+        [(r.seq_qualificador, int(r.ano) * 12 + int(r.mes) - 1, float(r.total or 0)) for r in rows],
+        columns=['seq_qualificador', 'periodo', 'valor'],
+    )
+
+    def _erros(quals: set) -> pd.Series:
+        selecao = historico[historico['seq_qualificador'].isin(quals)]
+        serie = selecao.groupby('periodo')['valor'].sum().abs().sort_index()
+        return erros_relativos(serie)
+
+    erros = pd.concat({'receita': _erros(quals_receita), 'despesa': _erros(quals_despesa)}, axis=1)
+    return erros.fillna(0.0)[['receita', 'despesa']].to_numpy()
+
+
+# ==================== Cenário ====================
+
+def simular_monte_carlo(
+    seq_simulador_cenario: int,
+    caminhos: int = 10000,
+    percentis: Sequence[float] = PERCENTIS_PADRAO,
+    metodo: str = 'bootstrap',
+    semente: Optional[int] = None,
+    saldo_inicial: Optional[float] = None,
+    anos_historico: int = 4,
+) -> Optional[Dict]:
+    """Faixas de percentis e probabilidade de saldo negativo de um cenário.
+
+    Args:
+        seq_simulador_cenario: ID do cenário simulador
+        caminhos: Número de caminhos sorteados
+        percentis: Percentis das faixas
+        metodo: 'bootstrap' ou 'normal'
+        semente: Semente do gerador
+        saldo_inicial: Saldo antes do primeiro mês projetado (default: saldo
+            bancário na véspera)
+        anos_historico: Anos de histórico usados para os erros
+
+    Returns:
+        None se o cenário não existe; senão Dict com 'meses', 'deterministico',
+        'percentis', 'prob_saldo_negativo', 'saldo_inicial', 'caminhos',
+        'metodo' e 'meses_erro' (tamanho da amostra de erros)
+    """
+    resultado = obter_simulacao(seq_simulador_cenario)
+    cenario_completo = obter_simulador_completo(seq_simulador_cenario)
+    if not resultado or not cenario_completo:
+        return None
+
+    total = resultado['cenario_total'].copy()
+    total['data'] = pd.to_datetime(total['data'])
+    total = total.sort_values('data')
+    receita = total['receita'].astype(float).to_numpy() if len(total) else np.zeros(0)
+    despesa = total['despesa'].astype(float).abs().to_numpy() if len(total) else np.zeros(0)
+
+    if saldo_inicial is None:
+        inicio = total['data'].iloc[0].date() if len(total) else date(cenario_completo['simulador'].ano_base, 1, 1)
+        saldo_inicial = SaldoContaRepository().get_saldo_total_at_date(inicio - timedelta(days=1))
+
+    erros = carregar_erros_cenario(cenario_completo, resultado, anos_historico)
+    bandas = simular_caminhos(
+        receita, despesa, erros,
+        caminhos=caminhos, saldo_inicial=saldo_inicial, percentis=percentis,
+        metodo=metodo, semente=semente,
+    )
+    return {
+        'meses': [d.strftime('%Y-%m') for d in total['data']],
+        'deterministico': {
+            'receita': receita.round(2).tolist(),
+            'despesa': despesa.round(2).tolist(),
+            'saldo': (saldo_inicial + np.cumsum(receita - despesa)).round(2).tolist(),
+        },
+        'percentis': bandas['percentis'],
+        'prob_saldo_negativo': bandas['prob_saldo_negativo'],
+        'saldo_inicial': float(saldo_inicial),
+        'caminhos': caminhos,
+        'metodo': metodo,
+        'meses_erro': len(erros),
+    }
@@ -1,13 +1,61 @@
 from datetime import date
 
+import numpy as np
+
 from ..repositories.lancamento_repository import LancamentoRepository
 from ..repositories.tipo_lancamento_repository import TipoLancamentoRepository
 from ..repositories import qualificador_repository
+from ..repositories.simulador_cenario_historico_repository import montar_ajustes
 from ..services.simulador_cenario_service import get_versao_inicial_cenario, get_versao_final_cenario
 from ..utils import format_currency
 from ..utils.constants import MONTH_ABBR_PT
 
 
+def _ajustes_da_versao(versao, tipo: str) -> np.ndarray:
+    """Ajustes de um fluxo da versão como array `AJUSTE_DTYPE`.
+
+    Snapshots já trazem o array; o cenário atual traz objetos ORM.
+    """
+    if not versao:
+        return montar_ajustes([])
+    ajustes = (versao.get(tipo) or {}).get('ajustes', [])
+    if isinstance(ajustes, np.ndarray):
+        return ajustes
+    return montar_ajustes(ajustes)
+
+
+def _tensores_ajuste(versao, seq_ordenados: np.ndarray, posicoes: np.ndarray,
+                     despesa: np.ndarray, ano_inicial: int, anos: int):
+    """Fator multiplicativo e parcela somada por (qualificador × ano × mês).
+
+    Ajuste 'P' vira fator (1 + val/100); os demais, parcela somada à base.
+    Ajustes de receita só valem para qualificadores de receita e vice-versa.
+    """
+    fator = np.ones((len(despesa), anos, 12))
+    soma = np.zeros((len(despesa), anos, 12))
+    if not len(seq_ordenados):
+        return fator, soma
+    for tipo, eh_despesa in (('receita', False), ('despesa', True)):
+        ajustes = _ajustes_da_versao(versao, tipo)
+        if not len(ajustes):
+            continue
+        busca = np.minimum(np.searchsorted(seq_ordenados, ajustes['seq_qualificador']), len(seq_ordenados) - 1)
+        q = posicoes[busca]
+        a = ajustes['ano'].astype(int) - ano_inicial
+        m = ajustes['mes'].astype(int) - 1
+        valido = (
+            (seq_ordenados[busca] == ajustes['seq_qualificador'])
+            & (despesa[q] == eh_despesa)
+            & (a >= 0) & (a < anos) & (m >= 0) & (m < 12)
+        )
+        q, a, m = q[valido], a[valido], m[valido]
+        percentual = ajustes['cod_tipo_ajuste'][valido] == b'P'
+        valor = ajustes['val_ajuste'][valido]
+        fator[q, a, m] = np.where(percentual, 1 + valor / 100, 1.0)
+        soma[q, a, m] = np.where(percentual, 0.0, valor)
+    return fator, soma
+
+
 def get_previsao_realizado_data(
     ano: int,
     cenario_id: int | None,
@@ -24,160 +72,88 @@ def get_previsao_realizado_data(
     cod_saida = tipo_saida.cod_tipo_lancamento if tipo_saida else None
 
     qs = qualificador_repository.get_qualificadores_by_ids(qualificadores_ids)
-    qual_tipo_map = {
-        q.seq_qualificador: (cod_saida if q.tipo_fluxo == "despesa" else cod_entrada)
-        for q in qs
-    }
+    indice_qual = {q.seq_qualificador: i for i, q in enumerate(qs)}
+    despesa = np.array([q.tipo_fluxo == "despesa" for q in qs], dtype=bool)
+    seq_qs = np.array([q.seq_qualificador for q in qs], dtype=np.int64)
+    posicoes = np.argsort(seq_qs, kind="stable")
+    seq_ordenados = seq_qs[posicoes]
 
+    # Eixo de anos: [ano - 3, ano]; anos do relatório são os três últimos e
+    # cada um usa o anterior como base da previsão
     anos_range = [ano - 2, ano - 1, ano]
-    anos_base = {a - 1 for a in anos_range}
-    anos_needed = set(anos_range) | anos_base
-    
-    lancamento_repo = LancamentoRepository()
-    lanc_rows = lancamento_repo.get_grouped_by_qualificador_year_month(
+    ano_inicial = ano - 3
+    n_anos = 4
+
+    # Tensor (qualificador × ano × mês × tipo) a partir da query agrupada
+    tipos = {cod_entrada: 0, cod_saida: 1}
+    lancamentos = np.zeros((len(qs), n_anos, 12, 2))
+    lanc_rows = LancamentoRepository().get_grouped_by_qualificador_year_month(
         qualificador_ids=qualificadores_ids,
-        anos=list(anos_needed),
+        anos=list(range(ano_inicial, ano + 1)),
         meses=list(range(1, 13))
     )
-    
-    lanc_map = {
-        (
-            row.seq_qualificador,
-            int(row.ano),
-            int(row.mes),
-            row.cod_tipo_lancamento,
-        ): float(row.total or 0)
-        for row in lanc_rows
-    }
+    for row in lanc_rows:
+        q = indice_qual.get(row.seq_qualificador)
+        t = tipos.get(row.cod_tipo_lancamento)
+        if q is None or t is None:
+            continue
+        lancamentos[q, int(row.ano) - ano_inicial, int(row.mes) - 1, t] += float(row.total or 0)
+
+    # Realizado: o tipo do próprio fluxo (saída para despesa, entrada para receita)
+    realizado = np.where(despesa[:, None, None], lancamentos[..., 1], lancamentos[..., 0])
+    if cod_saida is None:
+        realizado[despesa] = 0.0
+    if cod_entrada is None:
+        realizado[~despesa] = 0.0
 
-    def lanc_val(q_id, ano_ref, mes, cod_tipo):
-        return lanc_map.get((q_id, ano_ref, mes, cod_tipo), 0.0)
+    # Previsão do ano A = realizado de A - 1, ajustado pela versão do cenário
+    base = np.zeros_like(realizado)
+    base[:, 1:, :] = realizado[:, :-1, :]
 
-    # Obter versões inicial e final do cenário usando o novo sistema de histórico
     versao_inicial = None
     versao_final = None
-    
     if cenario_id:
         versao_inicial = get_versao_inicial_cenario(cenario_id, ano)
         versao_final = get_versao_final_cenario(cenario_id, ano)
-    
-    def get_ajustes_from_versao(versao, tipo='receita'):
-        """Extrai ajustes de uma versão do cenário."""
-        if not versao:
-            return {}
-        
-        ajustes_list = versao.get(tipo, {}).get('ajustes', [])
-        ajustes_map = {}
-        
-        for ajuste in ajustes_list:
-            key = (
-                ajuste['seq_qualificador'],
-                ajuste['ano'],
-                ajuste['mes']
-            )
-            ajustes_map[key] = {
-                'cod_tipo_ajuste': ajuste['cod_tipo_ajuste'],
-                'val_ajuste': ajuste['val_ajuste']
-            }
-        
-        return ajustes_map
-    
-    # Criar mapas de ajustes para versão inicial e final
-    ajustes_ini_receita = get_ajustes_from_versao(versao_inicial, 'receita')
-    ajustes_ini_despesa = get_ajustes_from_versao(versao_inicial, 'despesa')
-    ajustes_fin_receita = get_ajustes_from_versao(versao_final, 'receita')
-    ajustes_fin_despesa = get_ajustes_from_versao(versao_final, 'despesa')
-
-    def previsao_val_for_year(ajustes_map, q_id, mes, ano_ref):
-        base = lanc_val(q_id, ano_ref - 1, mes, qual_tipo_map.get(q_id, cod_entrada))
-        
-        ajuste = ajustes_map.get((q_id, ano_ref, mes))
-        if ajuste:
-            if ajuste['cod_tipo_ajuste'] == "P":
-                return base * (1 + float(ajuste['val_ajuste']) / 100)
-            return base + float(ajuste['val_ajuste'])
-        return base
-
-    def real_val(q_id, ano_ref, meses_ref):
-        cod_tipo = qual_tipo_map.get(q_id)
-        return sum(lanc_val(q_id, ano_ref, m, cod_tipo) for m in meses_ref)
-
-    tabela = []
-    total_prev_ini = total_prev_fin = total_real = 0
-    
-    # Determinar qual mapa de ajustes usar baseado no tipo de qualificador
-    for q in qs:
-        # Selecionar mapa de ajustes correto (receita ou despesa)
-        ajustes_ini = ajustes_ini_despesa if q.tipo_fluxo == "despesa" else ajustes_ini_receita
-        ajustes_fin = ajustes_fin_despesa if q.tipo_fluxo == "despesa" else ajustes_fin_receita
-        
-        prev_ini = sum(
-            previsao_val_for_year(ajustes_ini, q.seq_qualificador, m, ano)
-            for m in meses
-        )
-        prev_fin = sum(
-            previsao_val_for_year(ajustes_fin, q.seq_qualificador, m, ano)
-            for m in meses
-        )
-        real = real_val(q.seq_qualificador, ano, meses)
-        tabela.append(
-            {
-                "descricao": q.dsc_qualificador,
-                "previsao_inicial": format_currency(prev_ini),
-                "previsao_final": format_currency(prev_fin),
-                "realizado": format_currency(real),
-            }
-        )
-        total_prev_ini += prev_ini
-        total_prev_fin += prev_fin
-        total_real += real
 
+    fator_ini, soma_ini = _tensores_ajuste(versao_inicial, seq_ordenados, posicoes, despesa, ano_inicial, n_anos)
+    fator_fin, soma_fin = _tensores_ajuste(versao_final, seq_ordenados, posicoes, despesa, ano_inicial, n_anos)
+    previsao_ini = base * fator_ini + soma_ini
+    previsao_fin = base * fator_fin + soma_fin
+
+    a_atual = ano - ano_inicial
+    colunas_meses = np.array(meses, dtype=int) - 1
+    prev_ini_q = previsao_ini[:, a_atual, colunas_meses].sum(axis=1)
+    prev_fin_q = previsao_fin[:, a_atual, colunas_meses].sum(axis=1)
+    real_q = realizado[:, a_atual, colunas_meses].sum(axis=1)
+
+    tabela = [
+        {
+            "descricao": q.dsc_qualificador,
+            "previsao_inicial": format_currency(float(prev_ini_q[i])),
+            "previsao_final": format_currency(float(prev_fin_q[i])),
+            "realizado": format_currency(float(real_q[i])),
+        }
+        for i, q in enumerate(qs)
+    ]
     if len(tabela) > 1:
         tabela.append(
             {
                 "descricao": "Total",
-                "previsao_inicial": format_currency(total_prev_ini),
-                "previsao_final": format_currency(total_prev_fin),
-                "realizado": format_currency(total_real),
+                "previsao_inicial": format_currency(float(prev_ini_q.sum())),
+                "previsao_final": format_currency(float(prev_fin_q.sum())),
+                "realizado": format_currency(float(real_q.sum())),
             }
         )
 
     labels = [MONTH_ABBR_PT[m] for m in meses]
-    previsao_series = []
-    realizado_series = []
-    for m in meses:
-        prev_total = 0
-        for q_id in qualificadores_ids:
-            q = next((qual for qual in qs if qual.seq_qualificador == q_id), None)
-            if q:
-                ajustes_fin = ajustes_fin_despesa if q.tipo_fluxo == "despesa" else ajustes_fin_receita
-                prev_total += previsao_val_for_year(ajustes_fin, q_id, m, ano)
-        
-        real_total = sum(
-            real_val(q_id, ano, [m]) for q_id in qualificadores_ids
-        )
-        previsao_series.append(round(prev_total / 1_000_000_000, 3))
-        realizado_series.append(round(real_total / 1_000_000_000, 3))
-
-    diff_final = []
-    diff_inicial = []
-    for a in anos_range:
-        inicial_sum = 0
-        final_sum = 0
-        
-        for q in qs:
-            ajustes_ini = ajustes_ini_despesa if q.tipo_fluxo == "despesa" else ajustes_ini_receita
-            ajustes_fin = ajustes_fin_despesa if q.tipo_fluxo == "despesa" else ajustes_fin_receita
-            
-            for m in range(1, 13):
-                inicial_sum += previsao_val_for_year(ajustes_ini, q.seq_qualificador, m, a)
-                final_sum += previsao_val_for_year(ajustes_fin, q.seq_qualificador, m, a)
-        
-        real_year = sum(
-            real_val(q_id, a, list(range(1, 13))) for q_id in qualificadores_ids
-        )
-        diff_final.append(round((real_year - final_sum) / 1_000_000_000, 3))
-        diff_inicial.append(round((real_year - inicial_sum) / 1_000_000_000, 3))
+    previsao_series = (previsao_fin[:, a_atual, colunas_meses].sum(axis=0) / 1_000_000_000).round(3).tolist()
+    realizado_series = (realizado[:, a_atual, colunas_meses].sum(axis=0) / 1_000_000_000).round(3).tolist()
+
+    anos_relatorio = slice(1, n_anos)
+    real_ano = realizado[:, anos_relatorio, :].sum(axis=(0, 2))
+    diff_final = ((real_ano - previsao_fin[:, anos_relatorio, :].sum(axis=(0, 2))) / 1_000_000_000).round(3).tolist()
+    diff_inicial = ((real_ano - previsao_ini[:, anos_relatorio, :].sum(axis=(0, 2))) / 1_000_000_000).round(3).tolist()
 
     return {
         "tabela": tabela,
@@ -6,7 +6,8 @@ from typing import Dict, List, Optional, Tuple
 import pandas as pd
 from sqlalchemy import and_, extract, func
 
-from ..models import db, ProjecaoVersao, ProjecaoValor, Lancamento
+from ..models import db, ProjecaoVersao, ProjecaoValor
+from ..repositories.lancamento_arquivo_repository import fonte_lancamentos
 from ..repositories import projecao_versao_repository as repo
 from .simulador_cenario_service import (
     executar_simulacao,
@@ -41,6 +42,29 @@ def salvar_projecao_como_versao(
         raise ValueError(f"Simulação não pôde ser executada para cenário {seq_simulador_cenario}")
 
     cenario_completo = obter_simulador_completo(seq_simulador_cenario)
+    return salvar_resultado_como_versao(
+        seq_simulador_cenario, nom_versao, resultado, cenario_completo,
+        dsc_motivo=dsc_motivo, user_id=user_id, publicar=publicar,
+    )
+
+
+def salvar_resultado_como_versao(
+    seq_simulador_cenario: int,
+    nom_versao: str,
+    resultado: Dict,
+    cenario_completo: Optional[Dict],
+    dsc_motivo: Optional[str] = None,
+    user_id: Optional[int] = None,
+    publicar: bool = False,
+) -> ProjecaoVersao:
+    """Persiste um resultado de simulação já calculado como uma versão.
+
+    Usado por `salvar_projecao_como_versao` e pelo pré-cálculo em lote,
+    que executa os cenários fora da requisição.
+    """
+    if not nom_versao or not nom_versao.strip():
+        raise ValueError("nom_versao é obrigatório")
+
     json_inputs = _serializar_inputs(cenario_completo)
     json_resumo = json.dumps({
         'total_receita': float(resultado['resumo']['total_receita'] or 0),
@@ -232,6 +256,42 @@ def get_versao_detalhe(seq_projecao_versao: int) -> Optional[Dict]:
     }
 
 
+def carregar_resultado_versao(versao: ProjecaoVersao, simulador) -> Dict:
+    """Reconstrói, a partir das linhas salvas, o resultado de `executar_simulacao`.
+
+    Linhas com seq_qualificador viram a projeção detalhada (como nos modelos
+    por qualificador); linhas sem qualificador, a projeção agregada por data.
+    """
+    from .simulador_cenario_service import montar_resultado_simulacao
+
+    rows = (
+        db.session.query(
+            ProjecaoValor.cod_tipo,
+            ProjecaoValor.seq_qualificador,
+            ProjecaoValor.ano,
+            ProjecaoValor.mes,
+            ProjecaoValor.val_projetado,
+        )
+        .filter(ProjecaoValor.seq_projecao_versao == versao.seq_projecao_versao)
+        .order_by(ProjecaoValor.cod_tipo, ProjecaoValor.ano, ProjecaoValor.mes, ProjecaoValor.seq_qualificador)
+        .all()
+    )
+    df = pd.DataFrame(
+        [(t, sq, date(ano, mes, 1), float(v or 0)) for t, sq, ano, mes, v in rows],
+        columns=['cod_tipo', 'seq_qualificador', 'data', 'valor_projetado'],
+    )
+
+    def _ramo(cod_tipo: str):
+        linhas = df[df['cod_tipo'] == cod_tipo]
+        if linhas['seq_qualificador'].notna().any():
+            detalhada = linhas[['data', 'seq_qualificador', 'valor_projetado']].reset_index(drop=True)
+            detalhada['seq_qualificador'] = detalhada['seq_qualificador'].astype(int)
+            return detalhada, detalhada.copy()
+        return linhas[['data', 'valor_projetado']].reset_index(drop=True), None
+
+    return montar_resultado_simulacao(simulador, _ramo('R'), _ramo('D'))
+
+
 def comparar_versoes(seq_versao_a: int, seq_versao_b: int) -> Optional[Dict]:
     versao_a = repo.get_versao_by_id(seq_versao_a)
     versao_b = repo.get_versao_by_id(seq_versao_b)
@@ -322,21 +382,22 @@ def atualizar_realizados_de_lancamentos(
     seq_quals = {sq for sq, _, _, _ in chaves_fechadas}
     anos = {ano for _, _, ano, _ in chaves_fechadas}
 
+    L = fonte_lancamentos(anos=anos, mensal=True)
     rows = (
         db.session.query(
-            Lancamento.seq_qualificador,
-            Lancamento.cod_tipo_lancamento,
-            extract('year', Lancamento.dat_lancamento).label('ano'),
-            extract('month', Lancamento.dat_lancamento).label('mes'),
-            func.sum(Lancamento.val_lancamento).label('total'),
+            L.seq_qualificador,
+            L.cod_tipo_lancamento,
+            extract('year', L.dat_lancamento).label('ano'),
+            extract('month', L.dat_lancamento).label('mes'),
+            func.sum(L.val_lancamento).label('total'),
         )
-        .filter(Lancamento.ind_status == 'A')
-        .filter(Lancamento.seq_qualificador.in_(seq_quals))
-        .filter(extract('year', Lancamento.dat_lancamento).in_(anos))
-        .filter(Lancamento.dat_lancamento < primeiro_dia_mes_corrente)
+        .filter(L.ind_status == 'A')
+        .filter(L.seq_qualificador.in_(seq_quals))
+        .filter(extract('year', L.dat_lancamento).in_(anos))
+        .filter(L.dat_lancamento < primeiro_dia_mes_corrente)
         .group_by(
-            Lancamento.seq_qualificador,
-            Lancamento.cod_tipo_lancamento,
+            L.seq_qualificador,
+            L.cod_tipo_lancamento,
             'ano',
             'mes',
         )
@@ -1,6 +1,12 @@
-from ..repositories import qualificador_repository
+from ..repositories import qualificador_repository, revisao_repository
 from ..models import Qualificador
 
+# Opções de qualificadores folha para selects (filtros e modais de /saldos).
+# Dados derivados da árvore inteira; recalculados após qualquer escrita,
+# deste ou de outro worker.
+_folha_opcoes_cache: list[dict] | None = None
+
+
 def list_all_qualificadores():
     return qualificador_repository.get_all_qualificadores()
 
@@ -30,13 +36,58 @@ def list_despesa_qualificadores_folha():
     """Retorna apenas qualificadores de despesa que não têm filhos."""
     return qualificador_repository.get_despesa_qualificadores_folha()
 
+def list_qualificadores_folha_opcoes() -> list[dict]:
+    """Retorna as folhas ativas como dicts (seq, num, dsc, path_completo) ordenadas por número.
+
+    A árvore é montada a partir de uma única query e o resultado fica em cache
+    até a próxima alteração de qualificador, evitando `is_folha()`/`path_completo`
+    com lazy loads por nó a cada renderização.
+    """
+    global _folha_opcoes_cache
+    if _folha_opcoes_cache is None:
+        rows = qualificador_repository.get_hierarquia_rows()
+        por_seq = {row.seq_qualificador: row for row in rows}
+        pais_com_filho_ativo = {
+            row.cod_qualificador_pai for row in rows
+            if row.ind_status == 'A' and row.cod_qualificador_pai is not None
+        }
+
+        def path_completo(row) -> str:
+            partes = [row.dsc_qualificador]
+            while row.cod_qualificador_pai is not None and row.cod_qualificador_pai in por_seq:
+                row = por_seq[row.cod_qualificador_pai]
+                partes.append(row.dsc_qualificador)
+            return ' > '.join(reversed(partes))
+
+        _folha_opcoes_cache = sorted(
+            (
+                {
+                    'seq_qualificador': row.seq_qualificador,
+                    'num_qualificador': row.num_qualificador,
+                    'dsc_qualificador': row.dsc_qualificador,
+                    'path_completo': path_completo(row),
+                }
+                for row in rows
+                if row.ind_status == 'A' and row.seq_qualificador not in pais_com_filho_ativo
+            ),
+            key=lambda opcao: opcao['num_qualificador'],
+        )
+    return _folha_opcoes_cache
+
+@revisao_repository.ao_mudar('qualificador')
+def invalidate_qualificadores_cache():
+    global _folha_opcoes_cache
+    _folha_opcoes_cache = None
+
 def create_qualificador(num_qualificador: str, dsc_qualificador: str, cod_qualificador_pai: int = None):
     qualificador = Qualificador(
         num_qualificador=num_qualificador,
         dsc_qualificador=dsc_qualificador,
         cod_qualificador_pai=cod_qualificador_pai,
     )
-    return qualificador_repository.create_qualificador(qualificador)
+    qualificador = qualificador_repository.create_qualificador(qualificador)
+    invalidate_qualificadores_cache()
+    return qualificador
 
 def update_qualificador(seq_qualificador: int, num_qualificador: str, dsc_qualificador: str, cod_qualificador_pai: int = None):
     qualificador = qualificador_repository.get_qualificador_by_id(seq_qualificador)
@@ -47,7 +98,11 @@ def update_qualificador(seq_qualificador: int, num_qualificador: str, dsc_qualif
     qualificador.dsc_qualificador = dsc_qualificador
     qualificador.cod_qualificador_pai = cod_qualificador_pai
     
-    return qualificador_repository.update_qualificador(qualificador)
+    qualificador = qualificador_repository.update_qualificador(qualificador)
+    invalidate_qualificadores_cache()
+    return qualificador
 
 def delete_qualificador(seq_qualificador: int):
-    return qualificador_repository.delete_qualificador_logical(seq_qualificador)
+    qualificador = qualificador_repository.delete_qualificador_logical(seq_qualificador)
+    invalidate_qualificadores_cache()
+    return qualificador
@@ -2,6 +2,7 @@
 from datetime import date
 from sqlalchemy import extract, or_
 from ...repositories.tipo_lancamento_repository import TipoLancamentoRepository
+from ...repositories import qualificador_repository
 
 
 def criar_filtro_data_meses(ano_selecionado: int, meses_selecionados: list[int], query_table):
@@ -38,3 +39,75 @@ def get_tipo_lancamento_ids() -> dict[str, int]:
         'entrada': tipo_entrada.cod_tipo_lancamento if tipo_entrada else -1,
         'saida': tipo_saida.cod_tipo_lancamento if tipo_saida else -1,
     }
+
+
+# Palavras-chave (minúsculas) usadas para classificar despesas nas metas da LDO
+CATEGORIAS_LDO = {
+    'pessoal': ('pessoal', 'folha'),
+    'saude': ('saúde', 'saude'),
+    'educacao': ('educação', 'educacao'),
+}
+
+
+def _tipo_fluxo_por_raiz(num_raiz: str) -> str:
+    if num_raiz.startswith('1'):
+        return 'receita'
+    elif num_raiz.startswith('2'):
+        return 'despesa'
+    return 'indefinido'
+
+
+def _classificar_categorias(dsc_qualificador: str) -> frozenset[str]:
+    dsc = dsc_qualificador.lower()
+    return frozenset(
+        categoria
+        for categoria, palavras in CATEGORIAS_LDO.items()
+        if any(palavra in dsc for palavra in palavras)
+    )
+
+
+def get_qualificadores_classificados() -> list[dict]:
+    """Get every qualificador with tipo_fluxo, leaf flag and LDO categories resolved.
+
+    Loads the whole tree with a single query and resolves roots, leaves and
+    categories in memory, replacing per-node `tipo_fluxo`/`is_folha()` calls.
+
+    Returns:
+        List of dicts with seq_qualificador, num_qualificador,
+        dsc_qualificador, tipo_fluxo, ativo, is_folha (active with no active children) and categorias
+        (frozenset with 'pessoal', 'saude' and/or 'educacao'), ordered by
+        seq_qualificador
+    """
+    rows = qualificador_repository.get_hierarquia_rows()
+    pai_por_seq = {row.seq_qualificador: row.cod_qualificador_pai for row in rows}
+    num_por_seq = {row.seq_qualificador: row.num_qualificador for row in rows}
+    pais_com_filho_ativo = {
+        row.cod_qualificador_pai for row in rows
+        if row.ind_status == 'A' and row.cod_qualificador_pai is not None
+    }
+
+    raiz_cache: dict[int, int] = {}
+
+    def raiz(seq: int) -> int:
+        caminho = []
+        while seq not in raiz_cache and pai_por_seq.get(seq) is not None:
+            caminho.append(seq)
+            seq = pai_por_seq[seq]
+        topo = raiz_cache.get(seq, seq)
+        for visitado in caminho:
+            raiz_cache[visitado] = topo
+        raiz_cache[seq] = topo
+        return topo
+
+    return [
+        {
+            'seq_qualificador': row.seq_qualificador,
+            'num_qualificador': row.num_qualificador,
+            'dsc_qualificador': row.dsc_qualificador,
+            'tipo_fluxo': _tipo_fluxo_por_raiz(num_por_seq[raiz(row.seq_qualificador)]),
+            'ativo': row.ind_status == 'A',
+            'is_folha': row.ind_status == 'A' and row.seq_qualificador not in pais_com_filho_ativo,
+            'categorias': _classificar_categorias(row.dsc_qualificador),
+        }
+        for row in rows
+    ]
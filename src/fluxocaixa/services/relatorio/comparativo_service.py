@@ -1,101 +1,120 @@
-"""Comparative analysis service."""
-from datetime import date
-import calendar
+"""Comparative analysis service.
 
+Os valores agrupados (item, ano, mês) vão direto para um array
+`valores[item, mes, ano]`; totais por item, por mês e geral são reduções
+NumPy sobre ele, e o dicionário aninhado consumido pelo template só é
+montado na saída. O custo não depende do número de anos comparados.
+"""
+import numpy as np
+
+from ...models.base import somente_leitura
 from ...repositories.lancamento_repository import LancamentoRepository
 from ...repositories.pagamento_repository import PagamentoRepository
-from ...repositories.tipo_lancamento_repository import TipoLancamentoRepository
 from ...utils.constants import MONTH_NAME_PT
+from .base import get_qualificadores_classificados
+
 
+def _pivotar(chaves_item, anos_linha, meses_linha, valores_linha, indice_item, n_itens, anos):
+    """Acumula as linhas agrupadas em valores[item, mes - 1, ano]."""
+    valores = np.zeros((n_itens, 12, len(anos)))
+    if not len(chaves_item):
+        return valores
+    indice_ano = {ano: i for i, ano in enumerate(anos)}
+    itens = np.array([indice_item.get(c, -1) for c in chaves_item])
+    colunas_ano = np.array([indice_ano.get(int(a), -1) for a in anos_linha])
+    meses = np.asarray(meses_linha, dtype=int) - 1
+    validos = (itens >= 0) & (colunas_ano >= 0)
+    np.add.at(
+        valores,
+        (itens[validos], meses[validos], colunas_ano[validos]),
+        np.asarray(valores_linha, dtype=float)[validos],
+    )
+    return valores
 
+
+@somente_leitura()
 def get_analise_comparativa_data(
-    ano1: int,
-    ano2: int,
+    anos: list[int],
     meses_selecionados: list[int],
     tipo_analise: str
 ) -> dict:
-    """Get comparative analysis data between two years.
-    
+    """Get comparative analysis data across N years.
+
     Args:
-        ano1: First year to compare
-        ano2: Second year to compare
+        anos: Years to compare (in display order)
         meses_selecionados: List of months to include (1-12)
         tipo_analise: 'receitas' or 'despesas'
-    
+
     Returns:
-        Dictionary with comparative data per item and totals
+        Dictionary with 'data' ({item: {mes: {ano: valor}, 'total': {ano: valor}}},
+        months 1-12 as strings), 'totals' ({mes: {ano: valor}, 'total': ...}
+        for the selected months), 'anos' and 'meses_nomes'
     """
-    meses_nomes = MONTH_NAME_PT
-    data = {}
-    totals = {str(m): {str(ano1): 0, str(ano2): 0} for m in meses_selecionados}
-    totals["total"] = {str(ano1): 0, str(ano2): 0}
+    anos = list(dict.fromkeys(int(a) for a in anos))
+    classificados = get_qualificadores_classificados()
 
     if tipo_analise == "receitas":
-        from ...models import Qualificador
-        tipo_repo = TipoLancamentoRepository()
-        lancamento_repo = LancamentoRepository()
-        
-        tipo_entrada = tipo_repo.get_by_descricao("Entrada")
-        id_entrada = tipo_entrada.cod_tipo_lancamento if tipo_entrada else -1
-        
-        # Get all leaf qualifiers for revenues
-        qualificadores = Qualificador.query.filter_by(ind_status='A').all()
-        qualificadores_folha = [q for q in qualificadores if q.is_folha() and q.tipo_fluxo == 'receita']
-        
-        # Get all qualificador IDs
-        qualificador_ids = [q.seq_qualificador for q in qualificadores_folha]
-        
-        # Get comparative data by qualificador
-        results = lancamento_repo.get_grouped_by_qualificador_year_month(
-            qualificador_ids=qualificador_ids,
-            anos=[ano1, ano2],
+        # Folhas de receita, na ordem do cadastro
+        itens = [
+            q for q in classificados
+            if q['is_folha'] and q['tipo_fluxo'] == 'receita'
+        ]
+        results = LancamentoRepository().get_grouped_by_qualificador_year_month(
+            qualificador_ids=[q['seq_qualificador'] for q in itens],
+            anos=anos,
             meses=meses_selecionados
         )
-        
-        # Map seq_qualificador to description for display
-        qualificador_map = {q.seq_qualificador: q.dsc_qualificador for q in qualificadores_folha}
-        all_items = [q.dsc_qualificador for q in qualificadores_folha]
+        # (seq_qualificador, ano, mes, cod_tipo_lancamento, total): os tipos se somam
+        linhas = [(seq, ano, mes, total) for seq, ano, mes, _, total in results]
+        chave = 'seq_qualificador'
     else:
-        pagamento_repo = PagamentoRepository()
-        
-        results = pagamento_repo.get_comparative_by_qualificador(
-            anos=[ano1, ano2],
+        # Qualificadores de despesa ativos (inclusive agrupadores), por número
+        itens = sorted(
+            (q for q in classificados if q['ativo'] and q['tipo_fluxo'] == 'despesa'),
+            key=lambda q: q['num_qualificador'],
+        )
+        # (dsc_qualificador, ano, mes, total)
+        linhas = PagamentoRepository().get_comparative_by_qualificador(
+            anos=anos,
             meses=meses_selecionados
         )
-        
-        qualificadores = pagamento_repo.list_qualificadores()
-        all_items = [q.dsc_qualificador for q in qualificadores if q.tipo_fluxo == 'despesa']
+        chave = 'dsc_qualificador'
 
-    for item_name in all_items:
-        data[item_name] = {str(m): {str(ano1): 0, str(ano2): 0} for m in range(1, 13)}
-        data[item_name]["total"] = {str(ano1): 0, str(ano2): 0}
+    # Itens com a mesma descrição ocupam uma só linha do relatório
+    nomes = list(dict.fromkeys(q['dsc_qualificador'] for q in itens))
+    posicao_nome = {nome: i for i, nome in enumerate(nomes)}
+    indice_item = {q[chave]: posicao_nome[q['dsc_qualificador']] for q in itens}
+
+    chaves_item, anos_linha, meses_linha, totais_linha = zip(*linhas) if linhas else ((),) * 4
+    valores = _pivotar(
+        chaves_item, anos_linha, meses_linha,
+        [float(v or 0) for v in totais_linha],
+        indice_item, len(nomes), anos,
+    )
+
+    # A consulta já se restringe aos meses selecionados
+    total_item = valores.sum(axis=1)          # [item, ano]
+    total_mes = valores.sum(axis=0)           # [mes, ano]
+    total_geral = total_item.sum(axis=0)      # [ano]
+
+    # ==================== Serialização ====================
+    rotulos_ano = [str(a) for a in anos]
+
+    def por_ano(linha):
+        return dict(zip(rotulos_ano, linha.tolist()))
+
+    data = {}
+    for i, nome in enumerate(nomes):
+        item = {str(m): por_ano(valores[i, m - 1]) for m in range(1, 13)}
+        item["total"] = por_ano(total_item[i])
+        data[nome] = item
+
+    totals = {str(m): por_ano(total_mes[m - 1]) for m in meses_selecionados}
+    totals["total"] = por_ano(total_geral)
 
-    # Process results
-    if tipo_analise == "receitas":
-        # Results format: (seq_qualificador, ano, mes, cod_tipo_lancamento, total)
-        for seq_qual, year, month, cod_tipo, total_val in results:
-            item_name = qualificador_map.get(seq_qual)
-            if item_name and item_name in data:
-                data[item_name][str(month)][str(year)] = float(total_val or 0)
-    else:
-        # Results format for despesas: (item, year, month, total)
-        for item, year, month, total_val in results:
-            if item in data:
-                data[item][str(month)][str(year)] = float(total_val or 0)
-
-    for item_name, item_data in data.items():
-        total1 = sum(item_data[str(m)][str(ano1)] for m in meses_selecionados)
-        total2 = sum(item_data[str(m)][str(ano2)] for m in meses_selecionados)
-        data[item_name]["total"][str(ano1)] = total1
-        data[item_name]["total"][str(ano2)] = total2
-        totals["total"][str(ano1)] += total1
-        totals["total"][str(ano2)] += total2
-        for m in meses_selecionados:
-            totals[str(m)][str(ano1)] += item_data[str(m)][str(ano1)]
-            totals[str(m)][str(ano2)] += item_data[str(m)][str(ano2)]
-            
     return {
         "data": data,
         "totals": totals,
-        "meses_nomes": meses_nomes,
+        "anos": anos,
+        "meses_nomes": MONTH_NAME_PT,
     }
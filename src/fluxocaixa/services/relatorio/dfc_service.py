@@ -4,12 +4,14 @@ import calendar
 from sqlalchemy import extract
 
 from ...models import Lancamento, Qualificador
+from ...models.base import somente_leitura
 from ...repositories.lancamento_repository import LancamentoRepository
 from ...repositories.saldo_conta_repository import SaldoContaRepository
 from ...repositories import qualificador_repository
 from ...utils.constants import DAY_ABBR_PT, MONTH_ABBR_PT, MONTH_NAME_PT
 
 
+@somente_leitura()
 def get_dfc_data(
     periodo: str,
     ano_selecionado: int,
@@ -54,9 +56,7 @@ def get_dfc_data(
         data_inicial = date(ano_selecionado, primeiro_mes, 1)
     
     data_saldo_anterior = data_inicial - timedelta(days=1)
-    saldo_banco_inicial = saldo_repo.get_saldo_total_by_date(data_saldo_anterior)
-    if saldo_banco_inicial == 0:
-        saldo_banco_inicial = saldo_repo.get_latest_saldo_total_before_date(data_saldo_anterior)
+    saldo_banco_inicial = saldo_repo.get_saldo_total_at_date(data_saldo_anterior)
 
     # Get actual lancamentos using repository
     if periodo == "mes":
@@ -169,16 +169,24 @@ def get_dfc_data(
     }
 
 
+@somente_leitura()
 def get_dfc_eventos(
     seq: int,
     periodo: str,
     col: int,
     mes_ano: str,
     estrategia: str,
-    cenario_id: int | None
+    cenario_id: int | None,
+    page: int = 1,
+    per_page: int = 100,
 ) -> dict:
-    """Get detailed events (lancamentos) for a specific DFC cell.
-    
+    """Get a page of detailed events (lancamentos) for a specific DFC cell.
+
+    The qualificador subtree is resolved by a recursive CTE inside the same
+    statement, and only the displayed columns are selected; the count and
+    sum of the whole cell are computed by the database, so busy cells are
+    never materialized at once.
+
     Args:
         seq: Qualificador sequence ID
         periodo: 'mes' or 'ano'
@@ -186,38 +194,17 @@ def get_dfc_eventos(
         mes_ano: Date string format "YYYY-MM" or "YYYY"
         estrategia: 'realizado' or 'projetado'
         cenario_id: Scenario ID for projections
-    
+        page: 1-based page number
+        per_page: Events per page
+
     Returns:
-        Dictionary with detailed events list and total
+        Dictionary with the page of events, the cell total (sum of values)
+        and the pagination info (page, per_page, total_count, total_pages)
     """
-    qual = qualificador_repository.get_qualificador_by_id(seq)
-    ids = (
-        [seq] + [f.seq_qualificador for f in qual.get_todos_filhos()] if qual else [seq]
-    )
-    
-    # Initialize repository
-    lancamento_repo = LancamentoRepository()
-
     if periodo == "mes":
         ano, mes = [int(x) for x in mes_ano.split("-")]
-        registros = lancamento_repo.get_lancamentos_by_qualificador_and_period(
-            seq_qualificador=seq,
-            ano=ano,
-            mes=mes,
-            dia=col,
-            qualificador_ids=ids
-        )
-        
-        eventos = [
-            {
-                "data": r.dat_lancamento.strftime("%d/%m/%Y"),
-                "descricao": f"{r.qualificador.num_qualificador} - {r.qualificador.dsc_qualificador}",
-                "valor": float(r.val_lancamento),
-                "tipo": r.tipo.dsc_tipo_lancamento,
-                "origem": r.origem.dsc_origem_lancamento,
-            }
-            for r in registros
-        ]
+        dias = calendar.monthrange(ano, mes)[1]
+        intervalo = (date(ano, mes, col), date(ano, mes, col)) if 1 <= col <= dias else None
     else:
         ano = int(mes_ano)
         hoje = date.today()
@@ -226,25 +213,37 @@ def get_dfc_eventos(
             and cenario_id
             and (ano > hoje.year or (ano == hoje.year and col >= hoje.month))
         )
-        if projetar:
-            # NOTE: Projection mode removed - use Simulator feature instead
-            eventos = []
+        # NOTE: Projection mode removed - use Simulator feature instead
+        if projetar or not 1 <= col <= 12:
+            intervalo = None
         else:
-            registros = lancamento_repo.get_by_qualificadores_and_month_year(
-                qualificador_ids=ids,
-                ano=ano,
-                mes=col
-            )
-            eventos = [
-                {
-                    "data": r.dat_lancamento.strftime("%d/%m/%Y"),
-                    "descricao": f"{r.qualificador.num_qualificador} - {r.qualificador.dsc_qualificador}",
-                    "valor": float(r.val_lancamento),
-                    "tipo": r.tipo.dsc_tipo_lancamento,
-                    "origem": r.origem.dsc_origem_lancamento,
-                }
-                for r in registros
-            ]
-
-    total = sum(e["valor"] for e in eventos)
-    return {"eventos": eventos, "total": total}
+            intervalo = (date(ano, col, 1), date(ano, col, calendar.monthrange(ano, col)[1]))
+
+    registros, total_count, total = [], 0, 0.0
+    if intervalo:
+        registros, total_count, total = LancamentoRepository().get_eventos_page(
+            qualificador_repository.select_subarvore_ids(seq),
+            intervalo[0],
+            intervalo[1],
+            page=page,
+            per_page=per_page,
+        )
+
+    eventos = [
+        {
+            "data": r.dat_lancamento.strftime("%d/%m/%Y"),
+            "descricao": f"{r.num_qualificador} - {r.dsc_qualificador}",
+            "valor": float(r.val_lancamento),
+            "tipo": r.dsc_tipo_lancamento,
+            "origem": r.dsc_origem_lancamento,
+        }
+        for r in registros
+    ]
+    return {
+        "eventos": eventos,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "total_count": total_count,
+        "total_pages": (total_count + per_page - 1) // per_page if total_count > 0 else 1,
+    }
@@ -1,24 +1,29 @@
 """Indicadores (Indicators) service - financial metrics and charts."""
-from datetime import date
-import calendar
+import pandas as pd
 
+from ...models.base import somente_leitura
 from ...repositories.lancamento_repository import LancamentoRepository
-from .base import get_tipo_lancamento_ids
+from .base import get_tipo_lancamento_ids, get_qualificadores_classificados
 from ...utils.constants import MONTH_NAME_PT
 
 
+@somente_leitura()
 def get_indicadores_data(
     ano_selecionado: int,
     meses_selecionados: list[int],
     tipo_selecionado: str
 ) -> dict:
     """Get financial indicators data (area chart, pie chart, projection chart).
-    
+
+    All three charts are reduced from a single query grouped by
+    (seq_qualificador, cod_tipo, month), so the number of round trips does
+    not depend on how many months or leaf qualificadores are selected.
+
     Args:
         ano_selecionado: Year to analyze
         meses_selecionados: List of months (1-12)
         tipo_selecionado: 'receita', 'despesa', or 'ambos'
-    
+
     Returns:
         Dictionary with area_chart_data, pie_chart_data, and projection_chart_data
     """
@@ -26,101 +31,71 @@ def get_indicadores_data(
     tipo_ids = get_tipo_lancamento_ids()
     id_entrada = tipo_ids['entrada']
     id_saida = tipo_ids['saida']
-    
+    meses_ordenados = sorted(meses_selecionados)
+
     # Initialize repository
     lancamento_repo = LancamentoRepository()
-    
+
+    rows = lancamento_repo.get_grouped_by_qualificador_tipo_month(
+        ano=ano_selecionado,
+        meses=meses_ordenados,
+    ) if meses_ordenados else []
+    df = pd.DataFrame(
+        [(r.seq_qualificador, r.cod_tipo_lancamento, int(r.mes), float(r.total or 0)) for r in rows],
+        columns=['seq_qualificador', 'cod_tipo', 'mes', 'total'],
+    )
+
+    # Monthly totals per tipo (rows: month, columns: cod_tipo)
+    por_mes = (
+        df.pivot_table(index='mes', columns='cod_tipo', values='total', aggfunc='sum')
+        .reindex(index=meses_ordenados, columns=[id_entrada, id_saida])
+        .fillna(0.0)
+    )
+    receitas = por_mes[id_entrada]
+    despesas = por_mes[id_saida].abs()
+    labels = [meses_nomes[mes][:3] for mes in meses_ordenados]
+
     # Area chart: Monthly revenues vs expenses
-    area_chart_data = {"labels": [], "receitas": [], "despesas": []}
-
-    for mes in sorted(meses_selecionados):
-        receitas_mes = lancamento_repo.get_monthly_summary(
-            ano=ano_selecionado,
-            mes=mes,
-            cod_tipo=id_entrada
-        )
-        
-        despesas_lanc_mes = lancamento_repo.get_monthly_summary(
-            ano=ano_selecionado,
-            mes=mes,
-            cod_tipo=id_saida
-        )
-        despesas_mes = abs(despesas_lanc_mes or 0)
-        
-        area_chart_data["labels"].append(meses_nomes[mes][:3])
-        area_chart_data["receitas"].append(float(receitas_mes))
-        area_chart_data["despesas"].append(float(despesas_mes))
+    area_chart_data = {
+        "labels": labels,
+        "receitas": [float(v) for v in receitas],
+        "despesas": [float(v) for v in despesas],
+    }
 
     # Pie chart: Distribution by qualificador folha (leaf qualifiers)
     pie_chart_data = {"labels": [], "values": []}
-    
-    # Import Qualificador model
-    from ...models import Qualificador
-    qualificadores = Qualificador.query.filter_by(ind_status='A').all()
-    qualificadores_folha = [q for q in qualificadores if q.is_folha()]
-    
+
     if tipo_selecionado in ("receita", "ambos"):
-        # Filter only revenue qualifiers (those under root 1.x)
-        qualificadores_receita = [q for q in qualificadores_folha if q.tipo_fluxo == 'receita']
-        
-        for qualificador in qualificadores_receita:
-            total_qualificador = 0
-            for mes in meses_selecionados:
-                # Use more efficient repository method
-                month_total = lancamento_repo.get_sum_by_qualificadores_and_month(
-                    qualificadores_ids=[qualificador.seq_qualificador],
-                    cod_tipo=id_entrada,
-                    ano=ano_selecionado,
-                    mes=mes
-                )
-                total_qualificador += float(month_total)
-            
-            if total_qualificador > 0:
-                pie_chart_data["labels"].append(qualificador.dsc_qualificador)
-                pie_chart_data["values"].append(total_qualificador)
-                
+        tipo_fluxo, cod_tipo = 'receita', id_entrada
     elif tipo_selecionado == "despesa":
-        # Filter only expense qualifiers (those under root 2.x)
-        qualificadores_despesa = [q for q in qualificadores_folha if q.tipo_fluxo == 'despesa']
-        
-        for qualificador in qualificadores_despesa:
-            total_qualificador = 0
-            for mes in meses_selecionados:
-                # Use more efficient repository method
-                month_total = lancamento_repo.get_sum_by_qualificadores_and_month(
-                    qualificadores_ids=[qualificador.seq_qualificador],
-                    cod_tipo=id_saida,
-                    ano=ano_selecionado,
-                    mes=mes
-                )
-                total_qualificador += abs(float(month_total))
-            
+        tipo_fluxo, cod_tipo = 'despesa', id_saida
+    else:
+        tipo_fluxo, cod_tipo = None, None
+
+    if tipo_fluxo:
+        folhas = [
+            q for q in get_qualificadores_classificados()
+            if q['is_folha'] and q['tipo_fluxo'] == tipo_fluxo
+        ]
+        valores = df.loc[df['cod_tipo'] == cod_tipo, ['seq_qualificador', 'total']]
+        if tipo_fluxo == 'despesa':
+            # Expenses are summed as absolute monthly values
+            valores = valores.assign(total=valores['total'].abs())
+        total_por_qualificador = valores.groupby('seq_qualificador')['total'].sum()
+
+        for qualificador in folhas:
+            total_qualificador = float(total_por_qualificador.get(qualificador['seq_qualificador'], 0.0))
             if total_qualificador > 0:
-                pie_chart_data["labels"].append(qualificador.dsc_qualificador)
+                pie_chart_data["labels"].append(qualificador['dsc_qualificador'])
                 pie_chart_data["values"].append(total_qualificador)
 
     # Projection chart: Cumulative balance over time
-    projection_chart_data = {"labels": [], "saldo": []}
-    saldo_acumulado = 0
-    
-    for mes in sorted(meses_selecionados):
-        receitas_mes = lancamento_repo.get_monthly_summary(
-            ano=ano_selecionado,
-            mes=mes,
-            cod_tipo=id_entrada
-        )
-        
-        despesas_lanc_mes = lancamento_repo.get_monthly_summary(
-            ano=ano_selecionado,
-            mes=mes,
-            cod_tipo=id_saida
-        )
-        despesas_mes = abs(despesas_lanc_mes or 0)
-        saldo_mes = float(receitas_mes) - float(despesas_mes)
-        saldo_acumulado += saldo_mes
-        projection_chart_data["labels"].append(meses_nomes[mes][:3])
-        projection_chart_data["saldo"].append(saldo_acumulado)
-        
+    saldo_acumulado = (receitas - despesas).cumsum()
+    projection_chart_data = {
+        "labels": list(labels),
+        "saldo": [float(v) for v in saldo_acumulado],
+    }
+
     return {
         "area_chart_data": area_chart_data,
         "pie_chart_data": pie_chart_data,
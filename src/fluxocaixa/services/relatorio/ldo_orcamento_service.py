@@ -3,14 +3,13 @@
 Refatorado para usar dados reais da LOA (flc_loa) e suportar
 receitas + despesas + comparativo LOA × Realizado.
 """
-from datetime import date
-
-from ...models import Qualificador
+from ...models.base import somente_leitura
 from ...repositories.lancamento_repository import LancamentoRepository
 from ...repositories.loa_repository import LoaRepository
-from .base import get_tipo_lancamento_ids
+from .base import CATEGORIAS_LDO, get_tipo_lancamento_ids, get_qualificadores_classificados
 
 
+@somente_leitura()
 def get_ldo_orcamento_data(ano: int, tipo_fluxo: str = 'ambos') -> dict:
     """
     Retorna dados para o relatório de LDO & Orçamento.
@@ -21,6 +20,9 @@ def get_ldo_orcamento_data(ano: int, tipo_fluxo: str = 'ambos') -> dict:
     - Distribuição do Orçamento (LOA) por categoria (gráfico pizza)
     - Metas Fiscais (LDO) com status de cumprimento
 
+    Os valores realizados vêm de uma única consulta agrupada por
+    (seq_qualificador, cod_tipo) no ano, combinada em memória com a LOA.
+
     Args:
         ano: Ano para análise
         tipo_fluxo: 'receita', 'despesa' ou 'ambos'
@@ -37,22 +39,23 @@ def get_ldo_orcamento_data(ano: int, tipo_fluxo: str = 'ambos') -> dict:
     lancamento_repo = LancamentoRepository()
     loa_repo = LoaRepository()
 
-    # --- Buscar qualificadores folha ativos ---
-    qualificadores_ativos = [
-        q for q in Qualificador.query.filter_by(ind_status='A').all()
-        if q.is_folha()
-    ]
+    # --- Árvore de qualificadores classificada uma única vez ---
+    qualificadores = get_qualificadores_classificados()
+    qualificadores_ativos = [q for q in qualificadores if q['is_folha']]
 
     # Filtrar por tipo_fluxo
-    if tipo_fluxo == 'receita':
-        qualificadores_filtrados = [q for q in qualificadores_ativos if q.tipo_fluxo == 'receita']
-    elif tipo_fluxo == 'despesa':
-        qualificadores_filtrados = [q for q in qualificadores_ativos if q.tipo_fluxo == 'despesa']
+    if tipo_fluxo in ('receita', 'despesa'):
+        qualificadores_filtrados = [q for q in qualificadores_ativos if q['tipo_fluxo'] == tipo_fluxo]
     else:
         qualificadores_filtrados = qualificadores_ativos
 
-    # --- Buscar dados LOA reais ---
+    # --- Buscar dados LOA reais e realizado agrupado ---
     loa_dict = loa_repo.get_dict_by_year(ano)
+    realizado = lancamento_repo.get_totals_by_qualificador_and_tipo(ano)
+
+    def valor_realizado_de(qual: dict) -> float:
+        cod_tipo = id_entrada if qual['tipo_fluxo'] == 'receita' else id_saida
+        return realizado.get((qual['seq_qualificador'], cod_tipo), 0.0)
 
     # --- 1. COMPARATIVO LOA × REALIZADO ---
     comparativo = []
@@ -61,28 +64,22 @@ def get_ldo_orcamento_data(ano: int, tipo_fluxo: str = 'ambos') -> dict:
 
     for qual in qualificadores_filtrados:
         # Valor LOA cadastrado
-        valor_loa = loa_dict.get(qual.seq_qualificador, 0.0)
+        valor_loa = loa_dict.get(qual['seq_qualificador'], 0.0)
 
         # Valor Realizado (soma dos lançamentos)
-        cod_tipo = id_entrada if qual.tipo_fluxo == 'receita' else id_saida
-        valor_realizado = lancamento_repo.get_sum_by_qualificadores_and_year(
-            qualificadores_ids=[qual.seq_qualificador],
-            cod_tipo=cod_tipo,
-            ano=ano
-        )
-        valor_realizado = abs(valor_realizado)
+        valor_realizado = abs(valor_realizado_de(qual))
 
         # Percentual de execução
         perc_execucao = (valor_realizado / valor_loa * 100) if valor_loa > 0 else 0.0
 
         if valor_loa > 0 or valor_realizado > 0:
             comparativo.append({
-                'categoria': qual.dsc_qualificador,
-                'qualificador_id': qual.seq_qualificador,
+                'categoria': qual['dsc_qualificador'],
+                'qualificador_id': qual['seq_qualificador'],
                 'valor_loa': round(valor_loa, 2),
                 'valor_realizado': round(valor_realizado, 2),
                 'percentual_execucao': round(perc_execucao, 2),
-                'tipo': qual.tipo_fluxo
+                'tipo': qual['tipo_fluxo']
             })
             total_loa += valor_loa
             total_realizado += valor_realizado
@@ -106,12 +103,12 @@ def get_ldo_orcamento_data(ano: int, tipo_fluxo: str = 'ambos') -> dict:
     total_loa_dist = 0.0
 
     for qual in qualificadores_filtrados:
-        valor_loa = loa_dict.get(qual.seq_qualificador, 0.0)
+        valor_loa = loa_dict.get(qual['seq_qualificador'], 0.0)
         if valor_loa > 0:
             distribuicao.append({
-                'categoria': qual.dsc_qualificador,
+                'categoria': qual['dsc_qualificador'],
                 'valor': valor_loa,
-                'tipo': qual.tipo_fluxo
+                'tipo': qual['tipo_fluxo']
             })
             total_loa_dist += valor_loa
 
@@ -124,9 +121,14 @@ def get_ldo_orcamento_data(ano: int, tipo_fluxo: str = 'ambos') -> dict:
     distribuicao.sort(key=lambda x: x['valor'], reverse=True)
 
     # --- 4. METAS FISCAIS (LDO) ---
+    tipo_por_seq = {q['seq_qualificador']: q['tipo_fluxo'] for q in qualificadores}
+    loa_receita_total = sum(
+        valor for seq, valor in loa_dict.items()
+        if tipo_por_seq.get(seq) == 'receita'
+    )
     metas_fiscais = _calcular_metas_fiscais(
-        ano, lancamento_repo, loa_repo, loa_dict,
-        qualificadores_ativos, id_entrada, id_saida
+        [(q, valor_realizado_de(q)) for q in qualificadores_ativos],
+        loa_receita_total,
     )
 
     return {
@@ -138,69 +140,33 @@ def get_ldo_orcamento_data(ano: int, tipo_fluxo: str = 'ambos') -> dict:
 
 
 def _calcular_metas_fiscais(
-    ano: int,
-    lancamento_repo: LancamentoRepository,
-    loa_repo: LoaRepository,
-    loa_dict: dict[int, float],
-    qualificadores_ativos: list,
-    id_entrada: int,
-    id_saida: int
+    folhas_realizado: list[tuple[dict, float]],
+    loa_receita_total: float,
 ) -> list[dict]:
-    """Calcula metas fiscais usando dados reais de LOA e lançamentos."""
+    """Calcula metas fiscais a partir do realizado por folha, em uma única passada."""
 
-    quals_receita = [q for q in qualificadores_ativos if q.tipo_fluxo == 'receita']
-    quals_despesa = [q for q in qualificadores_ativos if q.tipo_fluxo == 'despesa']
+    rcl = 0.0
+    total_despesas_ano = 0.0
+    por_categoria = {categoria: 0.0 for categoria in CATEGORIAS_LDO}
 
-    # Receita Corrente Líquida (RCL) = Total receitas realizadas
-    rcl = lancamento_repo.get_sum_by_qualificadores_and_year(
-        qualificadores_ids=[q.seq_qualificador for q in quals_receita],
-        cod_tipo=id_entrada,
-        ano=ano
-    )
+    for qual, valor in folhas_realizado:
+        if qual['tipo_fluxo'] == 'receita':
+            # Receita Corrente Líquida (RCL) = Total receitas realizadas
+            rcl += valor
+        elif qual['tipo_fluxo'] == 'despesa':
+            total_despesas_ano += valor
+            for categoria in qual['categorias']:
+                por_categoria[categoria] += abs(valor)
 
     # Total Despesas Realizadas
-    total_despesas_ano = lancamento_repo.get_sum_by_qualificadores_and_year(
-        qualificadores_ids=[q.seq_qualificador for q in quals_despesa],
-        cod_tipo=id_saida,
-        ano=ano
-    )
     total_despesas_ano = abs(total_despesas_ano)
 
     # Superávit Primário
     superavit_primario = rcl - total_despesas_ano
 
-    # Despesa com Pessoal
-    despesa_pessoal = 0
-    for qual in quals_despesa:
-        if 'pessoal' in qual.dsc_qualificador.lower() or 'folha' in qual.dsc_qualificador.lower():
-            valor = lancamento_repo.get_sum_by_qualificadores_and_year(
-                qualificadores_ids=[qual.seq_qualificador],
-                cod_tipo=id_saida,
-                ano=ano
-            )
-            despesa_pessoal += abs(valor)
-
-    # Aplicação em Saúde
-    aplicacao_saude = 0
-    for qual in quals_despesa:
-        if 'saúde' in qual.dsc_qualificador.lower() or 'saude' in qual.dsc_qualificador.lower():
-            valor = lancamento_repo.get_sum_by_qualificadores_and_year(
-                qualificadores_ids=[qual.seq_qualificador],
-                cod_tipo=id_saida,
-                ano=ano
-            )
-            aplicacao_saude += abs(valor)
-
-    # Aplicação em Educação
-    aplicacao_educacao = 0
-    for qual in quals_despesa:
-        if 'educação' in qual.dsc_qualificador.lower() or 'educacao' in qual.dsc_qualificador.lower():
-            valor = lancamento_repo.get_sum_by_qualificadores_and_year(
-                qualificadores_ids=[qual.seq_qualificador],
-                cod_tipo=id_saida,
-                ano=ano
-            )
-            aplicacao_educacao += abs(valor)
+    despesa_pessoal = por_categoria['pessoal']
+    aplicacao_saude = por_categoria['saude']
+    aplicacao_educacao = por_categoria['educacao']
 
     # Calcular percentuais
     perc_despesa_pessoal = (despesa_pessoal / rcl * 100) if rcl > 0 else 0
@@ -208,7 +174,6 @@ def _calcular_metas_fiscais(
     perc_educacao = (aplicacao_educacao / total_despesas_ano * 100) if total_despesas_ano > 0 else 0
 
     # Usar LOA total de receita como referência para meta de superávit
-    loa_receita_total = loa_repo.get_total_by_year(ano, 'receita')
     meta_superavit = loa_receita_total * 0.02 if loa_receita_total > 0 else rcl * 0.02
 
     # Dívida Consolidada (simplificado)
@@ -4,12 +4,14 @@ import calendar
 import pandas as pd
 
 from ...models import Qualificador
+from ...models.base import somente_leitura
 from ...repositories.lancamento_repository import LancamentoRepository
 from .base import get_tipo_lancamento_ids
 from ...utils.constants import MONTH_NAME_PT
-from ..simulador_cenario_service import executar_simulacao
+from ..simulacao_lote_service import obter_simulacao
 
 
+@somente_leitura()
 def get_previsao_receita_data(
     ano: int,
     cenario_id: int | None,
@@ -68,7 +70,7 @@ def get_previsao_receita_data(
     df_detalhado = None
     
     if cenario_id:
-        simulacao_resultado = executar_simulacao(cenario_id)
+        simulacao_resultado = obter_simulacao(cenario_id)
         if simulacao_resultado and 'projecao_receita_detalhada' in simulacao_resultado:
             df_detalhado = simulacao_resultado['projecao_receita_detalhada']
             if df_detalhado is not None and not df_detalhado.empty:
@@ -5,13 +5,15 @@ import pandas as pd
 from sqlalchemy import extract
 
 from ...models import db
+from ...models.base import somente_leitura
 from ...repositories.lancamento_repository import LancamentoRepository
 from ...repositories.saldo_conta_repository import SaldoContaRepository
 from .base import get_tipo_lancamento_ids
 from ...utils.constants import MONTH_NAME_PT
-from ..simulador_cenario_service import executar_simulacao
+from ..simulacao_lote_service import obter_simulacao
 
 
+@somente_leitura()
 def get_resumo_data(
     ano_selecionado: int,
     meses_selecionados: list[int],
@@ -59,9 +61,7 @@ def get_resumo_data(
     data_inicio_periodo = date(ano_selecionado, primeiro_mes, 1)
     data_saldo_inicial = data_inicio_periodo - timedelta(days=1)  # Day before period
     
-    saldo_inicial_conta = saldo_repo.get_saldo_total_by_date(data_saldo_inicial)
-    if saldo_inicial_conta == 0:
-        saldo_inicial_conta = saldo_repo.get_latest_saldo_total_before_date(data_saldo_inicial)
+    saldo_inicial_conta = saldo_repo.get_saldo_total_at_date(data_saldo_inicial)
     
     # Calculate final bank balance
     saldo_final_conta = saldo_inicial_conta + total_entradas_periodo - total_saidas_periodo
@@ -72,7 +72,7 @@ def get_resumo_data(
     df_despesa_proj = None
     
     if estrategia == "projetado" and cenario_selecionado_id:
-        simulacao_resultado = executar_simulacao(cenario_selecionado_id)
+        simulacao_resultado = obter_simulacao(cenario_selecionado_id)
         if simulacao_resultado:
             df_receita_proj = simulacao_resultado['projecao_receita']
             df_despesa_proj = simulacao_resultado['projecao_despesa']
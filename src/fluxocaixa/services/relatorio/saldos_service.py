@@ -2,15 +2,17 @@
 from datetime import date, timedelta
 
 from ...models import ContaBancaria
-from ...repositories.lancamento_repository import LancamentoRepository
-from ...repositories.saldo_conta_repository import SaldoContaRepository
+from ...models.base import somente_leitura
+from ...repositories.saldo_conta_diario_repository import SaldoContaDiarioRepository
 
 
+@somente_leitura()
 def get_saldos_diarios_data(data_ref: date) -> dict:
     """Get daily balance data for all active bank accounts.
     
     This service crosses bank balance information (from flc_saldo_conta)
-    with transaction data (from flc_lancamento).
+    with transaction data (from flc_lancamento) through the daily ledger
+    (flc_saldo_conta_diario), with a fixed number of queries.
     
     Args:
         data_ref: Reference date for balance calculation
@@ -18,79 +20,92 @@ def get_saldos_diarios_data(data_ref: date) -> dict:
     Returns:
         Dictionary with daily balances per account, totals, and 30-day evolution chart
     """
-    lancamento_repo = LancamentoRepository()
-    saldo_repo = SaldoContaRepository()
+    diario_repo = SaldoContaDiarioRepository()
     contas = ContaBancaria.query.filter_by(ind_status="A").all()
+
+    # Posição de cada conta no dia (ou última antes dele) e saldos informados no dia seguinte
+    posicoes = diario_repo.get_posicoes(data_ref)
+    proximo_dia = data_ref + timedelta(days=1)
+    saldos_proximo_dia = {
+        linha.seq_conta: float(linha.val_saldo_abertura)
+        for linha in diario_repo.get_periodo(proximo_dia, proximo_dia)
+        if linha.ind_saldo_informado == 'S'
+    }
+
     rows = []
     total_saldo_anterior = total_entradas = total_saidas = total_saldo_final = 0.0
 
     for c in contas:
-        # Get initial balance from SaldoConta table
-        saldo_conta = saldo_repo.get_saldo_by_conta_and_date(c.seq_conta, data_ref)
-        
-        # If no exact balance for this date, get the most recent one before it
-        saldo_exato = True
-        if not saldo_conta:
-            saldo_conta = saldo_repo.get_latest_saldo_before_date(c.seq_conta, data_ref)
-            saldo_exato = False
-        
-        saldo_inicial = float(saldo_conta.val_saldo) if saldo_conta else 0.0
-        
-        # Get transactions linked to this specific account (seq_conta filter)
-        entradas_dia = lancamento_repo.get_sum_by_account_on_date_positive(
-            seq_conta=c.seq_conta,
-            on_date=data_ref
-        )
-        
-        saidas_dia = lancamento_repo.get_sum_by_account_on_date_negative(
-            seq_conta=c.seq_conta,
-            on_date=data_ref
+        posicao = posicoes.get(c.seq_conta)
+        movimento_no_dia = posicao is not None and posicao.dat_movimento == data_ref
+
+        # Saldo informado no dia ou, na falta dele, o mais recente antes
+        saldo_exato = movimento_no_dia and posicao.ind_saldo_informado == 'S'
+        saldo_inicial = (
+            float(posicao.val_saldo_informado)
+            if posicao is not None and posicao.val_saldo_informado is not None else 0.0
         )
 
+        # Movimentos vinculados à conta no dia
+        entradas_dia = float(posicao.val_entradas) if movimento_no_dia else 0.0
+        saidas_dia = float(posicao.val_saidas) if movimento_no_dia else 0.0
+
         # Calculate final balance
-        saldo_final = saldo_inicial + float(entradas_dia) - float(saidas_dia)
-        
+        saldo_final = saldo_inicial + entradas_dia - saidas_dia
+
         # Check for divergence with next day's bank balance
-        saldo_proximo_dia = saldo_repo.get_saldo_by_conta_and_date(
-            c.seq_conta, 
-            data_ref + timedelta(days=1)
-        )
-        
         divergencia = None
-        if saldo_proximo_dia:
-            divergencia = float(saldo_proximo_dia.val_saldo) - saldo_final
+        if c.seq_conta in saldos_proximo_dia:
+            divergencia = saldos_proximo_dia[c.seq_conta] - saldo_final
 
         rows.append(
             {
                 "conta": c,
                 "saldo_inicial": saldo_inicial,
                 "saldo_exato": saldo_exato,  # Indicator if balance is exact or estimated
-                "entradas_dia": float(entradas_dia),
-                "saidas_dia": float(saidas_dia),
+                "entradas_dia": entradas_dia,
+                "saidas_dia": saidas_dia,
                 "saldo_final": saldo_final,
                 "divergencia": divergencia,
             }
         )
 
         total_saldo_anterior += saldo_inicial
-        total_entradas += float(entradas_dia)
-        total_saidas += float(saidas_dia)
+        total_entradas += entradas_dia
+        total_saidas += saidas_dia
         total_saldo_final += saldo_final
 
-    # Compute 30-day evolution using SaldoConta data
+    # Compute 30-day evolution from the ledger, walking the days in memory
     labels = []
     serie_saldo = []
     start_day = data_ref - timedelta(days=29)
-    
+
+    # Último saldo informado de cada conta antes do dia corrente
+    informado_anterior = {
+        seq_conta: float(linha.val_saldo_informado)
+        for seq_conta, linha in diario_repo.get_posicoes(start_day, inclusive=False).items()
+        if linha.val_saldo_informado is not None
+    }
+    linhas_por_dia: dict[date, list] = {}
+    for linha in diario_repo.get_periodo(start_day, data_ref):
+        linhas_por_dia.setdefault(linha.dat_movimento, []).append(linha)
+
     cur = start_day
     while cur <= data_ref:
-        # Get total balance for all accounts on this date
-        total_dia = saldo_repo.get_saldo_total_by_date(cur)
-        
-        # If no balance for this specific date, try to get from previous date
+        linhas = linhas_por_dia.get(cur, [])
+        # Total balance informed for this date
+        total_dia = sum(
+            float(linha.val_saldo_abertura) for linha in linhas if linha.ind_saldo_informado == 'S'
+        )
+
+        # If no balance for this specific date, use the latest before it
         if total_dia == 0:
-            total_dia = saldo_repo.get_latest_saldo_total_before_date(cur)
-        
+            total_dia = sum(informado_anterior.values())
+
+        for linha in linhas:
+            if linha.val_saldo_informado is not None:
+                informado_anterior[linha.seq_conta] = float(linha.val_saldo_informado)
+
         labels.append(cur.strftime("%Y-%m-%d"))
         serie_saldo.append(total_dia)
         cur += timedelta(days=1)
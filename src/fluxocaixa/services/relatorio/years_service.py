@@ -1,8 +1,10 @@
 """Years service - extract available years from data."""
+from ...models.base import somente_leitura
 from ...repositories.lancamento_repository import LancamentoRepository
 from ...repositories.pagamento_repository import PagamentoRepository
 
 
+@somente_leitura()
 def get_available_years() -> list[int]:
     """Get list of years with lancamentos or pagamentos data.
     
@@ -20,13 +20,29 @@ from ..models import (
     CenarioReceitaAjuste,
     CenarioDespesaAjuste,
     Loa,
+    LancamentoAnoArquivado,
+    PeriodoFechado,
 )
 from ..models.base import db
 from ..models import ContaBancaria
 
 def seed_data(session=None):
-    """Populate the database with some basic records for testing."""
+    """Populate the database with some basic records for testing.
+
+    Returns:
+        False when the database was kept as is (see below), True otherwise
+    """
     session = session or db.session
+    # Meses fechados congelam seus totais em flc_lancamento_mensal e recusam
+    # lançamentos novos; anos arquivados guardam os seus fora de
+    # flc_lancamento. Apagar e reinserir 2022–2026 deixaria os totais
+    # congelados sem as linhas ou duplicaria os anos arquivados.
+    if (
+        session.query(PeriodoFechado.dat_mes).first() is not None
+        or session.query(LancamentoAnoArquivado.ano).first() is not None
+    ):
+        print("Seed ignorado: há meses fechados ou anos arquivados")
+        return False
     # Clear existing data to ensure a clean slate for new values
     try:
         session.query(Mapeamento).delete()
@@ -1751,3 +1767,9 @@ def seed_data(session=None):
         session.commit()
         print("Seeded RubricaFormula data (16 formulas)")
 
+
+    # Razão diário por conta: as limpezas em massa acima não disparam os
+    # hooks de sessão, então o razão é reconstruído por inteiro.
+    from ..repositories.saldo_conta_diario_repository import SaldoContaDiarioRepository
+    SaldoContaDiarioRepository(session).recalcular_tudo()
+    return True
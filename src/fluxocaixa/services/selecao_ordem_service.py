@@ -0,0 +1,339 @@
+"""Seleção automática da ordem de modelos ARIMA/SARIMA.
+
+Avalia uma grade limitada de ordens (p,d,q)(P,D,Q,s) e escolhe a de menor
+AIC (ou BIC):
+
+- A grade é percorrida por níveis de complexidade (p + q + P + Q); as ordens
+  de um nível são ajustadas em paralelo num pool de processos, criado no
+  primeiro uso e compartilhado por todas as chamadas do processo
+  (`Config.SELECAO_ORDEM_PROCESSOS`). Os processos do pool são iniciados com
+  ``spawn``: um ``fork`` copiaria do servidor as conexões e travas de outras
+  threads.
+- Cada ordem parte dos parâmetros já estimados da vizinha do nível anterior
+  (mesma diferenciação, um termo a menos), o que reduz as iterações do
+  otimizador.
+- Para cada diferenciação (d, D), a busca para quando o melhor critério
+  deixa de melhorar por `paciencia` níveis seguidos.
+- A ordem escolhida fica em cache por série (valores + grade + critério), de
+  modo que o backtest e projeções repetidas não refazem a busca.
+"""
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import Config
+
+HAS_STATSMODELS = False
+try:
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    HAS_STATSMODELS = True
+except ImportError:
+    pass
+
+CRITERIOS = ('aic', 'bic')
+
+# Grades padrão: a não sazonal é a mesma da antiga busca serial do ARIMA
+GRADE_ARIMA = {'p': range(0, 4), 'd': range(0, 3), 'q': range(0, 4)}
+GRADE_SARIMA = {
+    'p': range(0, 3), 'd': range(0, 2), 'q': range(0, 3),
+    'P': range(0, 2), 'D': range(0, 2), 'Q': range(0, 2),
+}
+
+# Ordem escolhida por série: {chave: resultado}
+MAX_ORDENS_CACHE = 256
+_ordens_escolhidas: "OrderedDict[Tuple, Dict]" = OrderedDict()
+
+# Pools de processos por tamanho, criados no primeiro uso
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_trava_pools = threading.Lock()
+
+
+# ==================== Ajuste de uma ordem ====================
+
+def _criar_modelo(valores: np.ndarray, ordem: Tuple, ordem_sazonal: Optional[Tuple], opcoes: Dict):
+    """ARIMA para ordens não sazonais, SARIMAX para as sazonais (como nas projeções)."""
+    if ordem_sazonal is None:
+        return ARIMA(valores, order=ordem)
+    return SARIMAX(
+        valores,
+        order=ordem,
+        seasonal_order=ordem_sazonal,
+        enforce_stationarity=opcoes.get('enforce_stationarity', False),
+        enforce_invertibility=opcoes.get('enforce_invertibility', False),
+    )
+
+
+def parametros_de_partida(modelo, parametros_iniciais: Optional[Dict[str, float]]) -> Optional[np.ndarray]:
+    """start_params do modelo preenchidos com os parâmetros de outra ordem.
+
+    Parâmetros que a outra ordem não tem (o termo acrescentado) partem de
+    zero; os demais (constante, sigma2, termos comuns) são herdados.
+    """
+    if not parametros_iniciais:
+        return None
+    start_params = np.asarray(modelo.start_params, dtype=float).copy()
+    for i, nome in enumerate(modelo.param_names):
+        if nome in parametros_iniciais:
+            start_params[i] = parametros_iniciais[nome]
+        elif nome.startswith(('ar.', 'ma.')):
+            start_params[i] = 0.0
+    return start_params
+
+
+def _ajustar(modelo, parametros_iniciais: Optional[Dict[str, float]], opcoes: Dict):
+    start_params = parametros_de_partida(modelo, parametros_iniciais)
+    if isinstance(modelo, ARIMA):
+        return modelo.fit(start_params=start_params)
+    return modelo.fit(start_params=start_params, disp=False, maxiter=opcoes.get('maxiter', 200))
+
+
+def ajustar_ordem(
+    valores: np.ndarray,
+    ordem: Tuple,
+    ordem_sazonal: Optional[Tuple],
+    opcoes: Dict,
+    parametros_iniciais: Optional[Dict[str, float]] = None,
+) -> Optional[Dict]:
+    """Ajusta uma ordem e devolve critérios e parâmetros (None se falhar).
+
+    Executada nos processos do pool: recebe e devolve apenas tipos simples.
+    """
+    try:
+        with warnings.catch_warnings():
+            # Ordens ruins da grade geram avisos de convergência aos montes
+            warnings.simplefilter('ignore')
+            modelo = _criar_modelo(valores, ordem, ordem_sazonal, opcoes)
+            ajustado = _ajustar(modelo, parametros_iniciais, opcoes)
+    except Exception:
+        return None
+    if not np.isfinite(ajustado.aic) or not np.isfinite(ajustado.bic):
+        return None
+    return {
+        'ordem': ordem,
+        'ordem_sazonal': ordem_sazonal,
+        'aic': float(ajustado.aic),
+        'bic': float(ajustado.bic),
+        'parametros': dict(zip(modelo.param_names, map(float, ajustado.params))),
+    }
+
+
+# ==================== Grade ====================
+
+def _niveis_grade(grade: Dict[str, Sequence[int]], s: Optional[int]) -> List[List[Tuple]]:
+    """Ordens (ordem, ordem_sazonal) agrupadas por p + q + P + Q."""
+    sazonal = s is not None
+    nomes = ('p', 'd', 'q', 'P', 'D', 'Q') if sazonal else ('p', 'd', 'q')
+    niveis: Dict[int, List[Tuple]] = {}
+    for combinacao in product(*(grade.get(nome, [0]) for nome in nomes)):
+        valores = dict(zip(nomes, combinacao))
+        ordem = (valores['p'], valores['d'], valores['q'])
+        ordem_sazonal = (valores['P'], valores['D'], valores['Q'], s) if sazonal else None
+        nivel = valores['p'] + valores['q'] + valores.get('P', 0) + valores.get('Q', 0)
+        niveis.setdefault(nivel, []).append((ordem, ordem_sazonal))
+    return [niveis[n] for n in sorted(niveis)]
+
+
+def _vizinhas(ordem: Tuple, ordem_sazonal: Optional[Tuple]) -> List[Tuple]:
+    """Ordens do nível anterior com a mesma diferenciação (um termo a menos)."""
+    p, d, q = ordem
+    vizinhas = [((p - 1, d, q), ordem_sazonal), ((p, d, q - 1), ordem_sazonal)]
+    if ordem_sazonal is not None:
+        P, D, Q, s = ordem_sazonal
+        vizinhas += [(ordem, (P - 1, D, Q, s)), (ordem, (P, D, Q - 1, s))]
+    return [v for v in vizinhas if min(v[0]) >= 0 and (v[1] is None or min(v[1]) >= 0)]
+
+
+def _grupo(ordem: Tuple, ordem_sazonal: Optional[Tuple]) -> Tuple:
+    return (ordem[1], ordem_sazonal[1] if ordem_sazonal else None)
+
+
+def _chave_cache(valores: np.ndarray, grade: Dict, s: Optional[int], criterio: str, opcoes: Dict) -> Tuple:
+    resumo = hashlib.sha1(np.ascontiguousarray(valores, dtype=float).tobytes()).hexdigest()
+    return (
+        resumo, s, criterio,
+        tuple((nome, tuple(grade[nome])) for nome in sorted(grade)),
+        bool(opcoes.get('enforce_stationarity', False)),
+        bool(opcoes.get('enforce_invertibility', False)),
+    )
+
+
+def limpar_cache_ordens() -> None:
+    """Descarta as ordens escolhidas em cache."""
+    _ordens_escolhidas.clear()
+
+
+# ==================== Pool de processos ====================
+
+def _pool(processos: int) -> ProcessPoolExecutor:
+    with _trava_pools:
+        pool = _pools.get(processos)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=processos, mp_context=multiprocessing.get_context('spawn'),
+            )
+            _pools[processos] = pool
+        return pool
+
+
+def _descartar_pool(processos: int) -> None:
+    with _trava_pools:
+        pool = _pools.pop(processos, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def encerrar_pools() -> None:
+    """Encerra os pools de processos (recriados na próxima busca)."""
+    with _trava_pools:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _processos_padrao() -> int:
+    # Num processo filho (ex.: pool do lote de simulações) o paralelismo
+    # já é o do pool de fora
+    if multiprocessing.parent_process():
+        return 1
+    return Config.SELECAO_ORDEM_PROCESSOS or os.cpu_count() or 1
+
+
+# ==================== Busca ====================
+
+def _avaliar_nivel(executor, valores, nivel, ajustes, opcoes) -> List[Dict]:
+    tarefas = []
+    for ordem, ordem_sazonal in nivel:
+        vizinhas = [ajustes[v] for v in _vizinhas(ordem, ordem_sazonal) if v in ajustes]
+        iniciais = min(vizinhas, key=lambda a: a['aic'])['parametros'] if vizinhas else None
+        tarefas.append((valores, ordem, ordem_sazonal, opcoes, iniciais))
+    if executor is None:
+        resultados = [ajustar_ordem(*tarefa) for tarefa in tarefas]
+    else:
+        resultados = [f.result() for f in [executor.submit(ajustar_ordem, *tarefa) for tarefa in tarefas]]
+    return [r for r in resultados if r is not None]
+
+
+def _buscar(executor, valores, niveis, criterio, paciencia, opcoes) -> Dict[Tuple, Dict]:
+    """Ajusta os níveis da grade em ordem, com parada antecipada; devolve {ordem: ajuste}."""
+    ajustes: Dict[Tuple, Dict] = {}
+    # Parada antecipada por diferenciação (d, D): o critério só é comparável
+    # entre ordens com a mesma diferenciação
+    melhor_grupo: Dict[Tuple, float] = {}
+    sem_melhora: Dict[Tuple, int] = {}
+    encerrados = set()
+    for nivel in niveis:
+        nivel = [o for o in nivel if _grupo(*o) not in encerrados]
+        if not nivel:
+            break
+        resultados = _avaliar_nivel(executor, valores, nivel, ajustes, opcoes)
+        melhor_nivel: Dict[Tuple, float] = {}
+        for r in resultados:
+            ajustes[(r['ordem'], r['ordem_sazonal'])] = r
+            grupo = _grupo(r['ordem'], r['ordem_sazonal'])
+            melhor_nivel[grupo] = min(melhor_nivel.get(grupo, np.inf), r[criterio])
+        for grupo in {_grupo(*o) for o in nivel}:
+            if melhor_nivel.get(grupo, np.inf) < melhor_grupo.get(grupo, np.inf):
+                melhor_grupo[grupo] = melhor_nivel[grupo]
+                sem_melhora[grupo] = 0
+            elif grupo in melhor_grupo:
+                sem_melhora[grupo] += 1
+                if sem_melhora[grupo] >= paciencia:
+                    encerrados.add(grupo)
+    return ajustes
+
+
+def selecionar_ordem(
+    serie: pd.Series,
+    sazonal: bool = False,
+    s: int = 12,
+    criterio: str = 'aic',
+    grade: Optional[Dict[str, Sequence[int]]] = None,
+    paciencia: int = 2,
+    processos: Optional[int] = None,
+    opcoes: Optional[Dict] = None,
+) -> Dict:
+    """Escolhe a ordem de menor AIC/BIC numa grade limitada.
+
+    Args:
+        serie: Série mensal (valores em ordem cronológica)
+        sazonal: Busca também (P,D,Q) com período `s` (SARIMA)
+        s: Período sazonal
+        criterio: 'aic' ou 'bic'
+        grade: {'p': valores, 'd': ..., 'q': ..., 'P': ..., 'D': ..., 'Q': ...}
+            (default: GRADE_ARIMA ou GRADE_SARIMA)
+        paciencia: Níveis de complexidade sem melhora antes de encerrar uma
+            diferenciação (d, D)
+        processos: Processos do pool compartilhado (default:
+            `Config.SELECAO_ORDEM_PROCESSOS`, ou serial dentro de um processo
+            filho; 0 ou 1 = serial)
+        opcoes: enforce_stationarity / enforce_invertibility / maxiter (SARIMA)
+
+    Returns:
+        Dict com 'ordem', 'ordem_sazonal' (None no ARIMA), 'criterio',
+        'valor' (critério da ordem escolhida), 'parametros' (estimados,
+        usados como partida do ajuste final), 'avaliadas' (ordens ajustadas)
+        e 'cache' (True se veio do cache)
+
+    Raises:
+        ValueError: statsmodels ausente, critério inválido ou nenhuma ordem
+            da grade ajustou
+    """
+    if not HAS_STATSMODELS:
+        raise ValueError("Biblioteca statsmodels não está instalada. Execute: pip install statsmodels")
+    if criterio not in CRITERIOS:
+        raise ValueError(f'Critério inválido: {criterio}')
+
+    opcoes = opcoes or {}
+    grade = grade or (GRADE_SARIMA if sazonal else GRADE_ARIMA)
+    periodo = s if sazonal else None
+    valores = np.asarray(serie, dtype=float)
+
+    chave = _chave_cache(valores, grade, periodo, criterio, opcoes)
+    escolhida = _ordens_escolhidas.get(chave)
+    if escolhida is not None:
+        _ordens_escolhidas.move_to_end(chave)
+        return {**escolhida, 'cache': True}
+
+    niveis = _niveis_grade(grade, periodo)
+    if processos is None:
+        processos = _processos_padrao()
+
+    executor = _pool(processos) if processos > 1 else None
+    try:
+        ajustes = _buscar(executor, valores, niveis, criterio, paciencia, opcoes)
+    except BrokenProcessPool:
+        # Um processo do pool morreu: o pool é recriado na próxima busca e
+        # esta termina no processo atual
+        _descartar_pool(processos)
+        ajustes = _buscar(None, valores, niveis, criterio, paciencia, opcoes)
+
+    melhor = min(ajustes.values(), key=lambda r: r[criterio], default=None)
+    if melhor is None:
+        raise ValueError('Nenhuma ordem da grade pôde ser ajustada')
+
+    escolhida = {
+        'ordem': melhor['ordem'],
+        'ordem_sazonal': melhor['ordem_sazonal'],
+        'criterio': criterio,
+        'valor': melhor[criterio],
+        'parametros': melhor['parametros'],
+        'avaliadas': len(ajustes),
+    }
+    _ordens_escolhidas[chave] = escolhida
+    while len(_ordens_escolhidas) > MAX_ORDENS_CACHE:
+        _ordens_escolhidas.popitem(last=False)
+    return {**escolhida, 'cache': False}
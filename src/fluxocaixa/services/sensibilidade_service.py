@@ -0,0 +1,221 @@
+"""Análise de sensibilidade dos cenários de fórmula.
+
+Varre faixas de valores de parâmetros (ipca, pib, elasticidade...) sem
+alterar o cenário salvo: as bases históricas de todas as rubricas são
+calculadas uma vez e cada fórmula é avaliada sobre a grade inteira num único
+passo vetorizado (períodos × pontos). Devolve agregados prontos para um
+heatmap (grade de totais) e um gráfico de tornado (um parâmetro por vez).
+"""
+from __future__ import annotations
+
+import json
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from ..repositories import formula_repository as f_repo
+from .formula_engine import avaliar_formula_vetorial, calcular_bases_periodos, extrair_variaveis
+from .simulacao_pipeline import executar_ramos, montar_ramos_cenario
+from .simulador_cenario_service import obter_simulador_completo
+
+# Limite de pontos da grade (produto do número de valores de cada parâmetro)
+MAX_PONTOS = 100000
+
+METRICAS = ('receita', 'despesa', 'saldo')
+
+
+def _valores_faixa(nome: str, faixa: Union[List[float], Dict]) -> np.ndarray:
+    """Lista explícita de valores ou {'min', 'max', 'passos'}."""
+    if isinstance(faixa, dict):
+        try:
+            minimo, maximo = float(faixa['min']), float(faixa['max'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Faixa de '{nome}' precisa de 'min' e 'max'")
+        passos = int(faixa.get('passos', 5))
+        if passos < 1:
+            raise ValueError(f"Faixa de '{nome}' precisa de pelo menos 1 passo")
+        return np.linspace(minimo, maximo, passos)
+    valores = np.asarray(faixa, dtype=float).ravel()
+    if valores.size == 0:
+        raise ValueError(f"Faixa de '{nome}' está vazia")
+    return valores
+
+
+def _rubricas_formula(tipo_fluxo: str) -> List:
+    """Fórmulas ativas das folhas do fluxo (mesmo recorte de projetar_cenario_formula)."""
+    return [
+        f for f in f_repo.get_all_formulas()
+        if f.qualificador is not None
+        and f.qualificador.ind_status == 'A'
+        and f.qualificador.tipo_fluxo == tipo_fluxo
+        and f.qualificador.is_folha()
+    ]
+
+
+def _preparar_cenario(cenario_completo: Dict) -> Dict:
+    """Bases e fórmulas de um cenário, prontas para avaliar pontos de parâmetros.
+
+    Returns:
+        Dict com 'parametros' (valores do cenário), 'variaveis' (usadas nas
+        fórmulas), 'rubricas' ({tipo_fluxo: [(expressão, base (periodos, 1))]})
+        e 'constantes' (total dos ramos que não são FORMULA)
+    """
+    simulador = cenario_completo['simulador']
+    try:
+        config_base = json.loads(simulador.json_config_base or '{}')
+    except (json.JSONDecodeError, TypeError):
+        config_base = {}
+    periodicidade = simulador.cod_periodicidade or 'ANUAL'
+    metodo_base = simulador.cod_metodo_base or 'MEDIA_SIMPLES'
+
+    preparo = {
+        'parametros': {
+            v.nom_parametro: float(v.val_parametro)
+            for v in f_repo.get_valores_cenario(simulador.seq_simulador_cenario)
+        },
+        'variaveis': set(),
+        'rubricas': {},
+        'constantes': {},
+    }
+
+    # Ramos que não são FORMULA não dependem dos parâmetros: total constante
+    ramos = dict(zip(('receita', 'despesa'), montar_ramos_cenario(cenario_completo)))
+    fixos = [ramo for ramo in ramos.values() if ramo['tipo'] != 'FORMULA']
+    for ramo, (projecao, _) in zip(fixos, executar_ramos(fixos) if fixos else []):
+        total = float(projecao['valor_projetado'].sum()) if len(projecao) else 0.0
+        preparo['constantes'][ramo['tipo_fluxo']] = total
+
+    for tipo_fluxo, ramo in ramos.items():
+        if ramo['tipo'] != 'FORMULA':
+            continue
+        formulas = _rubricas_formula(tipo_fluxo)
+        bases = calcular_bases_periodos(
+            [f.seq_qualificador for f in formulas],
+            simulador.meses_projecao, periodicidade, metodo_base, config_base,
+        )
+        preparo['rubricas'][tipo_fluxo] = [
+            (f.dsc_formula_expressao, bases[f.seq_qualificador][:, None]) for f in formulas
+        ]
+        for f in formulas:
+            preparo['variaveis'].update(v for v in extrair_variaveis(f.dsc_formula_expressao) if v != 'base')
+
+    if not preparo['rubricas']:
+        raise ValueError('Cenário não usa fórmulas')
+    return preparo
+
+
+def _avaliar_pontos(preparo: Dict, pontos: Dict[str, np.ndarray], n: int) -> Dict[str, np.ndarray]:
+    """Totais de receita, despesa e saldo em cada um dos `n` pontos.
+
+    Parâmetros sem valor no ponto nem no cenário entram como NaN: a fórmula
+    cai para a própria base, como em `projetar_com_formula`.
+    """
+    variaveis = {nome: preparo['parametros'].get(nome, np.nan) for nome in preparo['variaveis']}
+    variaveis.update({nome: np.asarray(valores, dtype=float)[None, :] for nome, valores in pontos.items()})
+
+    totais = {}
+    for tipo_fluxo in ('receita', 'despesa'):
+        if tipo_fluxo not in preparo['rubricas']:
+            totais[tipo_fluxo] = np.full(n, preparo['constantes'].get(tipo_fluxo, 0.0))
+            continue
+        total = np.zeros(n)
+        for expressao, base in preparo['rubricas'][tipo_fluxo]:
+            try:
+                valores = avaliar_formula_vetorial(expressao, {**variaveis, 'base': base})
+                valores = np.where(np.isnan(valores), base, valores)
+            except ValueError:
+                valores = base
+            total += np.broadcast_to(valores, (base.shape[0], n)).sum(axis=0)
+        totais[tipo_fluxo] = total
+    totais['saldo'] = totais['receita'] - np.abs(totais['despesa'])
+    return totais
+
+
+def varrer_parametros(
+    seq_simulador_cenario: int,
+    faixas: Dict[str, Union[List[float], Dict]],
+    metrica: str = 'saldo',
+) -> Optional[Dict]:
+    """Avalia o cenário de fórmula sobre a grade de valores dos parâmetros.
+
+    Args:
+        seq_simulador_cenario: ID do cenário simulador (receita e/ou despesa FORMULA)
+        faixas: {nom_parametro: [valores] ou {'min', 'max', 'passos'}}
+        metrica: Métrica do tornado ('receita', 'despesa' ou 'saldo')
+
+    Returns:
+        None se o cenário não existe; senão Dict com:
+            'parametros': nomes na ordem dos eixos da grade
+            'valores': {nome: valores do eixo}
+            'grade': {'receita'|'despesa'|'saldo': totais com forma (n1, n2, ...)}
+            'base': parâmetros do cenário e totais correspondentes
+            'tornado': variação da métrica com cada parâmetro no mínimo e no
+                máximo da faixa (demais no valor do cenário), da maior
+                amplitude para a menor
+
+    Raises:
+        ValueError: Cenário sem fórmula, parâmetro desconhecido, faixa
+            inválida ou grade maior que MAX_PONTOS
+    """
+    if metrica not in METRICAS:
+        raise ValueError(f'Métrica inválida: {metrica}')
+    if not faixas:
+        raise ValueError('Informe pelo menos um parâmetro')
+
+    cenario_completo = obter_simulador_completo(seq_simulador_cenario)
+    if not cenario_completo:
+        return None
+    preparo = _preparar_cenario(cenario_completo)
+
+    conhecidos = preparo['variaveis'] | set(preparo['parametros'])
+    conhecidos |= {p.nom_parametro for p in f_repo.get_all_parametros_globais()}
+    desconhecidos = sorted(set(faixas) - conhecidos)
+    if desconhecidos:
+        raise ValueError(f'Parâmetros desconhecidos: {", ".join(desconhecidos)}')
+
+    nomes = list(faixas)
+    eixos = [_valores_faixa(nome, faixas[nome]) for nome in nomes]
+    forma = tuple(len(eixo) for eixo in eixos)
+    total_pontos = int(np.prod(forma))
+    if total_pontos > MAX_PONTOS:
+        raise ValueError(f'Grade com {total_pontos} pontos excede o limite de {MAX_PONTOS}')
+
+    malha = np.meshgrid(*eixos, indexing='ij')
+    grade = _avaliar_pontos(preparo, {nome: m.ravel() for nome, m in zip(nomes, malha)}, total_pontos)
+
+    # Tornado: ponto do cenário + mínimo e máximo de cada parâmetro isolado
+    base_valores = {nome: preparo['parametros'].get(nome, np.nan) for nome in nomes}
+    pontos = {nome: np.full(1 + 2 * len(nomes), base_valores[nome]) for nome in nomes}
+    for i, (nome, eixo) in enumerate(zip(nomes, eixos)):
+        pontos[nome][1 + 2 * i] = eixo.min()
+        pontos[nome][2 + 2 * i] = eixo.max()
+    isolados = _avaliar_pontos(preparo, pontos, 1 + 2 * len(nomes))
+
+    referencia = float(isolados[metrica][0])
+    tornado = []
+    for i, (nome, eixo) in enumerate(zip(nomes, eixos)):
+        valor_min = float(isolados[metrica][1 + 2 * i])
+        valor_max = float(isolados[metrica][2 + 2 * i])
+        tornado.append({
+            'parametro': nome,
+            'valor_min': float(eixo.min()),
+            'valor_max': float(eixo.max()),
+            'metrica_min': round(valor_min, 2),
+            'metrica_max': round(valor_max, 2),
+            'delta_min': round(valor_min - referencia, 2),
+            'delta_max': round(valor_max - referencia, 2),
+            'amplitude': round(abs(valor_max - valor_min), 2),
+        })
+    tornado.sort(key=lambda item: item['amplitude'], reverse=True)
+
+    return {
+        'parametros': nomes,
+        'valores': {nome: eixo.tolist() for nome, eixo in zip(nomes, eixos)},
+        'grade': {chave: valores.reshape(forma).round(2).tolist() for chave, valores in grade.items()},
+        'base': {
+            'parametros': {nome: (None if np.isnan(v) else v) for nome, v in base_valores.items()},
+            **{chave: round(float(valores[0]), 2) for chave, valores in isolados.items()},
+        },
+        'metrica': metrica,
+        'tornado': tornado,
+    }
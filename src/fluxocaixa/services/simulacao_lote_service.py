@@ -0,0 +1,229 @@
+"""Pré-cálculo em lote das projeções do simulador.
+
+Executa vários cenários numa única passada: os ramos de receita e despesa de
+todos eles compartilham a mesma carga de histórico (uma query agrupada), ramos
+idênticos entre cenários (`chave_ramo`) são ajustados uma única vez e os
+modelos que não consultam o banco rodam num pool de processos. Cada cenário é
+gravado como uma versão em flc_projecao_versao (rascunho com `MOTIVO_LOTE`),
+que os relatórios leem via `obter_simulacao` enquanto ela estiver válida.
+
+Disparado por cron com `python -m fluxocaixa.precalculo`.
+"""
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from ..models.base import engine, engine_leitura
+from ..repositories import projecao_versao_repository as versao_repo
+from . import simulacao_pipeline as pipeline
+from .projecao_versao_service import (
+    _serializar_inputs,
+    carregar_resultado_versao,
+    salvar_resultado_como_versao,
+)
+from .simulador_cenario_service import (
+    executar_simulacao,
+    list_active_simuladores,
+    montar_resultado_simulacao,
+    obter_simulador_completo,
+)
+
+# dsc_motivo das versões gravadas pelo lote — identifica o que pode ser
+# reaproveitado pelos relatórios e substituído na próxima execução
+MOTIVO_LOTE = 'Pré-cálculo automático (lote)'
+
+# Por quanto tempo uma versão do lote substitui a execução sob demanda
+VALIDADE_PADRAO = timedelta(hours=24)
+
+
+# ==================== Execução ====================
+
+def _inicializar_processo() -> None:
+    # Conexões herdadas do processo pai não podem ser usadas no filho
+    engine.dispose(close=False)
+    engine_leitura.dispose(close=False)
+
+
+def _projetar_ramos(ramos: Dict[tuple, Dict], processos: int) -> Dict[tuple, object]:
+    """Projeta ramos únicos; devolve {chave: (projeção, detalhada) ou Exception}.
+
+    Ramos cujo modelo consulta o banco rodam no processo atual; os demais vão
+    para o pool (o ajuste dos modelos estatísticos é CPU-bound).
+    """
+    resultados: Dict[tuple, object] = {}
+    locais, remotos = [], []
+    for chave, ramo in ramos.items():
+        spec = pipeline.REGISTRO_MODELOS.get(ramo['tipo']) or {}
+        (locais if spec.get('usa_banco') or processos <= 1 else remotos).append(chave)
+
+    if len(remotos) > 1:
+        with ProcessPoolExecutor(max_workers=min(processos, len(remotos)),
+                                 initializer=_inicializar_processo) as executor:
+            futuros = {chave: executor.submit(pipeline.executar_ramo, ramos[chave]) for chave in remotos}
+            for chave in locais:
+                resultados[chave] = _projetar_local(ramos[chave])
+            for chave, futuro in futuros.items():
+                try:
+                    resultados[chave] = futuro.result()
+                except Exception as exc:
+                    resultados[chave] = exc
+    else:
+        for chave in locais + remotos:
+            resultados[chave] = _projetar_local(ramos[chave])
+    return resultados
+
+
+def _projetar_local(ramo: Dict) -> object:
+    try:
+        return pipeline.executar_ramo(ramo)
+    except Exception as exc:
+        return exc
+
+
+def _copiar(projecao):
+    # Resultados compartilhados entre cenários: cada um recebe a sua cópia
+    return None if projecao is None else projecao.copy()
+
+
+def executar_lote(
+    seq_cenarios: Optional[List[int]] = None,
+    processos: Optional[int] = None,
+) -> Dict:
+    """Executa a simulação de vários cenários numa única passada.
+
+    Args:
+        seq_cenarios: Cenários a executar (default: todos os ativos)
+        processos: Tamanho do pool de processos (default: núcleos da máquina;
+            0 ou 1 executa tudo no processo atual)
+
+    Returns:
+        Dict com:
+            'resultados': {seq_simulador_cenario: resultado de executar_simulacao}
+            'cenarios': {seq_simulador_cenario: obter_simulador_completo}
+            'erros': {seq_simulador_cenario: mensagem}
+            'ramos': total de ramos, 'ramos_unicos': ramos efetivamente ajustados
+    """
+    if seq_cenarios is None:
+        seq_cenarios = [s.seq_simulador_cenario for s in list_active_simuladores()]
+    if processos is None:
+        processos = os.cpu_count() or 1
+
+    cenarios, erros, ramos_cenario = {}, {}, {}
+    for seq in seq_cenarios:
+        cenario_completo = obter_simulador_completo(seq)
+        if not cenario_completo:
+            erros[seq] = 'Cenário não encontrado'
+            continue
+        cenarios[seq] = cenario_completo
+        ramos_cenario[seq] = pipeline.montar_ramos_cenario(cenario_completo)
+
+    todos = [ramo for par in ramos_cenario.values() for ramo in par]
+    pipeline.preparar_ramos(todos)
+
+    unicos: Dict[tuple, Dict] = {}
+    chaves_cenario = {}
+    for seq, par in ramos_cenario.items():
+        chaves_cenario[seq] = tuple(pipeline.chave_ramo(ramo) for ramo in par)
+        for chave, ramo in zip(chaves_cenario[seq], par):
+            unicos.setdefault(chave, ramo)
+
+    projecoes = _projetar_ramos(unicos, processos)
+
+    resultados = {}
+    for seq, (chave_receita, chave_despesa) in chaves_cenario.items():
+        receita, despesa = projecoes[chave_receita], projecoes[chave_despesa]
+        falha = next((r for r in (receita, despesa) if isinstance(r, Exception)), None)
+        if falha is not None:
+            erros[seq] = f'{type(falha).__name__}: {falha}'
+            continue
+        resultados[seq] = montar_resultado_simulacao(
+            cenarios[seq]['simulador'],
+            tuple(_copiar(p) for p in receita),
+            tuple(_copiar(p) for p in despesa),
+        )
+
+    return {
+        'resultados': resultados,
+        'cenarios': cenarios,
+        'erros': erros,
+        'ramos': len(todos),
+        'ramos_unicos': len(unicos),
+    }
+
+
+def precalcular_cenarios(
+    seq_cenarios: Optional[List[int]] = None,
+    processos: Optional[int] = None,
+    nom_versao: Optional[str] = None,
+    publicar: bool = False,
+    manter_anteriores: bool = False,
+    user_id: Optional[int] = None,
+) -> Dict:
+    """Executa o lote e grava cada cenário como uma versão da projeção.
+
+    Args:
+        seq_cenarios: Cenários a executar (default: todos os ativos)
+        processos: Tamanho do pool de processos
+        nom_versao: Nome das versões (default: 'Lote dd/mm/aaaa hh:mm')
+        publicar: Grava as versões já publicadas
+        manter_anteriores: Se False, apaga os rascunhos de lotes anteriores
+        user_id: cod_pessoa das versões
+
+    Returns:
+        Dict com 'versoes' ({seq_simulador_cenario: seq_projecao_versao}),
+        'erros', 'ramos' e 'ramos_unicos'
+    """
+    lote = executar_lote(seq_cenarios, processos)
+    nom_versao = nom_versao or f'Lote {datetime.now():%d/%m/%Y %H:%M}'
+
+    versoes = {}
+    erros = dict(lote['erros'])
+    for seq, resultado in lote['resultados'].items():
+        try:
+            if not manter_anteriores:
+                versao_repo.delete_rascunhos_por_motivo(seq, MOTIVO_LOTE)
+            versao = salvar_resultado_como_versao(
+                seq, nom_versao, resultado, lote['cenarios'][seq],
+                dsc_motivo=MOTIVO_LOTE, user_id=user_id, publicar=publicar,
+            )
+            versoes[seq] = versao.seq_projecao_versao
+        except Exception as exc:
+            erros[seq] = f'{type(exc).__name__}: {exc}'
+
+    return {
+        'versoes': versoes,
+        'erros': erros,
+        'ramos': lote['ramos'],
+        'ramos_unicos': lote['ramos_unicos'],
+    }
+
+
+# ==================== Leitura pelos relatórios ====================
+
+def obter_resultado_precalculado(
+    seq_simulador_cenario: int,
+    validade: timedelta = VALIDADE_PADRAO,
+) -> Optional[Dict]:
+    """Resultado gravado pelo último lote, se ainda vale para o cenário.
+
+    A versão só é usada se for mais recente que `validade` e se os inputs do
+    cenário (config e ajustes) não mudaram desde o cálculo.
+    """
+    versao = versao_repo.get_ultima_versao_por_motivo(seq_simulador_cenario, MOTIVO_LOTE)
+    if versao is None or versao.dat_versao < datetime.now() - validade:
+        return None
+    cenario_completo = obter_simulador_completo(seq_simulador_cenario)
+    if not cenario_completo:
+        return None
+    if json.loads(versao.json_inputs or '{}') != json.loads(_serializar_inputs(cenario_completo)):
+        return None
+    return carregar_resultado_versao(versao, cenario_completo['simulador'])
+
+
+def obter_simulacao(seq_simulador_cenario: int) -> Optional[Dict]:
+    """Resultado do lote quando válido; senão executa a simulação."""
+    return obter_resultado_precalculado(seq_simulador_cenario) or executar_simulacao(seq_simulador_cenario)
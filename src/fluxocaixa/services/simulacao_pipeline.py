@@ -0,0 +1,489 @@
+"""Pipeline de projeção do simulador, orientado a tabela.
+
+`REGISTRO_MODELOS` descreve cada `cod_tipo_cenario`: janela de histórico,
+mínimo de meses, fluxos em que é aceito e a função que projeta. Um *ramo*
+é a configuração de receita ou de despesa de um cenário (ou uma projeção
+avulsa). O planejador une as janelas de histórico de todos os ramos, carrega
+tudo numa única query agrupada por (qualificador, mês) e entrega a cada ramo
+a sua série; os ramos então rodam em paralelo.
+
+Usado por `executar_simulacao`, `/simulador/calcular-projecao`,
+`backtest_service._executar_modelo` e pelo pré-cálculo em lote
+(`simulacao_lote_service`), que reaproveita ramos iguais via `chave_ramo`.
+"""
+from __future__ import annotations
+
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..models.base import db
+from ..repositories.lancamento_repository import LancamentoRepository
+from . import modelos_economicos_service as modelos
+
+# Mesmos atributos de CenarioReceitaAjuste/CenarioDespesaAjuste, sem sessão
+Ajuste = namedtuple('Ajuste', 'mes seq_qualificador cod_tipo_ajuste val_ajuste')
+
+
+# ==================== Funções de projeção ====================
+
+def _projetar_manual(ramo: Dict) -> pd.DataFrame:
+    from .simulador_cenario_service import (
+        _executar_cenario_manual_despesa,
+        _executar_cenario_manual_receita,
+    )
+    executar = (
+        _executar_cenario_manual_receita if ramo['tipo_fluxo'] == 'receita'
+        else _executar_cenario_manual_despesa
+    )
+    return executar(ramo['ajustes'], ramo['ano_base'], ramo['meses_projecao'], ramo['valores_ref'])
+
+
+def _projetar_loa(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_loa(ramo['meses_projecao'], ramo['config'])
+
+
+def _projetar_holt_winters(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_holt_winters(ramo['dados'], ramo['meses_projecao'], ramo['config'], ramo['ano_base'])
+
+
+def _projetar_arima(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_arima(ramo['dados'], ramo['meses_projecao'], ramo['config'], ramo['ano_base'])
+
+
+def _projetar_sarima(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_sarima(ramo['dados'], ramo['meses_projecao'], ramo['config'], ramo['ano_base'])
+
+
+def _projetar_xgboost(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_xgboost(ramo['dados'], ramo['meses_projecao'], ramo['config'], ramo['ano_base'])
+
+
+def _projetar_lightgbm(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_lightgbm(ramo['dados'], ramo['meses_projecao'], ramo['config'], ramo['ano_base'])
+
+
+def _projetar_media_historica(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_media_historica(ramo['dados'], ramo['meses_projecao'], ramo['config'], ramo['ano_base'])
+
+
+def _projetar_regressao(ramo: Dict) -> pd.DataFrame:
+    return modelos.projetar_regressao_multipla(ramo['meses_projecao'], ramo['config'], ramo['ano_base'])
+
+
+def _projetar_formula(ramo: Dict) -> pd.DataFrame:
+    from .formula_engine import projetar_cenario_formula
+    simulador = ramo['simulador']
+    return projetar_cenario_formula(
+        seq_simulador_cenario=simulador['seq_simulador_cenario'],
+        ano_base=ramo['ano_base'],
+        periodos=ramo['meses_projecao'],
+        tipo_fluxo=ramo['tipo_fluxo'],
+        periodicidade=simulador.get('cod_periodicidade') or 'ANUAL',
+        metodo_base=simulador.get('cod_metodo_base') or 'MEDIA_SIMPLES',
+        config_base=simulador.get('config_base') or {},
+    )
+
+
+def _projetar_crescimento_ano(ramo: Dict) -> pd.DataFrame:
+    from .formula_engine import projetar_crescimento_ultimo_ano
+    anos = ramo['anos_referencia']
+    return projetar_crescimento_ultimo_ano(
+        seq_qualificadores=ramo['seq_qualificadores'],
+        ano_projecao=ramo['ano_base'],
+        ano_referencia=max(anos) if anos else ramo['ano_base'] - 1,
+        mes_referencia=int(ramo['config'].get('mes_referencia', 6)),
+        meses_projecao=ramo['meses_projecao'],
+    )
+
+
+def _projetar_media_crescimento(ramo: Dict) -> pd.DataFrame:
+    from .formula_engine import projetar_media_crescimento_anos
+    return projetar_media_crescimento_anos(
+        seq_qualificadores=ramo['seq_qualificadores'],
+        ano_projecao=ramo['ano_base'],
+        anos_referencia=ramo['anos_referencia'],
+        mes_referencia=int(ramo['config'].get('mes_referencia', 6)),
+        meses_projecao=ramo['meses_projecao'],
+    )
+
+
+# ==================== Registro de modelos ====================
+
+# serie: 'agregada' (soma mensal dos qualificadores do ramo), 'por_qualificador'
+#        (valores do ano anterior por qualificador, para ajustes percentuais) ou None
+# anos_historico: anos completos até ano_base - 1
+# fluxos: onde o tipo é aceito em um cenário salvo
+# avulso: aceito em /simulador/calcular-projecao e no backtest
+# detalhado: a projeção mantém seq_qualificador (vira *_detalhada no resultado)
+# usa_banco: a função de projeção consulta o banco por conta própria
+# por_cenario: a projeção depende do cenário (parâmetros salvos), não só do ramo
+REGISTRO_MODELOS: Dict[str, Dict] = {
+    'MANUAL': {
+        'serie': 'por_qualificador', 'anos_historico': 1, 'min_meses': 0,
+        'fluxos': ('receita', 'despesa'), 'avulso': False, 'detalhado': True,
+        'projetar': _projetar_manual,
+    },
+    'LOA': {
+        'serie': None, 'anos_historico': 0, 'min_meses': 0,
+        'fluxos': ('despesa',), 'avulso': False, 'detalhado': False,
+        'projetar': _projetar_loa,
+    },
+    'HOLT_WINTERS': {
+        'serie': 'agregada', 'anos_historico': 3, 'min_meses': 12,
+        'fluxos': ('receita',), 'avulso': True, 'detalhado': False,
+        'projetar': _projetar_holt_winters,
+    },
+    'ARIMA': {
+        'serie': 'agregada', 'anos_historico': 3, 'min_meses': 12,
+        'fluxos': ('receita',), 'avulso': True, 'detalhado': False,
+        'projetar': _projetar_arima,
+    },
+    'SARIMA': {
+        'serie': 'agregada', 'anos_historico': 4, 'min_meses': 12,
+        'fluxos': ('receita',), 'avulso': True, 'detalhado': False,
+        'projetar': _projetar_sarima,
+    },
+    'XGBOOST': {
+        'serie': 'agregada', 'anos_historico': 3, 'min_meses': 13,
+        'fluxos': ('receita',), 'avulso': True, 'detalhado': False,
+        'projetar': _projetar_xgboost,
+    },
+    'LIGHTGBM': {
+        'serie': 'agregada', 'anos_historico': 3, 'min_meses': 13,
+        'fluxos': ('receita',), 'avulso': True, 'detalhado': False,
+        'projetar': _projetar_lightgbm,
+    },
+    'MEDIA_HISTORICA': {
+        'serie': 'agregada', 'anos_historico': 3, 'min_meses': 1,
+        'fluxos': ('despesa',), 'avulso': True, 'detalhado': False,
+        'projetar': _projetar_media_historica,
+    },
+    'REGRESSAO': {
+        'serie': None, 'anos_historico': 0, 'min_meses': 0,
+        'fluxos': ('receita',), 'avulso': True, 'detalhado': False,
+        'projetar': _projetar_regressao,
+    },
+    'FORMULA': {
+        'serie': None, 'anos_historico': 0, 'min_meses': 0,
+        'fluxos': ('receita', 'despesa'), 'avulso': False, 'detalhado': True,
+        'usa_banco': True, 'por_cenario': True,
+        'projetar': _projetar_formula,
+    },
+    'CRESCIMENTO_ANO': {
+        'serie': None, 'anos_historico': 0, 'min_meses': 0,
+        'fluxos': ('receita', 'despesa'), 'avulso': True, 'detalhado': True,
+        'usa_banco': True,
+        'projetar': _projetar_crescimento_ano,
+    },
+    'MEDIA_CRESCIMENTO': {
+        'serie': None, 'anos_historico': 0, 'min_meses': 0, 'exige_anos': True,
+        'fluxos': ('receita', 'despesa'), 'avulso': True, 'detalhado': True,
+        'usa_banco': True,
+        'projetar': _projetar_media_crescimento,
+    },
+}
+
+
+# ==================== Ramos ====================
+
+def _carregar_json(texto: Optional[str]) -> Dict:
+    try:
+        return json.loads(texto or '{}')
+    except (json.JSONDecodeError, TypeError):
+        return {}
+
+
+def _qualificadores_da_config(config: Dict) -> List[int]:
+    seq_qualificadores = config.get('seq_qualificadores') or []
+    if not seq_qualificadores and config.get('seq_qualificador'):
+        seq_qualificadores = [config['seq_qualificador']]
+    return [int(s) for s in seq_qualificadores]
+
+
+def novo_ramo(
+    tipo: str,
+    ano_base: int,
+    meses_projecao: int = 12,
+    config: Optional[Dict] = None,
+    tipo_fluxo: str = 'receita',
+    seq_qualificadores: Optional[List[int]] = None,
+    anos_referencia: Optional[List[int]] = None,
+    ajustes: Optional[List[Ajuste]] = None,
+    simulador: Optional[Dict] = None,
+    dados: Optional[pd.DataFrame] = None,
+) -> Dict:
+    """Cria a descrição de um ramo de projeção.
+
+    `dados` pode vir pronto (ex.: série de treino do backtest); caso
+    contrário é preenchido por `executar_ramos` a partir do histórico
+    carregado em lote.
+    """
+    config = config or {}
+    if seq_qualificadores is None:
+        seq_qualificadores = _qualificadores_da_config(config)
+    return {
+        'tipo': tipo,
+        'tipo_fluxo': tipo_fluxo,
+        'config': config,
+        'ano_base': ano_base,
+        'meses_projecao': meses_projecao,
+        'seq_qualificadores': list(seq_qualificadores),
+        'anos_referencia': list(anos_referencia or []),
+        'ajustes': list(ajustes or []),
+        'simulador': simulador or {},
+        'dados': dados,
+        'valores_ref': None,
+    }
+
+
+def montar_ramos_cenario(cenario_completo: Dict) -> Tuple[Dict, Dict]:
+    """Monta os ramos de receita e despesa de `obter_simulador_completo`.
+
+    Tudo o que os ramos precisam é copiado para tipos simples, de modo que
+    eles possam rodar em outras threads sem tocar nos objetos da sessão.
+    """
+    simulador = cenario_completo['simulador']
+    config_base = _carregar_json(simulador.json_config_base)
+    info_simulador = {
+        'seq_simulador_cenario': simulador.seq_simulador_cenario,
+        'cod_periodicidade': simulador.cod_periodicidade,
+        'cod_metodo_base': simulador.cod_metodo_base,
+        'config_base': config_base,
+    }
+    ramos = []
+    for tipo_fluxo in ('receita', 'despesa'):
+        dados_fluxo = cenario_completo.get(tipo_fluxo) or {}
+        config_fluxo = dados_fluxo.get('config')
+        ramos.append(novo_ramo(
+            tipo=config_fluxo.cod_tipo_cenario if config_fluxo else 'MANUAL',
+            ano_base=simulador.ano_base,
+            meses_projecao=simulador.meses_projecao,
+            config=_carregar_json(config_fluxo.json_configuracao) if config_fluxo else {},
+            tipo_fluxo=tipo_fluxo,
+            anos_referencia=config_base.get('anos', []),
+            ajustes=[
+                Ajuste(a.mes, a.seq_qualificador, a.cod_tipo_ajuste, a.val_ajuste)
+                for a in dados_fluxo.get('ajustes', [])
+            ],
+            simulador=info_simulador,
+        ))
+    return ramos[0], ramos[1]
+
+
+# ==================== Planejamento do histórico ====================
+
+def _janela(ramo: Dict) -> Optional[Tuple[set, date, date]]:
+    """Qualificadores e período de histórico de que o ramo precisa."""
+    spec = REGISTRO_MODELOS.get(ramo['tipo'])
+    if not spec or not spec['serie'] or ramo['dados'] is not None:
+        return None
+    if spec['serie'] == 'por_qualificador':
+        seq_qualificadores = {a.seq_qualificador for a in ramo['ajustes']}
+    else:
+        seq_qualificadores = set(ramo['seq_qualificadores'])
+    if not seq_qualificadores:
+        return None
+    ano_fim = ramo['ano_base'] - 1
+    return seq_qualificadores, date(ano_fim - spec['anos_historico'] + 1, 1, 1), date(ano_fim, 12, 31)
+
+
+def planejar_historico(ramos: List[Dict]) -> Optional[Dict]:
+    """União das janelas de histórico dos ramos (None se nenhum precisa)."""
+    janelas = [j for j in map(_janela, ramos) if j]
+    if not janelas:
+        return None
+    return {
+        'seq_qualificadores': sorted(set().union(*(j[0] for j in janelas))),
+        'data_inicio': min(j[1] for j in janelas),
+        'data_fim': max(j[2] for j in janelas),
+    }
+
+
+def carregar_historico(plano: Dict) -> pd.DataFrame:
+    """Executa o plano: uma query com os totais mensais por qualificador.
+
+    Os totais são arredondados ao centavo, para que a série não dependa da
+    ordem de soma em ponto flutuante do banco (o Holt-Winters é sensível a
+    ruído dessa ordem).
+    """
+    rows = LancamentoRepository().get_monthly_totals_by_qualificador(
+        plano['seq_qualificadores'], plano['data_inicio'], plano['data_fim']
+    )
+    return pd.DataFrame(
+        [(r.seq_qualificador, int(r.ano), int(r.mes), round(float(r.total or 0), 2)) for r in rows],
+        columns=['seq_qualificador', 'ano', 'mes', 'valor'],
+    )
+
+
+def _anexar_historico(ramo: Dict, historico: Optional[pd.DataFrame]) -> None:
+    spec = REGISTRO_MODELOS.get(ramo['tipo'])
+    if not spec or not spec['serie'] or ramo['dados'] is not None:
+        return
+    janela = _janela(ramo)
+    selecao = None
+    if janela and historico is not None:
+        seq_qualificadores, inicio, fim = janela
+        periodo = historico['ano'] * 12 + historico['mes']
+        selecao = historico[
+            historico['seq_qualificador'].isin(seq_qualificadores)
+            & (periodo >= inicio.year * 12 + inicio.month)
+            & (periodo <= fim.year * 12 + fim.month)
+        ]
+
+    if spec['serie'] == 'por_qualificador':
+        ramo['valores_ref'] = {} if selecao is None else {
+            (seq, mes): valor
+            for (seq, mes), valor in selecao.groupby(['seq_qualificador', 'mes'])['valor'].sum().items()
+        }
+        return
+
+    if selecao is None or selecao.empty:
+        ramo['dados'] = pd.DataFrame(columns=['data', 'valor'])
+        return
+    serie = selecao.groupby(['ano', 'mes'], as_index=False)['valor'].sum()
+    ramo['dados'] = pd.DataFrame({
+        'data': pd.to_datetime(pd.DataFrame({'year': serie['ano'], 'month': serie['mes'], 'day': 1})),
+        'valor': serie['valor'].astype(float),
+    }).sort_values('data').reset_index(drop=True)
+
+
+def preparar_ramos(ramos: List[Dict]) -> None:
+    """Anexa a todos os ramos o histórico carregado numa única query."""
+    plano = planejar_historico(ramos)
+    historico = carregar_historico(plano) if plano else None
+    for ramo in ramos:
+        _anexar_historico(ramo, historico)
+
+
+def chave_ramo(ramo: Dict) -> Tuple:
+    """Identidade de um ramo já com histórico anexado.
+
+    Dois ramos com a mesma chave produzem a mesma projeção (mesmo modelo,
+    configuração e série), então o resultado de um pode ser reaproveitado
+    pelo outro — ex.: cenários que só diferem na despesa.
+    """
+    spec = REGISTRO_MODELOS.get(ramo['tipo']) or {}
+    dados = ramo['dados']
+    serie = None
+    if dados is not None:
+        serie = tuple(zip(pd.to_datetime(dados['data']).dt.strftime('%Y-%m'), dados['valor'].astype(float)))
+    valores_ref = None
+    if ramo['valores_ref'] is not None:
+        valores_ref = tuple(sorted(ramo['valores_ref'].items()))
+    return (
+        ramo['tipo'],
+        ramo['tipo_fluxo'],
+        ramo['ano_base'],
+        ramo['meses_projecao'],
+        json.dumps(ramo['config'], sort_keys=True, default=str),
+        tuple(ramo['seq_qualificadores']),
+        tuple(ramo['anos_referencia']),
+        tuple((a.mes, a.seq_qualificador, a.cod_tipo_ajuste, float(a.val_ajuste or 0)) for a in ramo['ajustes']),
+        ramo['simulador'].get('seq_simulador_cenario') if spec.get('por_cenario') else None,
+        serie,
+        valores_ref,
+    )
+
+
+# ==================== Execução ====================
+
+def _projecao_vazia() -> pd.DataFrame:
+    return pd.DataFrame({'data': [], 'valor_projetado': []})
+
+
+def dados_suficientes(tipo: str, dados: Optional[pd.DataFrame]) -> bool:
+    """Se a série tem o mínimo de meses exigido pelo modelo."""
+    spec = REGISTRO_MODELOS.get(tipo)
+    if not spec or spec['serie'] != 'agregada':
+        return True
+    return dados is not None and len(dados) >= max(spec['min_meses'], 1)
+
+
+def executar_ramo(ramo: Dict, estrito: bool = False) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Projeta um ramo já com histórico anexado.
+
+    Args:
+        ramo: Ramo criado por `novo_ramo`/`montar_ramos_cenario`
+        estrito: Se True, tipo não suportado ou histórico insuficiente geram
+            ValueError (uso avulso); senão a projeção volta vazia (cenários)
+
+    Returns:
+        (projeção, projeção detalhada por qualificador ou None)
+    """
+    spec = REGISTRO_MODELOS.get(ramo['tipo'])
+    suportado = spec is not None and (spec['avulso'] if estrito else ramo['tipo_fluxo'] in spec['fluxos'])
+    if not suportado:
+        if estrito:
+            raise ValueError('Modelo não suportado para cálculo automático')
+        return _projecao_vazia(), None
+
+    if estrito and spec.get('exige_anos') and not ramo['anos_referencia']:
+        raise ValueError('Selecione pelo menos um ano na Base Histórica')
+
+    if not dados_suficientes(ramo['tipo'], ramo['dados']):
+        if not estrito:
+            return _projecao_vazia(), None
+        encontrados = 0 if ramo['dados'] is None else len(ramo['dados'])
+        if spec['min_meses'] <= 1:
+            raise ValueError('Não há dados históricos disponíveis')
+        raise ValueError(
+            f"Dados históricos insuficientes. Encontrados: {encontrados} meses, mínimo: {spec['min_meses']}"
+        )
+
+    projecao = spec['projetar'](ramo)
+    detalhada = projecao.copy() if spec['detalhado'] and len(projecao) > 0 else None
+    return projecao, detalhada
+
+
+def _executar_em_thread(ramo: Dict) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    try:
+        return executar_ramo(ramo)
+    finally:
+        # Sessão própria da thread (scoped_session), descartada ao final
+        db.session.remove()
+
+
+def executar_ramos(ramos: List[Dict], paralelo: bool = True) -> List[Tuple[pd.DataFrame, Optional[pd.DataFrame]]]:
+    """Carrega o histórico de todos os ramos de uma vez e projeta cada um.
+
+    Com `paralelo`, cada ramo roda numa thread (o ajuste dos modelos
+    estatísticos passa a maior parte do tempo em NumPy, fora do GIL).
+    """
+    preparar_ramos(ramos)
+
+    if paralelo and len(ramos) > 1:
+        with ThreadPoolExecutor(max_workers=len(ramos)) as executor:
+            return list(executor.map(_executar_em_thread, ramos))
+    return [executar_ramo(ramo) for ramo in ramos]
+
+
+def projetar_avulso(
+    tipo: str,
+    seq_qualificadores: List[int],
+    config: Dict,
+    ano_base: int,
+    meses_projecao: int = 12,
+    anos_referencia: Optional[List[int]] = None,
+) -> pd.DataFrame:
+    """Projeção sob demanda de um único modelo (sem cenário salvo).
+
+    Raises:
+        ValueError: Modelo não suportado ou histórico insuficiente
+    """
+    ramo = novo_ramo(
+        tipo=tipo,
+        ano_base=ano_base,
+        meses_projecao=meses_projecao,
+        config=config,
+        seq_qualificadores=seq_qualificadores,
+        anos_referencia=anos_referencia,
+    )
+    plano = planejar_historico([ramo])
+    _anexar_historico(ramo, carregar_historico(plano) if plano else None)
+    projecao, _ = executar_ramo(ramo, estrito=True)
+    return projecao
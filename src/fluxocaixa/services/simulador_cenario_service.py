@@ -1,11 +1,15 @@
 """Service layer for Simulador de Cenários."""
 
 from datetime import date
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import json
 
 from ..repositories import simulador_cenario_repository as repo
-from ..repositories.simulador_cenario_historico_repository import SimuladorCenarioHistoricoRepository
+from ..repositories.simulador_cenario_historico_repository import (
+    SimuladorCenarioHistoricoRepository,
+    montar_ajustes,
+    serializar_ajustes,
+)
 from ..models import (
     SimuladorCenario,
     CenarioReceita,
@@ -338,7 +342,7 @@ def criar_snapshot_cenario(seq_simulador_cenario: int, user_id: int = 1) -> Simu
     if not cenario_completo:
         raise ValueError(f"Cenário {seq_simulador_cenario} não encontrado")
     
-    # Serializar para JSON
+    # Cabeçalho em JSON; os ajustes vão em colunas tipadas (bin_ajustes)
     snapshot_data = {
         'simulador': {
             'seq_simulador_cenario': cenario_completo['simulador'].seq_simulador_cenario,
@@ -347,48 +351,27 @@ def criar_snapshot_cenario(seq_simulador_cenario: int, user_id: int = 1) -> Simu
             'ano_base': cenario_completo['simulador'].ano_base,
             'meses_projecao': cenario_completo['simulador'].meses_projecao,
         },
-        'receita': {
-            'config': {
-                'cod_tipo_cenario': cenario_completo['receita']['config'].cod_tipo_cenario if cenario_completo['receita'].get('config') else None,
-                'json_configuracao': cenario_completo['receita']['config'].json_configuracao if cenario_completo['receita'].get('config') else None,
-            },
-            'ajustes': [
-                {
-                    'seq_qualificador': a.seq_qualificador,
-                    'ano': a.ano,
-                    'mes': a.mes,
-                    'cod_tipo_ajuste': a.cod_tipo_ajuste,
-                    'val_ajuste': float(a.val_ajuste) if a.val_ajuste else 0
-                }
-                for a in cenario_completo['receita'].get('ajustes', [])
-            ]
-        },
-        'despesa': {
+    }
+    ajustes = {}
+    for fluxo in ('receita', 'despesa'):
+        config = cenario_completo[fluxo].get('config')
+        snapshot_data[fluxo] = {
             'config': {
-                'cod_tipo_cenario': cenario_completo['despesa']['config'].cod_tipo_cenario if cenario_completo['despesa'].get('config') else None,
-                'json_configuracao': cenario_completo['despesa']['config'].json_configuracao if cenario_completo['despesa'].get('config') else None,
+                'cod_tipo_cenario': config.cod_tipo_cenario if config else None,
+                'json_configuracao': config.json_configuracao if config else None,
             },
-            'ajustes': [
-                {
-                    'seq_qualificador': a.seq_qualificador,
-                    'ano': a.ano,
-                    'mes': a.mes,
-                    'cod_tipo_ajuste': a.cod_tipo_ajuste,
-                    'val_ajuste': float(a.val_ajuste) if a.val_ajuste else 0
-                }
-                for a in cenario_completo['despesa'].get('ajustes', [])
-            ]
         }
-    }
-    
+        ajustes[fluxo] = montar_ajustes(cenario_completo[fluxo].get('ajustes', []))
+
     # Criar snapshot
     historico_repo = SimuladorCenarioHistoricoRepository()
     snapshot = SimuladorCenarioHistorico(
         seq_simulador_cenario=seq_simulador_cenario,
         cod_pessoa_snapshot=user_id,
-        json_snapshot=json.dumps(snapshot_data)
+        json_snapshot=json.dumps(snapshot_data),
+        bin_ajustes=serializar_ajustes(ajustes),
     )
-    
+
     return historico_repo.create_snapshot(snapshot)
 
 
@@ -401,13 +384,15 @@ def get_versao_inicial_cenario(seq_simulador_cenario: int, ano: Optional[int] =
         ano: Ano para filtrar snapshots (opcional)
     
     Returns:
-        Dicionário com dados do cenário ou None
+        Dicionário com dados do cenário ou None. Do snapshot, os ajustes
+        vêm como array `AJUSTE_DTYPE` e o dict vem do cache (não alterar);
+        do cenário atual, como objetos ORM
     """
     historico_repo = SimuladorCenarioHistoricoRepository()
-    primeiro_snapshot = historico_repo.get_primeiro_snapshot(seq_simulador_cenario, ano)
+    ref = historico_repo.get_snapshot_ref(seq_simulador_cenario, ano)
     
-    if primeiro_snapshot:
-        return json.loads(primeiro_snapshot.json_snapshot)
+    if ref:
+        return historico_repo.get_snapshot_decodificado(ref.seq_historico, ref.dat_snapshot)
     
     # Fallback: usar cenário atual
     return obter_simulador_completo(seq_simulador_cenario)
@@ -422,13 +407,15 @@ def get_versao_final_cenario(seq_simulador_cenario: int, ano: Optional[int] = No
         ano: Ano para filtrar snapshots (opcional)
     
     Returns:
-        Dicionário com dados do cenário ou None
+        Dicionário com dados do cenário ou None. Do snapshot, os ajustes
+        vêm como array `AJUSTE_DTYPE` e o dict vem do cache (não alterar);
+        do cenário atual, como objetos ORM
     """
     historico_repo = SimuladorCenarioHistoricoRepository()
-    ultimo_snapshot = historico_repo.get_ultimo_snapshot(seq_simulador_cenario, ano)
+    ref = historico_repo.get_snapshot_ref(seq_simulador_cenario, ano, ultimo=True)
     
-    if ultimo_snapshot:
-        return json.loads(ultimo_snapshot.json_snapshot)
+    if ref:
+        return historico_repo.get_snapshot_decodificado(ref.seq_historico, ref.dat_snapshot)
     
     # Fallback: usar cenário atual
     return obter_simulador_completo(seq_simulador_cenario)
@@ -457,306 +444,42 @@ def executar_simulacao(seq_simulador_cenario: int) -> Optional[Dict]:
             }
         }
     """
-    from . import modelos_economicos_service as modelos
-    from datetime import date
-    from dateutil.relativedelta import relativedelta
-    import pandas as pd
-    
+    from .simulacao_pipeline import executar_ramos, montar_ramos_cenario
+
     # Carregar cenário completo
     cenario_completo = obter_simulador_completo(seq_simulador_cenario)
     if not cenario_completo:
         return None
-    
+
     simulador = cenario_completo['simulador']
-    ano_base = simulador.ano_base
-    meses_projecao = simulador.meses_projecao
-    
-    # ==================== Projeção de Receita ====================
-    
-    config_receita = cenario_completo['receita'].get('config')
-    tipo_receita = config_receita.cod_tipo_cenario if config_receita else 'MANUAL'
-    
-    if tipo_receita == 'MANUAL':
-        # Usar ajustes manuais
-        projecao_receita = _executar_cenario_manual_receita(
-            cenario_completo['receita'].get('ajustes', []),
-            ano_base,
-            meses_projecao
-        )
-        projecao_receita_detalhada = projecao_receita.copy()  # Guardar versão detalhada
-    elif tipo_receita == 'HOLT_WINTERS':
-        config = json.loads(config_receita.json_configuracao or '{}')
-        seq_qualificador = config.get('seq_qualificador')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        
-        # Obter dados históricos
-        data_fim = date(ano_base - 1, 12, 31)  # Dados até o ano anterior
-        data_inicio = data_fim - relativedelta(years=3)  # 3 anos de histórico
-        
-        if seq_qualificadores and len(seq_qualificadores) > 1:
-            dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-        elif seq_qualificador:
-            dados_hist = modelos.obter_dados_historicos(seq_qualificador, data_inicio, data_fim)
-        else:
-            dados_hist = pd.DataFrame(columns=['data', 'valor'])
-        
-        if len(dados_hist) >= 12:
-            projecao_receita = modelos.projetar_holt_winters(dados_hist, meses_projecao, config, ano_base)
-        else:
-            projecao_receita = pd.DataFrame({'data': [], 'valor_projetado': []})
-        projecao_receita_detalhada = None
-        
-    elif tipo_receita == 'ARIMA':
-        config = json.loads(config_receita.json_configuracao or '{}')
-        seq_qualificador = config.get('seq_qualificador')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        
-        data_fim = date(ano_base - 1, 12, 31)
-        data_inicio = data_fim - relativedelta(years=3)
-        
-        if seq_qualificadores and len(seq_qualificadores) > 1:
-            dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-        elif seq_qualificador:
-            dados_hist = modelos.obter_dados_historicos(seq_qualificador, data_inicio, data_fim)
-        else:
-            dados_hist = pd.DataFrame(columns=['data', 'valor'])
-        
-        if len(dados_hist) >= 12:
-            projecao_receita = modelos.projetar_arima(dados_hist, meses_projecao, config, ano_base)
-        else:
-            projecao_receita = pd.DataFrame({'data': [], 'valor_projetado': []})
-        projecao_receita_detalhada = None
-        
-    elif tipo_receita == 'SARIMA':
-        config = json.loads(config_receita.json_configuracao or '{}')
-        seq_qualificador = config.get('seq_qualificador')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        
-        data_fim = date(ano_base - 1, 12, 31)
-        data_inicio = data_fim - relativedelta(years=4)  # 4 anos para SARIMA
-        
-        if seq_qualificadores and len(seq_qualificadores) > 1:
-            dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-        elif seq_qualificador:
-            dados_hist = modelos.obter_dados_historicos(seq_qualificador, data_inicio, data_fim)
-        else:
-            dados_hist = pd.DataFrame(columns=['data', 'valor'])
-        
-        if len(dados_hist) >= 12:
-            projecao_receita = modelos.projetar_sarima(dados_hist, meses_projecao, config, ano_base)
-        else:
-            projecao_receita = pd.DataFrame({'data': [], 'valor_projetado': []})
-        projecao_receita_detalhada = None
-        
-    elif tipo_receita == 'REGRESSAO':
-        config = json.loads(config_receita.json_configuracao or '{}')
-        projecao_receita = modelos.projetar_regressao_multipla(meses_projecao, config, ano_base)
-        projecao_receita_detalhada = None
-    
-    elif tipo_receita == 'XGBOOST':
-        config = json.loads(config_receita.json_configuracao or '{}')
-        seq_qualificador = config.get('seq_qualificador')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        
-        data_fim = date(ano_base - 1, 12, 31)
-        data_inicio = data_fim - relativedelta(years=3)
-        
-        if seq_qualificadores and len(seq_qualificadores) > 1:
-            dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-        elif seq_qualificador:
-            dados_hist = modelos.obter_dados_historicos(seq_qualificador, data_inicio, data_fim)
-        else:
-            dados_hist = pd.DataFrame(columns=['data', 'valor'])
-        
-        if len(dados_hist) >= 13:
-            projecao_receita = modelos.projetar_xgboost(dados_hist, meses_projecao, config, ano_base)
-        else:
-            projecao_receita = pd.DataFrame({'data': [], 'valor_projetado': []})
-        projecao_receita_detalhada = None
-        
-    elif tipo_receita == 'LIGHTGBM':
-        config = json.loads(config_receita.json_configuracao or '{}')
-        seq_qualificador = config.get('seq_qualificador')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        
-        data_fim = date(ano_base - 1, 12, 31)
-        data_inicio = data_fim - relativedelta(years=3)
-        
-        if seq_qualificadores and len(seq_qualificadores) > 1:
-            dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-        elif seq_qualificador:
-            dados_hist = modelos.obter_dados_historicos(seq_qualificador, data_inicio, data_fim)
-        else:
-            dados_hist = pd.DataFrame(columns=['data', 'valor'])
-        
-        if len(dados_hist) >= 13:
-            projecao_receita = modelos.projetar_lightgbm(dados_hist, meses_projecao, config, ano_base)
-        else:
-            projecao_receita = pd.DataFrame({'data': [], 'valor_projetado': []})
-        projecao_receita_detalhada = None
-
-    elif tipo_receita == 'FORMULA':
-        from .formula_engine import projetar_cenario_formula
-        config_base_dict = {}
-        if simulador.json_config_base:
-            try:
-                config_base_dict = json.loads(simulador.json_config_base)
-            except (json.JSONDecodeError, TypeError):
-                pass
-        projecao_receita = projetar_cenario_formula(
-            seq_simulador_cenario=simulador.seq_simulador_cenario,
-            ano_base=ano_base,
-            periodos=meses_projecao,
-            tipo_fluxo='receita',
-            periodicidade=simulador.cod_periodicidade or 'ANUAL',
-            metodo_base=simulador.cod_metodo_base or 'MEDIA_SIMPLES',
-            config_base=config_base_dict,
-        )
-        projecao_receita_detalhada = projecao_receita.copy() if len(projecao_receita) > 0 else None
-
-    elif tipo_receita == 'CRESCIMENTO_ANO':
-        from .formula_engine import projetar_crescimento_ultimo_ano
-        config = json.loads(config_receita.json_configuracao or '{}')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        mes_referencia = config.get('mes_referencia', 6)
-        config_base = json.loads(simulador.json_config_base or '{}')
-        anos = config_base.get('anos', [])
-        ano_ref = max(anos) if anos else ano_base - 1
-        
-        projecao_receita = projetar_crescimento_ultimo_ano(
-            seq_qualificadores=seq_qualificadores,
-            ano_projecao=ano_base,
-            ano_referencia=ano_ref,
-            mes_referencia=mes_referencia,
-            meses_projecao=meses_projecao,
-        )
-        projecao_receita_detalhada = projecao_receita.copy() if len(projecao_receita) > 0 else None
-
-    elif tipo_receita == 'MEDIA_CRESCIMENTO':
-        from .formula_engine import projetar_media_crescimento_anos
-        config = json.loads(config_receita.json_configuracao or '{}')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        mes_referencia = config.get('mes_referencia', 6)
-        config_base = json.loads(simulador.json_config_base or '{}')
-        anos = config_base.get('anos', [])
-        
-        projecao_receita = projetar_media_crescimento_anos(
-            seq_qualificadores=seq_qualificadores,
-            ano_projecao=ano_base,
-            anos_referencia=anos,
-            mes_referencia=mes_referencia,
-            meses_projecao=meses_projecao,
-        )
-        projecao_receita_detalhada = projecao_receita.copy() if len(projecao_receita) > 0 else None
 
-    else:
-        # Fallback: cenário vazio
-        projecao_receita = pd.DataFrame({
-            'data': [],
-            'valor_projetado': []
-        })
-        projecao_receita_detalhada = None
-    
-    # ==================== Projeção de Despesa ====================
-    
-    config_despesa = cenario_completo['despesa'].get('config')
-    tipo_despesa = config_despesa.cod_tipo_cenario if config_despesa else 'MANUAL'
-    
-    if tipo_despesa == 'MANUAL':
-        # Usar ajustes manuais
-        projecao_despesa = _executar_cenario_manual_despesa(
-            cenario_completo['despesa'].get('ajustes', []),
-            ano_base,
-            meses_projecao
-        )
-        projecao_despesa_detalhada = projecao_despesa.copy()  # Guardar versão detalhada
-    elif tipo_despesa == 'LOA':
-        config = json.loads(config_despesa.json_configuracao or '{}')
-        projecao_despesa = modelos.projetar_loa(meses_projecao, config)
-        projecao_despesa_detalhada = None
-        
-    elif tipo_despesa == 'MEDIA_HISTORICA':
-        config = json.loads(config_despesa.json_configuracao or '{}')
-        seq_qualificador = config.get('seq_qualificador')
-        seq_qualificadores = config.get('seq_qualificadores', [])
-        
-        data_fim = date(ano_base - 1, 12, 31)
-        data_inicio = data_fim - relativedelta(years=3)
-        
-        if seq_qualificadores and len(seq_qualificadores) > 1:
-            dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-        elif seq_qualificador:
-            dados_hist = modelos.obter_dados_historicos(seq_qualificador, data_inicio, data_fim)
-        else:
-            dados_hist = pd.DataFrame(columns=['data', 'valor'])
-        
-        if len(dados_hist) > 0:
-            projecao_despesa = modelos.projetar_media_historica(dados_hist, meses_projecao, config, ano_base)
-        else:
-            projecao_despesa = pd.DataFrame({'data': [], 'valor_projetado': []})
-        projecao_despesa_detalhada = None
-    elif tipo_despesa == 'FORMULA':
-        from .formula_engine import projetar_cenario_formula
-        config_base_dict_d = {}
-        if simulador.json_config_base:
-            try:
-                config_base_dict_d = json.loads(simulador.json_config_base)
-            except (json.JSONDecodeError, TypeError):
-                pass
-        projecao_despesa = projetar_cenario_formula(
-            seq_simulador_cenario=simulador.seq_simulador_cenario,
-            ano_base=ano_base,
-            periodos=meses_projecao,
-            tipo_fluxo='despesa',
-            periodicidade=simulador.cod_periodicidade or 'ANUAL',
-            metodo_base=simulador.cod_metodo_base or 'MEDIA_SIMPLES',
-            config_base=config_base_dict_d,
-        )
-        projecao_despesa_detalhada = projecao_despesa.copy() if len(projecao_despesa) > 0 else None
-
-    elif tipo_despesa == 'CRESCIMENTO_ANO':
-        from .formula_engine import projetar_crescimento_ultimo_ano
-        config_d = json.loads(config_despesa.json_configuracao or '{}')
-        seq_qualificadores_d = config_d.get('seq_qualificadores', [])
-        mes_referencia_d = config_d.get('mes_referencia', 6)
-        config_base_d = json.loads(simulador.json_config_base or '{}')
-        anos_d = config_base_d.get('anos', [])
-        ano_ref_d = max(anos_d) if anos_d else ano_base - 1
-        
-        projecao_despesa = projetar_crescimento_ultimo_ano(
-            seq_qualificadores=seq_qualificadores_d,
-            ano_projecao=ano_base,
-            ano_referencia=ano_ref_d,
-            mes_referencia=mes_referencia_d,
-            meses_projecao=meses_projecao,
-        )
-        projecao_despesa_detalhada = projecao_despesa.copy() if len(projecao_despesa) > 0 else None
-
-    elif tipo_despesa == 'MEDIA_CRESCIMENTO':
-        from .formula_engine import projetar_media_crescimento_anos
-        config_d = json.loads(config_despesa.json_configuracao or '{}')
-        seq_qualificadores_d = config_d.get('seq_qualificadores', [])
-        mes_referencia_d = config_d.get('mes_referencia', 6)
-        config_base_d = json.loads(simulador.json_config_base or '{}')
-        anos_d = config_base_d.get('anos', [])
-        
-        projecao_despesa = projetar_media_crescimento_anos(
-            seq_qualificadores=seq_qualificadores_d,
-            ano_projecao=ano_base,
-            anos_referencia=anos_d,
-            mes_referencia=mes_referencia_d,
-            meses_projecao=meses_projecao,
-        )
-        projecao_despesa_detalhada = projecao_despesa.copy() if len(projecao_despesa) > 0 else None
+    # ==================== Projeções de Receita e Despesa ====================
+    # Histórico dos dois ramos numa única query; ramos projetados em paralelo
+
+    ramo_receita, ramo_despesa = montar_ramos_cenario(cenario_completo)
+    (
+        (projecao_receita, projecao_receita_detalhada),
+        (projecao_despesa, projecao_despesa_detalhada),
+    ) = executar_ramos([ramo_receita, ramo_despesa])
+
+    return montar_resultado_simulacao(
+        simulador,
+        (projecao_receita, projecao_receita_detalhada),
+        (projecao_despesa, projecao_despesa_detalhada),
+    )
+
+
+def montar_resultado_simulacao(simulador, receita: Tuple, despesa: Tuple) -> Dict:
+    """Monta o resultado de `executar_simulacao` a partir das projeções.
+
+    Args:
+        simulador: SimuladorCenario
+        receita: (projeção, projeção detalhada ou None) do ramo de receita
+        despesa: (projeção, projeção detalhada ou None) do ramo de despesa
+    """
+    projecao_receita, projecao_receita_detalhada = receita
+    projecao_despesa, projecao_despesa_detalhada = despesa
 
-    else:
-        # Fallback
-        projecao_despesa = pd.DataFrame({
-            'data': [],
-            'valor_projetado': []
-        })
-        projecao_despesa_detalhada = None
-    
     # ==================== Cenário Total ====================
     
     cenario_total = _calcular_cenario_total(projecao_receita, projecao_despesa)
@@ -781,8 +504,17 @@ def executar_simulacao(seq_simulador_cenario: int) -> Optional[Dict]:
     }
 
 
-def _executar_cenario_manual_receita(ajustes: List, ano_base: int, meses_projecao: int) -> 'pd.DataFrame':
-    """Helper para executar cenário manual de receita baseado em ajustes."""
+def _executar_cenario_manual_receita(
+    ajustes: List,
+    ano_base: int,
+    meses_projecao: int,
+    valores_ref: Optional[Dict] = None,
+) -> 'pd.DataFrame':
+    """Helper para executar cenário manual de receita baseado em ajustes.
+
+    `valores_ref` ({(seq_qualificador, mes): valor} do ano anterior) vem
+    pré-carregado pelo pipeline de simulação; sem ele, é consultado aqui.
+    """
     import pandas as pd
     from dateutil.relativedelta import relativedelta
     from datetime import date
@@ -807,9 +539,8 @@ def _executar_cenario_manual_receita(ajustes: List, ano_base: int, meses_projeca
     ano_ref = ano_base - 1
     data_inicio_ref = date(ano_ref, 1, 1)
     data_fim_ref = date(ano_ref, 12, 31)
-    valores_ref = {} # (seq, mes) -> valor
-    
-    if qualificadores:
+    if valores_ref is None and qualificadores:
+        valores_ref = {}  # (seq, mes) -> valor
         # Otimização: buscar dados apenas se houver ajustes percentuais?
         # Por simplicidade, buscamos para todos os qualificadores envolvidos
         for seq in qualificadores:
@@ -850,8 +581,17 @@ def _executar_cenario_manual_receita(ajustes: List, ano_base: int, meses_projeca
     return pd.DataFrame(records)
 
 
-def _executar_cenario_manual_despesa(ajustes: List, ano_base: int, meses_projecao: int) -> 'pd.DataFrame':
-    """Helper para executar cenário manual de despesa baseado em ajustes."""
+def _executar_cenario_manual_despesa(
+    ajustes: List,
+    ano_base: int,
+    meses_projecao: int,
+    valores_ref: Optional[Dict] = None,
+) -> 'pd.DataFrame':
+    """Helper para executar cenário manual de despesa baseado em ajustes.
+
+    `valores_ref` ({(seq_qualificador, mes): valor} do ano anterior) vem
+    pré-carregado pelo pipeline de simulação; sem ele, é consultado aqui.
+    """
     import pandas as pd
     from dateutil.relativedelta import relativedelta
     from datetime import date
@@ -876,9 +616,8 @@ def _executar_cenario_manual_despesa(ajustes: List, ano_base: int, meses_projeca
     ano_ref = ano_base - 1
     data_inicio_ref = date(ano_ref, 1, 1)
     data_fim_ref = date(ano_ref, 12, 31)
-    valores_ref = {} # (seq, mes) -> valor
-    
-    if qualificadores:
+    if valores_ref is None and qualificadores:
+        valores_ref = {}  # (seq, mes) -> valor
         for seq in qualificadores:
             df_hist = modelos.obter_dados_historicos(seq, data_inicio_ref, data_fim_ref)
             for _, row in df_hist.iterrows():
@@ -1,9 +1,10 @@
 from datetime import date, datetime
+from typing import Optional
 import calendar
 import csv
 
 from fastapi import Request, UploadFile, File
-from fastapi.responses import RedirectResponse, StreamingResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, StreamingResponse, HTMLResponse, JSONResponse
 from io import BytesIO, StringIO
 import openpyxl
 from sqlalchemy import func
@@ -19,12 +20,18 @@ from ..services import (
     list_tipos_lancamento,
     list_origens_lancamento,
     list_contas_bancarias,
-    list_active_qualificadores,
+    list_qualificadores_folha_opcoes,
+    invalidate_qualificadores_cache,
+    get_page_cursors,
     list_conferencias,
     list_alertas_ativos,
 )
+from ..services.exportacao_service import COLUNAS_LANCAMENTOS, lotes_lancamentos, validar_formato
+from ..repositories import LancamentoRepository
+from ..repositories import lancamento_arquivo_repository as arquivo_repo
 from ..models import db
 from ..services.seed import seed_data
+from .exportacao import resposta_exportacao
 
 @router.get('/')
 @handle_exceptions
@@ -46,7 +53,11 @@ async def init_db():
         db.create_all()
         from ..models.alerta import ensure_alerta_schema
         ensure_alerta_schema()
-        seed_data()
+        semeado = seed_data()
+        invalidate_qualificadores_cache()
+        LancamentoRepository.invalidate_count_cache()
+        if not semeado:
+            return "Database kept: it has closed months or archived years (see /recreate-db)"
         return "Database initialized successfully!"
     except Exception as e:
         return f"Error initializing database: {str(e)}"
@@ -59,9 +70,13 @@ async def recreate_db():
     try:
         db.drop_all()
         db.create_all()
+        # Meses fechados e anos arquivados saíram com as tabelas
+        arquivo_repo.invalidar_cache()
         from ..models.alerta import ensure_alerta_schema
         ensure_alerta_schema()
         seed_data()
+        invalidate_qualificadores_cache()
+        LancamentoRepository.invalidate_count_cache()
         return "Database recreated successfully!"
     except Exception as e:
         return f"Error recreating database: {str(e)}"
@@ -81,6 +96,8 @@ async def saldos(request: Request):
     per_page = 50
     sort_by = 'dat_lancamento'
     sort_order = 'desc'
+    cursor = None
+    direction = 'next'
 
     if request.method == 'POST':
         form = await request.form()
@@ -93,6 +110,8 @@ async def saldos(request: Request):
         page_str = form.get('page')
         sort_by = form.get('sort_by', 'dat_lancamento')
         sort_order = form.get('sort_order', 'desc')
+        cursor = form.get('cursor') or None
+        direction = form.get('direction') or 'next'
 
         if sd_str and ed_str:
             start_date = date.fromisoformat(sd_str)
@@ -130,16 +149,19 @@ async def saldos(request: Request):
         page=page,
         per_page=per_page,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        cursor=cursor,
+        direction=direction,
     )
 
     total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
+    page = min(max(page, 1), total_pages)
+    cursor_first, cursor_last = get_page_cursors(lancamentos, sort_by)
 
     tipos = list_tipos_lancamento()
     origens = list_origens_lancamento()
-    # Buscar apenas qualificadores folha (que não possuem filhos ativos)
-    qualificadores = list_active_qualificadores()
-    qualificadores_folha = [q for q in qualificadores if q.is_folha()]
+    # Apenas qualificadores folha (que não possuem filhos ativos), em cache
+    qualificadores_folha = list_qualificadores_folha_opcoes()
     contas = list_contas_bancarias()
 
     # Obter código da origem "Manual" para inserção automática
@@ -153,7 +175,6 @@ async def saldos(request: Request):
             'lancamentos': lancamentos,
             'tipos': tipos,
             'origens': origens,
-            'qualificadores': qualificadores,
             'qualificadores_folha': qualificadores_folha,
             'contas': contas,
             'page': page,
@@ -162,6 +183,8 @@ async def saldos(request: Request):
             'total_pages': total_pages,
             'sort_by': sort_by,
             'sort_order': sort_order,
+            'cursor_first': cursor_first,
+            'cursor_last': cursor_last,
             'cod_origem_manual': cod_origem_manual,
             'filtros': {
                 'start_date': start_date.isoformat() if start_date else '',
@@ -176,6 +199,33 @@ async def saldos(request: Request):
 
 
 
+@router.get('/saldos/exportar', name='exportar_lancamentos')
+@handle_exceptions
+async def exportar_lancamentos(
+    formato: str = 'csv',
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    tipo: Optional[str] = None,
+    qualificador_folha: Optional[str] = None,
+    seq_conta: Optional[str] = None,
+    cod_origem: Optional[str] = None,
+):
+    """Exporta os lançamentos filtrados (mesmos filtros de /saldos) em streaming."""
+    try:
+        formato = validar_formato(formato)
+        lotes = lotes_lancamentos(
+            start_date=date.fromisoformat(start_date) if start_date and end_date else None,
+            end_date=date.fromisoformat(end_date) if start_date and end_date else None,
+            tipo=int(tipo) if tipo else None,
+            qualificador_folha=int(qualificador_folha) if qualificador_folha else None,
+            seq_conta=int(seq_conta) if seq_conta else None,
+            cod_origem=int(cod_origem) if cod_origem else None,
+        )
+    except ValueError as exc:
+        return JSONResponse({'error': str(exc)}, status_code=400)
+    return resposta_exportacao(formato, 'lancamentos', COLUNAS_LANCAMENTOS, lotes)
+
+
 @router.post('/saldos/add', name='add_lancamento')
 @handle_exceptions
 async def add_lancamento(request: Request):
@@ -188,7 +238,12 @@ async def add_lancamento(request: Request):
         cod_origem_lancamento=int(form['cod_origem_lancamento']),
         seq_conta=int(form.get('seq_conta')) if form.get('seq_conta') else None,
     )
-    create_lancamento(data)
+    try:
+        create_lancamento(data)
+    except ValueError as exc:
+        # Mês fechado (ver services/fechamento_service.py)
+        db.session.rollback()
+        return JSONResponse({'error': str(exc)}, status_code=400)
     return RedirectResponse(request.url_for('saldos'), status_code=303)
 
 
@@ -245,14 +300,24 @@ async def edit_lancamento_route(request: Request, seq_lancamento: int):
         cod_origem_lancamento=int(form['cod_origem_lancamento']),
     seq_conta=int(form.get('seq_conta')) if form.get('seq_conta') else None,
     )
-    update_lancamento(seq_lancamento, data)
+    try:
+        update_lancamento(seq_lancamento, data)
+    except ValueError as exc:
+        # Mês fechado (ver services/fechamento_service.py)
+        db.session.rollback()
+        return JSONResponse({'error': str(exc)}, status_code=400)
     return RedirectResponse(request.url_for('saldos'), status_code=303)
 
 
 @router.post('/saldos/delete/{seq_lancamento}', name='delete_lancamento')
 @handle_exceptions
 async def delete_lancamento_route(request: Request, seq_lancamento: int):
-    delete_lancamento(seq_lancamento)
+    try:
+        delete_lancamento(seq_lancamento)
+    except ValueError as exc:
+        # Mês fechado (ver services/fechamento_service.py)
+        db.session.rollback()
+        return JSONResponse({'error': str(exc)}, status_code=400)
     return RedirectResponse(request.url_for('saldos'), status_code=303)
 
 
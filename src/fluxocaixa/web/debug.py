@@ -0,0 +1,28 @@
+"""Rota local de diagnóstico de desempenho (instrumentação de SQL)."""
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from . import router, handle_exceptions
+from ..config import Config
+from ..models import instrumentacao
+
+_CLIENTES_LOCAIS = ('127.0.0.1', '::1', 'localhost', 'testclient')
+# Requisições repassadas por um proxy chegam de um endereço local
+_CABECALHOS_PROXY = ('forwarded', 'x-forwarded-for', 'x-forwarded-host', 'x-real-ip')
+
+
+@router.get('/_debug/perf')
+@handle_exceptions
+async def debug_perf(request: Request, limite: int = 50, limpar: bool = False):
+    """Estatísticas de SQL por requisição e por função (PERF_SQL=1 e PERF_SQL_DEBUG=1, só acesso local)."""
+    if not (Config.PERF_SQL and Config.PERF_SQL_DEBUG):
+        raise HTTPException(status_code=404, detail='Diagnóstico desativado (PERF_SQL e PERF_SQL_DEBUG)')
+    if any(cabecalho in request.headers for cabecalho in _CABECALHOS_PROXY):
+        raise HTTPException(status_code=403, detail='Disponível apenas localmente')
+    # Sem endereço do cliente: socket Unix ou cliente em processo
+    if request.client is not None and request.client.host not in _CLIENTES_LOCAIS:
+        raise HTTPException(status_code=403, detail='Disponível apenas localmente')
+    dados = instrumentacao.resumo(limite)
+    if limpar:
+        instrumentacao.limpar()
+    return JSONResponse(dados)
@@ -0,0 +1,21 @@
+"""Resposta HTTP comum às rotas de exportação (CSV/Parquet em streaming)."""
+from datetime import date
+from typing import Iterable, Sequence
+
+from fastapi.responses import StreamingResponse
+
+from ..services.exportacao_service import FORMATOS, gerar_arquivo
+
+
+def resposta_exportacao(formato: str, nome: str, colunas, lotes: Iterable[Sequence]) -> StreamingResponse:
+    """StreamingResponse com o arquivo gerado lote a lote.
+
+    `formato` já deve ter passado por `validar_formato`.
+    """
+    media_type, extensao = FORMATOS[formato]
+    arquivo = f"{nome}_{date.today().isoformat()}.{extensao}"
+    return StreamingResponse(
+        gerar_arquivo(formato, colunas, lotes),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{arquivo}"'},
+    )
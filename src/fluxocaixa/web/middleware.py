@@ -0,0 +1,75 @@
+"""ASGI middleware of the web layer."""
+from ..config import Config
+from ..models import instrumentacao
+from ..models.base import engine, engine_leitura, escopo_sessao
+from ..repositories import colunas_mapeadas_repository, revisao_repository
+
+
+class SessaoPorRequisicaoMiddleware:
+    """Open a `SessionLocal` scope per request and remove it at the end.
+
+    Before that, drops the caches of data another worker changed
+    (`revisao_repository.verificar`, one primary-key lookup) and maps a new
+    generation of the shared column files, if another worker published one
+    (`colunas_mapeadas_repository.acompanhar`, one `stat`).
+
+    Pure ASGI (not `BaseHTTPMiddleware`) so the endpoint runs in the same
+    context as the scope, and the session is only removed after the whole
+    response body has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] not in ('http', 'websocket'):
+            await self.app(scope, receive, send)
+            return
+        if not scope['path'].startswith('/static'):
+            revisao_repository.verificar()
+        colunas_mapeadas_repository.acompanhar()
+        with escopo_sessao():
+            await self.app(scope, receive, send)
+
+
+class InstrumentacaoSqlMiddleware:
+    """Measure the SQL of each request while `Config.PERF_SQL` is on.
+
+    Adds `X-DB-Queries`, `X-DB-Time-Ms` and `Server-Timing` to the response
+    (statements issued while a streaming body is sent are only counted in
+    `/_debug/perf`). Requests are grouped by route template, e.g.
+    `GET /simulador/{seq_simulador_cenario}`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not Config.PERF_SQL
+            or scope['type'] != 'http'
+            or scope['path'].startswith(('/static', '/_debug'))
+        ):
+            await self.app(scope, receive, send)
+            return
+        instrumentacao.instalar(engine, engine_leitura)
+
+        with instrumentacao.medir_requisicao(f"{scope['method']} {scope['path']}") as medicao:
+            async def enviar(mensagem):
+                if mensagem['type'] == 'http.response.start':
+                    tempo = medicao['tempo_ms']
+                    cabecalhos = list(mensagem.get('headers', []))
+                    cabecalhos += [
+                        (b'x-db-queries', str(medicao['consultas']).encode()),
+                        (b'x-db-time-ms', f'{tempo:.1f}'.encode()),
+                        (b'server-timing', f'db;dur={tempo:.1f};desc="{medicao["consultas"]} queries"'.encode()),
+                    ]
+                    mensagem = {**mensagem, 'headers': cabecalhos}
+                await send(mensagem)
+
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                rota = scope.get('route')
+                if rota is not None and hasattr(rota, 'path'):
+                    medicao['rota'] = f"{scope['method']} {rota.path}"
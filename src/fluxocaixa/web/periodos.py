@@ -0,0 +1,61 @@
+"""Endpoints de fechamento de períodos de flc_lancamento."""
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from . import router, handle_exceptions
+from ..services import fechamento_service
+
+
+def _data(valor):
+    return valor.isoformat() if valor is not None else None
+
+
+@router.get('/api/periodos-fechados')
+@handle_exceptions
+async def periodos_fechados_listar():
+    """Meses fechados e a data até a qual os lançamentos estão congelados."""
+    periodos = fechamento_service.listar_periodos_fechados()
+    for periodo in periodos:
+        periodo['dat_fechamento'] = _data(periodo['dat_fechamento'])
+    return JSONResponse({
+        'fechado_ate': _data(fechamento_service.fechado_ate()),
+        'periodos': periodos,
+    })
+
+
+async def _mes_do_form(request: Request):
+    form = await request.form()
+    try:
+        return int(form.get('ano', '')), int(form.get('mes', ''))
+    except ValueError:
+        return None
+
+
+@router.post('/api/periodos-fechados')
+@handle_exceptions
+async def periodos_fechados_fechar(request: Request):
+    """Fecha todos os meses abertos até ano/mes."""
+    mes = await _mes_do_form(request)
+    if mes is None:
+        return JSONResponse({'error': 'ano e mes são obrigatórios'}, status_code=400)
+    try:
+        resultado = fechamento_service.fechar_periodo(*mes)
+    except ValueError as exc:
+        return JSONResponse({'error': str(exc)}, status_code=400)
+    resultado['fechado_ate'] = _data(resultado['fechado_ate'])
+    return JSONResponse(resultado)
+
+
+@router.post('/api/periodos-fechados/reabrir')
+@handle_exceptions
+async def periodos_fechados_reabrir(request: Request):
+    """Reabre ano/mes e todos os meses fechados posteriores."""
+    mes = await _mes_do_form(request)
+    if mes is None:
+        return JSONResponse({'error': 'ano e mes são obrigatórios'}, status_code=400)
+    try:
+        resultado = fechamento_service.reabrir_periodo(*mes)
+    except ValueError as exc:
+        return JSONResponse({'error': str(exc)}, status_code=400)
+    resultado['fechado_ate'] = _data(resultado['fechado_ate'])
+    return JSONResponse(resultado)
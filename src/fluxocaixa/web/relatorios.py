@@ -285,8 +285,11 @@ async def relatorio_analise_comparativa(request: Request):
         anos_disponiveis[1] if len(anos_disponiveis) > 1 else (date.today().year - 1)
     )
     ano2_default = anos_disponiveis[0] if anos_disponiveis else date.today().year
-    ano1 = int(form.get("ano1", ano1_default))
-    ano2 = int(form.get("ano2", ano2_default))
+    anos_str = form.getlist("anos") if hasattr(form, "getlist") else []
+    if anos_str:
+        anos = sorted({int(a) for a in anos_str})
+    else:
+        anos = [int(form.get("ano1", ano1_default)), int(form.get("ano2", ano2_default))]
     meses_selecionados_str = form.getlist("meses") if hasattr(form, "getlist") else []
     meses_selecionados = (
         list(range(1, 13))
@@ -294,7 +297,7 @@ async def relatorio_analise_comparativa(request: Request):
         else [int(m) for m in meses_selecionados_str]
     )
     
-    data = get_analise_comparativa_data(ano1, ano2, meses_selecionados, tipo_analise)
+    data = get_analise_comparativa_data(anos, meses_selecionados, tipo_analise)
 
     return templates.TemplateResponse(
         "rel_analise_comparativa.html",
@@ -303,8 +306,7 @@ async def relatorio_analise_comparativa(request: Request):
             "data": data["data"],
             "totals": data["totals"],
             "tipo_analise": tipo_analise,
-            "ano1": ano1,
-            "ano2": ano2,
+            "anos": data["anos"],
             "anos_disponiveis": anos_disponiveis,
             "meses_selecionados": [str(m) for m in meses_selecionados],
             "meses_nomes": data["meses_nomes"],
@@ -406,10 +408,32 @@ async def relatorio_dfc(request: Request):
     )
 
 
+@router.get("/relatorios/dfc/exportar", name="exportar_dfc")
+@handle_exceptions
+async def exportar_dfc(request: Request, formato: str = "csv", periodo: str = "mes", mes_ano: str = ""):
+    """Exporta a matriz do DFC (mesmos parâmetros da tela) em CSV ou Parquet."""
+    from ..services.exportacao_service import tabela_dfc, validar_formato
+    from .exportacao import resposta_exportacao
+
+    try:
+        formato = validar_formato(formato)
+        if periodo == "mes":
+            ano_selecionado, mes_selecionado = [int(x) for x in mes_ano.split("-")]
+        else:
+            ano_selecionado, mes_selecionado = int(mes_ano), None
+        meses_selecionados = [int(m) for m in request.query_params.getlist("meses")] or list(range(1, 13))
+    except ValueError as exc:
+        return JSONResponse({'error': str(exc)}, status_code=400)
+
+    data = get_dfc_data(periodo, ano_selecionado, mes_selecionado, meses_selecionados, "realizado", None)
+    colunas, lotes = tabela_dfc(data)
+    return resposta_exportacao(formato, f"dfc_{mes_ano}", colunas, lotes)
+
+
 @router.get("/relatorios/dfc/eventos")
 @handle_exceptions
 async def dfc_eventos(request: Request):
-    """Retorna os eventos (lançamentos) para um qualificador e coluna."""
+    """Retorna uma página dos eventos (lançamentos) de um qualificador e coluna."""
 
     seq = int(request.query_params.get("seq"))
     periodo = request.query_params.get("periodo", "mes")
@@ -417,10 +441,14 @@ async def dfc_eventos(request: Request):
     mes_ano = request.query_params.get("mes_ano")
     estrategia = request.query_params.get("estrategia", "realizado")
     cenario_id = request.query_params.get("cenario_id")
+    page = int(request.query_params.get("page", 1))
+    per_page = int(request.query_params.get("per_page", 100))
+    if page < 1 or not 1 <= per_page <= 1000:
+        return JSONResponse({"error": "Paginação inválida (page >= 1, per_page entre 1 e 1000)"}, status_code=400)
 
-    data = get_dfc_eventos(seq, periodo, col, mes_ano, estrategia, cenario_id)
+    data = get_dfc_eventos(seq, periodo, col, mes_ano, estrategia, cenario_id, page, per_page)
 
-    return JSONResponse({"eventos": data["eventos"], "total": data["total"]})
+    return JSONResponse(data)
 
 
 # ==================== BACKTEST ====================
@@ -507,6 +535,21 @@ async def relatorio_backtest_executar(request: Request):
         return JSONResponse({'error': f'Erro interno: {str(e)}'}, status_code=500)
 
 
+@router.post("/relatorios/backtest/exportar", name="relatorio_backtest_exportar")
+@handle_exceptions
+async def relatorio_backtest_exportar(request: Request, formato: str = "csv"):
+    """Exporta um resultado de backtest (o JSON devolvido por /executar) linha a linha."""
+    from ..services.exportacao_service import COLUNAS_BACKTEST, lotes_backtest, validar_formato
+    from .exportacao import resposta_exportacao
+
+    try:
+        formato = validar_formato(formato)
+    except ValueError as exc:
+        return JSONResponse({'error': str(exc)}, status_code=400)
+    resultado = await request.json()
+    return resposta_exportacao(formato, "backtest", COLUNAS_BACKTEST, lotes_backtest(resultado))
+
+
 @router.post("/relatorios/backtest/salvar-recomendacao", name="backtest_salvar_recomendacao")
 @handle_exceptions
 async def backtest_salvar_recomendacao(request: Request):
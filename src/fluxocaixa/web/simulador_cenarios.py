@@ -1,6 +1,7 @@
 """Web endpoints for Simulador de Cenários."""
 
 from datetime import date
+from typing import Optional
 from fastapi import Request
 from fastapi.responses import RedirectResponse, JSONResponse
 import json
@@ -318,6 +319,48 @@ async def simulador_executar_api(id: int):
     })
 
 
+@router.get('/simulador/{id}/monte-carlo')
+@handle_exceptions
+async def simulador_monte_carlo(
+    id: int,
+    caminhos: int = 10000,
+    metodo: str = 'bootstrap',
+    semente: Optional[int] = None,
+):
+    """Faixas de percentis e probabilidade de saldo negativo por mês."""
+    from ..services.monte_carlo_service import METODOS, simular_monte_carlo
+
+    if not 1 <= caminhos <= 100000:
+        return JSONResponse({'error': 'caminhos deve estar entre 1 e 100000'}, status_code=400)
+    if metodo not in METODOS:
+        return JSONResponse({'error': f'Método inválido: {metodo}'}, status_code=400)
+
+    resultado = simular_monte_carlo(id, caminhos=caminhos, metodo=metodo, semente=semente)
+    if not resultado:
+        return JSONResponse({'error': 'Simulação não encontrada'}, status_code=404)
+    return JSONResponse(resultado)
+
+
+@router.post('/simulador/{id}/sensibilidade')
+@handle_exceptions
+async def simulador_sensibilidade(request: Request, id: int):
+    """Varre faixas de parâmetros de um cenário de fórmula (heatmap/tornado).
+
+    Corpo: {"faixas": {"ipca": {"min": 0.03, "max": 0.07, "passos": 5},
+    "pib": [0, 0.01, 0.02]}, "metrica": "saldo"}
+    """
+    from ..services.sensibilidade_service import varrer_parametros
+
+    data = await request.json()
+    try:
+        resultado = varrer_parametros(id, data.get('faixas') or {}, data.get('metrica', 'saldo'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    if resultado is None:
+        return JSONResponse({'error': 'Simulação não encontrada'}, status_code=404)
+    return JSONResponse(resultado)
+
+
 @router.post('/simulador/calcular-projecao')
 @handle_exceptions
 async def simulador_calcular_projecao(request: Request):
@@ -325,9 +368,8 @@ async def simulador_calcular_projecao(request: Request):
     Calcula projeção sob demanda (sem salvar cenário).
     Usado para preencher a tabela no frontend.
     """
-    from ..services import modelos_economicos_service as modelos
-    from dateutil.relativedelta import relativedelta
-    
+    from ..services.simulacao_pipeline import projetar_avulso
+
     data = await request.json()
     
     tipo_modelo = data.get('tipo_modelo')
@@ -337,9 +379,6 @@ async def simulador_calcular_projecao(request: Request):
     ano_base = int(data.get('ano_base', date.today().year))
     config = data.get('config', {})
     
-    # Definir período histórico necessário
-    data_fim = date(ano_base - 1, 12, 31)  # Usar dados até o ano anterior
-    
     # Converter seq_qualificador para lista se necessário
     if seq_qualificador and not seq_qualificadores:
         seq_qualificadores = [int(seq_qualificador)]
@@ -350,121 +389,15 @@ async def simulador_calcular_projecao(request: Request):
         return JSONResponse({'error': 'Nenhum qualificador selecionado'}, status_code=400)
     
     try:
-        if tipo_modelo == 'HOLT_WINTERS':
-            # Holt-Winters precisa de pelo menos 24 meses (2 anos)
-            data_inicio = data_fim - relativedelta(years=3)  # Pegar 3 anos para garantir
-            
-            if len(seq_qualificadores) > 1:
-                # Agregar dados de múltiplos qualificadores
-                dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-            else:
-                dados_hist = modelos.obter_dados_historicos(seq_qualificadores[0], data_inicio, data_fim)
-            
-            if len(dados_hist) < 12:
-                return JSONResponse({'error': f'Dados históricos insuficientes. Encontrados: {len(dados_hist)} meses, mínimo: 12'}, status_code=400)
-            
-            resultado = modelos.projetar_holt_winters(dados_hist, meses_projecao, config, ano_base)
-                
-        elif tipo_modelo == 'ARIMA':
-            data_inicio = data_fim - relativedelta(years=3)
-            
-            if len(seq_qualificadores) > 1:
-                dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-            else:
-                dados_hist = modelos.obter_dados_historicos(seq_qualificadores[0], data_inicio, data_fim)
-            
-            if len(dados_hist) < 12:
-                return JSONResponse({'error': f'Dados históricos insuficientes. Encontrados: {len(dados_hist)} meses, mínimo: 12'}, status_code=400)
-            
-            resultado = modelos.projetar_arima(dados_hist, meses_projecao, config, ano_base)
-                
-        elif tipo_modelo == 'SARIMA':
-            data_inicio = data_fim - relativedelta(years=4)
-            
-            if len(seq_qualificadores) > 1:
-                dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-            else:
-                dados_hist = modelos.obter_dados_historicos(seq_qualificadores[0], data_inicio, data_fim)
-            
-            if len(dados_hist) < 12:
-                return JSONResponse({'error': f'Dados históricos insuficientes. Encontrados: {len(dados_hist)} meses, mínimo: 12'}, status_code=400)
-            
-            resultado = modelos.projetar_sarima(dados_hist, meses_projecao, config, ano_base)
-        
-        elif tipo_modelo == 'REGRESSAO':
-            resultado = modelos.projetar_regressao_multipla(meses_projecao, config, ano_base)
-        
-        elif tipo_modelo == 'MEDIA_HISTORICA':
-            data_inicio = data_fim - relativedelta(years=3)
-            
-            if len(seq_qualificadores) > 1:
-                dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-            else:
-                dados_hist = modelos.obter_dados_historicos(seq_qualificadores[0], data_inicio, data_fim)
-            
-            if len(dados_hist) == 0:
-                return JSONResponse({'error': 'Não há dados históricos disponíveis'}, status_code=400)
-            
-            resultado = modelos.projetar_media_historica(dados_hist, meses_projecao, config, ano_base)
-                
-        elif tipo_modelo == 'XGBOOST':
-            data_inicio = data_fim - relativedelta(years=3)
-            
-            if len(seq_qualificadores) > 1:
-                dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-            else:
-                dados_hist = modelos.obter_dados_historicos(seq_qualificadores[0], data_inicio, data_fim)
-            
-            if len(dados_hist) < 13:
-                return JSONResponse({'error': f'Dados históricos insuficientes. Encontrados: {len(dados_hist)} meses, mínimo: 13'}, status_code=400)
-            
-            resultado = modelos.projetar_xgboost(dados_hist, meses_projecao, config, ano_base)
-
-        elif tipo_modelo == 'LIGHTGBM':
-            data_inicio = data_fim - relativedelta(years=3)
-            
-            if len(seq_qualificadores) > 1:
-                dados_hist = modelos.obter_dados_historicos_agregados(seq_qualificadores, data_inicio, data_fim)
-            else:
-                dados_hist = modelos.obter_dados_historicos(seq_qualificadores[0], data_inicio, data_fim)
-            
-            if len(dados_hist) < 13:
-                return JSONResponse({'error': f'Dados históricos insuficientes. Encontrados: {len(dados_hist)} meses, mínimo: 13'}, status_code=400)
-            
-            resultado = modelos.projetar_lightgbm(dados_hist, meses_projecao, config, ano_base)
-
-        elif tipo_modelo == 'CRESCIMENTO_ANO':
-            from ..services.formula_engine import projetar_crescimento_ultimo_ano
-            anos_selecionados = data.get('anos_selecionados', [])
-            mes_referencia = int(config.get('mes_referencia', 6))
-            ano_ref = max(anos_selecionados) if anos_selecionados else ano_base - 1
-            
-            resultado = projetar_crescimento_ultimo_ano(
-                seq_qualificadores=seq_qualificadores,
-                ano_projecao=ano_base,
-                ano_referencia=ano_ref,
-                mes_referencia=mes_referencia,
-                meses_projecao=meses_projecao,
-            )
-
-        elif tipo_modelo == 'MEDIA_CRESCIMENTO':
-            from ..services.formula_engine import projetar_media_crescimento_anos
-            anos_selecionados = data.get('anos_selecionados', [])
-            mes_referencia = int(config.get('mes_referencia', 6))
-            
-            if not anos_selecionados:
-                return JSONResponse({'error': 'Selecione pelo menos um ano na Base Histórica'}, status_code=400)
-            
-            resultado = projetar_media_crescimento_anos(
-                seq_qualificadores=seq_qualificadores,
-                ano_projecao=ano_base,
-                anos_referencia=anos_selecionados,
-                mes_referencia=mes_referencia,
-                meses_projecao=meses_projecao,
-            )
-
-        else:
-            return JSONResponse({'error': 'Modelo não suportado para cálculo automático'}, status_code=400)
+        # Janela de histórico, mínimo de meses e despacho vêm do registro de modelos
+        resultado = projetar_avulso(
+            tipo=tipo_modelo,
+            seq_qualificadores=seq_qualificadores,
+            config=config,
+            ano_base=ano_base,
+            meses_projecao=meses_projecao,
+            anos_referencia=data.get('anos_selecionados', []),
+        )
         
         return JSONResponse({
             'projecao': _dataframe_to_json(resultado),
@@ -765,6 +698,32 @@ async def simulador_historico_detalhe(request: Request, id: int, seq_versao: int
     )
 
 
+@router.get('/simulador/{id}/historico/{seq_versao}/exportar', name='simulador_historico_exportar')
+@handle_exceptions
+async def simulador_historico_exportar(
+    request: Request,
+    id: int,
+    seq_versao: int,
+    formato: str = 'csv',
+    cod_tipo: Optional[str] = None,
+):
+    """Exporta as linhas (flc_projecao_valor) de uma versão em streaming."""
+    from ..repositories import projecao_versao_repository
+    from ..services.exportacao_service import COLUNAS_PROJECAO_VALOR, lotes_projecao_versao, validar_formato
+    from .exportacao import resposta_exportacao
+
+    try:
+        formato = validar_formato(formato)
+    except ValueError as exc:
+        return JSONResponse({'error': str(exc)}, status_code=400)
+    versao = projecao_versao_repository.get_versao_by_id(seq_versao)
+    if versao is None or versao.seq_simulador_cenario != id:
+        return JSONResponse({'error': 'Versão não encontrada'}, status_code=404)
+
+    lotes = lotes_projecao_versao(seq_versao, cod_tipo or None)
+    return resposta_exportacao(formato, f'projecao_versao_{seq_versao}', COLUNAS_PROJECAO_VALOR, lotes)
+
+
 @router.post('/simulador/{id}/historico/{seq_versao}/publicar')
 @handle_exceptions
 async def simulador_historico_publicar(request: Request, id: int, seq_versao: int):
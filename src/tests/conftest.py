@@ -1,4 +1,6 @@
 import os
+from datetime import date
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -16,3 +18,41 @@ def app():
 @pytest.fixture()
 def client(app) -> TestClient:
     return TestClient(app)
+
+
+@pytest.fixture()
+def novo_lancamento(client):
+    """Create lancamentos through the service; the ones left are deleted at teardown.
+
+    Each call copies qualificador, tipo and origem of an active 2024
+    lancamento and returns the new one.
+    """
+    from fluxocaixa.domain import LancamentoCreate
+    from fluxocaixa.models import Lancamento, db
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.services import create_lancamento
+
+    criados = []
+
+    def incluir(dat_lancamento=date(2024, 4, 10), val_lancamento=1234.56):
+        with escopo_sessao():
+            modelo = db.session.query(Lancamento).filter(
+                Lancamento.dat_lancamento >= date(2024, 1, 1),
+                Lancamento.ind_status == 'A',
+            ).first()
+            novo = create_lancamento(LancamentoCreate(
+                dat_lancamento=dat_lancamento,
+                seq_qualificador=modelo.seq_qualificador,
+                val_lancamento=val_lancamento,
+                cod_tipo_lancamento=modelo.cod_tipo_lancamento,
+                cod_origem_lancamento=modelo.cod_origem_lancamento,
+                seq_conta=None,
+            ))
+        criados.append(novo.seq_lancamento)
+        return novo
+
+    yield incluir
+    if criados:
+        with escopo_sessao():
+            db.session.query(Lancamento).filter(Lancamento.seq_lancamento.in_(criados)).delete()
+            db.session.commit()
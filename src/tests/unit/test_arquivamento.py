@@ -0,0 +1,64 @@
+"""Arquivar um ano não muda os relatórios, e restaurar devolve tudo."""
+from datetime import date
+
+HOJE = date(2030, 1, 1)
+
+
+def _leituras(ano):
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories.lancamento_repository import LancamentoRepository
+    from fluxocaixa.services.relatorio import comparativo_service
+
+    with escopo_sessao():
+        repo = LancamentoRepository()
+        return {
+            'anos': repo.get_available_years(),
+            'totais': repo.get_totals_by_qualificador_and_tipo(ano),
+            'periodo': round(repo.get_total_by_tipo_and_period(
+                1, ano, start_date=date(ano, 2, 10), end_date=date(ano, 9, 3)), 2),
+            'diario': repo.get_daily_sums_in_period(date(ano, 1, 1), date(ano, 12, 31)),
+            'antes': round(repo.get_sum_before_date(date(ano + 1, 3, 15)), 2),
+            'listagem': repo.list(start_date=date(ano, 1, 1), end_date=date(ano, 12, 31))[1],
+            'comparativo': comparativo_service.get_analise_comparativa_data(
+                [ano, ano + 1], list(range(1, 13)), 'receitas')['totals'],
+        }
+
+
+def test_arquivar_e_restaurar_ano_preserva_resultados(client):
+    from fluxocaixa import create_app
+    from fluxocaixa.models.base import engine
+    from fluxocaixa.repositories import lancamento_arquivo_repository as arquivo_repo
+    from fluxocaixa.services import arquivamento_service, fechamento_service
+
+    ano = min(arquivamento_service.anos_arquivaveis(HOJE))
+    antes = _leituras(ano)
+    assert antes['totais'] and antes['listagem']
+
+    resultado = arquivamento_service.arquivar_ano(ano, hoje=HOJE)
+    try:
+        assert resultado['lancamentos'] > 0
+        with engine.connect() as conn:
+            assert ano not in arquivo_repo.anos_no_quente(conn)
+        assert arquivo_repo.anos_arquivados() == {ano}
+        assert _leituras(ano) == antes
+        # Reiniciar a aplicação não semeia de novo o ano arquivado
+        create_app()
+        assert _leituras(ano) == antes
+    finally:
+        arquivamento_service.restaurar_ano(ano)
+
+    assert arquivo_repo.anos_arquivados() == frozenset()
+    assert _leituras(ano) == antes
+    # Restaurado, o ano continua fechado
+    assert arquivo_repo.fechado_ate() == date(ano, 12, 31)
+    fechamento_service.reabrir_periodo(ano, 1)
+    assert arquivo_repo.fechado_ate() is None
+
+
+def test_ano_na_janela_quente_nao_e_arquivado(client):
+    import pytest
+
+    from fluxocaixa.services import arquivamento_service
+
+    with pytest.raises(ValueError):
+        arquivamento_service.arquivar_ano(date.today().year)
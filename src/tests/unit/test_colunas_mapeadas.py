@@ -0,0 +1,51 @@
+"""Arquivos colunares compartilhados: mesmos resultados do SQL e troca de geração."""
+from datetime import date
+
+
+def _leituras():
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories import LancamentoRepository, SaldoContaRepository
+
+    with escopo_sessao():
+        saldos = SaldoContaRepository()
+        return {
+            'totais': {chave: round(valor, 2) for chave, valor in
+                       LancamentoRepository().get_totals_by_qualificador_and_tipo(2024).items()},
+            'saldos': [
+                (round(saldos.get_saldo_total_at_date(dia), 2),
+                 round(saldos.get_latest_saldo_total_before_date(dia), 2))
+                for dia in (date(2023, 5, 3), date(2024, 6, 30), date(2025, 1, 1))
+            ],
+        }
+
+
+def test_colunas_mapeadas_iguais_ao_sql_e_trocam_de_geracao(client, tmp_path, monkeypatch, novo_lancamento):
+    from fluxocaixa.config import Config
+    from fluxocaixa.repositories import colunas_mapeadas_repository as mapeadas
+    from fluxocaixa.repositories import lancamento_colunar_repository
+
+    # Sem reconstrução em segundo plano durante o teste
+    monkeypatch.setattr(Config, 'COLUNAS_MAPEADAS_ATRASO_S', 3600)
+    raiz = str(tmp_path)
+    sql = _leituras()
+    assert mapeadas.construir(raiz=raiz)['geracao'] == 'geracao-000001'
+    try:
+        assert mapeadas.iniciar(raiz)
+        assert not lancamento_colunar_repository.colunas_lancamento().gravavel
+        assert _leituras() == sql
+
+        novo_lancamento()
+        # Quem escreveu volta ao SQL até a próxima geração
+        assert lancamento_colunar_repository.colunas_lancamento() is None
+        alterado = _leituras()
+        assert alterado != sql
+
+        # Outro worker publica a geração nova; a requisição seguinte a mapeia
+        mapeadas.construir(raiz=raiz)
+        client.get('/')
+        assert lancamento_colunar_repository.colunas_lancamento() is not None
+        assert _leituras() == alterado
+    finally:
+        mapeadas.encerrar()
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith('geracao-')) == [
+        'geracao-000001', 'geracao-000002']
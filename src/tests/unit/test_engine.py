@@ -0,0 +1,65 @@
+"""Perfis da engine (models/engine.py)."""
+import pytest
+
+
+def test_perfil_sqlite_aplica_pragmas_em_cada_conexao(tmp_path):
+    from fluxocaixa.models.engine import criar_engine, perfil_da_url
+
+    url = f'sqlite:///{tmp_path / "perfil.db"}'
+    assert perfil_da_url(url) == 'sqlite'
+    assert perfil_da_url('postgresql+psycopg2://u:s@localhost/fluxo') == 'postgresql'
+
+    engine = criar_engine(url, busy_timeout=1234)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 1234
+    engine.dispose()
+
+    memoria = criar_engine('sqlite://')
+    with memoria.connect() as conn:
+        conn.exec_driver_sql('CREATE TABLE t (x INTEGER)')
+    # StaticPool: a mesma base em memória em todas as conexões
+    with memoria.connect() as conn:
+        assert conn.exec_driver_sql('SELECT count(*) FROM t').scalar() == 0
+
+
+def test_perfil_incompativel_com_url():
+    from fluxocaixa.models.engine import criar_engine
+
+    with pytest.raises(ValueError):
+        criar_engine('sqlite://', 'postgresql')
+    with pytest.raises(ValueError):
+        criar_engine('sqlite://', 'oracle')
+
+
+def test_somente_leitura_roteia_consultas_e_mantem_escritas_no_primario(client):
+    from sqlalchemy import event, text
+    from sqlalchemy.exc import OperationalError
+
+    from fluxocaixa.models import Orgao, db
+    from fluxocaixa.models.base import engine, engine_leitura, somente_leitura
+
+    usadas = []
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        usadas.append(conn.engine)
+
+    for alvo in (engine, engine_leitura):
+        event.listen(alvo, 'before_cursor_execute', _registrar)
+    try:
+        with somente_leitura():
+            Orgao.query.count()
+            assert usadas[-1] is engine_leitura
+            db.session.execute(text('DELETE FROM flc_orgao WHERE 1 = 0'))
+            assert usadas[-1] is engine
+        db.session.commit()
+        Orgao.query.count()
+        assert usadas[-1] is engine
+    finally:
+        for alvo in (engine, engine_leitura):
+            event.remove(alvo, 'before_cursor_execute', _registrar)
+
+    with engine_leitura.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text('DELETE FROM flc_orgao WHERE 1 = 0'))
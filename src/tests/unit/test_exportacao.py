@@ -0,0 +1,36 @@
+"""Exportação em streaming de lançamentos e versões de projeção."""
+import csv
+from io import StringIO
+
+import pytest
+
+
+def test_exportar_lancamentos_csv_em_lotes(client):
+    from fluxocaixa.models import Lancamento
+    from fluxocaixa.services.exportacao_service import COLUNAS_LANCAMENTOS, lotes_lancamentos
+
+    total = Lancamento.query.filter_by(ind_status='A').count()
+    lotes = list(lotes_lancamentos(tamanho_lote=7))
+    assert sum(len(lote) for lote in lotes) == total
+    assert all(len(lote) <= 7 for lote in lotes)
+
+    resp = client.get('/saldos/exportar?formato=csv')
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('text/csv')
+    linhas = list(csv.reader(StringIO(resp.content.decode('utf-8-sig')), delimiter=';'))
+    assert linhas[0] == [nome for nome, _ in COLUNAS_LANCAMENTOS]
+    assert len(linhas) == total + 1
+
+    assert client.get('/saldos/exportar?formato=xml').status_code == 400
+
+
+def test_exportar_parquet_mesmas_linhas_do_csv(client):
+    pq = pytest.importorskip('pyarrow.parquet')
+    import pyarrow as pa
+    from fluxocaixa.services.exportacao_service import COLUNAS_LANCAMENTOS, gerar_parquet, lotes_lancamentos
+
+    conteudo = b''.join(gerar_parquet(COLUNAS_LANCAMENTOS, lotes_lancamentos(tamanho_lote=7)))
+    tabela = pq.read_table(pa.BufferReader(conteudo))
+    esperado = [linha for lote in lotes_lancamentos() for linha in lote]
+    assert tabela.num_rows == len(esperado)
+    assert tabela.column('seq_lancamento').to_pylist() == [linha[0] for linha in esperado]
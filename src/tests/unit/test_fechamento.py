@@ -0,0 +1,67 @@
+"""Fechar meses congela os relatórios e recusa escrita nos meses fechados."""
+from datetime import date
+
+
+def _leituras():
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories.lancamento_repository import LancamentoRepository
+    from fluxocaixa.services.relatorio import indicadores_service
+
+    with escopo_sessao():
+        repo = LancamentoRepository()
+        return {
+            'totais': repo.get_totals_by_qualificador_and_tipo(2023),
+            'periodo': round(repo.get_total_by_tipo_and_period(
+                1, 2023, start_date=date(2023, 5, 10), end_date=date(2023, 8, 31)), 2),
+            'antes': round(repo.get_sum_before_date(date(2023, 7, 15)), 2),
+            'indicadores': indicadores_service.get_indicadores_data(
+                2023, list(range(1, 13)), 'ambos'),
+        }
+
+
+def test_fechar_periodo_preserva_relatorios_e_recusa_escrita(client):
+    from fluxocaixa import create_app
+    from fluxocaixa.models import Lancamento, db
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories import lancamento_arquivo_repository as arquivo_repo
+    from fluxocaixa.services import fechamento_service
+
+    antes = _leituras()
+    resultado = fechamento_service.fechar_periodo(2023, 6)
+    try:
+        assert resultado['fechado_ate'] == date(2023, 6, 30)
+        assert arquivo_repo.fechado_ate() == date(2023, 6, 30)
+        assert _leituras() == antes
+
+        with escopo_sessao():
+            fechado = db.session.query(Lancamento).filter(
+                Lancamento.dat_lancamento <= date(2023, 6, 30)).first()
+            seq, status = fechado.seq_lancamento, fechado.ind_status
+            resposta = client.post(f'/saldos/delete/{seq}')
+            assert resposta.status_code == 400
+            assert 'fechado' in resposta.json()['error']
+
+        with escopo_sessao():
+            assert db.session.get(Lancamento, seq).ind_status == status
+
+        # Reiniciar a aplicação com meses fechados não semeia de novo
+        create_app()
+        assert 'kept' in client.get('/init-db').text
+        assert arquivo_repo.fechado_ate() == date(2023, 6, 30)
+        assert _leituras() == antes
+    finally:
+        primeiro = fechamento_service.listar_periodos_fechados()[0]
+        fechamento_service.reabrir_periodo(primeiro['ano'], primeiro['mes'])
+
+    assert arquivo_repo.fechado_ate() is None
+    assert _leituras() == antes
+
+
+def test_mes_corrente_nao_e_fechado(client):
+    import pytest
+
+    from fluxocaixa.services import fechamento_service
+
+    hoje = date.today()
+    with pytest.raises(ValueError):
+        fechamento_service.fechar_periodo(hoje.year, hoje.month)
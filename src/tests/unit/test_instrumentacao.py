@@ -0,0 +1,38 @@
+"""Instrumentação de SQL: cabeçalhos, /_debug/perf e captura de plano."""
+
+
+def test_perf_sql_por_requisicao_e_por_funcao(client, monkeypatch):
+    from fluxocaixa.config import Config
+    from fluxocaixa.models import instrumentacao
+
+    assert client.get('/_debug/perf').status_code == 404
+    assert 'x-db-queries' not in client.get('/saldos').headers
+
+    monkeypatch.setattr(Config, 'PERF_SQL', True)
+    monkeypatch.setattr(Config, 'PERF_SQL_LENTA_MS', 0)
+    monkeypatch.setattr(Config, 'PERF_SQL_EXPLAIN_MS', 0)
+    instrumentacao.limpar()
+    try:
+        resp = client.get('/relatorios/indicadores')
+        assert resp.status_code == 200
+        consultas = int(resp.headers['x-db-queries'])
+        assert consultas > 0
+        assert resp.headers['server-timing'].startswith('db;dur=')
+
+        # A rota só existe com PERF_SQL_DEBUG, e nunca atrás de um proxy
+        assert client.get('/_debug/perf').status_code == 404
+        monkeypatch.setattr(Config, 'PERF_SQL_DEBUG', True)
+        assert client.get('/_debug/perf', headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 403
+
+        dados = client.get('/_debug/perf').json()
+        requisicao = dados['requisicoes'][0]
+        assert requisicao['rota'] == 'GET /relatorios/indicadores'
+        assert requisicao['consultas'] == consultas
+        assert sum(f['consultas'] for f in requisicao['funcoes']) == consultas
+        funcoes = {f['funcao'] for f in requisicao['funcoes']}
+        assert 'services.relatorio.indicadores_service.get_indicadores_data' in funcoes
+        # Limiar zero: todo SELECT lento tem o plano capturado
+        assert requisicao['lentas'] and all(l['plano'] for l in requisicao['lentas'])
+    finally:
+        instrumentacao.desinstalar()
+        instrumentacao.limpar()
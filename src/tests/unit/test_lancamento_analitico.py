@@ -0,0 +1,41 @@
+"""Backend analítico (DuckDB): mesmas linhas das consultas SQL do repositório."""
+from datetime import date
+
+import pytest
+
+
+def _leituras():
+    from fluxocaixa.models import Qualificador, db
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories import LancamentoRepository
+
+    def normalizar(linhas):
+        return sorted(
+            tuple(int(v) if isinstance(v, float) and v.is_integer() else v for v in linha[:-1])
+            + (round(float(linha[-1] or 0), 2),)
+            for linha in linhas
+        )
+
+    with escopo_sessao():
+        qualificadores = [q.seq_qualificador for q in db.session.query(Qualificador).all()]
+        repo = LancamentoRepository()
+        return {
+            'agrupado': normalizar(repo.get_grouped_by_qualificador_year_month(
+                qualificadores, [2023, 2024], [1, 6, 12])),
+            'origem': normalizar(repo.get_comparative_by_origem(1, [2023, 2024], list(range(1, 13)))),
+            'historico': normalizar(repo.get_monthly_totals_by_qualificador(
+                qualificadores, date(2023, 3, 5), date(2024, 7, 9))),
+        }
+
+
+def test_analitico_igual_ao_sql(client):
+    pytest.importorskip('duckdb')
+    from fluxocaixa.repositories import lancamento_analitico_repository as analitico
+
+    sql = _leituras()
+    assert sql['agrupado'] and sql['origem'] and sql['historico']
+    analitico.iniciar()
+    try:
+        assert _leituras() == sql
+    finally:
+        analitico.encerrar()
@@ -0,0 +1,52 @@
+"""Cópia colunar de flc_lancamento: mesmos resultados do SQL e escrita em dia."""
+from datetime import date
+
+
+def _leituras():
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories.lancamento_repository import LancamentoRepository
+    from fluxocaixa.services.relatorio import indicadores_service
+
+    def arredondar(totais):
+        return {chave: round(valor, 2) for chave, valor in totais.items()}
+
+    with escopo_sessao():
+        repo = LancamentoRepository()
+        return {
+            'totais': arredondar(repo.get_totals_by_qualificador_and_tipo(2024)),
+            'periodo': round(repo.get_total_by_tipo_and_period(
+                1, 2024, start_date=date(2024, 2, 10), end_date=date(2024, 9, 3)), 2),
+            'diario': arredondar(repo.get_daily_sums_in_period(date(2024, 3, 1), date(2024, 5, 31))),
+            'antes': round(repo.get_sum_before_date(date(2024, 7, 15)), 2),
+            'indicadores': indicadores_service.get_indicadores_data(2024, list(range(1, 13)), 'ambos'),
+        }
+
+
+def test_colunar_igual_ao_sql_e_acompanha_escritas(client, novo_lancamento):
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories import lancamento_colunar_repository
+    from fluxocaixa.services import delete_lancamento
+
+    sql = _leituras()
+    colunas = lancamento_colunar_repository.carregar()
+    try:
+        assert _leituras() == sql
+
+        novo = novo_lancamento()
+        alterado = _leituras()
+        assert alterado != sql
+
+        lancamento_colunar_repository.descartar()
+        assert _leituras() == alterado
+        lancamento_colunar_repository.carregar()
+
+        with escopo_sessao():
+            delete_lancamento(novo.seq_lancamento)
+        assert _leituras() == sql
+    finally:
+        lancamento_colunar_repository.descartar()
+
+    filtro = colunas.filtro(anos=[2024], meses=[1, 2, 3])
+    acumulado = colunas.acumulado(filtro, por='mes')
+    assert [periodo for periodo, _ in acumulado] == [(2024, 1), (2024, 2), (2024, 3)]
+    assert acumulado[-1][1] == colunas.somar(filtro)
@@ -0,0 +1,42 @@
+"""Simulação de Monte Carlo do fluxo de caixa."""
+import numpy as np
+
+
+def test_simular_caminhos_bandas_e_probabilidade():
+    from fluxocaixa.services.monte_carlo_service import simular_caminhos
+
+    receita = np.full(36, 100.0)
+    despesa = np.full(36, 110.0)
+    erros = np.array([[0.1, 0.0], [-0.1, 0.0], [0.0, 0.0]])
+
+    a = simular_caminhos(receita, despesa, erros, caminhos=5000, saldo_inicial=50, semente=7, tamanho_bloco=700)
+    b = simular_caminhos(receita, despesa, erros, caminhos=5000, saldo_inicial=50, semente=7, tamanho_bloco=700)
+
+    assert a == b
+    saldo = a['percentis']['saldo']
+    assert len(saldo['p50']) == 36
+    assert all(p5 <= p50 <= p95 for p5, p50, p95 in zip(saldo['p5'], saldo['p50'], saldo['p95']))
+    # Déficit médio de 10/mês: o saldo de 50 fica negativo a partir do 6º mês
+    assert a['prob_saldo_negativo'][0] == 0
+    assert a['prob_saldo_negativo'][-1] == 1
+    assert a['percentis']['despesa']['p5'] == [110.0] * 36
+
+    # Em blocos, as faixas saem dos histogramas: próximas às de um bloco só (exatas)
+    exata = simular_caminhos(receita, despesa, erros, caminhos=5000, saldo_inicial=50, semente=7, tamanho_bloco=5000)
+    assert exata['prob_saldo_negativo'] == a['prob_saldo_negativo']
+    for nome, faixas in exata['percentis'].items():
+        for p, linha in faixas.items():
+            assert np.allclose(a['percentis'][nome][p], linha, atol=0.1)
+
+
+def test_monte_carlo_endpoint(client):
+    from fluxocaixa.models import CenarioDespesa
+
+    seq = CenarioDespesa.query.filter_by(cod_tipo_cenario='MANUAL').first().seq_simulador_cenario
+    response = client.get(f'/simulador/{seq}/monte-carlo', params={'caminhos': 500, 'semente': 1})
+    assert response.status_code == 200
+    dados = response.json()
+    assert len(dados['prob_saldo_negativo']) == len(dados['meses'])
+    assert set(dados['percentis']) == {'receita', 'despesa', 'saldo'}
+
+    assert client.get(f'/simulador/{seq}/monte-carlo', params={'caminhos': 0}).status_code == 400
@@ -0,0 +1,27 @@
+"""Relatório previsão × realizado."""
+from datetime import date
+
+
+def test_previsao_realizado_snapshot_e_cenario_atual_coincidem(client):
+    from fluxocaixa.models import CenarioDespesa, Qualificador
+    from fluxocaixa.repositories.simulador_cenario_historico_repository import (
+        SimuladorCenarioHistoricoRepository,
+    )
+    from fluxocaixa.services.previsao_service import get_previsao_realizado_data
+    from fluxocaixa.services.simulador_cenario_service import criar_snapshot_cenario
+
+    seq = CenarioDespesa.query.filter_by(cod_tipo_cenario='MANUAL').first().seq_simulador_cenario
+    quals = [q.seq_qualificador for q in Qualificador.query.all()]
+    ano = date.today().year
+
+    # Sem snapshot no ano, as versões vêm do cenário atual (ajustes ORM)
+    SimuladorCenarioHistoricoRepository().delete_snapshots_by_cenario(seq)
+    atual = get_previsao_realizado_data(ano, seq, [], quals)
+
+    criar_snapshot_cenario(seq)
+    snapshot = get_previsao_realizado_data(ano, seq, [], quals)
+
+    assert snapshot == atual
+    assert atual['tabela'][-1]['descricao'] == 'Total'
+    assert len(atual['evolucao']['previsao']) == 12
+    assert atual['diferenca']['labels'] == [ano - 2, ano - 1, ano]
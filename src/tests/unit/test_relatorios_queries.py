@@ -0,0 +1,97 @@
+"""Regressão do número de queries por renderização de relatório.
+
+Os relatórios agregam em uma única query agrupada; o número de round trips
+não pode crescer com a quantidade de meses ou de qualificadores folha.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+@contextmanager
+def contar_queries():
+    from fluxocaixa.models.base import engine, engine_leitura
+
+    statements = []
+    engines = {engine, engine_leitura}
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for alvo in engines:
+        event.listen(alvo, 'before_cursor_execute', _before)
+    try:
+        yield statements
+    finally:
+        for alvo in engines:
+            event.remove(alvo, 'before_cursor_execute', _before)
+
+
+def test_indicadores_query_count_independe_dos_meses(client):
+    from fluxocaixa.services.relatorio import get_indicadores_data
+
+    with contar_queries() as um_mes:
+        get_indicadores_data(2025, [1], 'receita')
+    with contar_queries() as ano_todo:
+        data = get_indicadores_data(2025, list(range(1, 13)), 'ambos')
+
+    # 2 tipos de lançamento + árvore de qualificadores + 1 agregação
+    assert len(um_mes) == 4
+    assert len(ano_todo) == len(um_mes)
+    assert len(data['area_chart_data']['labels']) == 12
+    assert len(data['projection_chart_data']['saldo']) == 12
+
+
+def test_ldo_orcamento_query_count_constante(client):
+    from fluxocaixa.services.relatorio import get_ldo_orcamento_data
+
+    with contar_queries() as statements:
+        data = get_ldo_orcamento_data(2025, 'ambos')
+
+    # 2 tipos de lançamento + árvore + LOA + 1 agregação
+    assert len(statements) == 5
+    assert len(data['metas_fiscais']) == 5
+
+
+def test_dfc_eventos_pagina_com_total_do_servidor(client):
+    from fluxocaixa.models import Qualificador
+    from fluxocaixa.services.relatorio import get_dfc_eventos
+
+    raiz = Qualificador.query.filter_by(cod_qualificador_pai=None, ind_status='A').first()
+    completo = get_dfc_eventos(raiz.seq_qualificador, 'ano', 3, '2025', 'realizado', None, 1, 1000)
+    assert completo['total_count'] > 2
+
+    with contar_queries() as statements:
+        pagina = get_dfc_eventos(raiz.seq_qualificador, 'ano', 3, '2025', 'realizado', None, 2, 2)
+
+    # Contagem/soma + página, ambas com a subárvore na CTE recursiva
+    assert len(statements) == 2
+    assert pagina['eventos'] == completo['eventos'][2:4]
+    assert pagina['total_count'] == completo['total_count']
+    assert pagina['total'] == completo['total']
+    assert pagina['total_pages'] == (completo['total_count'] + 1) // 2
+
+
+def test_analise_comparativa_n_anos_query_count_constante(client):
+    from fluxocaixa.services.relatorio import get_analise_comparativa_data
+
+    meses = [1, 2, 3]
+    with contar_queries() as dois_anos:
+        get_analise_comparativa_data([2024, 2025], meses, 'despesas')
+    with contar_queries() as tres_anos:
+        data = get_analise_comparativa_data([2023, 2024, 2025], meses, 'despesas')
+
+    assert len(tres_anos) == len(dois_anos)
+    assert data['anos'] == [2023, 2024, 2025]
+    for ano in ('2023', '2024', '2025'):
+        soma_meses = sum(data['totals'][str(m)][ano] for m in meses)
+        soma_itens = sum(item['total'][ano] for item in data['data'].values())
+        assert abs(soma_meses - data['totals']['total'][ano]) < 1e-6
+        assert abs(soma_itens - data['totals']['total'][ano]) < 1e-6
+
+    resp = client.post(
+        '/relatorios/analise-comparativa',
+        data={'anos': ['2025', '2023', '2024'], 'meses': ['1', '2'], 'tipo_analise': 'receitas'},
+    )
+    assert resp.status_code == 200
+    assert 'colspan="4"' in resp.text
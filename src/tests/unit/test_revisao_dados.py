@@ -0,0 +1,143 @@
+"""Revisões dos dados: escritas de outro worker descartam os caches deste."""
+import time
+from datetime import date
+
+from sqlalchemy import delete, insert, update
+
+
+def test_escrita_propria_incrementa_sem_descartar(client):
+    from fluxocaixa.models.base import escopo_sessao
+    from fluxocaixa.repositories import revisao_repository
+    from fluxocaixa.services import qualificador_service
+
+    chamadas = []
+    registrada = revisao_repository.ao_mudar('qualificador')(lambda: chamadas.append(1))
+    try:
+        client.get('/')
+        antes = revisao_repository.ler()
+        with escopo_sessao():
+            qualificador = qualificador_service.list_all_qualificadores()[0]
+            qualificador_service.update_qualificador(
+                qualificador.seq_qualificador,
+                qualificador.num_qualificador,
+                qualificador.dsc_qualificador + ' *',
+                qualificador.cod_qualificador_pai,
+            )
+            qualificador_service.update_qualificador(
+                qualificador.seq_qualificador,
+                qualificador.num_qualificador,
+                qualificador.dsc_qualificador[:-2],
+                qualificador.cod_qualificador_pai,
+            )
+        depois = revisao_repository.ler()
+        assert depois['qualificador'] == antes['qualificador'] + 2
+        assert depois['lancamento'] == antes['lancamento']
+        assert revisao_repository.revisao('qualificador') == depois['qualificador']
+        assert revisao_repository.verificar() == set()
+        assert chamadas == []
+    finally:
+        revisao_repository.remover(registrada)
+
+
+def test_escrita_de_outro_worker_descarta_caches(client):
+    from fluxocaixa.models import Lancamento, Qualificador
+    from fluxocaixa.models.base import engine, escopo_sessao
+    from fluxocaixa.repositories import LancamentoRepository, lancamento_colunar_repository
+    from fluxocaixa.repositories import revisao_repository
+    from fluxocaixa.services import qualificador_service
+
+    client.get('/')
+    with escopo_sessao():
+        opcoes = qualificador_service.list_qualificadores_folha_opcoes()
+        folha = opcoes[0]
+        total = LancamentoRepository().count_filtered(qualificador_folha=folha['seq_qualificador'])
+    colunas = lancamento_colunar_repository.carregar()
+    ano = date.today().year
+    somar = lambda c: c.somar(c.filtro(anos=[ano]))  # noqa: E731
+    soma = somar(colunas)
+    novo = None
+    try:
+        # Outro worker: escreve fora da sessão deste processo, na mesma transação dos contadores
+        with engine.begin() as conn:
+            conn.execute(
+                update(Qualificador.__table__)
+                .where(Qualificador.seq_qualificador == folha['seq_qualificador'])
+                .values(dsc_qualificador='Renomeado por outro worker')
+            )
+            novo = conn.execute(insert(Lancamento.__table__).values(
+                dat_lancamento=date(ano, 1, 2),
+                seq_qualificador=folha['seq_qualificador'],
+                val_lancamento=10.5,
+                cod_tipo_lancamento=1,
+                cod_origem_lancamento=1,
+                cod_pessoa_inclusao=1,
+                ind_status='A',
+            )).inserted_primary_key[0]
+            revisao_repository.incrementar(conn, 'qualificador', 'lancamento')
+
+        client.get('/')
+        with escopo_sessao():
+            opcoes = qualificador_service.list_qualificadores_folha_opcoes()
+            assert 'Renomeado por outro worker' in [o['dsc_qualificador'] for o in opcoes]
+            assert LancamentoRepository().count_filtered(
+                qualificador_folha=folha['seq_qualificador']) == total + 1
+
+        recarga = lancamento_colunar_repository._recarga
+        if recarga is not None:
+            recarga.join(30)
+        recarregada = lancamento_colunar_repository.colunas_lancamento()
+        assert recarregada is not None and recarregada is not colunas
+        assert round(somar(recarregada) - soma, 2) == 10.5
+    finally:
+        lancamento_colunar_repository.descartar()
+        with engine.begin() as conn:
+            conn.execute(
+                update(Qualificador.__table__)
+                .where(Qualificador.seq_qualificador == folha['seq_qualificador'])
+                .values(dsc_qualificador=folha['dsc_qualificador'])
+            )
+            if novo is not None:
+                conn.execute(delete(Lancamento.__table__).where(Lancamento.seq_lancamento == novo))
+            revisao_repository.incrementar(conn, 'qualificador', 'lancamento')
+        client.get('/')
+
+
+def test_recarga_colunar_desiste_e_retoma_depois(client, monkeypatch):
+    from fluxocaixa.models.base import engine
+    from fluxocaixa.repositories import lancamento_colunar_repository as colunar
+    from fluxocaixa.repositories import revisao_repository
+
+    ler = colunar.ler
+    cargas = []
+
+    def ler_com_escrita(bind):
+        # Cada carga coincide com uma escrita de outro worker
+        cargas.append(1)
+        with engine.begin() as conn:
+            revisao_repository.incrementar(conn, 'lancamento')
+        return ler(bind)
+
+    monkeypatch.setattr(colunar, 'ESPERA_RECARGA_S', 0.01)
+    monkeypatch.setattr(colunar, 'PAUSA_RECARGA_S', 0.2)
+    colunar.carregar()
+    try:
+        monkeypatch.setattr(colunar, 'ler', ler_com_escrita)
+        colunar.recarregar()
+        colunar._recarga.join(30)
+        assert len(cargas) == colunar.MAX_CARGAS_RECARGA
+        assert colunar.colunas_lancamento() is None
+
+        # Sem escritas concorrentes, a recarga agendada instala a cópia
+        monkeypatch.setattr(colunar, 'ler', ler)
+        for _ in range(100):
+            recarga = colunar._recarga
+            if recarga is not None:
+                recarga.join(30)
+            if colunar.colunas_lancamento() is not None:
+                break
+            time.sleep(0.05)
+        assert colunar.colunas_lancamento() is not None
+        assert len(cargas) == colunar.MAX_CARGAS_RECARGA
+    finally:
+        colunar.descartar()
+        revisao_repository.verificar()
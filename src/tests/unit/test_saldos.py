@@ -3,4 +3,56 @@
 def test_saldos_page(client):
     response = client.get('/saldos')
     assert response.status_code == 200
-    assert 'Lançamentos' in response.text
\ No newline at end of file
+    assert 'Lançamentos' in response.text
+
+def test_saldos_keyset_pagination(client):
+    from fluxocaixa.repositories import LancamentoRepository
+
+    repo = LancamentoRepository()
+    por_offset, total = repo.list(page=2, per_page=5)
+    pagina_1, _ = repo.list(page=1, per_page=5)
+    cursor = LancamentoRepository.encode_cursor(pagina_1[-1])
+    por_keyset, total_keyset = repo.list(per_page=5, cursor=cursor, direction='next')
+
+    assert total_keyset == total
+    assert [l.seq_lancamento for l in por_keyset] == [l.seq_lancamento for l in por_offset]
+
+    response = client.post('/saldos', data={'page': '2', 'cursor': cursor, 'direction': 'next'})
+    assert response.status_code == 200
+    assert 'Página <span class="font-medium">2</span>' in response.text
+
+
+def test_saldo_conta_diario_incremental(client):
+    from datetime import date
+    from fluxocaixa.models import ContaBancaria, Lancamento, SaldoConta, db
+    from fluxocaixa.repositories import SaldoContaDiarioRepository, SaldoContaRepository
+
+    session = db.session
+    conta = session.query(ContaBancaria).filter_by(ind_status='A').first()
+    lanc_base = session.query(Lancamento).first()
+    dia = date(2031, 3, 10)
+    saldo = SaldoConta(seq_conta=conta.seq_conta, dat_saldo=dia, val_saldo=1000, cod_pessoa_inclusao=1)
+    session.add(saldo)
+    lanc = Lancamento(
+        dat_lancamento=dia, seq_qualificador=lanc_base.seq_qualificador, val_lancamento=-250,
+        cod_tipo_lancamento=lanc_base.cod_tipo_lancamento, cod_origem_lancamento=lanc_base.cod_origem_lancamento,
+        seq_conta=conta.seq_conta, ind_status='A', cod_pessoa_inclusao=1,
+    )
+    session.add(lanc)
+    session.commit()
+    try:
+        posicao = SaldoContaDiarioRepository().get_posicoes(date(2031, 3, 15))[conta.seq_conta]
+        assert posicao.dat_movimento == dia
+        assert float(posicao.val_saldo_fechamento) == 750.0
+
+        lanc.val_lancamento = -100
+        session.commit()
+        posicao = SaldoContaDiarioRepository().get_posicoes(dia)[conta.seq_conta]
+        assert float(posicao.val_saldo_fechamento) == 900.0
+        assert SaldoContaRepository().get_saldo_total_at_date(dia) >= 1000.0
+    finally:
+        session.delete(lanc)
+        session.delete(saldo)
+        session.commit()
+    posicao = SaldoContaDiarioRepository().get_posicoes(dia).get(conta.seq_conta)
+    assert posicao is None or posicao.dat_movimento < dia
@@ -0,0 +1,50 @@
+"""Seleção automática de ordem ARIMA/SARIMA."""
+import numpy as np
+import pandas as pd
+
+
+def _serie():
+    rng = np.random.default_rng(7)
+    t = np.arange(36)
+    return pd.Series(1000 + 5 * t + 200 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 50, 36))
+
+
+def test_selecao_ordem_paralela_igual_serial_e_usa_cache():
+    from fluxocaixa.services import selecao_ordem_service
+    from fluxocaixa.services.selecao_ordem_service import limpar_cache_ordens, selecionar_ordem
+
+    serie = _serie()
+    grade = {'p': range(0, 3), 'd': range(0, 2), 'q': range(0, 2)}
+    limpar_cache_ordens()
+    serial = selecionar_ordem(serie, grade=grade, criterio='bic', processos=0)
+    try:
+        limpar_cache_ordens()
+        paralela = selecionar_ordem(serie, grade=grade, criterio='bic', processos=2)
+        pool = selecao_ordem_service._pools[2]
+        # Buscas seguintes reaproveitam o mesmo pool
+        assert selecionar_ordem(serie, grade=grade, criterio='aic', processos=2)['avaliadas']
+        assert selecao_ordem_service._pools[2] is pool
+    finally:
+        selecao_ordem_service.encerrar_pools()
+
+    assert paralela['ordem'] == serial['ordem']
+    assert paralela['valor'] == serial['valor']
+    assert not paralela['cache']
+    assert selecionar_ordem(serie, grade=grade, criterio='bic')['cache']
+    limpar_cache_ordens()
+
+
+def test_projetar_arima_auto_order_informa_ordem_escolhida():
+    from fluxocaixa.services.modelos_economicos_service import projetar_arima
+    from fluxocaixa.services.selecao_ordem_service import limpar_cache_ordens, selecionar_ordem
+
+    limpar_cache_ordens()
+    serie = _serie()
+    dados = pd.DataFrame({'data': pd.date_range('2022-01-01', periods=36, freq='MS'), 'valor': serie})
+    resultado = projetar_arima(dados, 12, {'auto_order': True}, 2025)
+
+    escolhida = selecionar_ordem(serie)
+    assert escolhida['cache']
+    assert resultado.attrs['ordem'] == escolhida['ordem']
+    assert len(resultado) == 12 and (resultado['valor_projetado'] >= 0).all()
+    limpar_cache_ordens()
@@ -0,0 +1,46 @@
+"""Varredura de parâmetros dos cenários de fórmula."""
+import json
+
+
+def _cenario_formula():
+    from fluxocaixa.repositories import formula_repository as f_repo
+    from fluxocaixa.services.simulador_cenario_service import criar_simulador_cenario
+
+    simulador = criar_simulador_cenario(
+        'Sensibilidade', '', 2026, 12, 'FORMULA', {}, 'FORMULA', {},
+        cod_periodicidade='MENSAL', cod_metodo_base='MEDIA_SIMPLES',
+        json_config_base=json.dumps({'anos': [2023, 2024, 2025]}),
+    )
+    f_repo.set_valores_cenario_batch(simulador.seq_simulador_cenario, {
+        'ipca': 0.045, 'pib_real': 0.02, 'elasticidade': 1.1, 'efeito_legislacao': 0,
+    })
+    return simulador.seq_simulador_cenario
+
+
+def test_varredura_reproduz_simulacao_no_ponto_do_cenario(client):
+    from fluxocaixa.services.sensibilidade_service import varrer_parametros
+    from fluxocaixa.services.simulador_cenario_service import executar_simulacao
+
+    seq = _cenario_formula()
+    esperado = executar_simulacao(seq)['resumo']
+
+    resultado = varrer_parametros(seq, {'ipca': {'min': 0.03, 'max': 0.07, 'passos': 5}, 'pib_real': [0, 0.02]})
+
+    assert abs(resultado['base']['receita'] - esperado['total_receita']) < 0.01
+    assert abs(resultado['base']['despesa'] - esperado['total_despesa']) < 0.01
+    assert [len(linha) for linha in resultado['grade']['saldo']] == [2] * 5
+    # ipca = 0.045 não está na grade, mas pib_real = 0.02 e ipca entre 0.04 e 0.05 cercam o cenário
+    receita = resultado['grade']['receita']
+    assert receita[1][1] < resultado['base']['receita'] < receita[2][1]
+    assert {t['parametro'] for t in resultado['tornado']} == {'ipca', 'pib_real'}
+
+
+def test_sensibilidade_endpoint_valida_parametros(client):
+    seq = _cenario_formula()
+    response = client.post(f'/simulador/{seq}/sensibilidade', json={'faixas': {'inexistente': [1, 2]}})
+    assert response.status_code == 400
+    assert response.json()['error'] == 'Parâmetros desconhecidos: inexistente'
+
+    response = client.post(f'/simulador/{seq}/sensibilidade', json={'faixas': {'ipca': [0.03, 0.05]}})
+    assert response.status_code == 200
+    assert len(response.json()['grade']['saldo']) == 2
@@ -0,0 +1,37 @@
+"""Sessão por requisição: nada sobra no registry e a memória não cresce."""
+import gc
+import tracemalloc
+
+URLS = ['/saldos', '/relatorios/indicadores']
+
+
+def _rodadas(client, n):
+    for _ in range(n):
+        for url in URLS:
+            assert client.get(url).status_code == 200, url
+
+
+def test_soak_sessoes_removidas_e_memoria_estavel(client):
+    from fluxocaixa.models.base import SessionLocal, escopo_sessao
+
+    escopos = set(SessionLocal.registry.registry)
+    _rodadas(client, 5)  # aquecimento (templates, caches limitados)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _rodadas(client, 5)
+        gc.collect()
+        inicio = tracemalloc.get_traced_memory()[0]
+        _rodadas(client, 20)
+        gc.collect()
+        crescimento = tracemalloc.get_traced_memory()[0] - inicio
+    finally:
+        tracemalloc.stop()
+
+    assert set(SessionLocal.registry.registry) == escopos
+    assert crescimento < 1024 * 1024, f'{crescimento / 1024:.0f} KiB após 40 requisições'
+
+    fora = SessionLocal()
+    with escopo_sessao():
+        assert SessionLocal() is not fora
+    assert SessionLocal() is fora
@@ -0,0 +1,41 @@
+"""Pré-cálculo em lote das projeções do simulador."""
+
+
+def test_precalcular_cenarios_grava_versao_lida_pelos_relatorios(client):
+    from fluxocaixa.models import CenarioDespesa
+    from fluxocaixa.repositories import projecao_versao_repository as repo
+    from fluxocaixa.services.simulacao_lote_service import (
+        MOTIVO_LOTE,
+        obter_resultado_precalculado,
+        precalcular_cenarios,
+    )
+    from fluxocaixa.services.simulador_cenario_service import executar_simulacao
+
+    seq = CenarioDespesa.query.filter_by(cod_tipo_cenario='MANUAL').first().seq_simulador_cenario
+    # Rascunhos de lote deixados por outra execução no mesmo banco
+    repo.delete_rascunhos_por_motivo(seq, MOTIVO_LOTE)
+    repo.commit()
+    assert obter_resultado_precalculado(seq) is None
+
+    try:
+        lote = precalcular_cenarios([seq, seq], processos=0)
+        assert lote['erros'] == {}
+        assert lote['ramos_unicos'] == 2  # o mesmo cenário duas vezes é ajustado uma vez
+
+        # Novo lote substitui o rascunho anterior
+        precalcular_cenarios([seq], processos=0)
+
+        esperado = executar_simulacao(seq)
+        precalculado = obter_resultado_precalculado(seq)
+        assert precalculado is not None
+        # Valores gravados em NUMERIC(18,2): no máximo meio centavo por linha
+        linhas = len(esperado['projecao_receita']) + len(esperado['projecao_despesa'])
+        for chave in ('total_receita', 'total_despesa'):
+            assert abs(precalculado['resumo'][chave] - esperado['resumo'][chave]) <= 0.005 * linhas
+        assert len(precalculado['cenario_total']) == len(esperado['cenario_total'])
+
+        versoes = [v for v in repo.list_versoes_by_simulador(seq) if v.dsc_motivo == MOTIVO_LOTE]
+        assert len(versoes) == 1
+    finally:
+        repo.delete_rascunhos_por_motivo(seq, MOTIVO_LOTE)
+        repo.commit()
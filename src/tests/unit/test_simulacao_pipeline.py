@@ -0,0 +1,49 @@
+"""Pipeline de simulação: planejamento do histórico e uso avulso."""
+from datetime import date
+
+
+def test_planejar_historico_une_janelas(client):
+    from fluxocaixa.services.simulacao_pipeline import Ajuste, novo_ramo, planejar_historico
+
+    receita = novo_ramo('SARIMA', 2025, config={'seq_qualificadores': [1, 2]})
+    despesa = novo_ramo('MANUAL', 2025, tipo_fluxo='despesa', ajustes=[Ajuste(1, 7, 'P', 2.0)])
+    loa = novo_ramo('LOA', 2025, tipo_fluxo='despesa')
+
+    plano = planejar_historico([receita, despesa, loa])
+
+    assert plano == {
+        'seq_qualificadores': [1, 2, 7],
+        'data_inicio': date(2021, 1, 1),
+        'data_fim': date(2024, 12, 31),
+    }
+    assert planejar_historico([loa]) is None
+
+
+def test_executar_simulacao_uma_query_de_historico(client):
+    from fluxocaixa.models import CenarioDespesa
+    from fluxocaixa.services.simulador_cenario_service import executar_simulacao
+    from tests.unit.test_relatorios_queries import contar_queries
+
+    # Receita e despesa manuais: antes, uma query por qualificador ajustado
+    cenario = CenarioDespesa.query.filter_by(cod_tipo_cenario='MANUAL').first()
+    with contar_queries() as statements:
+        resultado = executar_simulacao(cenario.seq_simulador_cenario)
+
+    historico = [s for s in statements if 'flc_lancamento' in s]
+    assert len(historico) == 1
+    assert len(resultado['cenario_total']) == resultado['simulador'].meses_projecao
+    assert resultado['projecao_despesa_detalhada'] is not None
+
+
+def test_calcular_projecao_historico_insuficiente(client):
+    response = client.post('/simulador/calcular-projecao', json={
+        'tipo_modelo': 'HOLT_WINTERS', 'seq_qualificador': 1, 'ano_base': 1990,
+    })
+    assert response.status_code == 400
+    assert response.json()['error'].startswith('Dados históricos insuficientes')
+
+    response = client.post('/simulador/calcular-projecao', json={
+        'tipo_modelo': 'LOA', 'seq_qualificador': 1,
+    })
+    assert response.status_code == 400
+    assert response.json()['error'] == 'Modelo não suportado para cálculo automático'
@@ -0,0 +1,54 @@
+"""Snapshots de cenário com ajustes em colunas tipadas."""
+import json
+
+
+def test_snapshot_grava_ajustes_em_colunas_e_le_formato_antigo(client):
+    from fluxocaixa.models import CenarioDespesa, SimuladorCenarioHistorico
+    from fluxocaixa.repositories.simulador_cenario_historico_repository import (
+        AJUSTE_DTYPE,
+        SimuladorCenarioHistoricoRepository,
+    )
+    from fluxocaixa.services.simulador_cenario_service import (
+        criar_snapshot_cenario,
+        obter_simulador_completo,
+    )
+
+    repo = SimuladorCenarioHistoricoRepository()
+    seq = CenarioDespesa.query.filter_by(cod_tipo_cenario='MANUAL').first().seq_simulador_cenario
+    atual = obter_simulador_completo(seq)
+
+    snapshot = criar_snapshot_cenario(seq)
+    assert 'ajustes' not in json.loads(snapshot.json_snapshot)['despesa']
+
+    dados = repo.get_snapshot_decodificado(snapshot.seq_historico, snapshot.dat_snapshot)
+    ajustes = dados['despesa']['ajustes']
+    assert ajustes.dtype == AJUSTE_DTYPE and not ajustes.flags.writeable
+    esperado = sorted(
+        (a.seq_qualificador, a.ano, a.mes, a.cod_tipo_ajuste, float(a.val_ajuste))
+        for a in atual['despesa']['ajustes']
+    )
+    lidos = sorted(
+        (int(a['seq_qualificador']), int(a['ano']), int(a['mes']), a['cod_tipo_ajuste'].decode(), float(a['val_ajuste']))
+        for a in ajustes
+    )
+    assert lidos == esperado
+    assert len(dados['receita']['ajustes']) == len(atual['receita']['ajustes'])
+    assert dados['despesa']['config']['cod_tipo_cenario'] == 'MANUAL'
+    # Segunda leitura vem do cache
+    assert repo.get_snapshot_decodificado(snapshot.seq_historico, snapshot.dat_snapshot) is dados
+
+    # Snapshots antigos trazem os ajustes no próprio JSON
+    legado = repo.create_snapshot(SimuladorCenarioHistorico(
+        seq_simulador_cenario=seq,
+        cod_pessoa_snapshot=1,
+        json_snapshot=json.dumps({
+            'simulador': {},
+            'receita': {'config': {}, 'ajustes': []},
+            'despesa': {'config': {}, 'ajustes': [
+                {'seq_qualificador': 7, 'ano': 2025, 'mes': 3, 'cod_tipo_ajuste': 'P', 'val_ajuste': 2.5},
+            ]},
+        }),
+    ))
+    antigo = repo.get_snapshot_decodificado(legado.seq_historico, legado.dat_snapshot)
+    assert antigo['despesa']['ajustes'].tolist() == [(b'D', 7, 2025, 3, b'P', 2.5)]
+    assert len(antigo['receita']['ajustes']) == 0